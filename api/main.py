@@ -7,21 +7,22 @@ from pydantic import BaseModel
 from video_creator.db_utils import VideoDB
 import os
 import json
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from pathlib import Path
 import traceback
 from create_audio.db_utils import PodcastDB
 
-from celery_app.tasks import generate_audio_task, create_video_task
+from celery_app.tasks import generate_audio_task, generate_audio_batch_task, create_video_task
 from .logger import api_logger
 from .models.podcast_job import PodcastJob
 from .db import get_db, engine, Base
 from config import get_error_detail, format_error_message, OUTPUTS_DIR
 from profile_utils import ProfileUtils
+from utils.batch_progress import batch_job_ids, batch_status
 from .google_auth import router as google_auth_router
 from publish.routes import router as publish_router
-from .routers import user_router, voice_router, style_router, podcast_router
+from .routers import user_router, voice_router, style_router, podcast_router, heygen_router
 from .security import verify_api_key
 
 # Get package root directory
@@ -86,6 +87,27 @@ class PodcastResponse(BaseModel):
     error: Optional[str] = None
     output_path: Optional[str] = None
 
+class BatchTopic(BaseModel):
+    topic: str
+    title: Optional[str] = None
+    sub_title: Optional[str] = None
+
+class BatchPodcastRequest(PodcastRequest):
+    topics: List[BatchTopic]
+
+class BatchPodcastResponse(BaseModel):
+    batch_id: Optional[str] = None
+    status: str
+    job_ids: List[int]
+
+class BatchStatusResponse(BaseModel):
+    batch_id: str
+    status: str
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    jobs: List[PodcastResponse] = []
+
 def load_profile(profile_name: str, theme: str = "dark") -> tuple[dict, dict]:
     """Load profile configuration and business info using ProfileUtils"""
     try:
@@ -116,6 +138,7 @@ app.include_router(user_router, prefix="/api/users", tags=["users"])
 app.include_router(voice_router, prefix="/api/voices", tags=["voices"])
 app.include_router(style_router, prefix="/api/styles", tags=["styles"])
 app.include_router(podcast_router, prefix="/api/podcasts", tags=["podcasts"])
+app.include_router(heygen_router, prefix="/api/heygen", tags=["heygen"])
 
 @app.get("/", include_in_schema=False)
 async def root():
@@ -223,6 +246,86 @@ async def create_podcast(request: PodcastRequest, db: Session = Depends(get_db),
         db.commit()
         raise HTTPException(status_code=500, detail=error_detail)
             
+@app.post("/api/podcasts/batch", response_model=BatchPodcastResponse, tags=["podcasts"])
+async def create_podcast_batch(request: BatchPodcastRequest, db: Session = Depends(get_db), api_key: str = Depends(verify_api_key)):
+    """Start podcast generation for several topics that share one profile"""
+    if not request.topics:
+        raise HTTPException(status_code=400, detail="At least one topic is required")
+    api_logger.info(f"Received batch podcast request for {len(request.topics)} topics on profile {request.profile_name}")
+    
+    # Load and validate the profile once for the whole batch
+    config, _ = load_profile(request.profile_name, request.theme)
+    config['voice_settings_num_turns'] = request.voice_settings_num_turns
+    config['voice_settings_conversation_mood'] = request.voice_settings_conversation_mood
+    config['voice_settings_language'] = request.voice_settings_language
+    config['voice_settings_voice_accent'] = request.voice_settings_voice_accent
+    
+    base_request = request.dict(exclude={"topics"})
+    jobs = []
+    for item in request.topics:
+        request_dict = dict(base_request, topic=item.topic,
+                            title=item.title or item.topic,
+                            sub_title=item.sub_title or request.sub_title)
+        job = PodcastJob(
+            profile_name=request.profile_name,
+            conversation_type=request.conversation_type,
+            topic=item.topic,
+            customer_id=request.customer_id,
+            youtube_channel_id=request.youtube_channel_id,
+            youtube_playlist_id=request.youtube_playlist_id,
+            status="processing"
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        
+        try:
+            video_db.add_video_paths(
+                job_id=job.id,
+                paths={},
+                video_config=config,
+                theme=request.theme,
+                customer_id=request.customer_id,
+                profile=request.profile_name
+            )
+        except Exception as e:
+            api_logger.error(f"Error creating video configuration for job {job.id}: {str(e)}")
+        jobs.append({"job_id": str(job.id), "request_dict": request_dict})
+    
+    job_ids = [int(job["job_id"]) for job in jobs]
+    try:
+        if os.getenv('CELERY_PROCESS') == 'true':
+            batch_task = generate_audio_batch_task.delay(jobs=jobs, config=config, business_info={})
+            for job in db.query(PodcastJob).filter(PodcastJob.id.in_(job_ids)):
+                job.audio_task_id = batch_task.id
+            db.commit()
+            return BatchPodcastResponse(batch_id=batch_task.id, status="processing", job_ids=job_ids)
+        
+        progress = generate_audio_batch_task(jobs=jobs, config=config, business_info={})
+        status = "failed" if progress["failed"] == progress["total"] else "completed"
+        return BatchPodcastResponse(status=status, job_ids=job_ids)
+    except Exception as e:
+        error_detail = get_error_detail(e, context="creating podcast batch")
+        api_logger.error(format_error_message(error_detail))
+        for job in db.query(PodcastJob).filter(PodcastJob.id.in_(job_ids)):
+            job.status = "failed"
+            job.error_message = str(e)
+        db.commit()
+        raise HTTPException(status_code=500, detail=error_detail)
+
+@app.get("/api/podcasts/batch/{batch_id}", response_model=BatchStatusResponse, tags=["podcasts"])
+async def get_podcast_batch_status(batch_id: str, db: Session = Depends(get_db), api_key: str = Depends(verify_api_key)):
+    """Get progress of a batch started with /api/podcasts/batch"""
+    result = generate_audio_batch_task.AsyncResult(batch_id)
+    job_ids = batch_job_ids(result.info)
+    if not job_ids:
+        job_ids = [job.id for job in db.query(PodcastJob).filter(PodcastJob.audio_task_id == batch_id)]
+    jobs = db.query(PodcastJob).filter(PodcastJob.id.in_(job_ids)).all() if job_ids else []
+    if not jobs:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    return BatchStatusResponse(**batch_status(batch_id, result.state, result.info, jobs))
+
 @app.get("/api/podcasts/{job_id}", response_model=PodcastResponse, tags=["podcasts"])
 async def get_podcast_status(job_id: int, db: Session = Depends(get_db), api_key: str = Depends(verify_api_key)):
     """Get status of a podcast generation job"""
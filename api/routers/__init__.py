@@ -8,6 +8,7 @@ from .user import router as user_router
 from .voice import router as voice_router
 from .style import router as style_router
 from .podcast import router as podcast_router
+from .heygen import router as heygen_router
 # Import other routers as they are created
 # from .speaker import router as speaker_router
 
@@ -15,5 +16,6 @@ __all__ = [
     "user_router",
     "voice_router",
     "style_router",
-    "podcast_router"
+    "podcast_router",
+    "heygen_router"
 ]
@@ -0,0 +1,58 @@
+"""
+Purpose and Objective:
+This module implements the HeyGen webhook endpoint. HeyGen calls it when an
+avatar video succeeds or fails, so finished videos are downloaded right away
+instead of waiting for the monitor's next status poll.
+
+The endpoint is enabled by HEYGEN_WEBHOOK_ENABLED and authenticated with the
+HMAC signature HeyGen sends using HEYGEN_WEBHOOK_SECRET. Register
+<api host>/api/heygen/webhook for the avatar_video.success and
+avatar_video.fail events in HeyGen.
+"""
+
+import os
+import json
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
+from video_creator.db_utils import VideoDB
+from video_creator.heygen_orchestrator import env_flag, get_heygen_orchestrator, verify_webhook_signature
+from ..logger import api_logger
+
+router = APIRouter(
+    tags=["heygen"],
+    responses={404: {"description": "Not found"}}
+)
+
+
+async def process_heygen_event(payload: dict):
+    """Handle the event, then wait for any download it started."""
+    orchestrator = get_heygen_orchestrator(db=VideoDB())
+    try:
+        await orchestrator.handle_webhook_event(payload)
+        await orchestrator.drain()
+    except Exception as e:
+        api_logger.error(f"Error handling HeyGen webhook event: {str(e)}")
+
+
+@router.post("/webhook")
+async def heygen_webhook(request: Request, background_tasks: BackgroundTasks):
+    """
+    Receive a HeyGen webhook event.
+
+    The event is acknowledged immediately; the status check and downloads
+    run in the background.
+    """
+    secret = os.getenv("HEYGEN_WEBHOOK_SECRET")
+    if not env_flag("HEYGEN_WEBHOOK_ENABLED") or not secret:
+        raise HTTPException(status_code=404, detail="HeyGen webhooks are not enabled")
+
+    body = await request.body()
+    if not verify_webhook_signature(body, request.headers.get("signature"), secret):
+        raise HTTPException(status_code=403, detail="Invalid webhook signature")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+
+    api_logger.info(f"HeyGen webhook received: {payload.get('event_type')}")
+    background_tasks.add_task(process_heygen_event, payload)
+    return {"status": "accepted"}
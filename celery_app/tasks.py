@@ -1,5 +1,6 @@
 from typing import Dict, Any, Tuple, List
 import os
+import copy
 from pathlib import Path
 from celery import Celery
 from sqlalchemy.orm import Session
@@ -9,6 +10,7 @@ from api.models import PodcastJob
 from api.logger import PodcastLogger
 from create_audio.conversation_generator import generate_conversation
 from utils.file_writer import get_output_path
+from utils.batch_progress import run_batch
 from video_creator import create_podcast_video
 from utils.logger_utils import PodcastLogger
 from config import get_error_detail, format_error_message
@@ -45,10 +47,8 @@ def get_error_detail(error: Exception, job_id: str, task_type: str, include_trac
     
     return error_msg, error_info
 
-@celery.task(bind=True)
-def generate_audio_task(self,request_dict: dict, config: dict, business_info: dict, job_id: str):
-    """Generate audio for podcast"""
-    debug_mode = os.getenv('DEBUG_MODE', 'false').lower() == 'true'
+def run_audio_job(request_dict: dict, config: dict, job_id: str) -> str:
+    """Generate audio for one podcast job and start its video task"""
     task_logger = TaskLogger(job_id)
     try:
         # Get database session
@@ -119,6 +119,39 @@ def generate_audio_task(self,request_dict: dict, config: dict, business_info: di
     finally:
         db.close()
 
+# Acknowledge only after completion so a job on a killed worker is redelivered;
+# generate_conversation resumes it from the job's checkpoint manifest
+@celery.task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def generate_audio_task(self,request_dict: dict, config: dict, business_info: dict, job_id: str):
+    """Generate audio for podcast"""
+    return run_audio_job(request_dict, config, job_id)
+
+# Acknowledged on receipt, unlike generate_audio_task: a batch routinely runs longer
+# than the Redis visibility timeout, and a late ack would get it redelivered to a
+# second worker (generating, and paying for, every episode twice) while it still runs
+@celery.task(bind=True)
+def generate_audio_batch_task(self, jobs: List[dict], config: dict, business_info: dict):
+    """Generate audio for a batch of podcasts that share one profile config.
+    
+    Episodes run concurrently in this worker, so they share its OpenAI and
+    ElevenLabs clients, the database connection pool and the process-wide
+    TTS rate budget. Progress is reported as the PROGRESS task state.
+    """
+    max_episodes = max(1, int(os.getenv("BATCH_MAX_EPISODES_IN_FLIGHT", "4")))
+    
+    def publish(progress: dict):
+        if self.request.id:
+            self.update_state(state="PROGRESS", meta=progress)
+    
+    def run(job: dict):
+        # Jobs write their own keys into config, so each gets a copy
+        run_audio_job(job["request_dict"], copy.deepcopy(config), str(job["job_id"]))
+    
+    logger.info(f"Starting audio batch of {len(jobs)} episodes ({max_episodes} at a time)")
+    progress = run_batch(jobs, run, max_episodes, on_update=publish)
+    logger.info(f"Audio batch finished: {progress['completed']} completed, {progress['failed']} failed")
+    return progress
+
 @celery.task(bind=True)
 def create_video_task(self, audio_path: str, config: dict, job_id: str, request_dict: dict, welcome_audio_path: str):
     """Create video for podcast"""
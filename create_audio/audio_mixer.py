@@ -0,0 +1,528 @@
+"""Module for single-decode, NumPy-based conversation mixing.
+
+Every clip is decoded once into PCM, all turn and overlap offsets are
+planned up front, and the plan is rendered onto a preallocated sample
+buffer with vectorized gain and fades before a single encode.
+
+For long episodes the streaming mode renders the same plan window by
+window into an encoder subprocess, so peak memory stays constant
+regardless of episode length.
+"""
+import os
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydub import AudioSegment
+from pydub.utils import get_encoder_name
+
+from create_audio.logger_utils import PodcastLogger
+from create_audio.loudness import get_leveling_mode, leveling_gain
+
+if TYPE_CHECKING:
+    from create_audio.conversation import Conversation
+
+# Initialize logger
+logger = PodcastLogger("AudioMixer")
+
+# Conversation overlap parameters
+OVERLAP_CROSSFADE_MS = 200
+OVERLAP_VOLUME_REDUCTION_DB = 3
+BASE_VOLUME_REDUCTION_DB = 2
+OVERLAP_LEAD_MS = 500  # Overlaps start 500ms before the end of the main line
+
+# Headroom used by pydub.effects.normalize
+NORMALIZE_HEADROOM_DB = 0.1
+
+INT16_MAX = 32768.0
+
+# Streaming render defaults
+STREAM_WINDOW_SECONDS = 10
+STREAM_MAX_RESIDENT_MB = 64
+
+
+def use_streaming_mix() -> bool:
+    """Whether mixes render through the bounded-memory streaming path."""
+    return os.getenv("AUDIO_STREAMING_MIX", "false").lower() in ("true", "1", "yes", "on")
+
+
+def db_to_gain(db: float) -> float:
+    """Convert a dB change to a linear amplitude factor."""
+    return 10 ** (db / 20)
+
+
+class ClipStore:
+    """Decodes audio files into int16 PCM and keeps them for reuse.
+
+    All clips are converted to the frame rate and channel count of the
+    first clip loaded (or the ones given), so they can be summed directly.
+    By default every clip stays resident, so each file is decoded once.
+    With ``max_resident_mb`` the least recently used samples are dropped
+    once the budget is exceeded (lengths are remembered), trading a
+    possible re-decode for bounded memory. The store is thread-safe.
+    """
+
+    def __init__(self, frame_rate: Optional[int] = None, channels: Optional[int] = None,
+                 max_resident_mb: Optional[float] = None):
+        self.frame_rate = frame_rate
+        self.channels = channels
+        self.max_resident_bytes = max_resident_mb * 1024 * 1024 if max_resident_mb else None
+        self._samples: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._frames: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self.decodes = 0
+
+    def get(self, path: str) -> np.ndarray:
+        """Return the clip's samples with shape ``(frames, channels)``."""
+        with self._lock:
+            return self._get(path)
+
+    def _get(self, path: str) -> np.ndarray:
+        if path in self._samples:
+            self._samples.move_to_end(path)
+            return self._samples[path]
+        segment = AudioSegment.from_file(path)
+        if self.frame_rate is None:
+            self.frame_rate = segment.frame_rate
+        if self.channels is None:
+            self.channels = segment.channels
+        segment = segment.set_frame_rate(self.frame_rate).set_channels(self.channels).set_sample_width(2)
+        samples = np.frombuffer(segment.raw_data, dtype=np.int16).reshape(-1, self.channels)
+        self._samples[path] = samples
+        self._frames[path] = len(samples)
+        self.decodes += 1
+        self._enforce_budget()
+        return samples
+
+    def _enforce_budget(self):
+        if self.max_resident_bytes is None:
+            return
+        while len(self._samples) > 1 and self.resident_bytes > self.max_resident_bytes:
+            self._samples.popitem(last=False)
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(a.nbytes for a in self._samples.values())
+
+    def frames(self, path: str) -> int:
+        with self._lock:
+            if path not in self._frames:
+                self._get(path)
+            return self._frames[path]
+
+    def duration_ms(self, path: str) -> float:
+        return self.frames(path) * 1000 / self.frame_rate
+
+    def ms_to_frames(self, ms: float) -> int:
+        return int(round(ms * self.frame_rate / 1000))
+
+    def release(self, path: str):
+        """Drop a clip's samples once it is no longer needed."""
+        with self._lock:
+            self._samples.pop(path, None)
+
+
+def peak_normalize_gain(samples: np.ndarray, headroom_db: float = NORMALIZE_HEADROOM_DB) -> float:
+    """Gain that brings the clip's peak to ``-headroom_db`` dBFS (pydub normalize)."""
+    peak = int(np.abs(samples.astype(np.int32)).max()) if len(samples) else 0
+    if peak == 0:
+        return 1.0
+    return (INT16_MAX * db_to_gain(-headroom_db)) / peak
+
+
+def clip_gain(samples: np.ndarray, frame_rate: int) -> float:
+    """Gain that levels one speech clip before it is mixed.
+
+    By default every clip is brought to the same integrated loudness
+    (EBU R128), so all speakers sit at a consistent level; with
+    ``AUDIO_LEVELING=peak`` clips are peak normalized as pydub did.
+    """
+    if get_leveling_mode() == "peak":
+        return peak_normalize_gain(samples)
+    return leveling_gain(samples, frame_rate)
+
+
+class Placement:
+    """One clip placed on the mix timeline.
+
+    Placements are applied in plan order: before the clip is added, the
+    audio already on the timeline under its span is scaled by
+    ``base_gain`` (ducking the main line under an overlap). A placement
+    without a ``path`` adds no audio and instead scales what is already
+    on the timeline by its envelope (e.g. fading out everything so far).
+    An optional per-frame ``gain_curve`` (e.g. music ducking under
+    speech) multiplies the envelope.
+    """
+
+    def __init__(self, key: str, path: Optional[str], start: int, frames: int, gain: float = 1.0,
+                 fade_in: int = 0, fade_out: int = 0, base_gain: float = 1.0,
+                 gain_curve: Optional[np.ndarray] = None):
+        self.key = key
+        self.path = path
+        self.start = start
+        self.frames = frames
+        self.gain = gain
+        self.fade_in = fade_in
+        self.fade_out = fade_out
+        self.base_gain = base_gain
+        self.gain_curve = gain_curve
+
+    @property
+    def end(self) -> int:
+        return self.start + self.frames
+
+    def envelope(self, offset: int, length: int) -> np.ndarray:
+        """Gain envelope (gain times linear fades) for frames ``[offset, offset + length)``."""
+        idx = np.arange(offset, offset + length, dtype=np.float32)
+        env = np.full(length, self.gain, dtype=np.float32)
+        if self.fade_in:
+            env *= np.clip(idx / self.fade_in, 0.0, 1.0)
+        if self.fade_out:
+            env *= np.clip((self.frames - idx) / self.fade_out, 0.0, 1.0)
+        if self.gain_curve is not None:
+            env *= self.gain_curve[offset:offset + length]
+        return env
+
+
+class MixPlan:
+    """Ordered placements plus the total timeline length, in frames."""
+
+    def __init__(self, placements: List[Placement], total_frames: int, frame_rate: int, channels: int):
+        self.placements = placements
+        self.total_frames = total_frames
+        self.frame_rate = frame_rate
+        self.channels = channels
+
+    @property
+    def duration_ms(self) -> float:
+        return self.total_frames * 1000 / self.frame_rate
+
+
+def overlap_placement(key: str, path: str, samples: np.ndarray, start: int, clips: ClipStore,
+                      gain: float = 1.0, crossfade_ms: float = OVERLAP_CROSSFADE_MS,
+                      overlap_db: float = OVERLAP_VOLUME_REDUCTION_DB,
+                      base_db: float = BASE_VOLUME_REDUCTION_DB) -> Placement:
+    """Place an interjection over the audio already on the timeline at ``start``.
+
+    The overlay is lowered by ``overlap_db`` and crossfaded in and out
+    (unless it is too short for both fades); the audio under it is
+    lowered by ``base_db``. Rendering the placement touches only the
+    frames it covers, however long the timeline already is.
+    """
+    frames = len(samples)
+    fade = clips.ms_to_frames(crossfade_ms)
+    has_fades = frames > fade * 2
+    return Placement(
+        key, path, start, frames,
+        gain=gain * db_to_gain(-overlap_db),
+        fade_in=fade if has_fades else 0,
+        fade_out=fade if has_fades else 0,
+        base_gain=db_to_gain(-base_db)
+    )
+
+
+def plan_turn(turn, audio_files: Dict[str, str], clips: ClipStore, cursor: int) -> Tuple[List[Placement], int]:
+    """Place one turn (main line plus overlaps) starting at ``cursor``.
+
+    Returns the placements and the new cursor. Nothing placed by later
+    turns starts before the returned cursor, so every frame before it is
+    final once this turn has been rendered.
+    """
+    key = f"{turn.speaker}_{turn.order}"
+    path = audio_files[key]
+    samples = clips.get(path)
+    main = Placement(key, path, cursor, len(samples), gain=clip_gain(samples, clips.frame_rate))
+    placements = [main]
+    end = main.end
+
+    if turn.overlap_with:
+        lead = clips.ms_to_frames(OVERLAP_LEAD_MS)
+        for overlap_speaker in turn.overlap_with:
+            overlap_key = f"{overlap_speaker}_overlap_{turn.order}"
+            overlap_path = audio_files[overlap_key]
+            overlap_samples = clips.get(overlap_path)
+            # Calculate overlap position (near the end of main speech)
+            offset = max(0, main.frames - len(overlap_samples) - lead)
+            overlap = overlap_placement(overlap_key, overlap_path, overlap_samples, main.start + offset, clips,
+                                        gain=clip_gain(overlap_samples, clips.frame_rate))
+            placements.append(overlap)
+            end = max(end, overlap.end)
+    return placements, end
+
+
+def plan_conversation(conversation: "Conversation", audio_files: Dict[str, str], clips: ClipStore) -> MixPlan:
+    """Compute every turn's and overlap's absolute position and gain up front."""
+    placements = []
+    cursor = 0  # End of everything placed so far
+    for turn in conversation.turns:
+        turn_placements, cursor = plan_turn(turn, audio_files, clips, cursor)
+        placements.extend(turn_placements)
+    return MixPlan(placements, cursor, clips.frame_rate, clips.channels)
+
+
+def render_placements(placements: List[Placement], clips: ClipStore, start: int, end: int,
+                      channels: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Render frames ``[start, end)`` of ordered placements as float32 in [-1, 1] scale.
+
+    Placements only touch the part of the buffer they cover, so the cost
+    is proportional to the audio placed rather than the episode length.
+    """
+    if out is None:
+        out = np.zeros((end - start, channels), dtype=np.float32)
+    for p in placements:
+        lo, hi = max(p.start, start), min(p.end, end)
+        if lo >= hi:
+            continue
+        region = out[lo - start:hi - start]
+        if p.path is None:
+            region *= p.envelope(lo - p.start, hi - lo)[:, None]
+            continue
+        if p.base_gain != 1.0:
+            region *= p.base_gain
+        src = clips.get(p.path)[lo - p.start:hi - p.start]
+        region += src.astype(np.float32) * (p.envelope(lo - p.start, hi - lo)[:, None] / INT16_MAX)
+    return out
+
+
+def render_window(plan: MixPlan, clips: ClipStore, start: int, end: int,
+                  out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Render frames ``[start, end)`` of the plan."""
+    return render_placements(plan.placements, clips, start, end, plan.channels, out=out)
+
+
+def to_segment(samples: np.ndarray, frame_rate: int) -> AudioSegment:
+    """Convert float samples to a 16-bit AudioSegment, clipping like pydub does."""
+    pcm = np.clip(samples * INT16_MAX, -INT16_MAX, INT16_MAX - 1).astype(np.int16)
+    return AudioSegment(data=pcm.tobytes(), sample_width=2, frame_rate=frame_rate, channels=samples.shape[1])
+
+
+class PCMStreamWriter:
+    """Pipes float PCM chunks into an ffmpeg encoder subprocess.
+
+    With ``normalize`` the chunks are spooled to a temporary file while
+    the peak is tracked, then scaled to ``-headroom_db`` dBFS on the way
+    to the encoder, so even whole-mix normalization needs no more memory
+    than one chunk.
+    """
+
+    def __init__(self, output_path: str, frame_rate: int, channels: int, format: str = "mp3",
+                 bitrate: Optional[str] = None, parameters: Optional[List[str]] = None,
+                 normalize: bool = False, headroom_db: float = NORMALIZE_HEADROOM_DB):
+        self.output_path = output_path
+        self.frame_rate = frame_rate
+        self.channels = channels
+        self.normalize = normalize
+        self.headroom_db = headroom_db
+        self.frames_written = 0
+        self._peak = 0.0
+        self._command = [get_encoder_name(), "-y", "-f", "s16le", "-ar", str(frame_rate),
+                         "-ac", str(channels), "-i", "pipe:0", "-f", format]
+        if bitrate:
+            self._command += ["-b:a", bitrate]
+        self._command += list(parameters or []) + [output_path]
+        self._spool = tempfile.TemporaryFile() if normalize else None
+        self._stderr = tempfile.TemporaryFile()
+        self._process = None if normalize else self._start_encoder()
+
+    def _start_encoder(self):
+        return subprocess.Popen(self._command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                stderr=self._stderr)
+
+    def _encode(self, samples: np.ndarray):
+        pcm = np.clip(samples * INT16_MAX, -INT16_MAX, INT16_MAX - 1).astype(np.int16)
+        self._process.stdin.write(pcm.tobytes())
+
+    def write(self, samples: np.ndarray):
+        """Write a ``(frames, channels)`` float32 chunk."""
+        self.frames_written += len(samples)
+        if self._spool is None:
+            self._encode(samples)
+            return
+        if len(samples):
+            self._peak = max(self._peak, float(np.abs(samples).max()))
+        self._spool.write(np.ascontiguousarray(samples, dtype=np.float32).tobytes())
+
+    def close(self) -> str:
+        """Finish encoding and return the output path."""
+        if self._spool is not None:
+            gain = db_to_gain(-self.headroom_db) / self._peak if self._peak > 0 else 1.0
+            self._process = self._start_encoder()
+            self._spool.seek(0)
+            chunk_bytes = self.frame_rate * STREAM_WINDOW_SECONDS * self.channels * 4
+            while True:
+                data = self._spool.read(chunk_bytes)
+                if not data:
+                    break
+                self._encode(np.frombuffer(data, dtype=np.float32).reshape(-1, self.channels) * gain)
+            self._spool.close()
+        self._process.stdin.close()
+        if self._process.wait() != 0:
+            self._stderr.seek(0)
+            error = self._stderr.read().decode(errors="replace")[-2000:]
+            raise Exception(f"Encoding {self.output_path} failed: {error}")
+        self._stderr.close()
+        return self.output_path
+
+
+class StreamingMixer:
+    """Incrementally renders placements as the timeline frontier advances.
+
+    Callers add placements in plan order and then call ``advance`` with
+    a frontier before which nothing further will be placed. Finished
+    frames are rendered in fixed-size windows, handed to the writer and
+    the samples of clips that are fully rendered are released.
+    """
+
+    def __init__(self, writer: PCMStreamWriter, clips: ClipStore, window_seconds: float = STREAM_WINDOW_SECONDS):
+        self.writer = writer
+        self.clips = clips
+        self.window_frames = int(window_seconds * writer.frame_rate)
+        self.rendered = 0
+        self._active: List[Placement] = []
+
+    def place(self, placements: List[Placement]):
+        self._active.extend(placements)
+
+    def advance(self, frontier: int):
+        """Render and write every frame before ``frontier``."""
+        while self.rendered < frontier:
+            end = min(frontier, self.rendered + self.window_frames)
+            self.writer.write(render_placements(self._active, self.clips, self.rendered, end, self.writer.channels))
+            self.rendered = end
+            finished = [p for p in self._active if p.end <= end]
+            if finished:
+                self._active = [p for p in self._active if p.end > end]
+                still_needed = {p.path for p in self._active}
+                for p in finished:
+                    if p.path is not None and p.path not in still_needed:
+                        self.clips.release(p.path)
+
+    def close(self, total_frames: int) -> str:
+        self.advance(total_frames)
+        return self.writer.close()
+
+
+def render_mix(conversation: "Conversation", audio_files: Dict[str, str], output_path: str,
+               clips: Optional[ClipStore] = None, **export_kwargs) -> Tuple[str, MixPlan]:
+    """Plan, render and encode a conversation mix in one pass."""
+    if not conversation.turns:
+        raise ValueError("Cannot mix a conversation with no turns")
+    clips = clips or ClipStore()
+    plan = plan_conversation(conversation, audio_files, clips)
+    logger.info(f"Mix plan: {len(plan.placements)} clips, {plan.duration_ms / 1000:.2f} seconds")
+    timeline = render_window(plan, clips, 0, plan.total_frames)
+    to_segment(timeline, plan.frame_rate).export(output_path, format="mp3", **export_kwargs)
+    return output_path, plan
+
+
+class ClipArrivals:
+    """Thread-safe record of clips that have finished synthesizing.
+
+    The TTS stage calls ``add`` as each clip lands on disk; the mixing
+    stage blocks in ``wait_for`` until the clips of its next turn exist.
+    """
+
+    def __init__(self):
+        self._paths: Dict[str, str] = {}
+        self._error: Optional[Exception] = None
+        self._condition = threading.Condition()
+
+    def add(self, key: str, path: str):
+        with self._condition:
+            self._paths[key] = path
+            self._condition.notify_all()
+
+    def fail(self, error: Exception):
+        """Wake any waiter with the producer's error."""
+        with self._condition:
+            self._error = error
+            self._condition.notify_all()
+
+    def wait_for(self, keys: List[str]) -> Dict[str, str]:
+        with self._condition:
+            while not all(k in self._paths for k in keys):
+                if self._error is not None:
+                    raise Exception(f"Audio synthesis failed: {self._error}")
+                self._condition.wait()
+            return {k: self._paths[k] for k in keys}
+
+
+def turn_clip_keys(turn) -> List[str]:
+    """Keys of the main and overlap clips a turn needs."""
+    return [f"{turn.speaker}_{turn.order}"] + [
+        f"{overlap_speaker}_overlap_{turn.order}" for overlap_speaker in (turn.overlap_with or {})
+    ]
+
+
+def line_timings(conversation: "Conversation", placements: List[Placement], frame_rate: int) -> List[Dict]:
+    """Start and end (seconds) of every main and overlap line placed in the mix, with its script text."""
+    lines = {}
+    for turn in conversation.turns:
+        lines[f"{turn.speaker}_{turn.order}"] = (turn, turn.speaker, turn.text, False)
+        for overlap_speaker, overlap_text in (turn.overlap_with or {}).items():
+            lines[f"{overlap_speaker}_overlap_{turn.order}"] = (turn, overlap_speaker, overlap_text, True)
+    timings = []
+    for p in placements:
+        if p.key not in lines:
+            continue
+        turn, speaker, text, is_overlap = lines[p.key]
+        timings.append({
+            "order": turn.order,
+            "speaker": speaker,
+            "overlap": is_overlap,
+            "start": round(p.start / frame_rate, 3),
+            "end": round(p.end / frame_rate, 3),
+            "text": text,
+        })
+    return timings
+
+
+def _stream_turns(conversation: "Conversation", get_files: Callable[[List[str]], Dict[str, str]],
+                  output_path: str, clips: ClipStore, bitrate: Optional[str] = None,
+                  parameters: Optional[List[str]] = None, placed: Optional[List[Placement]] = None) -> str:
+    if not conversation.turns:
+        raise ValueError("Cannot mix a conversation with no turns")
+    mixer = None
+    cursor = 0
+    for turn in conversation.turns:
+        audio_files = get_files(turn_clip_keys(turn))
+        placements, cursor = plan_turn(turn, audio_files, clips, cursor)
+        if placed is not None:
+            placed.extend(placements)
+        if mixer is None:
+            writer = PCMStreamWriter(output_path, clips.frame_rate, clips.channels,
+                                     bitrate=bitrate, parameters=parameters)
+            mixer = StreamingMixer(writer, clips)
+        mixer.place(placements)
+        mixer.advance(cursor)
+    mixer.close(cursor)
+    logger.info(f"Streamed {cursor / clips.frame_rate:.2f} seconds of audio ({clips.decodes} decodes)")
+    return output_path
+
+
+def render_mix_streaming(conversation: "Conversation", audio_files: Dict[str, str], output_path: str,
+                         clips: Optional[ClipStore] = None, bitrate: Optional[str] = None,
+                         parameters: Optional[List[str]] = None, placed: Optional[List[Placement]] = None) -> str:
+    """Render a conversation mix turn by turn with constant peak memory.
+
+    Each turn is planned as it is reached; all frames before the turn's
+    end are final at that point and are streamed to the encoder. Every
+    placement is appended to ``placed`` if given.
+    """
+    clips = clips or ClipStore(max_resident_mb=STREAM_MAX_RESIDENT_MB)
+    return _stream_turns(conversation, lambda keys: audio_files, output_path, clips, bitrate, parameters, placed)
+
+
+def render_mix_incremental(conversation: "Conversation", arrivals: ClipArrivals, output_path: str,
+                           clips: Optional[ClipStore] = None, placed: Optional[List[Placement]] = None) -> str:
+    """Stream a conversation mix while its clips are still being synthesized.
+
+    Turns are mixed in order as soon as their clips arrive, so mixing
+    overlaps TTS instead of waiting for the whole batch. Every placement
+    is appended to ``placed`` if given.
+    """
+    clips = clips or ClipStore(max_resident_mb=STREAM_MAX_RESIDENT_MB)
+    return _stream_turns(conversation, arrivals.wait_for, output_path, clips, placed=placed)
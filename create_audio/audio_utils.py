@@ -2,126 +2,80 @@
 import os
 import time
 import json
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 from pydub import AudioSegment
-from pydub.effects import normalize
-from create_audio.elevanlab_util import client
-from create_audio.conversation import Conversation
+from create_audio.audio_mixer import (
+    STREAM_MAX_RESIDENT_MB, ClipArrivals, ClipStore, line_timings, render_mix, render_mix_incremental,
+    render_mix_streaming, use_streaming_mix
+)
+from create_audio.tts_engine import TTSEngine, TTSRequest, get_default_engine
+from create_audio.conversation import Conversation, ConversationTurn
 from create_audio.logger_utils import PodcastLogger
+from utils.turn_timings import TURN_TIMINGS_FILENAME, write_turn_timings
 
 # Initialize logger
 logger = PodcastLogger("AudioGenerator")
 
-def create_natural_overlap(base_audio: AudioSegment, overlay_audio: AudioSegment, position_ms: int) -> AudioSegment:
-    """Create a natural-sounding overlap between two audio segments"""
-    # Parameters for natural-sounding overlap
-    CROSSFADE_DURATION = 200  # 200ms crossfade
-    OVERLAY_VOLUME_REDUCTION = 3  # -3dB for overlaying audio
-    BASE_VOLUME_REDUCTION = 2  # -2dB for base audio during overlap
-    
-    # Calculate the end position of the overlay
-    overlay_end_position = position_ms + len(overlay_audio)
-    
-    # Ensure the base audio is long enough
-    if overlay_end_position > len(base_audio):
-        pad_duration = overlay_end_position - len(base_audio)
-        base_audio = base_audio + AudioSegment.silent(duration=pad_duration)
-    
-    # Extract the segment of base audio that will be overlapped
-    overlap_region = base_audio[position_ms:overlay_end_position]
-    
-    # Reduce volume of both audio segments in the overlap region
-    overlap_region = overlap_region - BASE_VOLUME_REDUCTION
-    overlay_audio = overlay_audio - OVERLAY_VOLUME_REDUCTION
-    
-    # Apply crossfade at the start and end of the overlay
-    if len(overlay_audio) > CROSSFADE_DURATION * 2:
-        overlay_audio = overlay_audio.fade_in(CROSSFADE_DURATION).fade_out(CROSSFADE_DURATION)
-    
-    # Overlay the audio segments
-    overlap_region = overlap_region.overlay(overlay_audio)
-    
-    # Combine the parts
-    return base_audio[:position_ms] + overlap_region + base_audio[overlay_end_position:]
+def build_tts_requests(turns: List[ConversationTurn], topic_dir: str, speakers: List[Dict]) -> List[TTSRequest]:
+    """Build the TTS requests for the main and overlap lines of ``turns``."""
+    # Create direct mapping of speaker name to voice_id
+    voice_map = {s['name']: s['voice_id'] for s in speakers}
+    # Add fallback mapping for Speaker1/Speaker2 format
+    for i, s in enumerate(speakers, 1):
+        voice_map[f"Speaker{i}"] = s['voice_id']
+
+    requests = []
+    for turn in turns:
+        requests.append(TTSRequest(
+            key=f"{turn.speaker}_{turn.order}",
+            voice_id=voice_map.get(turn.speaker, speakers[0]['voice_id']),
+            text=turn.text,
+            output_path=os.path.join(topic_dir, f"{turn.speaker}_{turn.order}.mp3")
+        ))
+        if turn.overlap_with:
+            for overlap_speaker, overlap_text in turn.overlap_with.items():
+                requests.append(TTSRequest(
+                    key=f"{overlap_speaker}_overlap_{turn.order}",
+                    voice_id=voice_map.get(overlap_speaker, speakers[0]['voice_id']),
+                    text=overlap_text,
+                    output_path=os.path.join(topic_dir, f"{overlap_speaker}_overlap_{turn.order}.mp3")
+                ))
+    return requests
 
-def generate_audio_files(conversation: Conversation, topic_dir: str, speakers: List[Dict],) -> Dict[str, str]:
-    """Generate audio files for both main speech and overlaps."""
+def generate_audio_files(conversation: Conversation, topic_dir: str, speakers: List[Dict],
+                         engine: Optional[TTSEngine] = None,
+                         clips: Optional[ClipStore] = None,
+                         on_clip_ready: Optional[Callable[[str, str], None]] = None) -> Dict[str, str]:
+    """Generate audio files for both main speech and overlaps.
+    
+    Lines are synthesized concurrently through ``engine`` (the shared
+    default engine if omitted), which enforces the TTS rate budget. Pass
+    the same ``clips`` store to ``mix_conversation`` so every clip decoded
+    here for its duration is reused by the mixer. ``on_clip_ready(key, path)``
+    is called as each clip lands on disk.
+    """
     logger.info("Generating audio files...")
-    audio_files = {}
     
     # Analytics tracking
     total_duration_ms = 0
     turn_durations = []
     
-    # Create direct mapping of speaker name to voice_id
-    voice_map = {s['name']: s['voice_id'] for s in speakers}
-    # Add fallback mapping for Speaker1/Speaker2 format
-    for i, s in enumerate(speakers, 1):
-        voice_map[f"Speaker{i}"] = s['voice_id']
-    
-    logger.info(f"Voice mapping: {voice_map}")
+    # Queue every main and overlap line so they can be synthesized concurrently
+    requests = build_tts_requests(conversation.turns, topic_dir, speakers)
+
+    audio_files = (engine or get_default_engine()).synthesize_all(requests, on_complete=on_clip_ready)
+    clips = clips if clips is not None else ClipStore()
     
     for turn in conversation.turns:
-        turn_start_time = time.time()
-        
-        # Get speaker voice ID, defaulting to first speaker if not found
-        speaker_voice_id = voice_map.get(turn.speaker, voice_map.get('Speaker1', speakers[0]['voice_id']))
-        
-        # Generate main speech audio
-        main_audio_path = os.path.join(topic_dir, f"{turn.speaker}_{turn.order}.mp3")
-        if not os.path.exists(main_audio_path):
-            logger.info(f"Generating main audio for {turn.speaker} turn {turn.order}")
-            try:
-                response = client.text_to_speech.convert(
-                    voice_id=voice_map.get(turn.speaker, speakers[0]['voice_id']),
-                    output_format="mp3_44100_128",
-                    text=turn.text,
-                    model_id="eleven_multilingual_v2"
-                )
-                # Write chunks directly to file
-                with open(main_audio_path, "wb") as f:
-                    for chunk in response:
-                        if chunk:  # Ensure chunk is not empty
-                            f.write(chunk)
-                time.sleep(1)  # Rate limiting
-            except Exception as e:
-                logger.error(f"Error generating audio for {turn.speaker}: {str(e)}")
-                raise
-        
-        # Load the audio to get its duration
-        main_audio = AudioSegment.from_mp3(main_audio_path)
-        turn_duration_ms = len(main_audio)
+        # Decode the audio once to get its duration
+        turn_duration_ms = clips.duration_ms(audio_files[f"{turn.speaker}_{turn.order}"])
         total_duration_ms += turn_duration_ms
         
-        audio_files[f"{turn.speaker}_{turn.order}"] = main_audio_path
-        
-        # Generate overlap audio if present
+        # Add overlap durations if present
         overlap_duration_ms = 0
         if turn.overlap_with:
-            for overlap_speaker, overlap_text in turn.overlap_with.items():
-                overlap_audio_path = os.path.join(topic_dir, f"{overlap_speaker}_overlap_{turn.order}.mp3")
-                if not os.path.exists(overlap_audio_path):
-                    logger.info(f"Generating overlap audio for {overlap_speaker}")
-                    try:
-                        response = client.text_to_speech.convert(
-                            voice_id=voice_map.get(overlap_speaker, speakers[0]['voice_id']),
-                            output_format="mp3_44100_128",
-                            text=overlap_text,
-                            model_id="eleven_multilingual_v2"
-                        )
-                        audio_data = b"".join(chunk for chunk in response)
-                        with open(overlap_audio_path, "wb") as f:
-                            f.write(audio_data)
-                        time.sleep(1)  # Rate limiting
-                    except Exception as e:
-                        logger.error(f"Error generating overlap audio for {overlap_speaker}: {str(e)}")
-                        raise
-                
-                # Load overlap audio to get its duration
-                overlap_audio = AudioSegment.from_mp3(overlap_audio_path)
-                overlap_duration_ms += len(overlap_audio)
-                
-                audio_files[f"{overlap_speaker}_overlap_{turn.order}"] = overlap_audio_path
+            for overlap_speaker in turn.overlap_with:
+                overlap_duration_ms += clips.duration_ms(audio_files[f"{overlap_speaker}_overlap_{turn.order}"])
         
         # Calculate total turn duration including overlaps
         total_turn_duration_ms = turn_duration_ms + (overlap_duration_ms if overlap_duration_ms > 0 else 0)
@@ -150,16 +104,12 @@ def CreateWelcomeAudio(welcome_text: str, welcome_audio_path: str, voice_id: str
     """Generate audio file for welcome text."""
     logger.info("Generating welcome audio...")
     try:
-        response = client.text_to_speech.convert(
+        get_default_engine().synthesize(TTSRequest(
+            key="welcome",
             voice_id=voice_id,
-            output_format="mp3_44100_128",
             text=welcome_text,
-            model_id="eleven_multilingual_v2"
-        )
-        audio_data = b"".join(chunk for chunk in response)
-        with open(welcome_audio_path, "wb") as f:
-            f.write(audio_data)
-        time.sleep(1)  # Rate limiting
+            output_path=welcome_audio_path
+        ))
     except Exception as e:
         logger.error(f"Error generating welcome audio: {str(e)}")
         raise
@@ -171,21 +121,13 @@ def CreatePodcastIntroAudio(podcast_intro_voiceover: str, podcast_intro_audio_pa
     """Generate audio file for podcast intro."""
     logger.info("Generating podcast intro audio...")
     try:
-        # Generate audio in chunks
-        response = client.text_to_speech.convert(
+        # Generate audio through the shared rate-limited engine
+        get_default_engine().synthesize(TTSRequest(
+            key="podcast_intro",
             voice_id=voice_id,
-            output_format="mp3_44100_128",
             text=podcast_intro_voiceover,
-            model_id="eleven_multilingual_v2"
-        )
-
-        # Write chunks directly to file
-        with open(podcast_intro_audio_path, "wb") as f:
-            for chunk in response:
-                if chunk:  # Ensure chunk is not empty
-                    f.write(chunk)
-        
-        time.sleep(1)  # Rate limiting
+            output_path=podcast_intro_audio_path
+        ))
 
         # Verify the file was created and is valid
         if not os.path.exists(podcast_intro_audio_path) or os.path.getsize(podcast_intro_audio_path) == 0:
@@ -208,47 +150,55 @@ def CreatePodcastIntroAudio(podcast_intro_voiceover: str, podcast_intro_audio_pa
     return podcast_intro_audio_path
 
 
-def mix_conversation(conversation: Conversation, audio_files: Dict[str, str]) -> str:
-    """Mix the conversation audio files with natural overlaps."""
+def save_turn_timings(conversation: Conversation, placements: List, frame_rate: int, output_path: str) -> str:
+    """Write the turn-timing index for a mix next to it (and the conversation schema)."""
+    duration = max((p.end for p in placements), default=0) / frame_rate
+    return write_turn_timings(os.path.join(os.path.dirname(output_path), TURN_TIMINGS_FILENAME), output_path,
+                              duration, line_timings(conversation, placements, frame_rate))
+
+
+def mix_conversation(conversation: Conversation, audio_files: Dict[str, str],
+                     clips: Optional[ClipStore] = None, streaming: Optional[bool] = None) -> str:
+    """Mix the conversation audio files with natural overlaps.
+    
+    Each clip is decoded once (or reused from ``clips``), placed on a
+    preallocated sample buffer at offsets planned up front, and the mix is
+    encoded a single time. With ``streaming`` (default: the
+    AUDIO_STREAMING_MIX setting) the mix is rendered window by window
+    straight into the encoder instead, keeping memory flat for long episodes.
+    The start and end of every line in the mix is saved alongside it.
+    """
     logger.info("Mixing conversation audio...")
     
-    # Initialize the final mix
-    final_mix = AudioSegment.empty()
-    current_position = 0
-    
-    for turn in conversation.turns:
-        # Load main speech audio
-        main_audio_path = audio_files[f"{turn.speaker}_{turn.order}"]
-        main_audio = AudioSegment.from_mp3(main_audio_path)
-        main_audio = normalize(main_audio)
-        
-        # Add main speech to mix
-        final_mix = final_mix + main_audio
-        
-        # Process overlaps if present
-        if turn.overlap_with:
-            for overlap_speaker, _ in turn.overlap_with.items():
-                overlap_audio_path = audio_files[f"{overlap_speaker}_overlap_{turn.order}"]
-                overlap_audio = AudioSegment.from_mp3(overlap_audio_path)
-                overlap_audio = normalize(overlap_audio)
-                
-                # Calculate overlap position (near the end of main speech)
-                overlap_position = len(main_audio) - len(overlap_audio) - 500  # Start 500ms before end
-                if overlap_position < 0:
-                    overlap_position = 0
-                
-                # Create natural overlap
-                final_mix = create_natural_overlap(
-                    final_mix,
-                    overlap_audio,
-                    current_position + overlap_position
-                )
-        
-        current_position += len(main_audio)
+    first_turn = conversation.turns[0]
+    output_path = os.path.join(
+        os.path.dirname(audio_files[f"{first_turn.speaker}_{first_turn.order}"]), "final_mix.mp3"
+    )
+    if streaming is None:
+        streaming = use_streaming_mix()
+    if streaming:
+        clips = clips or ClipStore(max_resident_mb=STREAM_MAX_RESIDENT_MB)
+        placements = []
+        render_mix_streaming(conversation, audio_files, output_path, clips=clips, placed=placements)
+    else:
+        clips = clips or ClipStore()
+        _, plan = render_mix(conversation, audio_files, output_path, clips=clips)
+        placements = plan.placements
+    save_turn_timings(conversation, placements, clips.frame_rate, output_path)
+    logger.success(f"Final mix saved to: {output_path}")
     
-    # Export final mix
-    output_path = os.path.join(os.path.dirname(audio_files[f"{conversation.turns[0].speaker}_1"]), "final_mix.mp3")
-    final_mix.export(output_path, format="mp3")
+    return output_path
+
+
+def mix_conversation_incremental(conversation: Conversation, arrivals: ClipArrivals, output_dir: str,
+                                 clips: Optional[ClipStore] = None) -> str:
+    """Mix the conversation turn by turn as ``generate_audio_files`` reports clips ready."""
+    logger.info("Mixing conversation audio as turns arrive...")
+    output_path = os.path.join(output_dir, "final_mix.mp3")
+    clips = clips or ClipStore(max_resident_mb=STREAM_MAX_RESIDENT_MB)
+    placements = []
+    render_mix_incremental(conversation, arrivals, output_path, clips=clips, placed=placements)
+    save_turn_timings(conversation, placements, clips.frame_rate, output_path)
     logger.success(f"Final mix saved to: {output_path}")
     
     return output_path
@@ -1,8 +1,17 @@
 import os
-from pydub import AudioSegment
-from pydub.effects import normalize, speedup
 import re
-from typing import Dict, Optional
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Tuple
+from create_audio.audio_mixer import (
+    ClipStore, MixPlan, PCMStreamWriter, Placement, StreamingMixer, STREAM_MAX_RESIDENT_MB,
+    NORMALIZE_HEADROOM_DB, db_to_gain, overlap_placement, peak_normalize_gain, render_window, to_segment
+)
+
+# Parameters for natural-sounding overlaps in compilations
+OVERLAP_CROSSFADE_MS = 300  # 300ms crossfade
+OVERLAY_VOLUME_REDUCTION_DB = 4  # -4dB for overlaying audio
+BASE_VOLUME_REDUCTION_DB = 2  # -2dB for base audio during overlap
+TRANSITION_FADE_MS = 200  # Fade between consecutive lines
 
 def extract_sequence_number(filename):
     # Extract the number from filenames like "Emma_1.mp3" or "Jake_2.mp3"
@@ -20,60 +29,103 @@ def get_natural_gap_duration(current_speaker, next_speaker):
         return 300  # 300ms for same speaker
     return 800  # 800ms between different speakers
 
-def apply_natural_transition(audio1, audio2, gap_duration):
-    # Create a gap with the specified duration
-    gap = AudioSegment.silent(duration=gap_duration)
-    
-    # Apply fade out to the end of first clip
-    fade_duration = min(200, len(audio1))  # 200ms fade or shorter if clip is shorter
-    audio1 = audio1.fade_out(fade_duration)
+def iter_combination_plan(input_dir: str, audio_files: List[str], clips: ClipStore,
+                          overlap_info: Optional[Dict] = None) -> Iterator[Tuple[List[Placement], int]]:
+    """
+    Plan the compilation one file at a time.
     
-    # Apply fade in to the start of second clip
-    fade_duration = min(200, len(audio2))  # 200ms fade or shorter if clip is shorter
-    audio2 = audio2.fade_in(fade_duration)
+    Yields the placements for each file (its line, any overlap and the
+    transition into it) with absolute frame positions and gains, together
+    with a frontier: nothing placed later starts before it, so frames up
+    to the frontier can be rendered.
+    """
+    first_path = os.path.join(input_dir, audio_files[0])
+    first = clips.get(first_path)
+    transition_fade = clips.ms_to_frames(TRANSITION_FADE_MS)
+    print(f"\nProcessing: {audio_files[0]}")
+    cursor = len(first)
+    current_speaker = extract_speaker(audio_files[0])
+    yield [Placement(audio_files[0], first_path, 0, cursor, gain=peak_normalize_gain(first))], \
+        cursor - min(transition_fade, cursor)
     
-    # Combine with gap
-    return audio1 + gap + audio2
+    for i in range(1, len(audio_files)):
+        print(f"Processing: {audio_files[i]}")
+        audio_path = os.path.join(input_dir, audio_files[i])
+        next_audio = clips.get(audio_path)
+        placements = []
+        
+        next_speaker = extract_speaker(audio_files[i])
+        gap = clips.ms_to_frames(get_natural_gap_duration(current_speaker, next_speaker))
+        
+        # Overlaps start when the main speaker is 1/3 through their line
+        turn_number = extract_sequence_number(audio_files[i])
+        overlap_path = os.path.join(input_dir, f"overlap_{turn_number}.mp3")
+        if overlap_info and turn_number in overlap_info and os.path.exists(overlap_path):
+            overlap_audio = clips.get(overlap_path)
+            overlap = overlap_placement(
+                f"overlap_{turn_number}", overlap_path, overlap_audio, cursor + len(next_audio) // 3, clips,
+                gain=peak_normalize_gain(overlap_audio), crossfade_ms=OVERLAP_CROSSFADE_MS,
+                overlap_db=OVERLAY_VOLUME_REDUCTION_DB, base_db=BASE_VOLUME_REDUCTION_DB
+            )
+            placements.append(overlap)
+            cursor = max(cursor, overlap.end)
+        
+        # Fade out everything so far, then the gap, then fade in the next line
+        fade_out = min(transition_fade, cursor)
+        placements.append(Placement(f"fade_out_{i}", None, cursor - fade_out, fade_out, fade_out=fade_out))
+        start = cursor + gap
+        placements.append(Placement(audio_files[i], audio_path, start, len(next_audio),
+                                    gain=peak_normalize_gain(next_audio),
+                                    fade_in=min(transition_fade, len(next_audio))))
+        cursor = start + len(next_audio)
+        current_speaker = next_speaker
+        
+        # The next transition may still fade the tail of this line
+        yield placements, cursor - min(transition_fade, cursor)
 
-def create_natural_overlap(base_audio: AudioSegment, overlay_audio: AudioSegment, position_ms: int) -> AudioSegment:
-    """Create a natural-sounding overlap between two audio segments"""
-    # Parameters for natural-sounding overlap
-    CROSSFADE_DURATION = 300  # 300ms crossfade
-    OVERLAY_VOLUME_REDUCTION = 4  # -4dB for overlaying audio
-    BASE_VOLUME_REDUCTION = 2  # -2dB for base audio during overlap
-    
-    # Calculate the end position of the overlay
-    overlay_end_position = position_ms + len(overlay_audio)
-    
-    # Ensure the base audio is long enough
-    if overlay_end_position > len(base_audio):
-        pad_duration = overlay_end_position - len(base_audio)
-        base_audio = base_audio + AudioSegment.silent(duration=pad_duration)
-    
-    # Extract the segment of base audio that will be overlapped
-    overlap_region = base_audio[position_ms:overlay_end_position]
-    
-    # Reduce volume of both audio segments in the overlap region
-    overlap_region = overlap_region - BASE_VOLUME_REDUCTION
-    overlay_audio = overlay_audio - OVERLAY_VOLUME_REDUCTION
-    
-    # Apply crossfade at the start and end of the overlay
-    if len(overlay_audio) > CROSSFADE_DURATION * 2:
-        overlay_audio = overlay_audio.fade_in(CROSSFADE_DURATION).fade_out(CROSSFADE_DURATION)
-    
-    # Overlay the audio segments
-    overlap_region = overlap_region.overlay(overlay_audio)
+def plan_combination(input_dir: str, audio_files: List[str], clips: ClipStore,
+                     overlap_info: Optional[Dict] = None) -> MixPlan:
+    """Compute every line's, overlap's and transition's placement up front."""
+    placements = []
+    for file_placements, _ in iter_combination_plan(input_dir, audio_files, clips, overlap_info):
+        placements.extend(file_placements)
+    total_frames = max(p.end for p in placements)
+    return MixPlan(placements, total_frames, clips.frame_rate, clips.channels)
+
+def combine_audio_files_streaming(input_dir: str, audio_files: List[str], output_file: str,
+                                  overlap_info: Optional[Dict] = None) -> str:
+    """
+    Combine audio files like combine_audio_files, but render the timeline
+    window by window into the encoder so peak memory does not grow with
+    the length of the compilation.
+    """
+    clips = ClipStore(max_resident_mb=STREAM_MAX_RESIDENT_MB)
+    mixer = None
+    cursor = 0
+    for placements, frontier in iter_combination_plan(input_dir, audio_files, clips, overlap_info):
+        if mixer is None:
+            writer = PCMStreamWriter(output_file, clips.frame_rate, clips.channels, bitrate="192k",
+                                     parameters=["-q:a", "0"], normalize=True)
+            mixer = StreamingMixer(writer, clips)
+        mixer.place(placements)
+        mixer.advance(frontier)
+        cursor = max([cursor] + [p.end for p in placements])
     
-    # Combine the parts
-    return base_audio[:position_ms] + overlap_region + base_audio[overlay_end_position:]
+    print("\nExporting final audio...")
+    mixer.close(cursor)
+    print(f"Successfully created combined audio file: {output_file}")
+    return output_file
 
-def combine_audio_files(input_dir="output", output_file="combined_conversation.mp3", overlap_info: Optional[Dict] = None):
+def combine_audio_files(input_dir="output", output_file="combined_conversation.mp3", overlap_info: Optional[Dict] = None,
+                        streaming: bool = False):
     """
     Combine audio files with support for overlapping speech.
     overlap_info should be a dictionary mapping turn numbers to overlap details:
     {
         2: {"speaker": "Emma", "text": "Oh, exactly!", "position": 1000}  # Position in ms
     }
+    With streaming=True the episode is never held in memory as a whole
+    (see combine_audio_files_streaming).
     """
     # Ensure output directory exists
     if not os.path.exists(input_dir):
@@ -88,55 +140,29 @@ def combine_audio_files(input_dir="output", output_file="combined_conversation.m
         print("No MP3 files found in the output directory!")
         return
     
-    # Load and normalize the first audio file
-    print(f"\nProcessing: {audio_files[0]}")
-    combined = AudioSegment.from_mp3(os.path.join(input_dir, audio_files[0]))
-    combined = normalize(combined)
-    current_speaker = extract_speaker(audio_files[0])
-    current_position = len(combined)  # Keep track of current position in ms
+    if streaming:
+        return combine_audio_files_streaming(input_dir, audio_files, output_file, overlap_info)
     
-    # Append the rest of the audio files with natural transitions
-    for i in range(1, len(audio_files)):
-        print(f"Processing: {audio_files[i]}")
-        audio_path = os.path.join(input_dir, audio_files[i])
-        next_audio = AudioSegment.from_mp3(audio_path)
-        next_audio = normalize(next_audio)
-        
-        next_speaker = extract_speaker(audio_files[i])
-        gap_duration = get_natural_gap_duration(current_speaker, next_speaker)
-        
-        # Check for overlaps at this turn
-        turn_number = extract_sequence_number(audio_files[i])
-        if overlap_info and turn_number in overlap_info:
-            overlap = overlap_info[turn_number]
-            # Calculate overlap position - start overlay when main speaker is 1/3 through their line
-            main_audio_duration = len(next_audio)
-            overlap_position = current_position + (main_audio_duration // 3)
-            
-            # Load and apply the overlap audio
-            overlap_path = os.path.join(input_dir, f"overlap_{turn_number}.mp3")
-            if os.path.exists(overlap_path):
-                overlap_audio = AudioSegment.from_mp3(overlap_path)
-                overlap_audio = normalize(overlap_audio)
-                combined = create_natural_overlap(combined, overlap_audio, overlap_position)
-        
-        # Apply natural transition and update position
-        combined = apply_natural_transition(combined, next_audio, gap_duration)
-        current_position = len(combined)
-        current_speaker = next_speaker
+    # Plan every line, overlap and transition, then render them in one pass
+    clips = ClipStore()
+    plan = plan_combination(input_dir, audio_files, clips, overlap_info)
+    combined = render_window(plan, clips, 0, plan.total_frames)
     
-    # Final normalization and dynamic compression
-    combined = normalize(combined)
+    # Final normalization
+    peak = float(np.abs(combined).max()) if len(combined) else 0.0
+    if peak > 0:
+        combined *= db_to_gain(-NORMALIZE_HEADROOM_DB) / peak
     
     # Export the combined audio with higher quality settings
     print("\nExporting final audio...")
-    combined.export(
+    to_segment(combined, plan.frame_rate).export(
         output_file,
         format="mp3",
         bitrate="192k",
         parameters=["-q:a", "0"]  # Use highest quality VBR setting
     )
     print(f"Successfully created combined audio file: {output_file}")
+    return output_file
 
 if __name__ == "__main__":
     combine_audio_files()
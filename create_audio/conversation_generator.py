@@ -4,29 +4,53 @@ import json
 import re
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
-from openai import OpenAI
 
-from create_audio.audio_utils import CreatePodcastIntroAudio, generate_audio_files, mix_conversation, CreateWelcomeAudio
+from create_audio.audio_utils import CreatePodcastIntroAudio, build_tts_requests, generate_audio_files, mix_conversation, mix_conversation_incremental, CreateWelcomeAudio
+from create_audio.audio_mixer import ClipArrivals, ClipStore, STREAM_MAX_RESIDENT_MB
 from create_audio.conversation import Conversation, ConversationTurn, ensure_directory
 from create_audio.conversation_prompts import get_conversation_prompts
 from create_audio.db_utils import PodcastDB
+from create_audio.job_manifest import JobManifest
 from create_audio.logger_utils import PodcastLogger
+from create_audio.script_stream import stream_conversation_script, use_script_streaming
+from create_audio.stage_graph import StageGraph
+from create_audio.tts_engine import get_default_engine
 import config as config_settings
 import random
 from utils.file_writer import get_output_path
-from utils.open_ai_utils import get_podcast_intro
+from utils.open_ai_utils import client as openai_client, get_podcast_intro
 from create_audio.audio_db_utils import AudioDBManger
 # Initialize logger
 logger = PodcastLogger("ConversationGenerator", "conversation.log")
 
-def optimise_overlapping(data, key_to_update, num_random_records):
+# Speaking rate used to estimate how long an overlap line will be
+OVERLAP_WORDS_PER_SECOND = 2.5
+MIN_OVERLAP_SECONDS = 0.5
+
+def estimate_overlap_seconds(text: str) -> float:
+    """Estimate the duration of an overlap line from its word count.
+
+    Each overlap costs one TTS request and its frames in the mix plan, so
+    its duration is a proxy for the cost of rendering it.
+    """
+    return max(MIN_OVERLAP_SECONDS, len(str(text).split()) / OVERLAP_WORDS_PER_SECOND)
+
+def get_overlap_budget() -> Optional[float]:
+    """Estimated seconds of overlap speech an episode may render (OVERLAP_MAX_RENDER_SECONDS), None for no cap."""
+    value = os.getenv("OVERLAP_MAX_RENDER_SECONDS")
+    return float(value) if value else None
+
+def optimise_overlapping(data, key_to_update, num_random_records, max_render_seconds=None):
     """
     This function processes the input JSON and keeps only a specified number of random keys in the given field.
 
     Parameters:
     - data (dict): The input JSON containing a `conversation` list.
     - key_to_update (str): The key within each conversation entry to process.
-    - num_random_records (int): The number of random keys to retain in the specified field.
+    - num_random_records (int): The number of random keys to retain in the specified field
+      (None keeps them all).
+    - max_render_seconds (float, optional): Budget for the estimated duration of all retained
+      overlaps in the episode. Once it is spent, further overlaps are dropped at random.
 
     Returns:
     - dict: The updated JSON with the specified number of random keys retained in the given field.
@@ -34,9 +58,22 @@ def optimise_overlapping(data, key_to_update, num_random_records):
     for entry in data['conversation']:
         if key_to_update in entry:
             overlap_keys = list(entry[key_to_update].keys())
-            if len(overlap_keys) > num_random_records:
+            if num_random_records is not None and len(overlap_keys) > num_random_records:
                 selected_keys = random.sample(overlap_keys, num_random_records)  # Select specified number of random keys
                 entry[key_to_update] = {key: entry[key_to_update][key] for key in selected_keys}
+    if max_render_seconds is None:
+        return data
+
+    # Keep a random subset of the remaining overlaps within the render budget
+    overlaps = [(entry, key) for entry in data['conversation'] for key in entry.get(key_to_update) or {}]
+    random.shuffle(overlaps)
+    spent = 0.0
+    for entry, key in overlaps:
+        cost = estimate_overlap_seconds(entry[key_to_update][key])
+        if spent + cost <= max_render_seconds:
+            spent += cost
+        else:
+            del entry[key_to_update][key]
     return data
 
 def clean_filename(text: str) -> str:
@@ -59,6 +96,67 @@ def clean_filename(text: str) -> str:
     # Truncate to reasonable length
     return text[:30]
 
+def build_turn(turn: Dict, host_speaker: str) -> ConversationTurn:
+    """Convert one entry of the LLM's conversation array into a ConversationTurn."""
+    speaker_name = turn["speaker"]
+    # Map 'Host' to first speaker if needed
+    if speaker_name.lower() == "host":
+        speaker_name = host_speaker
+    return ConversationTurn(
+        order=turn["order"],
+        speaker=speaker_name,
+        text=turn["text"],
+        overlap_with=turn.get("overlap_with", {})
+    )
+
+def build_conversation(conversation_data: Dict, speakers: List[Dict], topic: str) -> Conversation:
+    """Convert the LLM's conversation JSON into a Conversation.
+    
+    Args:
+        conversation_data: Parsed JSON with optional intro/outro and the conversation turns
+        speakers: Selected speakers; the first one hosts the intro and outro
+        topic: Topic of the conversation
+        
+    Returns:
+        The Conversation with intro, main and outro turns in order
+    """
+    turns = []
+    
+    # Map 'Host' to first speaker for intro/outro
+    host_speaker = speakers[0]["name"]
+    
+    # Add intro if present
+    if "intro" in conversation_data and conversation_data["intro"]:
+        intro_turn = ConversationTurn(
+            order=0,
+            speaker=host_speaker,  # Always use first speaker as host
+            text=conversation_data["intro"]["text"],
+            overlap_with={}
+        )
+        turns.append(intro_turn)
+    
+    # Add main conversation turns
+    for turn in conversation_data["conversation"]:
+        turns.append(build_turn(turn, host_speaker))
+    
+    # Add outro if present
+    if "outro" in conversation_data and conversation_data["outro"]:
+        outro_turn = ConversationTurn(
+            order=len(turns) + 1,
+            speaker=host_speaker,  # Always use first speaker as host
+            text=conversation_data["outro"]["text"],
+            overlap_with={}
+        )
+        turns.append(outro_turn)
+    
+    return Conversation(
+        turns=turns,
+        topic=topic,
+        speakers=[s["name"] for s in speakers],
+        intro=conversation_data.get("intro", {}),
+        outro=conversation_data.get("outro", {})
+    )
+
 def generate_conversation(
     config: Dict,
     job_id: str,
@@ -81,8 +179,9 @@ def generate_conversation(
         Tuple of (audio_path, schema_path)
     """
     
-   
-    client = OpenAI()
+    # Module-level client shared by every job in the process, so its HTTP
+    # connection pool is reused across episodes
+    client = openai_client
     
    
     #print(json.dumps(config, indent=4))
@@ -144,169 +243,184 @@ def generate_conversation(
         )
       
         
-        logger.info(f"Generating conversation using OpenAI in {config.get('voice_settings_language')}...")
-        response = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-4o-mini-2024-07-18	"),
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        
-        # Parse the response
-        conversation_data = json.loads(response.choices[0].message.content)
-        #let us print in nice format
-        #logger.info(f"Conversation data: {json.dumps(conversation_data, indent=4)}")
-      
-        
-        # Convert to our conversation class
-        turns = []
-        
-        # Map 'Host' to first speaker for intro/outro
-        host_speaker = speakers[0]["name"]
-        
-        # Add intro if present
-        if "intro" in conversation_data and conversation_data["intro"]:
-            intro_turn = ConversationTurn(
-                order=0,
-                speaker=host_speaker,  # Always use first speaker as host
-                text=conversation_data["intro"]["text"],
-                overlap_with={}
+        def output_path_for(filename: str) -> Tuple[str, str]:
+            return get_output_path(
+                filename=filename,
+                profile_name=request_dict.get("profile_name"),
+                customer_id=request_dict.get("customer_id"),
+                job_id=job_id,
+                theme=request_dict.get("theme", "default"),
+                timestamp_format="%Y%m%d_%H%M%S",
+                create_dir=True
             )
-            turns.append(intro_turn)
         
-        # Add main conversation turns
-        for turn in conversation_data["conversation"]:
-            speaker_name = turn["speaker"]
-            # Map 'Host' to first speaker if needed
-            if speaker_name.lower() == "host":
-                speaker_name = host_speaker
-                
-            turns.append(
-                ConversationTurn(
-                    order=turn["order"],
-                    speaker=speaker_name,
-                    text=turn["text"],
-                    overlap_with=turn.get("overlap_with", {})
-                )
-            )
+        _, output_dir = output_path_for("dummy.txt")  # We only need the directory
         
-        # Add outro if present
-        if "outro" in conversation_data and conversation_data["outro"]:
-            outro_turn = ConversationTurn(
-                order=len(turns) + 1,
-                speaker=host_speaker,  # Always use first speaker as host
-                text=conversation_data["outro"]["text"],
-                overlap_with={}
-            )
-            turns.append(outro_turn)
-        
-        #find out topic summry from the conversation data
-        welcome_voiceover = conversation_data.get("welcome_voiceover", "")
-        # Create a conversation
-        conversation = Conversation(
-            turns=turns,
-            topic=request_dict.get("topic"),
-            speakers=[s["name"] for s in speakers],
-            intro=conversation_data.get("intro", {}),
-            outro=conversation_data.get("outro", {})
-        )
+        # Stages completed by an earlier attempt at this job are skipped
+        manifest = JobManifest(output_dir)
+        engine = get_default_engine()
+        overlap_budget = get_overlap_budget()
+        script_request = {
+            "model": os.getenv("OPENAI_MODEL", "gpt-4o-mini-2024-07-18	"),
+            "response_format": {"type": "json_object"},
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ]
+        }
         
-        # Print conversation summary
-     
-        # Save the conversation schema
-        schema_path, schema_output_dir = get_output_path(
-            filename="conversation.json",
-            profile_name=request_dict.get("profile_name"),
-            customer_id=request_dict.get("customer_id"),
-            job_id=job_id,
-            theme=request_dict.get("theme", "default"),
-            timestamp_format="%Y%m%d_%H%M%S",
-            create_dir=True
-        )
+        def stream_script() -> Optional[Dict]:
+            """Stream the script, synthesizing each turn as soon as the LLM finishes it.
+            
+            Returns None if the stream fails, after discarding any audio
+            already synthesized from it.
+            """
+            host_speaker = speakers[0]["name"]
+            dispatched = []
+            
+            def dispatch(section: str, obj: Dict):
+                try:
+                    if section == "intro" and obj:
+                        turn = ConversationTurn(order=0, speaker=host_speaker, text=obj["text"], overlap_with={})
+                    elif section == "turn":
+                        turn = build_turn(obj, host_speaker)
+                        if overlap_budget is not None:
+                            # Which overlaps fit the budget is only known for the whole script
+                            turn.overlap_with = {}
+                    else:
+                        return  # The outro's order depends on the final turn count
+                    for request in build_tts_requests([turn], output_dir, speakers):
+                        if not os.path.exists(request.output_path):
+                            manifest.add_clips([request.output_path])
+                            dispatched.append((request, engine.submit(request)))
+                except Exception as e:
+                    logger.warning(f"Could not dispatch streamed {section} early: {str(e)}")
+            
+            try:
+                stream = client.chat.completions.create(stream=True, **script_request)
+                conversation_data = stream_conversation_script(stream, on_section=dispatch)
+                logger.info(f"Dispatched {len(dispatched)} clips to TTS while the script streamed")
+                return conversation_data
+            except Exception as e:
+                logger.warning(f"Streaming script failed, falling back to a full response: {str(e)}")
+                for _, future in dispatched:
+                    future.cancel()
+                for request, future in dispatched:
+                    try:
+                        future.result()
+                    except Exception:
+                        pass
+                    if os.path.exists(request.output_path):
+                        os.remove(request.output_path)
+                return None
         
-        with open(schema_path, "w") as f:
-            json.dump(conversation.to_dict(), f, indent=2)
+        def generate_script(results: Dict) -> Dict:
+            conversation_data = manifest.get("script")
+            if conversation_data is None:
+                # Clips streamed for an earlier attempt's unfinished script no longer match
+                manifest.discard_clips()
+                logger.info(f"Generating conversation using OpenAI in {config.get('voice_settings_language')}...")
+                conversation_data = stream_script() if use_script_streaming() else None
+                if conversation_data is None:
+                    response = client.chat.completions.create(**script_request)
+                    
+                    # Parse the response
+                    conversation_data = json.loads(response.choices[0].message.content)
+                if overlap_budget is not None:
+                    optimise_overlapping(conversation_data, "overlap_with", None, max_render_seconds=overlap_budget)
+                manifest.record("script", conversation_data)
+            else:
+                logger.info("Using the conversation script from an earlier attempt")
+            return {
+                "conversation_data": conversation_data,
+                "conversation": build_conversation(conversation_data, speakers, request_dict.get("topic")),
+                "welcome_voiceover": conversation_data.get("welcome_voiceover", "")
+            }
         
-        logger.info(f"Saved conversation schema to {schema_path}")
+        def save_schema(results: Dict) -> str:
+            schema_path, _ = output_path_for("conversation.json")
+            with open(schema_path, "w") as f:
+                json.dump(results["script"]["conversation"].to_dict(), f, indent=2)
+            logger.info(f"Saved conversation schema to {schema_path}")
+            return schema_path
         
-        #let us generate podcast intro
-        logger.info("Generating podcast intro...")
-        podcast_expert_name = (business_info.get("representative_name") or "Eva Grace")
-    
-
-        podcast_intro = get_podcast_intro(request_dict.get("topic"), conversation, podcast_expert_name)
-    
-        podcast_intro_json = json.loads(podcast_intro)
-        podcast_intro_voiceover = podcast_intro_json['podcast_intro']
+        def generate_podcast_intro_script(results: Dict) -> str:
+            logger.info("Generating podcast intro...")
+            podcast_expert_name = (business_info.get("representative_name") or "Eva Grace")
+            podcast_intro = get_podcast_intro(request_dict.get("topic"), results["script"]["conversation"], podcast_expert_name)
+            return json.loads(podcast_intro)['podcast_intro']
         
+        def generate_podcast_intro_audio(results: Dict) -> str:
+            logger.info("Generating podcast intro voiceover...")
+            podcast_intro_filename = "podcast_intro.mp3"  # Always use mp3 extension for audio files
+            podcast_intro_path, _ = output_path_for(podcast_intro_filename)
+            podcast_intro_path = CreatePodcastIntroAudio(results["podcast_intro_script"], podcast_intro_path, speakers[0]["voice_id"])
+            logger.info(f"Podcast intro audio generated on path: {podcast_intro_path}")
+            return podcast_intro_path
         
+        # Turn audio is streamed into the mixer as each clip is synthesized.
+        # Clips are written atomically under fixed names, so on a retry the
+        # ones already on disk are reused and only missing turns hit the API.
+        clips = ClipStore(max_resident_mb=STREAM_MAX_RESIDENT_MB)
+        arrivals = ClipArrivals()
         
-        # Generate audio files
-        logger.info("Generating audio files...")
-        _, output_dir = get_output_path(
-            filename="dummy.txt",  # We only need the directory
-            profile_name=request_dict.get("profile_name"),
-            customer_id=request_dict.get("customer_id"),
-            job_id=job_id,
-            theme=request_dict.get("theme", "default"),
-            timestamp_format="%Y%m%d_%H%M%S",
-            create_dir=True
-        )
+        def generate_turn_audio(results: Dict) -> Dict[str, str]:
+            logger.info("Generating audio files...")
+            try:
+                return generate_audio_files(results["script"]["conversation"], output_dir, speakers,
+                                            clips=clips, on_clip_ready=arrivals.add)
+            except Exception as e:
+                arrivals.fail(e)
+                raise
         
-        # Generate audio files
-        logger.info("Generating audio files...")
-        audio_files = generate_audio_files(conversation, output_dir, speakers)
+        def mix(results: Dict) -> str:
+            output_path = mix_conversation_incremental(results["script"]["conversation"], arrivals, output_dir, clips=clips)
+            logger.success(f"Generated conversation at {output_path}")
+            return output_path
         
-        #let us generate welcome voiceover
-        # logger.info("Generating welcome voiceover...")
-        # welcome_audio_path = os.path.join(output_dir, "welcome.mp3")
-        # welcome_audio = CreateWelcomeAudio(welcome_voiceover, welcome_audio_path, speakers[0]["voice_id"])
-        # Mix the conversation
-        logger.info("Mixing conversation...")
-        output_path = mix_conversation(conversation, audio_files)
+        def save_audio_record(results: Dict):
+            #let us save all voideovver text and audio path to the database using AudioDBManger 
+            podcast_intro_voiceover = results["podcast_intro_script"]
+            welcome_audio_path = results["podcast_intro_audio"]
+            audio_db = AudioDBManger()
+            audio_db.create_audio_record(
+                job_id=job_id, 
+                customer_id=request_dict.get("customer_id"), welcome_voiceover_text=results["script"]["welcome_voiceover"], 
+                conversation_data=results["script"]["conversation_data"], 
+                intro_voiceover_text=podcast_intro_voiceover, 
+                podcast_intro_voiceover=podcast_intro_voiceover, 
+                default_podcast_intro_text=podcast_intro_voiceover, 
+                voice_settings=config.get("voice_settings"), 
+                request_data=request_dict,
+                welcome_audio_path=welcome_audio_path,
+                conversation_audio_path=results["turn_audio"],
+                intro_audio_path=welcome_audio_path,
+                default_podcast_intro_audio_path=welcome_audio_path,
+                final_mix_path=results["mix"],
+                schema_path=results["schema"] 
+                )
         
-        logger.success(f"Generated conversation at {output_path}")
-
-        #create audio for podcast intro 
-        logger.info("Generating podcast intro voiceover...")
-        podcast_intro_filename = "podcast_intro.mp3"  # Always use mp3 extension for audio files
-        podcast_intro_path_tuple = get_output_path(
-            filename=podcast_intro_filename,
-            profile_name=request_dict.get("profile_name"),
-            customer_id=request_dict.get("customer_id"),
-            job_id=job_id,
-            theme=request_dict.get("theme", "default"),
-            timestamp_format="%Y%m%d_%H%M%S",
-            create_dir=True
-        )
-        # Get just the file path from the tuple
-        welcome_audio_path = podcast_intro_path_tuple[0]
-       
-        welcome_audio_path = CreatePodcastIntroAudio(podcast_intro_voiceover, welcome_audio_path, speakers[0]["voice_id"])
-        logger.info(f"Podcast intro audio generated on path: {welcome_audio_path}")
-       #let us save all voideovver text and audio path to the database using AudioDBManger 
-        audio_db = AudioDBManger()
-        audio_db.create_audio_record(
-            job_id=job_id, 
-            customer_id=request_dict.get("customer_id"), welcome_voiceover_text=welcome_voiceover, 
-            conversation_data=conversation_data, 
-            intro_voiceover_text=podcast_intro_voiceover, 
-            podcast_intro_voiceover=podcast_intro_voiceover, 
-            default_podcast_intro_text=podcast_intro_voiceover, 
-            voice_settings=config.get("voice_settings"), 
-            request_data=request_dict,
-            welcome_audio_path=welcome_audio_path,
-            conversation_audio_path=audio_files,
-            intro_audio_path=welcome_audio_path,
-            default_podcast_intro_audio_path=welcome_audio_path,
-            final_mix_path=output_path,
-            schema_path=schema_path 
-            )
+        # Independent stages run concurrently: the intro LLM call and intro
+        # TTS overlap conversation TTS, and mixing consumes turns as they arrive
+        graph = StageGraph(f"audio job {job_id}", max_workers=6)
+        graph.add("script", generate_script)
+        graph.add("schema", manifest.checkpoint("schema", save_schema, paths=True), deps=["script"])
+        graph.add("podcast_intro_script", manifest.checkpoint("podcast_intro_script", generate_podcast_intro_script),
+                  deps=["script"])
+        graph.add("podcast_intro_audio", manifest.checkpoint("podcast_intro_audio", generate_podcast_intro_audio, paths=True),
+                  deps=["podcast_intro_script"])
+        graph.add("turn_audio", generate_turn_audio, deps=["script"])
+        graph.add("mix", manifest.checkpoint("mix", mix, paths=True), deps=["script"])
+        graph.add("audio_record", manifest.checkpoint("audio_record", save_audio_record),
+                  deps=["schema", "podcast_intro_audio", "turn_audio", "mix"])
+        results = graph.run()
 
         logger.success("Audio files generated and saved")
-     
+        
+        output_path = results["mix"]
+        schema_path = results["schema"]
+        welcome_audio_path = results["podcast_intro_audio"]
+        welcome_voiceover = results["script"]["welcome_voiceover"]
         return output_path, schema_path, welcome_audio_path,welcome_voiceover
     
     except Exception as e:
@@ -0,0 +1,116 @@
+"""Module for checkpointing audio job stages so a restarted job can resume."""
+import os
+import json
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List
+
+from create_audio.logger_utils import PodcastLogger
+
+# Initialize logger
+logger = PodcastLogger("JobManifest")
+
+MANIFEST_FILENAME = "audio_job.json"
+
+
+def _result_paths(value: Any) -> List[str]:
+    """File paths referenced by a stage result (a path or a dict of paths)."""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [v for v in value.values() if isinstance(v, str)]
+    return []
+
+
+class JobManifest:
+    """Record of the completed stages of one audio job.
+
+    The manifest lives as JSON in the job's output directory, which is the
+    same for every attempt at a job. It is rewritten atomically after each
+    stage, so a worker killed at any point leaves the last good checkpoint
+    on disk and a retry only redoes the stages that never finished.
+    """
+
+    def __init__(self, output_dir: str):
+        self.path = os.path.join(output_dir, MANIFEST_FILENAME)
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self) -> Dict:
+        empty = {"stages": {}, "clips": []}
+        if not os.path.exists(self.path):
+            return empty
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable job manifest {self.path}: {str(e)}")
+            return empty
+        logger.info(f"Resuming job from {self.path} (completed: {', '.join(data['stages']) or 'none'})")
+        return data
+
+    def _save(self):
+        tmp_path = f"{self.path}.part"
+        with open(tmp_path, "w") as f:
+            json.dump(self._data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def completed(self, stage: str) -> bool:
+        with self._lock:
+            return stage in self._data["stages"]
+
+    def get(self, stage: str, default: Any = None) -> Any:
+        """Get the recorded result of a completed stage."""
+        with self._lock:
+            entry = self._data["stages"].get(stage)
+            return entry["result"] if entry else default
+
+    def record(self, stage: str, result: Any = None):
+        """Mark a stage complete with its JSON-serializable result."""
+        with self._lock:
+            self._data["stages"][stage] = {
+                "result": result,
+                "completed_at": datetime.now().isoformat()
+            }
+            self._save()
+
+    def add_clips(self, paths: Iterable[str]):
+        """Remember clips synthesized before their script was checkpointed."""
+        with self._lock:
+            for path in paths:
+                if path not in self._data["clips"]:
+                    self._data["clips"].append(path)
+            self._save()
+
+    def discard_clips(self) -> int:
+        """Delete clips left by an attempt whose script was never checkpointed."""
+        with self._lock:
+            removed = 0
+            for path in self._data["clips"]:
+                if os.path.exists(path):
+                    os.remove(path)
+                    removed += 1
+            self._data["clips"] = []
+            self._save()
+        if removed:
+            logger.info(f"Discarded {removed} clips from an unfinished script")
+        return removed
+
+    def checkpoint(self, stage: str, fn: Callable[[Dict[str, Any]], Any],
+                   paths: bool = False) -> Callable[[Dict[str, Any]], Any]:
+        """Wrap a stage function so it is skipped once it has completed.
+
+        With ``paths``, the result is treated as a file path (or a dict of
+        paths) and the stage runs again if any of them has gone missing.
+        """
+        def run(results: Dict[str, Any]) -> Any:
+            if self.completed(stage):
+                result = self.get(stage)
+                if not paths or all(os.path.exists(p) for p in _result_paths(result)):
+                    logger.info(f"Skipping {stage}, completed by an earlier attempt")
+                    return result
+                logger.warning(f"Output of {stage} is missing, running it again")
+            result = fn(results)
+            self.record(stage, result)
+            return result
+        return run
@@ -0,0 +1,172 @@
+"""Module for EBU R128 loudness measurement and leveling on decoded PCM.
+
+Loudness follows ITU-R BS.1770: the signal is K-weighted, and mean
+square energy is taken over 100ms sub-blocks in a single pass. Gating
+blocks (400ms, 75% overlap) and short-term windows (3s) are then
+sliding sums over the sub-block energies, so integrated loudness and
+per-frame gain curves cost one filter pass over the audio.
+"""
+import os
+from typing import Optional
+
+import numpy as np
+from scipy.signal import sosfilt
+
+# BS.1770 / EBU R128 measurement constants
+SUBBLOCK_MS = 100
+GATING_BLOCK_SUBBLOCKS = 4  # 400ms blocks with 75% overlap
+SHORT_TERM_SUBBLOCKS = 30  # 3s short-term window
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = -10.0
+
+# Leveling defaults
+TARGET_LUFS = -16.0  # Podcast delivery loudness
+PEAK_CEILING_DB = -1.0
+
+# Music ducking defaults
+MUSIC_DUCK_LU = 15  # Music sits this far below speech while someone talks
+MUSIC_BED_LUFS = -26.0  # Music level when no one is talking
+DUCK_SMOOTHING_MS = 500
+
+# Samples filtered per chunk, so memory does not grow with the input length
+CHUNK_SUBBLOCKS = 100
+
+INT16_MAX = 32768.0
+
+
+def get_leveling_mode() -> str:
+    """Per-clip leveling: "loudness" (EBU R128) or "peak" (pydub normalize)."""
+    return os.getenv("AUDIO_LEVELING", "loudness").lower()
+
+
+def get_target_lufs() -> float:
+    """Integrated loudness that speech is leveled to."""
+    return float(os.getenv("AUDIO_TARGET_LUFS", str(TARGET_LUFS)))
+
+
+def k_weighting_sos(frame_rate: int) -> np.ndarray:
+    """The BS.1770 K-weighting filter for ``frame_rate`` as second-order sections."""
+    # Pre-filter: high shelf modelling the acoustic effect of the head
+    f0 = 1681.974450955533
+    gain_db = 3.999843853973347
+    q = 0.7071752369554196
+    k = np.tan(np.pi * f0 / frame_rate)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = [(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0,
+             1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+
+    # RLB weighting: high pass
+    f0 = 38.13547087602444
+    q = 0.5003270373238773
+    k = np.tan(np.pi * f0 / frame_rate)
+    a0 = 1 + k / q + k * k
+    high_pass = [1.0, -2.0, 1.0, 1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+    return np.array([shelf, high_pass])
+
+
+def subblock_energies(samples: np.ndarray, frame_rate: int) -> np.ndarray:
+    """K-weighted mean square energy of every complete 100ms sub-block.
+
+    ``samples`` are int16 (or float in [-1, 1]) frames of shape
+    ``(frames, channels)``. Channel energies are summed with unit weight,
+    which is correct for mono and stereo.
+    """
+    if samples.ndim == 1:
+        samples = samples[:, None]
+    subblock = max(1, int(round(frame_rate * SUBBLOCK_MS / 1000)))
+    usable = len(samples) - len(samples) % subblock
+    scale = np.float32(1 / INT16_MAX if samples.dtype == np.int16 else 1.0)
+    # Second-order sections keep float32 filtering accurate (~1e-5 dB)
+    sos = k_weighting_sos(frame_rate).astype(np.float32)
+    state = np.zeros((len(sos), 2, samples.shape[1]), dtype=np.float32)
+    chunk = subblock * CHUNK_SUBBLOCKS
+    energies = []
+    for start in range(0, usable, chunk):
+        x = samples[start:min(start + chunk, usable)].astype(np.float32) * scale
+        x, state = sosfilt(sos, x, axis=0, zi=state)
+        energies.append((x * x).reshape(-1, subblock, x.shape[1]).mean(axis=1, dtype=np.float64).sum(axis=1))
+    return np.concatenate(energies) if energies else np.zeros(0)
+
+
+def energy_to_lufs(energy):
+    """BS.1770 loudness of a mean square energy; silence is ``-inf``."""
+    with np.errstate(divide="ignore"):
+        return -0.691 + 10 * np.log10(energy)
+
+
+def integrated_loudness(samples: np.ndarray, frame_rate: int) -> float:
+    """Gated integrated loudness (LUFS) of a clip, ``-inf`` if it is silent.
+
+    Clips shorter than one 400ms gating block are measured as a single
+    block so that short interjections can still be leveled.
+    """
+    energies = subblock_energies(samples, frame_rate)
+    if len(energies) < GATING_BLOCK_SUBBLOCKS:
+        if len(energies) == 0:
+            return float("-inf")
+        blocks = np.array([energies.mean()])
+    else:
+        window = np.ones(GATING_BLOCK_SUBBLOCKS) / GATING_BLOCK_SUBBLOCKS
+        blocks = np.convolve(energies, window, mode="valid")
+    loudness = energy_to_lufs(blocks)
+    gated = loudness > ABSOLUTE_GATE_LUFS
+    if not gated.any():
+        return float("-inf")
+    relative_gate = energy_to_lufs(blocks[gated].mean()) + RELATIVE_GATE_LU
+    gated &= loudness > relative_gate
+    return float(energy_to_lufs(blocks[gated].mean()))
+
+
+def short_term_loudness(samples: np.ndarray, frame_rate: int) -> np.ndarray:
+    """Short-term loudness (3s window) centred on every 100ms sub-block, in LUFS."""
+    energies = subblock_energies(samples, frame_rate)
+    if len(energies) == 0:
+        return energies
+    sums = np.concatenate([[0.0], np.cumsum(energies)])
+    idx = np.arange(len(energies))
+    lo = np.clip(idx - SHORT_TERM_SUBBLOCKS // 2, 0, len(energies))
+    hi = np.clip(idx + SHORT_TERM_SUBBLOCKS // 2, 1, len(energies))
+    return energy_to_lufs((sums[hi] - sums[lo]) / (hi - lo))
+
+
+def leveling_gain(samples: np.ndarray, frame_rate: int, target_lufs: Optional[float] = None,
+                  peak_ceiling_db: float = PEAK_CEILING_DB) -> float:
+    """Linear gain that brings a clip to ``target_lufs``, limited so peaks stay below the ceiling."""
+    target_lufs = get_target_lufs() if target_lufs is None else target_lufs
+    loudness = integrated_loudness(samples, frame_rate)
+    if not np.isfinite(loudness):
+        return 1.0
+    gain = 10 ** ((target_lufs - loudness) / 20)
+    scale = 1 / INT16_MAX if samples.dtype == np.int16 else 1.0
+    peak = float(np.abs(samples).max()) * scale
+    if peak > 0:
+        gain = min(gain, 10 ** (peak_ceiling_db / 20) / peak)
+    return gain
+
+
+def ducking_gain_curve(speech: np.ndarray, frame_rate: int, music_lufs: float,
+                       duck_lu: float = MUSIC_DUCK_LU, bed_lufs: float = MUSIC_BED_LUFS,
+                       smoothing_ms: float = DUCK_SMOOTHING_MS) -> np.ndarray:
+    """Per-frame linear gain for music of loudness ``music_lufs`` played under ``speech``.
+
+    The music is held ``duck_lu`` below the short-term loudness of the
+    speech and rises to ``bed_lufs`` where no one is talking. The curve
+    is smoothed over ``smoothing_ms`` so the music does not pump.
+    """
+    frames = len(speech)
+    short_term = short_term_loudness(speech, frame_rate)
+    if len(short_term) == 0 or not np.isfinite(music_lufs):
+        return np.ones(frames, dtype=np.float32)
+    talking = short_term > ABSOLUTE_GATE_LUFS
+    desired = np.where(talking, np.minimum(bed_lufs, short_term - duck_lu), bed_lufs)
+    gain_db = desired - music_lufs
+    width = max(1, int(round(smoothing_ms / SUBBLOCK_MS)))
+    if width > 1 and len(gain_db) > width:
+        padded = np.pad(gain_db, (width // 2, width - 1 - width // 2), mode="edge")
+        gain_db = np.convolve(padded, np.ones(width) / width, mode="valid")
+    subblock = frame_rate * SUBBLOCK_MS / 1000
+    centres = (np.arange(len(gain_db)) + 0.5) * subblock
+    curve = np.interp(np.arange(frames), centres, 10 ** (gain_db / 20))
+    return curve.astype(np.float32)
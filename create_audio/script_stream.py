@@ -0,0 +1,150 @@
+"""Module for incrementally parsing a streamed conversation script."""
+import os
+import json
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from create_audio.logger_utils import PodcastLogger
+
+# Initialize logger
+logger = PodcastLogger("ScriptStream")
+
+# Top-level objects emitted as soon as they close, besides conversation turns
+STREAMED_SECTIONS = ("intro", "outro")
+
+
+def use_script_streaming() -> bool:
+    """Whether to stream the conversation script and start TTS on each turn early."""
+    return os.getenv("OPENAI_STREAM_SCRIPT", "true").lower() in ("true", "1", "yes", "on")
+
+
+class ScriptStreamError(Exception):
+    """Raised when a streamed script cannot be parsed."""
+
+
+class ConversationStreamParser:
+    """Extracts completed turns from the LLM's JSON while it is still streaming.
+
+    Text is fed in arbitrary chunks. The parser tracks string and nesting
+    state so that every object in the top-level ``conversation`` array (and
+    the ``intro``/``outro`` objects) is decoded the moment its closing brace
+    arrives. ``finish`` parses the whole document and checks that it agrees
+    with everything emitted along the way.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._pending_key: Optional[str] = None
+        # (bracket, key, start offset) for every open object/array
+        self._stack: List[Tuple[str, Optional[str], int]] = []
+        self.emitted: List[Tuple[str, Dict]] = []
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def feed(self, chunk: str) -> List[Tuple[str, Dict]]:
+        """Consume a chunk of text and return the ``(section, object)`` pairs it completed."""
+        self._text += chunk
+        completed = []
+        text = self._text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start:i + 1]
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":":
+                if self._last_string is None:
+                    raise ScriptStreamError(f"Unexpected ':' at offset {i}")
+                try:
+                    self._pending_key = json.loads(self._last_string)
+                except json.JSONDecodeError as e:
+                    raise ScriptStreamError(f"Malformed key at offset {i}: {str(e)}")
+            elif ch in "{[":
+                self._stack.append((ch, self._container_key(), i))
+                self._pending_key = None
+            elif ch in "}]":
+                if not self._stack or self._stack[-1][0] != {"}": "{", "]": "["}[ch]:
+                    raise ScriptStreamError(f"Unbalanced '{ch}' at offset {i}")
+                bracket, key, start = self._stack.pop()
+                if bracket == "{" and ((key == "turn" and len(self._stack) == 2)
+                                       or (key in STREAMED_SECTIONS and len(self._stack) == 1)):
+                    try:
+                        obj = json.loads(text[start:i + 1])
+                    except json.JSONDecodeError as e:
+                        raise ScriptStreamError(f"Malformed {key} object: {str(e)}")
+                    completed.append((key, obj))
+                self._pending_key = None
+            elif ch == ",":
+                self._pending_key = None
+            if not ch.isspace():
+                self._last_string = None
+        self._pos = len(text)
+        self.emitted.extend(completed)
+        return completed
+
+    def _container_key(self) -> Optional[str]:
+        """Name the object or array that is about to open."""
+        if len(self._stack) == 1 and self._stack[0][0] == "{":
+            return self._pending_key
+        if len(self._stack) == 2 and self._stack[1][1] == "conversation" and self._stack[1][0] == "[":
+            return "turn"
+        return None
+
+    def finish(self) -> Dict:
+        """Parse the complete document, checking it matches what was already emitted."""
+        if self._in_string or self._stack:
+            raise ScriptStreamError("Stream ended inside an unterminated value")
+        try:
+            data = json.loads(self._text)
+        except json.JSONDecodeError as e:
+            raise ScriptStreamError(f"Malformed script: {str(e)}")
+        if not isinstance(data, dict) or not isinstance(data.get("conversation"), list):
+            raise ScriptStreamError("Script has no conversation array")
+        turns = [obj for section, obj in self.emitted if section == "turn"]
+        if turns != data["conversation"]:
+            raise ScriptStreamError("Streamed turns do not match the parsed script")
+        return data
+
+
+def iter_stream_text(stream: Iterable) -> Iterable[str]:
+    """Yield the content deltas of an OpenAI chat completion stream."""
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        content = chunk.choices[0].delta.content
+        if content:
+            yield content
+
+
+def stream_conversation_script(stream: Iterable,
+                               on_section: Optional[Callable[[str, Dict], None]] = None) -> Dict:
+    """Parse a streamed chat completion into the conversation JSON.
+
+    ``on_section(section, obj)`` is called for the intro, each conversation
+    turn and the outro as soon as each is complete, so TTS can start before
+    the LLM has finished. Raises ``ScriptStreamError`` if the stream is
+    malformed; callers should discard anything dispatched and fall back to
+    a non-streaming request.
+    """
+    parser = ConversationStreamParser()
+    for text in iter_stream_text(stream):
+        for section, obj in parser.feed(text):
+            if on_section:
+                on_section(section, obj)
+    data = parser.finish()
+    logger.info(f"Streamed script with {len(data['conversation'])} turns")
+    return data
@@ -0,0 +1,119 @@
+"""Module for running pipeline stages as a dependency graph."""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional
+
+from create_audio.logger_utils import PodcastLogger
+
+# Initialize logger
+logger = PodcastLogger("StageGraph")
+
+
+class Stage:
+    """A named unit of work and the stages it depends on."""
+
+    def __init__(self, name: str, fn: Callable[[Dict[str, Any]], Any], deps: Optional[List[str]] = None):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps or [])
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+class StageGraph:
+    """Runs each stage as soon as all of its dependencies have finished.
+
+    Stage functions receive the dict of results produced so far (keyed by
+    stage name) and return their own result. Independent stages run
+    concurrently on a thread pool; per-stage timings and the critical
+    path are logged when the graph finishes.
+    """
+
+    def __init__(self, name: str, max_workers: int = 4):
+        self.name = name
+        self.max_workers = max_workers
+        self.stages: Dict[str, Stage] = {}
+        self.results: Dict[str, Any] = {}
+        self._started_at: Optional[float] = None
+
+    def add(self, name: str, fn: Callable[[Dict[str, Any]], Any], deps: Optional[List[str]] = None) -> "StageGraph":
+        if name in self.stages:
+            raise ValueError(f"Stage {name} already defined")
+        for dep in deps or []:
+            if dep not in self.stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dep}")
+        self.stages[name] = Stage(name, fn, deps)
+        return self
+
+    def _run_stage(self, stage: Stage):
+        stage.started_at = time.time()
+        try:
+            return stage.fn(self.results)
+        finally:
+            stage.finished_at = time.time()
+
+    def run(self) -> Dict[str, Any]:
+        """Run all stages and return their results. The first failure is re-raised."""
+        self._started_at = time.time()
+        pending = dict(self.stages)
+        running = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                while pending or running:
+                    for name in [n for n, s in pending.items() if all(d in self.results for d in s.deps)]:
+                        running[executor.submit(self._run_stage, pending.pop(name))] = name
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        try:
+                            self.results[name] = future.result()
+                        except Exception as e:
+                            logger.error(f"Stage {name} of {self.name} failed: {str(e)}")
+                            pending.clear()
+                            raise
+        finally:
+            self.log_timings()
+        return self.results
+
+    def critical_path(self) -> List[str]:
+        """Stages on the longest dependency chain, ending at the last stage to finish."""
+        finished = [s for s in self.stages.values() if s.finished_at is not None]
+        if not finished:
+            return []
+        path = [max(finished, key=lambda s: s.finished_at)]
+        while path[-1].deps:
+            deps = [self.stages[d] for d in path[-1].deps if self.stages[d].finished_at is not None]
+            if not deps:
+                break
+            path.append(max(deps, key=lambda s: s.finished_at))
+        return [s.name for s in reversed(path)]
+
+    def timings(self) -> Dict[str, Dict[str, float]]:
+        """Start, end and duration of each stage in seconds from the graph start."""
+        return {
+            s.name: {
+                "start": s.started_at - self._started_at,
+                "end": s.finished_at - self._started_at,
+                "duration": s.duration
+            }
+            for s in self.stages.values()
+            if s.started_at is not None and s.finished_at is not None
+        }
+
+    def log_timings(self):
+        timings = self.timings()
+        if not timings:
+            return
+        logger.info(f"\n=== Stage timings for {self.name} ===")
+        for name, t in sorted(timings.items(), key=lambda item: item[1]["start"]):
+            logger.info(f"{name:<24} {t['start']:>8.2f}s -> {t['end']:>8.2f}s  ({t['duration']:.2f}s)")
+        total = max(t["end"] for t in timings.values())
+        serial = sum(t["duration"] for t in timings.values())
+        logger.info(f"Wall clock: {total:.2f}s, sum of stages: {serial:.2f}s")
+        logger.info(f"Critical path: {' -> '.join(self.critical_path())}")
@@ -0,0 +1,232 @@
+"""Tests for planning and rendering conversation mixes."""
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+from pydub.generators import Sine
+from pydub.utils import get_encoder_name
+
+from create_audio.audio_mixer import (
+    INT16_MAX, ClipStore, PCMStreamWriter, Placement, StreamingMixer, db_to_gain, peak_normalize_gain,
+    plan_conversation, plan_turn, render_mix, render_mix_streaming, render_placements, render_window, to_segment
+)
+from create_audio.combine_audio import iter_combination_plan, plan_combination
+from create_audio.conversation import Conversation, ConversationTurn
+
+FRAME_RATE = 16000
+
+# pydub encodes and decodes everything but WAV with the ffmpeg on PATH
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+
+
+class CollectingWriter:
+    """Stands in for PCMStreamWriter and keeps the chunks it is given."""
+
+    def __init__(self, frame_rate=FRAME_RATE, channels=1):
+        self.frame_rate = frame_rate
+        self.channels = channels
+        self.chunks = []
+
+    def write(self, samples):
+        self.chunks.append(samples.copy())
+
+    def close(self):
+        return "collected"
+
+    @property
+    def samples(self):
+        return np.concatenate(self.chunks)
+
+
+def write_tone(path, ms, freq=440, volume=-20):
+    tone = Sine(freq, sample_rate=FRAME_RATE).to_audio_segment(duration=ms, volume=volume)
+    tone.export(str(path), format=str(path).rsplit(".", 1)[-1])
+    return str(path)
+
+
+def decode(path):
+    raw = subprocess.run([get_encoder_name(), "-loglevel", "error", "-i", path, "-f", "s16le", "-"],
+                         capture_output=True, check=True).stdout
+    return np.frombuffer(raw, dtype=np.int16)
+
+
+@pytest.fixture
+def peak_leveling(monkeypatch):
+    monkeypatch.setenv("AUDIO_LEVELING", "peak")
+
+
+@pytest.fixture
+def conversation_clips(tmp_path):
+    lines = {"Emma_1": (1000, 440), "Liam_2": (2000, 330), "Emma_overlap_2": (500, 550), "Emma_3": (700, 660)}
+    audio_files = {key: write_tone(tmp_path / f"{key}.wav", ms, freq) for key, (ms, freq) in lines.items()}
+    conversation = Conversation([
+        ConversationTurn(1, "Emma", "Welcome to the show"),
+        ConversationTurn(2, "Liam", "Thanks for having me", overlap_with={"Emma": "Of course"}),
+        ConversationTurn(3, "Emma", "Let's begin"),
+    ], topic="Testing", speakers=["Emma", "Liam"])
+    return conversation, audio_files
+
+
+def test_plan_places_turns_back_to_back_and_overlaps_before_the_end(peak_leveling, conversation_clips):
+    conversation, audio_files = conversation_clips
+    clips = ClipStore()
+    plan = plan_conversation(conversation, audio_files, clips)
+
+    assert [(p.key, p.start, p.frames) for p in plan.placements] == [
+        ("Emma_1", 0, 16000),
+        ("Liam_2", 16000, 32000),
+        # 500 ms lead before the end of the 2 s main line
+        ("Emma_overlap_2", 16000 + 32000 - 8000 - 8000, 8000),
+        ("Emma_3", 48000, 11200),
+    ]
+    assert plan.total_frames == 59200 and plan.duration_ms == 3700
+
+    main, overlap = plan.placements[1], plan.placements[2]
+    assert main.gain == pytest.approx(peak_normalize_gain(clips.get(audio_files["Liam_2"])))
+    assert (main.fade_in, main.fade_out, main.base_gain) == (0, 0, 1.0)
+    assert overlap.gain == pytest.approx(peak_normalize_gain(clips.get(audio_files["Emma_overlap_2"])) * db_to_gain(-3))
+    assert (overlap.fade_in, overlap.fade_out) == (3200, 3200)  # 200 ms crossfades
+    assert overlap.base_gain == pytest.approx(db_to_gain(-2))
+
+
+def test_overlap_too_short_for_crossfades_is_not_faded(peak_leveling, tmp_path):
+    audio_files = {"Liam_1": write_tone(tmp_path / "Liam_1.wav", 1000),
+                   "Emma_overlap_1": write_tone(tmp_path / "Emma_overlap_1.wav", 300)}
+    turn = ConversationTurn(1, "Liam", "Hi", overlap_with={"Emma": "Hey"})
+    placements, cursor = plan_turn(turn, audio_files, ClipStore(), 1000)
+    assert (placements[1].start, placements[1].fade_in, placements[1].fade_out) == (1000 + 16000 - 4800 - 8000, 0, 0)
+    assert cursor == 17000
+
+
+def test_envelope_applies_gain_and_linear_fades():
+    placement = Placement("line", None, 0, 100, gain=0.5, fade_in=10, fade_out=20)
+    envelope = placement.envelope(0, 100)
+    assert envelope[0] == 0 and envelope[5] == pytest.approx(0.25)
+    assert envelope[50] == pytest.approx(0.5)
+    assert envelope[90] == pytest.approx(0.25) and envelope[99] == pytest.approx(0.025)
+    # A window into the placement sees the same envelope
+    assert np.array_equal(placement.envelope(85, 10), envelope[85:95])
+
+
+def test_render_ducks_base_audio_and_clips_on_export(tmp_path):
+    clips = ClipStore()
+    loud = write_tone(tmp_path / "loud.wav", 100, volume=-1)
+    peak = float(np.abs(clips.get(loud)).max()) / INT16_MAX
+    placements = [
+        Placement("main", loud, 0, 1600),
+        Placement("overlap", loud, 800, 800, base_gain=0.5),
+        Placement("fade", None, 1200, 400, fade_out=400),
+    ]
+    mixed = render_placements(placements, clips, 0, 1600, 1)
+
+    source = clips.get(loud)[:, 0].astype(np.float32) / INT16_MAX
+    assert np.allclose(mixed[:800, 0], source[:800])
+    assert np.allclose(mixed[800:1200, 0], source[800:1200] * 0.5 + source[:400], atol=1e-6)
+    assert abs(mixed[1599, 0]) < abs(mixed[1200:1600, 0]).max() / 100
+    # Windows render the same frames as the whole timeline
+    parts = [render_placements(placements, clips, lo, lo + 300, 1) for lo in range(0, 1600, 300)]
+    assert np.allclose(np.concatenate(parts)[:1600], mixed)
+
+    assert np.abs(mixed).max() > peak  # The summed overlap exceeds full scale...
+    pcm = np.frombuffer(to_segment(mixed, FRAME_RATE).raw_data, dtype=np.int16)
+    assert pcm.max() == 32767 and pcm.min() == -32768  # ...and is clipped, not wrapped
+
+
+def test_clip_store_decodes_each_clip_once(conversation_clips):
+    conversation, audio_files = conversation_clips
+    clips = ClipStore()
+    plan = plan_conversation(conversation, audio_files, clips)
+    render_window(plan, clips, 0, plan.total_frames)
+    render_window(plan, clips, 0, plan.total_frames)
+    assert clips.decodes == len(audio_files)
+
+    # A budget smaller than one clip drops samples but remembers lengths
+    bounded = ClipStore(max_resident_mb=0.01)
+    assert [bounded.frames(path) for path in audio_files.values()] == [16000, 32000, 8000, 11200]
+    assert bounded.resident_bytes <= 11200 * 2 and bounded.decodes == len(audio_files)
+
+
+def test_streaming_mixer_matches_whole_render(conversation_clips):
+    conversation, audio_files = conversation_clips
+    clips = ClipStore()
+    plan = plan_conversation(conversation, audio_files, clips)
+    whole = render_window(plan, clips, 0, plan.total_frames)
+
+    writer = CollectingWriter()
+    streamed_clips = ClipStore(max_resident_mb=0.01)
+    mixer = StreamingMixer(writer, streamed_clips, window_seconds=0.3)
+    cursor = 0
+    for turn in conversation.turns:
+        placements, cursor = plan_turn(turn, audio_files, streamed_clips, cursor)
+        mixer.place(placements)
+        mixer.advance(cursor)
+    mixer.close(cursor)
+
+    assert len(writer.chunks) > len(conversation.turns)
+    assert np.array_equal(writer.samples, whole)
+
+
+@needs_ffmpeg
+def test_render_mix_streaming_matches_render_mix(conversation_clips, tmp_path):
+    conversation, audio_files = conversation_clips
+    whole_path, plan = render_mix(conversation, audio_files, str(tmp_path / "whole.mp3"), bitrate="128k")
+    placed = []
+    streamed_path = render_mix_streaming(conversation, audio_files, str(tmp_path / "streamed.mp3"),
+                                         bitrate="128k", placed=placed)
+
+    assert [(p.key, p.start) for p in placed] == [(p.key, p.start) for p in plan.placements]
+    whole, streamed = decode(whole_path), decode(streamed_path)
+    assert len(whole) == len(streamed)
+    assert np.array_equal(whole, streamed)
+
+
+def test_conversation_without_turns_is_rejected(tmp_path):
+    empty = Conversation([], topic="Testing", speakers=["Emma", "Liam"])
+    for render in (render_mix, render_mix_streaming):
+        with pytest.raises(ValueError, match="no turns"):
+            render(empty, {}, str(tmp_path / "mix.mp3"))
+    assert list(tmp_path.iterdir()) == []
+
+@needs_ffmpeg
+def test_normalizing_writer_matches_in_memory_normalization(tmp_path):
+    rng = np.random.default_rng(0)
+    chunks = [rng.uniform(-0.4, 0.4, (1000, 1)).astype(np.float32) for _ in range(5)]
+    chunks[3][10] = 1.7  # Peak in a later chunk, above full scale
+
+    writer = PCMStreamWriter(str(tmp_path / "streamed.wav"), FRAME_RATE, 1, format="wav", normalize=True)
+    for chunk in chunks:
+        writer.write(chunk)
+    streamed = decode(writer.close())
+
+    whole = np.concatenate(chunks)
+    expected = np.frombuffer(to_segment(whole * (db_to_gain(-0.1) / 1.7), FRAME_RATE).raw_data, dtype=np.int16)
+    assert writer.frames_written == 5000
+    assert np.array_equal(streamed, expected)
+
+
+@needs_ffmpeg
+def test_combination_plan_streams_the_same_audio(tmp_path):
+    for name, ms, freq in [("Emma_1", 900, 440), ("Jake_2", 1200, 330), ("Jake_3", 600, 550), ("Emma_4", 800, 660),
+                           ("overlap_3", 400, 770)]:
+        write_tone(tmp_path / f"{name}.mp3", ms, freq)
+    audio_files = ["Emma_1.mp3", "Jake_2.mp3", "Jake_3.mp3", "Emma_4.mp3"]
+    overlap_info = {3: {"speaker": "Emma", "text": "Right"}}
+
+    clips = ClipStore()
+    plan = plan_combination(str(tmp_path), audio_files, clips, overlap_info)
+    assert any(p.key == "overlap_3" for p in plan.placements)
+    whole = render_window(plan, clips, 0, plan.total_frames)
+
+    writer = CollectingWriter()
+    streamed_clips = ClipStore(max_resident_mb=0.01)
+    mixer = StreamingMixer(writer, streamed_clips, window_seconds=0.25)
+    cursor = 0
+    for placements, frontier in iter_combination_plan(str(tmp_path), audio_files, streamed_clips, overlap_info):
+        mixer.place(placements)
+        mixer.advance(frontier)
+        cursor = max([cursor] + [p.end for p in placements])
+    mixer.close(cursor)
+
+    assert cursor == plan.total_frames
+    assert np.array_equal(writer.samples, whole)
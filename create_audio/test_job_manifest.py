@@ -0,0 +1,99 @@
+"""Crash-injection tests for resuming checkpointed audio jobs."""
+import collections
+
+import pytest
+
+from create_audio.job_manifest import JobManifest
+from create_audio.stage_graph import StageGraph
+from create_audio.tts_engine import TTSEngine, TTSRequest
+
+# Same shape as the graph built by generate_conversation
+PIPELINE = [
+    ("script", []),
+    ("schema", ["script"]),
+    ("podcast_intro_script", ["script"]),
+    ("podcast_intro_audio", ["podcast_intro_script"]),
+    ("turn_audio", ["script"]),
+    ("mix", ["script"]),
+    ("audio_record", ["schema", "podcast_intro_audio", "turn_audio", "mix"]),
+]
+
+
+class Crash(Exception):
+    pass
+
+
+def run_pipeline(output_dir, runs, crash_at=None):
+    manifest = JobManifest(str(output_dir))
+    graph = StageGraph("test job", max_workers=1)
+
+    def stage_fn(name):
+        def fn(results):
+            runs[name] += 1
+            if name == crash_at:
+                raise Crash(name)
+            path = output_dir / f"{name}.out"
+            path.write_text(name)
+            return str(path)
+        return fn
+
+    for name, deps in PIPELINE:
+        graph.add(name, manifest.checkpoint(name, stage_fn(name), paths=True), deps=deps)
+    return graph.run()
+
+
+@pytest.mark.parametrize("crash_at", [name for name, _ in PIPELINE])
+def test_resume_only_reruns_unfinished_stages(tmp_path, crash_at):
+    runs = collections.Counter()
+    with pytest.raises(Crash):
+        run_pipeline(tmp_path, runs, crash_at=crash_at)
+    results = run_pipeline(tmp_path, runs)
+
+    assert set(results) == {name for name, _ in PIPELINE}
+    for name, _ in PIPELINE:
+        assert runs[name] == (2 if name == crash_at else 1), name
+
+
+def test_missing_output_reruns_completed_stage(tmp_path):
+    runs = collections.Counter()
+    run_pipeline(tmp_path, runs)
+    (tmp_path / "mix.out").unlink()
+    run_pipeline(tmp_path, runs)
+    assert runs["mix"] == 2
+    assert runs["script"] == 1
+
+
+def test_turn_audio_resumes_after_tts_failure(tmp_path):
+    calls = []
+    fail_on = {"Turn 17"}
+
+    def convert(voice_id, output_format, text, model_id):
+        calls.append(text)
+        if text in fail_on:
+            raise Crash(text)
+        yield text.encode()
+
+    engine = TTSEngine(convert=convert, requests_per_second=1000, max_in_flight=1)
+    requests = [TTSRequest(f"Emma_{i}", "v1", f"Turn {i}", str(tmp_path / f"Emma_{i}.mp3"))
+                for i in range(1, 21)]
+    with pytest.raises(Crash):
+        engine.synthesize_all(requests)
+    first_attempt = len(calls)
+    assert not list(tmp_path.glob("*.part"))
+
+    fail_on.clear()
+    engine.synthesize_all(requests)
+    resumed = calls[first_attempt:]
+    assert "Turn 17" in resumed
+    assert len(resumed) == 20 - (first_attempt - 1)
+    assert all((tmp_path / f"Emma_{i}.mp3").read_bytes() == f"Turn {i}".encode() for i in range(1, 21))
+
+
+def test_clips_from_unfinished_script_are_discarded(tmp_path):
+    clip = tmp_path / "Emma_1.mp3"
+    clip.write_bytes(b"stale")
+    JobManifest(str(tmp_path)).add_clips([str(clip)])
+
+    resumed = JobManifest(str(tmp_path))
+    assert resumed.discard_clips() == 1
+    assert not clip.exists()
@@ -0,0 +1,40 @@
+"""Tests for EBU R128 loudness measurement and leveling."""
+import numpy as np
+import pytest
+
+from create_audio.loudness import ducking_gain_curve, integrated_loudness, leveling_gain
+
+
+def tone(db_fs, seconds, frame_rate, channels=2, freq=1000.0):
+    t = np.arange(int(frame_rate * seconds)) / frame_rate
+    wave = 10 ** (db_fs / 20) * np.sin(2 * np.pi * freq * t)
+    return np.stack([wave] * channels, axis=1)
+
+
+@pytest.mark.parametrize("frame_rate", [44100, 48000])
+def test_reference_tone_measures_minus_23_lufs(frame_rate):
+    # EBU Tech 3341: a 1 kHz stereo sine at -23 dBFS reads -23 LUFS
+    assert integrated_loudness(tone(-23, 20, frame_rate), frame_rate) == pytest.approx(-23, abs=0.1)
+
+
+def test_silence_is_gated_out():
+    rate = 48000
+    signal = np.concatenate([tone(-23, 10, rate), np.zeros((rate * 10, 2)), tone(-23, 10, rate)])
+    assert integrated_loudness(signal, rate) == pytest.approx(-23, abs=0.1)
+    assert integrated_loudness(np.zeros((rate, 2)), rate) == float("-inf")
+
+
+def test_leveling_gain_reaches_target_for_int16():
+    rate = 44100
+    quiet = (tone(-30, 5, rate, channels=1) * 32767).astype(np.int16)
+    gain = leveling_gain(quiet, rate, target_lufs=-20)
+    leveled = quiet.astype(np.float64) / 32768 * gain
+    assert integrated_loudness(leveled, rate) == pytest.approx(-20, abs=0.1)
+
+
+def test_ducking_lowers_music_while_speech_plays():
+    rate = 44100
+    speech = np.concatenate([tone(-20, 6, rate, freq=300), np.zeros((rate * 6, 2))])
+    curve = ducking_gain_curve(speech, rate, music_lufs=-20, duck_lu=15, bed_lufs=-26)
+    assert len(curve) == len(speech)
+    assert curve[rate * 2] < curve[rate * 10]
@@ -0,0 +1,45 @@
+"""Tests for the per-episode overlap render budget."""
+import os
+import random
+
+os.environ.setdefault("OPENAI_API_KEY", "test")  # The module builds its OpenAI client on import
+
+from create_audio.conversation_generator import estimate_overlap_seconds, get_overlap_budget, optimise_overlapping
+
+
+def script(overlaps):
+    return {"conversation": [
+        {"order": n + 1, "speaker": "A", "text": "Main line", "overlap_with": {"B": text} if text else {}}
+        for n, text in enumerate(overlaps)
+    ]}
+
+
+def test_overlaps_past_the_budget_are_dropped():
+    # Five 2-second overlaps (five words each) against a 5-second budget
+    data = script(["one two three four five"] * 5 + [None])
+    random.seed(3)
+    optimise_overlapping(data, "overlap_with", None, max_render_seconds=5)
+
+    kept = [entry["overlap_with"] for entry in data["conversation"] if entry["overlap_with"]]
+    assert len(kept) == 2
+    assert sum(estimate_overlap_seconds(text) for overlap in kept for text in overlap.values()) <= 5
+    # Main lines are never touched
+    assert [entry["text"] for entry in data["conversation"]] == ["Main line"] * 6
+
+
+def test_overlaps_within_the_budget_are_kept():
+    data = script(["Right!", "Exactly, yes", None])
+    optimise_overlapping(data, "overlap_with", None, max_render_seconds=60)
+    assert [entry["overlap_with"] for entry in data["conversation"]] == [{"B": "Right!"}, {"B": "Exactly, yes"}, {}]
+
+    # Without a budget only the per-turn limit applies
+    data = {"conversation": [{"overlap_with": {"B": "Yes", "C": "No"}}]}
+    optimise_overlapping(data, "overlap_with", 1)
+    assert len(data["conversation"][0]["overlap_with"]) == 1
+
+
+def test_budget_from_environment(monkeypatch):
+    monkeypatch.delenv("OVERLAP_MAX_RENDER_SECONDS", raising=False)
+    assert get_overlap_budget() is None
+    monkeypatch.setenv("OVERLAP_MAX_RENDER_SECONDS", "12.5")
+    assert get_overlap_budget() == 12.5
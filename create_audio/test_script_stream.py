@@ -0,0 +1,69 @@
+"""Tests for streamed script parsing and early TTS dispatch."""
+import os
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from create_audio.script_stream import ScriptStreamError, stream_conversation_script
+from create_audio.tts_engine import TTSEngine, TTSRequest
+
+RECORDED_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample-conversation.json")
+
+
+def fake_stream(text, chunk_size=7, consumed=None):
+    """Yield chat completion chunks the way the OpenAI client streams them."""
+    yield SimpleNamespace(choices=[])  # Usage-only chunks carry no choices
+    for i in range(0, len(text), chunk_size):
+        if consumed is not None:
+            consumed.append(i + chunk_size)
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i:i + chunk_size]))])
+
+
+def test_recorded_stream_emits_sections_as_they_complete():
+    with open(RECORDED_SCRIPT) as f:
+        text = f.read()
+    consumed = []
+    sections = []
+
+    def on_section(section, obj):
+        sections.append((section, obj, consumed[-1]))
+
+    data = stream_conversation_script(fake_stream(text, consumed=consumed), on_section=on_section)
+
+    assert data == json.loads(text)
+    assert [s for s, _, _ in sections] == ["intro", "turn", "turn", "outro"]
+    assert [obj for s, obj, _ in sections if s == "turn"] == data["conversation"]
+    # The first turn is handed over long before the stream ends
+    assert sections[1][2] < len(text) // 2
+
+
+def test_truncated_stream_raises_for_fallback():
+    with open(RECORDED_SCRIPT) as f:
+        text = f.read()
+    sections = []
+    with pytest.raises(ScriptStreamError):
+        stream_conversation_script(fake_stream(text[:len(text) * 3 // 4]),
+                                   on_section=lambda section, obj: sections.append(section))
+    assert sections[:3] == ["intro", "turn", "turn"]
+
+
+def test_synthesize_all_waits_for_early_dispatch(tmp_path):
+    calls = []
+    release = threading.Event()
+
+    def convert(voice_id, output_format, text, model_id):
+        calls.append(text)
+        release.wait(5)
+        yield text.encode()
+
+    engine = TTSEngine(convert=convert, requests_per_second=100, max_in_flight=2)
+    request = TTSRequest("Emma_1", "v1", "Hello", str(tmp_path / "Emma_1.mp3"))
+    future = engine.submit(request)
+    threading.Timer(0.2, release.set).start()  # Still in flight when synthesize_all runs
+    audio_files = engine.synthesize_all([TTSRequest("Emma_1", "v1", "Hello", request.output_path)])
+
+    assert future.result() == request.output_path
+    assert audio_files == {"Emma_1": request.output_path}
+    assert calls == ["Hello"]
@@ -0,0 +1,108 @@
+"""Tests for running pipeline stages as a dependency graph."""
+import threading
+
+import pytest
+
+from create_audio.job_manifest import JobManifest
+from create_audio.stage_graph import StageGraph
+
+
+class Boom(Exception):
+    pass
+
+
+def test_stages_run_after_their_dependencies():
+    seen = {}
+
+    def stage(name, value):
+        def fn(results):
+            seen[name] = dict(results)
+            return value
+        return fn
+
+    graph = StageGraph("ordering", max_workers=4)
+    graph.add("script", stage("script", 1))
+    graph.add("intro", stage("intro", 2), deps=["script"])
+    graph.add("mix", stage("mix", 3), deps=["script"])
+    graph.add("record", stage("record", 4), deps=["intro", "mix"])
+
+    assert graph.run() == {"script": 1, "intro": 2, "mix": 3, "record": 4}
+    assert seen["script"] == {}
+    assert seen["intro"]["script"] == 1 and seen["mix"]["script"] == 1
+    assert seen["record"] == {"script": 1, "intro": 2, "mix": 3}
+    assert graph.critical_path()[0] == "script" and graph.critical_path()[-1] == "record"
+    timings = graph.timings()
+    assert timings["script"]["end"] <= min(timings["intro"]["start"], timings["mix"]["start"])
+
+
+def test_independent_stages_run_concurrently():
+    # Each stage only returns once the other has started
+    both_started = threading.Barrier(2, timeout=5)
+
+    def stage(results):
+        both_started.wait()
+        return True
+
+    graph = StageGraph("parallel", max_workers=2)
+    graph.add("intro", stage)
+    graph.add("mix", stage)
+    assert graph.run() == {"intro": True, "mix": True}
+
+
+def test_failure_is_raised_and_dependents_never_start():
+    started = []
+    slow_started = threading.Event()
+
+    def stage(name, fail=False):
+        def fn(results):
+            started.append(name)
+            if fail:
+                slow_started.wait(5)
+                raise Boom(name)
+            if name == "slow":
+                slow_started.set()
+            return name
+        return fn
+
+    graph = StageGraph("failure", max_workers=2)
+    graph.add("script", stage("script", fail=True))
+    graph.add("slow", stage("slow"))
+    graph.add("mix", stage("mix"), deps=["script"])
+    graph.add("record", stage("record"), deps=["mix", "slow"])
+
+    with pytest.raises(Boom):
+        graph.run()
+    assert sorted(started) == ["script", "slow"]
+    # A stage already running when another fails is left to finish
+    assert set(graph.timings()) == {"script", "slow"}
+
+
+def test_checkpointed_stage_is_skipped_and_its_result_reused(tmp_path):
+    manifest = JobManifest(str(tmp_path))
+    manifest.record("script", {"turns": 3})
+    calls = []
+
+    def script(results):
+        calls.append("script")
+        return {"turns": 0}
+
+    def mix(results):
+        calls.append("mix")
+        return results["script"]["turns"]
+
+    graph = StageGraph("resume", max_workers=2)
+    graph.add("script", manifest.checkpoint("script", script))
+    graph.add("mix", manifest.checkpoint("mix", mix), deps=["script"])
+
+    assert graph.run() == {"script": {"turns": 3}, "mix": 3}
+    assert calls == ["mix"]
+    assert JobManifest(str(tmp_path)).get("mix") == 3
+
+
+def test_unknown_or_duplicate_stage_is_rejected():
+    graph = StageGraph("invalid")
+    graph.add("script", lambda results: None)
+    with pytest.raises(ValueError):
+        graph.add("script", lambda results: None)
+    with pytest.raises(ValueError):
+        graph.add("mix", lambda results: None, deps=["schema"])
@@ -0,0 +1,58 @@
+"""Tests for the content-addressed TTS cache and its use by the TTS engine."""
+import os
+import time
+
+from create_audio.tts_cache import TTSCache, make_cache_key
+from create_audio.tts_engine import TTSEngine, TTSRequest
+
+
+def fake_convert_factory(calls):
+    def convert(voice_id, output_format, text, model_id):
+        calls.append(text)
+        yield f"{voice_id}:{text}".encode()
+    return convert
+
+
+def test_cache_key_ignores_cosmetic_whitespace():
+    a = make_cache_key("v1", "m", "mp3_44100_128", "Thanks for  listening!\n")
+    b = make_cache_key("v1", "m", "mp3_44100_128", " Thanks for listening!")
+    c = make_cache_key("v2", "m", "mp3_44100_128", "Thanks for listening!")
+    assert a == b
+    assert a != c
+
+
+def test_engine_reuses_cached_lines_across_jobs(tmp_path):
+    calls = []
+    cache = TTSCache(str(tmp_path / "cache"))
+    engine = TTSEngine(convert=fake_convert_factory(calls), requests_per_second=100,
+                       max_in_flight=2, cache=cache)
+
+    for job in ("job1", "job2"):
+        job_dir = tmp_path / job
+        job_dir.mkdir()
+        engine.synthesize_all([
+            TTSRequest("Emma_1", "v1", "Welcome to the show", str(job_dir / "Emma_1.mp3")),
+            TTSRequest("Jake_2", "v2", f"Topic for {job}", str(job_dir / "Jake_2.mp3")),
+        ])
+
+    assert calls.count("Welcome to the show") == 1
+    assert (tmp_path / "job2" / "Emma_1.mp3").read_bytes() == b"v1:Welcome to the show"
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+
+
+def test_lru_eviction_keeps_recently_used_entries(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=20)
+    first = cache.store("v", "m", "mp3_44100_128", "first", [b"x" * 10])
+    old = time.time() - 100
+    os.utime(first, (old, old))
+    cache.store("v", "m", "mp3_44100_128", "second", [b"y" * 10])
+    assert cache.lookup("v", "m", "mp3_44100_128", "first")  # Refreshes "first"
+    second = cache.lookup("v", "m", "mp3_44100_128", "second")
+    os.utime(second, (old, old))
+    cache.store("v", "m", "mp3_44100_128", "third", [b"z" * 10])
+
+    assert cache.lookup("v", "m", "mp3_44100_128", "first")
+    assert cache.lookup("v", "m", "mp3_44100_128", "second") is None
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,141 @@
+"""Tests for rate limiting, concurrency and deduplication in the TTS engine."""
+import threading
+
+import pytest
+
+from create_audio import tts_engine
+from create_audio.tts_engine import TokenBucket, TTSEngine, TTSRequest
+
+
+class FakeClock:
+    """Stands in for the time module: sleeping advances the clock instantly."""
+
+    def __init__(self):
+        self.now = 0.0
+        self._lock = threading.Lock()
+
+    def monotonic(self):
+        with self._lock:
+            return self.now
+
+    time = monotonic
+
+    def sleep(self, seconds):
+        with self._lock:
+            self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(tts_engine, "time", clock)
+    return clock
+
+
+def requests_for(tmp_path, count, speaker="Emma"):
+    return [TTSRequest(f"{speaker}_{i}", "v1", f"Turn {i}", str(tmp_path / f"{speaker}_{i}.mp3"))
+            for i in range(1, count + 1)]
+
+
+def test_bucket_allows_a_burst_then_the_sustained_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    admitted = []
+    for _ in range(7):
+        bucket.acquire()
+        admitted.append(clock.now)
+    assert admitted == pytest.approx([0, 0, 0, 0.5, 1.0, 1.5, 2.0])
+
+    clock.sleep(10)  # Idle time refills the bucket, but only up to its capacity
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.now == pytest.approx(12.5)
+
+
+def test_engine_starts_requests_at_the_bucket_rate(clock, tmp_path):
+    started = []
+
+    def convert(voice_id, output_format, text, model_id):
+        started.append(clock.now)
+        yield text.encode()
+
+    # One in flight, so the fake clock only ever advances for one sleeper
+    engine = TTSEngine(convert=convert, requests_per_second=4, max_in_flight=1)
+    engine.synthesize_all(requests_for(tmp_path, 10))
+    # A burst of four, then one every quarter second
+    assert started == pytest.approx([0, 0, 0, 0, 0.25, 0.5, 0.75, 1.0, 1.25, 1.5])
+
+
+def test_requests_in_flight_are_bounded(tmp_path):
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+    both_running = threading.Barrier(2, timeout=5)
+
+    def convert(voice_id, output_format, text, model_id):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        both_running.wait()  # Every request overlaps another one
+        with lock:
+            running[0] -= 1
+        yield text.encode()
+
+    engine = TTSEngine(convert=convert, requests_per_second=1000, max_in_flight=2)
+    results = engine.synthesize_all(requests_for(tmp_path, 8))
+    assert peak[0] == 2
+    assert list(results) == [f"Emma_{i}" for i in range(1, 9)]
+    assert all(open(path, "rb").read() == f"Turn {i}".encode() for i, path in enumerate(results.values(), 1))
+
+
+def test_duplicate_output_path_shares_the_future(tmp_path):
+    calls = []
+    release = threading.Event()
+
+    def convert(voice_id, output_format, text, model_id):
+        calls.append(text)
+        release.wait(5)
+        yield text.encode()
+
+    engine = TTSEngine(convert=convert, requests_per_second=1000, max_in_flight=2)
+    request = requests_for(tmp_path, 1)[0]
+    duplicate = TTSRequest("Emma_1_again", "v1", "Turn 1", request.output_path)
+    first = engine.submit(request)
+    assert engine.submit(duplicate) is first
+
+    # synthesize_all awaits the queued line instead of requesting it again
+    submit = engine.submit
+
+    def submit_then_release(r):
+        future = submit(r)
+        release.set()
+        return future
+
+    engine.submit = submit_then_release
+    assert engine.synthesize_all([duplicate]) == {"Emma_1_again": request.output_path}
+    assert first.result() == request.output_path and calls == ["Turn 1"]
+
+
+def test_on_complete_reports_each_clip_as_it_lands(tmp_path):
+    requests = requests_for(tmp_path, 3)
+    with open(requests[2].output_path, "wb") as f:
+        f.write(b"from an earlier attempt")
+    second_done = threading.Event()
+
+    def convert(voice_id, output_format, text, model_id):
+        if text == "Turn 1":
+            second_done.wait(5)  # Turn 1 finishes after Turn 2
+        yield text.encode()
+
+    completed = []
+
+    def on_complete(key, path):
+        completed.append(key)
+        if key == "Emma_2":
+            second_done.set()
+
+    engine = TTSEngine(convert=convert, requests_per_second=1000, max_in_flight=2)
+    results = engine.synthesize_all(requests, on_complete=on_complete)
+    # Clips already on disk first, then in completion order; results stay in request order
+    assert completed == ["Emma_3", "Emma_2", "Emma_1"]
+    assert list(results) == ["Emma_1", "Emma_2", "Emma_3"]
+    assert open(requests[2].output_path, "rb").read() == b"from an earlier attempt"
@@ -0,0 +1,45 @@
+"""Tests for the turn-timing index written alongside the conversation mix."""
+import json
+
+import pytest
+from pydub.generators import Sine
+
+from create_audio.audio_mixer import ClipStore, plan_conversation
+from create_audio.audio_utils import save_turn_timings
+from create_audio.conversation import Conversation, ConversationTurn
+from utils.turn_timings import load_turn_timings
+
+
+@pytest.fixture
+def planned_mix(tmp_path):
+    lines = {"Emma_1": 2000, "Liam_2": 3000, "Emma_overlap_2": 1000}
+    for key, ms in lines.items():
+        Sine(440).to_audio_segment(duration=ms, volume=-20).export(str(tmp_path / f"{key}.wav"), format="wav")
+    conversation = Conversation([
+        ConversationTurn(1, "Emma", "Welcome to the show"),
+        ConversationTurn(2, "Liam", "Thanks for having me", overlap_with={"Emma": "Of course"}),
+    ], topic="Testing", speakers=["Emma", "Liam"])
+    schema_path = tmp_path / "conversation.json"
+    schema_path.write_text(json.dumps(conversation.to_dict()))
+    clips = ClipStore()
+    plan = plan_conversation(conversation, {key: str(tmp_path / f"{key}.wav") for key in lines}, clips)
+    output_path = str(tmp_path / "final_mix.mp3")
+    save_turn_timings(conversation, plan.placements, clips.frame_rate, output_path)
+    return str(schema_path), output_path, plan.duration_ms / 1000
+
+
+def test_index_holds_line_offsets_in_the_mix(planned_mix):
+    schema_path, output_path, duration = planned_mix
+    turns = load_turn_timings(schema_path, output_path, duration)
+    assert [(t["speaker"], t["overlap"], t["text"], t["start"], t["end"]) for t in turns] == [
+        ("Emma", False, "Welcome to the show", 0.0, 2.0),
+        ("Liam", False, "Thanks for having me", 2.0, 5.0),
+        ("Emma", True, "Of course", 3.5, 4.5),  # Starts 500 ms before the end of the main line
+    ]
+
+
+def test_other_audio_is_not_matched(planned_mix):
+    schema_path, output_path, duration = planned_mix
+    assert load_turn_timings(schema_path, output_path.replace("final_mix", "external"), duration) is None
+    assert load_turn_timings(schema_path, output_path, duration + 5) is None
+    assert load_turn_timings(None, output_path, duration) is None
@@ -0,0 +1,124 @@
+"""Module for the shared, content-addressed text-to-speech cache."""
+import os
+import re
+import hashlib
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from create_audio.logger_utils import PodcastLogger
+from utils.disk_lru import DiskLRU, link_or_copy
+
+# Initialize logger
+logger = PodcastLogger("TTSCache")
+
+DEFAULT_CACHE_DIR = os.path.join(str(Path(__file__).parent.parent), "cache", "tts")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so cosmetic whitespace differences share a cache entry."""
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def make_cache_key(voice_id: str, model_id: str, output_format: str, text: str) -> str:
+    """Hash everything that changes the synthesized audio."""
+    payload = "\x1f".join([voice_id, model_id, output_format, normalize_text(text)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def write_chunks_atomic(path: str, chunks: Iterable[bytes]) -> str:
+    """Write streamed audio chunks to a temp file and move it into place.
+
+    A crash mid-download never leaves a truncated file behind, so the
+    ``os.path.exists`` checks used to skip finished turns stay reliable.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in chunks:
+                if chunk:  # Ensure chunk is not empty
+                    f.write(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+class TTSCache(DiskLRU):
+    """On-disk TTS cache with size-bounded LRU eviction.
+
+    Entries are stored as ``<sha256>.<ext>`` in ``cache_dir``; the file's
+    mtime is refreshed on every hit and eviction removes the least
+    recently used entries until the cache fits ``max_bytes``. The cache
+    directory can be shared by every worker on a host.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = 2 * 1024 ** 3):
+        super().__init__(cache_dir, max_bytes, label="TTS cache entries")
+        self.hits = 0
+        self.misses = 0
+        self._size = self.size()
+
+    def _path(self, key: str, output_format: str) -> str:
+        ext = output_format.split("_", 1)[0]
+        return os.path.join(self.cache_dir, f"{key}.{ext}")
+
+    def lookup(self, voice_id: str, model_id: str, output_format: str, text: str) -> Optional[str]:
+        """Return the cached file path, or None on a miss."""
+        path = self._path(make_cache_key(voice_id, model_id, output_format, text), output_format)
+        if not self.touch(path):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def store(self, voice_id: str, model_id: str, output_format: str, text: str,
+              chunks: Iterable[bytes]) -> str:
+        """Atomically write streamed audio into the cache and return its path."""
+        path = self._path(make_cache_key(voice_id, model_id, output_format, text), output_format)
+        write_chunks_atomic(path, chunks)
+        with self._lock:
+            self._size += os.path.getsize(path)
+            over_budget = self._size > self.max_bytes
+        if over_budget:
+            self.evict()
+        return path
+
+    def copy_to(self, cached_path: str, output_path: str) -> str:
+        """Materialize a cached entry at a job's output path."""
+        link_or_copy(cached_path, output_path)
+        return output_path
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Remove least recently used entries until the cache fits its budget."""
+        total = super().evict(keep)
+        with self._lock:
+            self._size = total
+        return total
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "size_bytes": self._size,
+            }
+
+
+def get_cache_from_env() -> Optional[TTSCache]:
+    """Build the cache from environment settings, or None if disabled."""
+    if os.getenv("TTS_CACHE_ENABLED", "true").lower() not in ("true", "1", "yes", "on"):
+        return None
+    return TTSCache(
+        cache_dir=os.getenv("TTS_CACHE_DIR") or DEFAULT_CACHE_DIR,
+        max_bytes=int(float(os.getenv("TTS_CACHE_MAX_MB", "2048")) * 1024 * 1024)
+    )
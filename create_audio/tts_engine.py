@@ -0,0 +1,202 @@
+"""Module for concurrent, rate-limited text-to-speech synthesis."""
+import os
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional
+
+from create_audio.logger_utils import PodcastLogger
+from create_audio.tts_cache import TTSCache, get_cache_from_env, write_chunks_atomic
+
+# Initialize logger
+logger = PodcastLogger("TTSEngine")
+
+DEFAULT_MODEL_ID = "eleven_multilingual_v2"
+DEFAULT_OUTPUT_FORMAT = "mp3_44100_128"
+
+
+def get_tts_settings() -> Dict:
+    """Get the TTS rate budget from the environment."""
+    return {
+        "requests_per_second": float(os.getenv("TTS_REQUESTS_PER_SECOND", "2")),
+        "max_in_flight": int(os.getenv("TTS_MAX_IN_FLIGHT", "4")),
+    }
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting how often requests may start."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize the bucket.
+
+        Args:
+            rate: Tokens added per second (sustained requests per second)
+            capacity: Maximum burst size, defaults to ``max(1, rate)``
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a token is available. Returns the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+            waited += wait_time
+
+
+class TTSRequest:
+    """A single piece of text to synthesize into ``output_path``."""
+
+    def __init__(self, key: str, voice_id: str, text: str, output_path: str,
+                 model_id: str = DEFAULT_MODEL_ID, output_format: str = DEFAULT_OUTPUT_FORMAT):
+        self.key = key
+        self.voice_id = voice_id
+        self.text = text
+        self.output_path = output_path
+        self.model_id = model_id
+        self.output_format = output_format
+
+
+class TTSEngine:
+    """Synthesizes batches of TTS requests with bounded concurrency.
+
+    ``convert`` has the signature of ``ElevenLabs.text_to_speech.convert``
+    and returns an iterable of audio byte chunks. Every call first takes a
+    token from the bucket, so the requests-per-second budget holds across
+    all threads (and all jobs) sharing an engine. With a ``cache``, lines
+    already synthesized for any job are copied from disk without an API
+    call or a rate-limit token. Requests queued with ``submit`` share the
+    in-flight future of any request already writing the same output path.
+    """
+
+    def __init__(self, convert: Optional[Callable[..., Iterable[bytes]]] = None,
+                 requests_per_second: Optional[float] = None,
+                 max_in_flight: Optional[int] = None,
+                 cache: Optional[TTSCache] = None):
+        settings = get_tts_settings()
+        if convert is None:
+            from create_audio.elevanlab_util import client
+            convert = client.text_to_speech.convert
+        self.convert = convert
+        self.cache = cache
+        self.max_in_flight = max(1, max_in_flight or settings["max_in_flight"])
+        self.bucket = TokenBucket(requests_per_second or settings["requests_per_second"])
+        self._in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="tts")
+        self._pending: Dict[str, Future] = {}
+        self._pending_lock = threading.Lock()
+
+    def synthesize(self, request: TTSRequest) -> str:
+        """Synthesize one request to its output path."""
+        cache_args = (request.voice_id, request.model_id, request.output_format, request.text)
+        if self.cache:
+            cached_path = self.cache.lookup(*cache_args)
+            if cached_path:
+                try:
+                    return self.cache.copy_to(cached_path, request.output_path)
+                except FileNotFoundError:
+                    pass  # Evicted between lookup and copy, synthesize again
+        with self._in_flight:
+            self.bucket.acquire()
+            response = self.convert(
+                voice_id=request.voice_id,
+                output_format=request.output_format,
+                text=request.text,
+                model_id=request.model_id
+            )
+            if not self.cache:
+                return write_chunks_atomic(request.output_path, response)
+            cached_path = self.cache.store(*cache_args, response)
+        return self.cache.copy_to(cached_path, request.output_path)
+
+    def submit(self, request: TTSRequest) -> Future:
+        """Queue one request in the background and return its future.
+
+        If a request for the same output path is already queued or running,
+        its future is returned instead of synthesizing the line twice.
+        """
+        with self._pending_lock:
+            future = self._pending.get(request.output_path)
+            if future is not None:
+                return future
+            future = self._executor.submit(self.synthesize, request)
+            self._pending[request.output_path] = future
+        # Registered outside the lock: the callback runs inline if already done
+        future.add_done_callback(lambda f, path=request.output_path: self._forget(path, f))
+        return future
+
+    def _forget(self, output_path: str, future: Future):
+        with self._pending_lock:
+            if self._pending.get(output_path) is future:
+                del self._pending[output_path]
+
+    def synthesize_all(self, requests: List[TTSRequest],
+                       on_complete: Optional[Callable[[str, str], None]] = None) -> Dict[str, str]:
+        """Synthesize every request whose output file does not exist yet.
+
+        Returns a mapping of request key to output path, in request order.
+        ``on_complete(key, path)`` is called as soon as each clip is on
+        disk (immediately for clips that already existed), so consumers can
+        start on early turns while later ones are still being synthesized.
+        Lines already queued with ``submit`` are awaited, not requested
+        again. The first failure cancels pending requests and is re-raised.
+        """
+        pending = []
+        for r in requests:
+            if not os.path.exists(r.output_path):
+                pending.append(r)
+            elif on_complete:
+                on_complete(r.key, r.output_path)
+        if pending:
+            logger.info(f"Synthesizing {len(pending)} of {len(requests)} clips "
+                        f"({self.max_in_flight} in flight, {self.bucket.rate:g} req/s)")
+        start_time = time.time()
+        futures = {}
+        for r in pending:
+            futures.setdefault(self.submit(r), []).append(r)
+        try:
+            for future in as_completed(futures):
+                for request in futures[future]:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.error(f"Error generating audio for {request.key}: {str(e)}")
+                        raise
+                    if on_complete:
+                        on_complete(request.key, request.output_path)
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+        if pending:
+            logger.info(f"Synthesized {len(pending)} clips in {time.time() - start_time:.2f} seconds")
+            if self.cache:
+                logger.info(f"TTS cache stats: {self.cache.stats()}")
+        return {r.key: r.output_path for r in requests}
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+
+def get_default_engine() -> TTSEngine:
+    """Get the process-wide engine so concurrent jobs share one rate budget."""
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = TTSEngine(cache=get_cache_from_env())
+        return _default_engine
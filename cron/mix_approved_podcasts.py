@@ -3,7 +3,7 @@ import os
 import sys
 from datetime import datetime
 import logging
-from pydub import AudioSegment
+import numpy as np
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 import colorlog
@@ -11,6 +11,10 @@ import colorlog
 # Add parent directory to path to import from project
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import OUTPUTS_DIR
+from create_audio.audio_mixer import ClipStore, Placement, db_to_gain, render_placements, to_segment
+from create_audio.loudness import (
+    MUSIC_DUCK_LU, PEAK_CEILING_DB, ducking_gain_curve, get_target_lufs, integrated_loudness, leveling_gain
+)
 
 # Configure logging
 handler = colorlog.StreamHandler()
@@ -29,6 +33,19 @@ logger = colorlog.getLogger('mix_podcasts')
 logger.addHandler(handler)
 logger.setLevel(logging.INFO)
 
+# Background music paths with different moods
+BG_MUSIC_FILES = {
+    'calm': "defaults/bgmusic/soft_theme_main_track.mp3",
+    'upbeat': "defaults/bgmusic/s3.mp3"
+}
+
+# Transition sound effects
+TRANSITION_EFFECTS = {
+    'whoosh': "defaults/sound_effects/Tech/Tech-06.wav",  # You'll need to add these files
+    'chime': "defaults/sound_effects/Tech/Tech-02.wav",
+    'pop': "defaults/sound_effects/Tech/Tech-03.wav"
+}
+
 def get_db_session():
     """Create database session"""
     POSTGRES_USER = os.getenv("POSTGRES_USER", "chiragahmedabadi")
@@ -43,120 +60,131 @@ def get_db_session():
     return Session()
 
 def mix_audio_files(audio_files, output_path, crossfade_duration=1000, outro_duration=10000):
-    """Mix audio files with crossfade and background music"""
+    """Mix audio files with crossfade and background music
+    
+    Every file is decoded once into PCM. Speech files are leveled to the same
+    integrated loudness (EBU R128), background music is set relative to that
+    level, and the outro music is ducked under the closing speech with a
+    per-frame gain curve. The timeline is rendered with NumPy and encoded once.
+    """
     try:
         if not audio_files:
             raise ValueError("No audio files provided for mixing")
 
-        # Background music paths with different moods
-        bg_music_files = {
-            'calm': "defaults/bgmusic/soft_theme_main_track.mp3",
-            'upbeat': "defaults/bgmusic/s3.mp3"
-        }
-        
-        # Transition sound effects
-        transition_effects = {
-            'whoosh': "defaults/sound_effects/Tech/Tech-06.wav",  # You'll need to add these files
-            'chime': "defaults/sound_effects/Tech/Tech-02.wav",
-            'pop': "defaults/sound_effects/Tech/Tech-03.wav"
-        }
+        clips = ClipStore(channels=2)
+        target_lufs = get_target_lufs()
         
-        # Load background music files
+        # Background music files
         bg_music = {}
-        for mood, file_path in bg_music_files.items():
+        for mood, file_path in BG_MUSIC_FILES.items():
             if os.path.exists(file_path):
-                bg_music[mood] = AudioSegment.from_file(file_path)
+                bg_music[mood] = file_path
             else:
                 logger.error(f"Background music file not found: {file_path}")
         
-        # Load transition effects
+        # Transition effects
         effects = {}
-        for effect_name, file_path in transition_effects.items():
+        for effect_name, file_path in TRANSITION_EFFECTS.items():
             if os.path.exists(file_path):
-                effects[effect_name] = AudioSegment.from_file(file_path)
-                # Make effects subtle
-                effects[effect_name] = effects[effect_name] - 15  # -15dB
+                effects[effect_name] = file_path
             else:
                 logger.warning(f"Effect file not found: {file_path}")
 
         # Load the first audio file
-        mixed = AudioSegment.from_file(audio_files[0])
+        first = clips.get(audio_files[0])
         logger.info(f"Loaded first audio file: {audio_files[0]}")
+        placements = [Placement(audio_files[0], audio_files[0], 0, len(first),
+                                gain=leveling_gain(first, clips.frame_rate, target_lufs))]
+        cursor = len(first)
+        
+        def append(key, path, frames, gain, fade_in=0, fade_out=0):
+            """Crossfade a clip onto the end of the timeline, like AudioSegment.append."""
+            nonlocal cursor
+            crossfade = min(clips.ms_to_frames(crossfade_duration), cursor, frames)
+            placements.append(Placement(f"fade_out_{key}", None, cursor - crossfade, crossfade, fade_out=crossfade))
+            start = cursor - crossfade
+            placements.append(Placement(key, path, start, frames, gain=gain,
+                                        fade_in=max(crossfade, fade_in), fade_out=fade_out))
+            cursor = start + frames
+            return start
 
         # Add subsequent files with enhanced transitions
-        current_bg_index = 0
         for i, audio_file in enumerate(audio_files[1:], 1):
             if not os.path.exists(audio_file):
                 logger.error(f"Audio file not found: {audio_file}")
                 continue
 
             # Load next audio segment
-            next_audio = AudioSegment.from_file(audio_file)
+            next_audio = clips.get(audio_file)
             logger.info(f"Loaded next audio file: {audio_file}")
             
             # Choose background music based on position
             bg_mood = 'upbeat' if i % 2 == 0 else 'calm'
             if bg_music.get(bg_mood):
-                bg_segment = bg_music[bg_mood]
+                bg_path = bg_music[bg_mood]
                 # Use 5 seconds of background music
                 bg_duration = 5000
-                bg_segment = bg_segment[:bg_duration]
+                bg_samples = clips.get(bg_path)[:clips.ms_to_frames(bg_duration)]
                 
-                # Dynamic volume adjustment
-                # Analyze speech volume in next segment
-                speech_volume = next_audio.dBFS
-                # Adjust bg music volume to be 15dB below speech
-                target_volume = speech_volume - 15
-                volume_change = target_volume - bg_segment.dBFS
-                bg_segment = bg_segment + volume_change
+                # Speech is leveled to the target, so keep the music 15 LU below it
+                bg_lufs = integrated_loudness(bg_samples, clips.frame_rate)
+                bg_gain = db_to_gain(target_lufs - MUSIC_DUCK_LU - bg_lufs) if np.isfinite(bg_lufs) else 1.0
                 
                 # Fade background music in and out
-                bg_segment = bg_segment.fade_in(1000).fade_out(1000)
+                fade = clips.ms_to_frames(1000)
+                bg_start = append(f"bg_{i}", bg_path, len(bg_samples), bg_gain, fade_in=fade, fade_out=fade)
                 
                 # Add transition effect if available
                 if effects:
-                    effect = effects['whoosh' if i % 3 == 0 else 'chime' if i % 3 == 1 else 'pop']
-                    if effect:
+                    effect_path = effects.get('whoosh' if i % 3 == 0 else 'chime' if i % 3 == 1 else 'pop')
+                    if effect_path:
                         # Add effect at start of transition
-                        bg_segment = effect.overlay(bg_segment[:1000]) + bg_segment[1000:]
-                
-                # Add background music
-                mixed = mixed.append(bg_segment, crossfade=crossfade_duration)
+                        placements.append(Placement(f"effect_{i}", effect_path, bg_start,
+                                                    clips.frames(effect_path), gain=db_to_gain(-15)))
             
             # Add next audio segment
-            mixed = mixed.append(next_audio, crossfade=crossfade_duration)
-            logger.info(f"Added background music ({bg_duration/1000}s) and next segment with effects")
+            append(audio_file, audio_file, len(next_audio),
+                   leveling_gain(next_audio, clips.frame_rate, target_lufs))
+            logger.info("Added background music and next segment with effects")
+
+        timeline = render_placements(placements, clips, 0, cursor, clips.channels)
 
         # Enhanced outro
         if bg_music.get('calm'):
-            outro_music = bg_music['calm'][:outro_duration]
-            # Create layered outro effect
-            if effects.get('chime'):
-                # Add subtle chimes throughout outro
-                chime_positions = [2000, 5000, 8000]  # at 2s, 5s, and 8s
-                for pos in chime_positions:
-                    if pos < outro_duration:
-                        outro_music = outro_music.overlay(effects['chime'], position=pos)
-            
-            # Fade in/out the outro music
-            outro_music = outro_music.fade_in(2000).fade_out(2000)
-            # Adjust volume
-            outro_music = outro_music - 10
+            outro_frames = min(clips.ms_to_frames(outro_duration), cursor,
+                               clips.frames(bg_music['calm']))
+            outro_start = cursor - outro_frames
+            outro_music = clips.get(bg_music['calm'])[:outro_frames]
             
-            # Get the last segment of the mixed audio
-            last_segment = mixed[-outro_duration:]
-            # Overlay the enhanced outro
-            last_segment = last_segment.overlay(outro_music)
+            # Duck the outro music under the closing speech
+            music_lufs = integrated_loudness(outro_music, clips.frame_rate)
+            ducking = ducking_gain_curve(timeline[outro_start:], clips.frame_rate, music_lufs)
+            fade = min(clips.ms_to_frames(2000), outro_frames // 2)
+            outro = [Placement("outro_music", bg_music['calm'], outro_start, outro_frames,
+                               fade_in=fade, fade_out=fade, gain_curve=ducking)]
             
-            # Replace the last segment
-            mixed = mixed[:-outro_duration] + last_segment
-            logger.info(f"Added enhanced outro in last {outro_duration/1000} seconds")
+            # Layered outro effect: subtle chimes at 2s, 5s and 8s
+            if effects.get('chime'):
+                for pos in [2000, 5000, 8000]:
+                    position = clips.ms_to_frames(pos)
+                    if position < outro_frames:
+                        frames = min(clips.frames(effects['chime']), outro_frames - position)
+                        outro.append(Placement(f"chime_{pos}", effects['chime'], outro_start + position,
+                                               frames, gain=db_to_gain(-25)))
+            render_placements(outro, clips, 0, cursor, clips.channels, out=timeline)
+            logger.info(f"Added enhanced outro in last {outro_frames / clips.frame_rate:.1f} seconds")
+
+        # Keep the summed mix below the peak ceiling
+        peak = float(np.abs(timeline).max()) if len(timeline) else 0.0
+        ceiling = db_to_gain(PEAK_CEILING_DB)
+        if peak > ceiling:
+            timeline *= ceiling / peak
 
         # Ensure output directory exists
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
         # Export with higher quality
-        mixed.export(output_path, format="mp3", bitrate="192k")
+        to_segment(timeline, clips.frame_rate).export(output_path, format="mp3", bitrate="192k")
         logger.info(f"Successfully exported mixed audio to: {output_path}")
         return True
 
@@ -0,0 +1,9 @@
+-- Add segment_cache to video_paths
+-- Description: Records, per profile-static segment (intro, bumper, outro), the render cache key
+-- and whether the segment was served from the shared segment cache instead of being rendered
+
+ALTER TABLE video_paths
+ADD COLUMN IF NOT EXISTS segment_cache JSONB DEFAULT '{}'::jsonb;
+
+-- Add comment to the column
+COMMENT ON COLUMN video_paths.segment_cache IS 'Segment render cache keys and hits, e.g. {"intro": {"key": "...", "hit": true}}';
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Benchmark the legacy pydub conversation mix against the NumPy and streaming mixers.
+
+Synthetic turn clips are generated for 10- and 60-minute episodes and each
+mixing path runs in its own subprocess so peak RSS can be compared.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+
+# Add parent directory to path to import from project
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TURN_SECONDS = 15
+OVERLAP_EVERY = 4
+SPEAKERS = ["Emma", "Jake"]
+
+
+def build_conversation(num_turns: int):
+    from create_audio.conversation import Conversation, ConversationTurn
+
+    turns = []
+    for order in range(1, num_turns + 1):
+        speaker = SPEAKERS[order % 2]
+        overlap = {SPEAKERS[(order + 1) % 2]: "Exactly!"} if order % OVERLAP_EVERY == 0 else {}
+        turns.append(ConversationTurn(order, speaker, f"Turn {order}", overlap))
+    return Conversation(turns, "benchmark", SPEAKERS)
+
+
+def generate_clips(conversation, clips_dir: str):
+    """Write tone-plus-noise MP3s standing in for TTS output."""
+    import numpy as np
+    from pydub import AudioSegment
+
+    rate = 44100
+    rng = np.random.default_rng(0)
+    audio_files = {}
+
+    def write(key, seconds):
+        t = np.arange(int(rate * seconds)) / rate
+        wave = 0.3 * np.sin(2 * np.pi * rng.uniform(120, 240) * t) + 0.05 * rng.standard_normal(len(t))
+        pcm = (wave * 32767).astype(np.int16)
+        path = os.path.join(clips_dir, f"{key}.mp3")
+        AudioSegment(pcm.tobytes(), sample_width=2, frame_rate=rate, channels=1).export(path, format="mp3")
+        audio_files[key] = path
+
+    for turn in conversation.turns:
+        write(f"{turn.speaker}_{turn.order}", TURN_SECONDS)
+        for overlap_speaker in turn.overlap_with or {}:
+            write(f"{overlap_speaker}_overlap_{turn.order}", 1.5)
+    return audio_files
+
+
+def create_natural_overlap(base_audio, overlay_audio, position_ms: int):
+    """The pydub overlap helper the legacy loop used: pad, slice and concatenate the whole mix."""
+    from pydub import AudioSegment
+
+    overlay_end_position = position_ms + len(overlay_audio)
+    if overlay_end_position > len(base_audio):
+        base_audio = base_audio + AudioSegment.silent(duration=overlay_end_position - len(base_audio))
+    overlap_region = base_audio[position_ms:overlay_end_position] - 2
+    overlay_audio = overlay_audio - 3
+    if len(overlay_audio) > 400:
+        overlay_audio = overlay_audio.fade_in(200).fade_out(200)
+    overlap_region = overlap_region.overlay(overlay_audio)
+    return base_audio[:position_ms] + overlap_region + base_audio[overlay_end_position:]
+
+
+def mix_legacy(conversation, audio_files, output_path):
+    """The pre-NumPy mix_conversation loop."""
+    from pydub import AudioSegment
+    from pydub.effects import normalize
+
+    final_mix = AudioSegment.empty()
+    current_position = 0
+    for turn in conversation.turns:
+        main_audio = normalize(AudioSegment.from_mp3(audio_files[f"{turn.speaker}_{turn.order}"]))
+        final_mix = final_mix + main_audio
+        for overlap_speaker in turn.overlap_with or {}:
+            overlap_audio = normalize(AudioSegment.from_mp3(audio_files[f"{overlap_speaker}_overlap_{turn.order}"]))
+            overlap_position = max(0, len(main_audio) - len(overlap_audio) - 500)
+            final_mix = create_natural_overlap(final_mix, overlap_audio, current_position + overlap_position)
+        current_position += len(main_audio)
+    final_mix.export(output_path, format="mp3")
+
+
+def mix_numpy(conversation, audio_files, output_path):
+    from create_audio.audio_mixer import render_mix
+
+    render_mix(conversation, audio_files, output_path)
+
+
+def mix_streaming(conversation, audio_files, output_path):
+    from create_audio.audio_mixer import render_mix_streaming
+
+    render_mix_streaming(conversation, audio_files, output_path)
+
+
+def run_one(path_name: str, num_turns: int, clips_dir: str):
+    """Child-process entry point: run one mixing path and report time and peak RSS."""
+    conversation = build_conversation(num_turns)
+    with open(os.path.join(clips_dir, "audio_files.json")) as f:
+        audio_files = json.load(f)
+    output_path = os.path.join(clips_dir, f"mix_{path_name}.mp3")
+    start = time.time()
+    {"legacy": mix_legacy, "numpy": mix_numpy, "streaming": mix_streaming}[path_name](conversation, audio_files, output_path)
+    elapsed = time.time() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_kb / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=int, nargs="+", default=[10, 60])
+    parser.add_argument("--paths", nargs="+", default=["legacy", "numpy", "streaming"])
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    parser.add_argument("--turns", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--clips-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_one(args.run, args.turns, args.clips_dir)
+        return
+
+    print(f"{'minutes':>8} {'path':>8} {'seconds':>10} {'peak RSS':>10}")
+    for minutes in args.minutes:
+        num_turns = minutes * 60 // TURN_SECONDS
+        clips_dir = tempfile.mkdtemp(prefix="mix_bench_")
+        try:
+            audio_files = generate_clips(build_conversation(num_turns), clips_dir)
+            with open(os.path.join(clips_dir, "audio_files.json"), "w") as f:
+                json.dump(audio_files, f)
+            for path_name in args.paths:
+                result = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--run", path_name,
+                     "--turns", str(num_turns), "--clips-dir", clips_dir],
+                    capture_output=True, text=True, check=True
+                )
+                stats = json.loads(result.stdout.strip().splitlines()[-1])
+                print(f"{minutes:>8} {path_name:>8} {stats['seconds']:>9.2f}s {stats['peak_rss_mb']:>8.0f}MB")
+        finally:
+            shutil.rmtree(clips_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
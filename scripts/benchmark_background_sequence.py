@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Benchmark the resources a main-video background sequence holds while it is read.
+
+A synthetic footage library (``--clips`` clips at 1280x720) is indexed and
+proxied at 780x480, and a ``--minutes`` long (45 by default) background
+is planned from it with a fixed seed. Paths:
+
+* compose: one VideoFileClip per shot with fadein/fadeout, joined with
+  concatenate_videoclips(method="compose"), as the background sequence
+  was built before;
+* track: the edit decision list rendered by one ffmpeg run to a single
+  track, opened as one VideoFileClip.
+
+Each path runs in its own subprocess and reads every frame of its
+background, as the main-video render does. Reported: open file
+descriptors and ffmpeg reader processes once the background is built,
+and the peak RSS of the process and its live children while reading.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+# Add parent directory to path to import from project
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RESOLUTION = (780, 480)
+SEED = "benchmark"
+
+
+def generate_library(videos_dir: str, clips: int):
+    from moviepy.config import get_setting
+
+    os.makedirs(videos_dir, exist_ok=True)
+    for i in range(clips):
+        # Lengths vary so some shots loop short clips
+        seconds = 4 + (i * 7) % 30
+        subprocess.run([
+            get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"testsrc2=s=1280x720:r=25:d={seconds}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+            os.path.join(videos_dir, f"clip_{i:02d}.mp4")
+        ], check=True)
+
+
+def process_tree_stats() -> dict:
+    """Open fds of this process, and the count and total RSS of it and its child processes."""
+    pid = os.getpid()
+    children = []
+    for tid in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{tid}/children") as f:
+            children += f.read().split()
+    rss_kb = 0
+    for p in [str(pid)] + children:
+        try:
+            with open(f"/proc/{p}/status") as f:
+                rss_kb += next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+        except (OSError, StopIteration):
+            pass
+    return {"fds": len(os.listdir(f"/proc/{pid}/fd")), "children": len(children), "rss_mb": rss_kb / 1024}
+
+
+def build_compose(index, shots):
+    from moviepy.editor import VideoFileClip, concatenate_videoclips
+
+    proxies = index.proxies(list(index.clips), RESOLUTION, fit="stretch")
+    segments = []
+    for shot in shots:
+        video = VideoFileClip(proxies[shot.name], audio=False)
+        if shot.loop:
+            video = video.loop(duration=shot.duration)
+        else:
+            video = video.subclip(shot.start, shot.start + shot.duration)
+        if shot.fade_in:
+            video = video.fadein(shot.fade_in)
+        if shot.fade_out:
+            video = video.fadeout(shot.fade_out)
+        segments.append(video)
+    return concatenate_videoclips(segments, method="compose")
+
+
+def build_track(index, shots):
+    from moviepy.editor import VideoFileClip
+    from video_creator.utils.footage_index import render_background_track
+
+    return VideoFileClip(render_background_track(index, shots, RESOLUTION, fit="stretch"), audio=False)
+
+
+PATHS = {"compose": build_compose, "track": build_track}
+
+
+def run_one(path_name: str, work_dir: str, minutes: int):
+    """Child-process entry point: build one background, read all of it, report resources."""
+    os.environ["FOOTAGE_CACHE_DIR"] = os.path.join(work_dir, "cache")
+    from video_creator.utils.footage_index import get_footage_index
+
+    index = get_footage_index(os.path.join(work_dir, "videos"))
+    shots = index.plan_background(minutes * 60, seed=SEED)
+    if path_name == "generate":
+        index.proxies(list(index.clips), RESOLUTION, fit="stretch")
+        return
+    start = time.time()
+    background = PATHS[path_name](index, shots)
+    built = process_tree_stats()
+    build_seconds = time.time() - start
+    peak_rss = built["rss_mb"]
+    for n, _ in enumerate(background.iter_frames(fps=background.fps or 30)):
+        if n % 1500 == 0:
+            peak_rss = max(peak_rss, process_tree_stats()["rss_mb"])
+    print(json.dumps(dict(built, shots=len(shots), build_seconds=build_seconds, peak_rss_mb=peak_rss,
+                          seconds=time.time() - start)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=int, default=45)
+    parser.add_argument("--clips", type=int, default=12)
+    parser.add_argument("--paths", nargs="+", default=list(PATHS), choices=list(PATHS))
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_one(args.run, args.work_dir, args.minutes)
+        return
+
+    def child(path_name: str) -> str:
+        return subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run", path_name,
+             "--work-dir", work_dir, "--minutes", str(args.minutes)],
+            capture_output=True, text=True, check=True
+        ).stdout
+
+    work_dir = tempfile.mkdtemp(prefix="background_bench_")
+    try:
+        generate_library(os.path.join(work_dir, "videos"), args.clips)
+        child("generate")
+        print(f"{'minutes':>8} {'path':>8} {'shots':>6} {'fds':>6} {'readers':>8} {'build':>8} "
+              f"{'built RSS':>10} {'peak RSS':>10} {'total':>8}")
+        for path_name in args.paths:
+            stats = json.loads(child(path_name).strip().splitlines()[-1])
+            print(f"{args.minutes:>8} {path_name:>8} {stats['shots']:>6} {stats['fds']:>6} {stats['children']:>8} "
+                  f"{stats['build_seconds']:>7.1f}s {stats['rss_mb']:>8.0f}MB {stats['peak_rss_mb']:>8.0f}MB "
+                  f"{stats['seconds']:>7.1f}s")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
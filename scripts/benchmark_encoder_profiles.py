@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Benchmark encode time and output size of every encoder profile.
+
+Two synthetic segments stand in for our standard outputs, each
+``--seconds`` long (20 by default) at ``--size`` (1280x720):
+
+* motion: a moving test pattern with a tone, like the avatar and B-roll
+  segments (hard to compress);
+* images: a slow zoom over a still image, like the images-style main
+  video and the intro/outro backgrounds (easy to compress).
+
+Each source is decoded from a lossless pre-render so only the encode
+under test is timed. Every profile encodes every segment with the same
+arguments the pipeline uses (``EncoderProfile.video_args`` and
+``audio_args``).
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+# Add parent directory to path to import from project
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from moviepy.config import get_setting
+from video_creator.utils.encoder_profiles import ENCODER_PROFILES
+
+FPS = 30
+SOURCES = {
+    "motion": "testsrc2=s={size}:r={fps}:d={seconds}",
+    "images": "testsrc=s={size}:r=1:d=1,scale=iw*2:-1,"
+              "zoompan=z='min(zoom+0.0008,1.3)':d={frames}:s={size}:fps={fps},trim=duration={seconds}",
+}
+
+
+def generate_source(work_dir: str, name: str, size: str, seconds: int) -> str:
+    """Losslessly pre-render a synthetic segment."""
+    path = os.path.join(work_dir, f"{name}.mkv")
+    video = SOURCES[name].format(size=size, fps=FPS, seconds=seconds, frames=seconds * FPS)
+    subprocess.run([
+        get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", video,
+        "-f", "lavfi", "-i", f"sine=f=440:d={seconds}",
+        "-c:v", "ffv1", "-c:a", "pcm_s16le", "-shortest", path
+    ], check=True)
+    return path
+
+
+def encode(source: str, output_path: str, profile) -> float:
+    start = time.time()
+    subprocess.run([
+        get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error", "-i", source,
+        *profile.video_args(FPS), "-pix_fmt", "yuv420p", *profile.audio_args(), output_path
+    ], check=True)
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=int, default=20)
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--profiles", nargs="+", default=list(ENCODER_PROFILES), choices=list(ENCODER_PROFILES))
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="encoder_bench_")
+    try:
+        sources = {name: generate_source(work_dir, name, args.size, args.seconds) for name in SOURCES}
+        print(f"{'segment':>8} {'profile':>13} {'encode':>9} {'x realtime':>11} {'size':>10} {'kbit/s':>8}")
+        for segment, source in sources.items():
+            for name in args.profiles:
+                output_path = os.path.join(work_dir, f"{segment}_{name}.mp4")
+                seconds = encode(source, output_path, ENCODER_PROFILES[name])
+                size = os.path.getsize(output_path)
+                print(f"{segment:>8} {name:>13} {seconds:>8.2f}s {args.seconds / seconds:>10.1f}x "
+                      f"{size / 1024 / 1024:>8.2f}MB {size * 8 / 1000 / args.seconds:>8.0f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
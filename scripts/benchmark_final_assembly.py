@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Benchmark MoviePy final assembly against the ffmpeg stream-copy engine.
+
+Synthetic intro, short, bumper, main and outro segments are generated
+(the main segment is ``--minutes`` long, 30 by default) at a resolution
+different from the target, so every path has to resize. Paths:
+
+* moviepy: the previous create_final_video_from_paths compositing;
+* ffmpeg_cold: stream-copy assembly with an empty segment cache;
+* ffmpeg_cached: a re-run where every segment is already normalized.
+
+Each path runs in its own subprocess. Wall time is reported next to the
+CPU time of the process and its ffmpeg children, which shows how much of
+the assembly is still compute-bound.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+
+# Add parent directory to path to import from project
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CONFIG = {'resolution': (780, 480), 'fps': 30}
+SEGMENTS = [("intro", 10), ("short", 45), ("bumper", 5), ("main", None), ("outro", 10)]
+
+
+def generate_inputs(work_dir: str, minutes: int) -> list:
+    from moviepy.config import get_setting
+
+    paths = []
+    for name, seconds in SEGMENTS:
+        seconds = seconds or minutes * 60
+        path = os.path.join(work_dir, f"{name}.mp4")
+        subprocess.run([
+            get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"testsrc2=s=1280x720:r=25:d={seconds}",
+            "-f", "lavfi", "-i", f"sine=f=440:d={seconds}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", "-shortest", path
+        ], check=True)
+        paths.append(path)
+    return paths
+
+
+def run_moviepy(paths: list, work_dir: str):
+    from video_creator.utils.video_utils import concatenate_with_moviepy
+
+    concatenate_with_moviepy(paths, os.path.join(work_dir, "final_moviepy.mp4"), CONFIG)
+
+
+def run_ffmpeg(paths: list, work_dir: str):
+    from video_creator.utils.video_assembly import AssemblyProfile, assemble_segments
+
+    assemble_segments(paths, os.path.join(work_dir, "final_ffmpeg.mp4"), AssemblyProfile.from_config(CONFIG),
+                      cache_dir=os.path.join(work_dir, "segment_cache"))
+
+
+PATHS = {
+    "moviepy": run_moviepy,
+    "ffmpeg_cold": run_ffmpeg,
+    "ffmpeg_cached": run_ffmpeg,
+}
+
+
+def run_one(path_name: str, work_dir: str, minutes: int):
+    """Child-process entry point: run one path and report wall and CPU time."""
+    if path_name == "generate":
+        with open(os.path.join(work_dir, "inputs.json"), "w") as f:
+            json.dump(generate_inputs(work_dir, minutes), f)
+        return
+    with open(os.path.join(work_dir, "inputs.json")) as f:
+        paths = json.load(f)
+    # Import outside the timed region
+    import video_creator.utils.video_utils  # noqa: F401
+    start = time.time()
+    PATHS[path_name](paths, work_dir)
+    elapsed = time.time() - start
+    usage = [resource.getrusage(who) for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+    print(json.dumps({"seconds": elapsed, "cpu_seconds": sum(u.ru_utime + u.ru_stime for u in usage)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=int, default=30)
+    parser.add_argument("--paths", nargs="+", default=list(PATHS), choices=list(PATHS))
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_one(args.run, args.work_dir, args.minutes)
+        return
+
+    def child(path_name: str, work_dir: str) -> str:
+        return subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run", path_name,
+             "--work-dir", work_dir, "--minutes", str(args.minutes)],
+            capture_output=True, text=True, check=True
+        ).stdout
+
+    work_dir = tempfile.mkdtemp(prefix="assembly_bench_")
+    try:
+        child("generate", work_dir)
+        print(f"{'minutes':>8} {'path':>14} {'wall':>10} {'cpu':>10}")
+        for path_name in args.paths:
+            stats = json.loads(child(path_name, work_dir).strip().splitlines()[-1])
+            print(f"{args.minutes:>8} {path_name:>14} {stats['seconds']:>9.1f}s {stats['cpu_seconds']:>9.1f}s")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
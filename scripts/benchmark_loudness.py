@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Benchmark pydub leveling against the NumPy loudness stage.
+
+Two comparisons on synthetic WAV inputs:
+
+* per-clip leveling of conversation turns: ``pydub.effects.normalize``
+  per clip versus EBU R128 ``leveling_gain`` on the decoded PCM;
+* the approved-podcast compilation: the previous pydub
+  ``mix_audio_files`` (dBFS-based music level, whole-segment overlays)
+  versus the current NumPy version in ``cron/mix_approved_podcasts``.
+
+Each path runs in its own subprocess so peak RSS can be compared. Output
+files are written as WAV so encoder time does not hide the mixing cost.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+
+# Add parent directory to path to import from project
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RATE = 44100
+TURN_SECONDS = 15
+
+
+def write_wav(path: str, seconds: float, amplitude: float, channels: int = 1, tone: float = 200.0, seed: int = 0):
+    """Write a tone with a slow tremolo plus noise, standing in for speech or music."""
+    import numpy as np
+    from pydub import AudioSegment
+
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(RATE * seconds)) / RATE
+    wave = amplitude * np.sin(2 * np.pi * tone * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 0.5 * t))
+    wave += 0.1 * amplitude * rng.standard_normal(len(t))
+    pcm = (np.stack([wave] * channels, axis=1) * 32767).astype(np.int16)
+    AudioSegment(pcm.tobytes(), sample_width=2, frame_rate=RATE, channels=channels).export(path, format="wav")
+    return path
+
+
+def generate_inputs(work_dir: str, minutes: int) -> dict:
+    """Turn clips, compilation inputs, background music and effects."""
+    clips_dir = os.path.join(work_dir, "clips")
+    os.makedirs(clips_dir)
+    num_turns = minutes * 60 // TURN_SECONDS
+    turns = [write_wav(os.path.join(clips_dir, f"turn_{i}.wav"), TURN_SECONDS, 0.1 + 0.5 * (i % 3) / 2, seed=i)
+             for i in range(num_turns)]
+    music = {
+        "calm": write_wav(os.path.join(work_dir, "calm.wav"), 60, 0.5, channels=2, tone=330),
+        "upbeat": write_wav(os.path.join(work_dir, "upbeat.wav"), 60, 0.3, channels=2, tone=440),
+    }
+    effects = {name: write_wav(os.path.join(work_dir, f"{name}.wav"), 0.8, 0.5, channels=2, tone=880)
+               for name in ("whoosh", "chime", "pop")}
+    compilation = [
+        write_wav(os.path.join(work_dir, "welcome.wav"), 15, 0.1),
+        write_wav(os.path.join(work_dir, "intro.wav"), 10, 0.6),
+        write_wav(os.path.join(work_dir, "final_mix.wav"), minutes * 60, 0.3),
+    ]
+    return {"turns": turns, "music": music, "effects": effects, "compilation": compilation}
+
+
+def level_pydub(inputs: dict, work_dir: str):
+    """The previous per-clip leveling: decode and peak normalize each turn."""
+    from pydub import AudioSegment
+    from pydub.effects import normalize
+
+    for path in inputs["turns"]:
+        normalize(AudioSegment.from_file(path))
+
+
+def level_numpy(inputs: dict, work_dir: str):
+    from create_audio.audio_mixer import ClipStore
+    from create_audio.loudness import leveling_gain
+
+    clips = ClipStore()
+    for path in inputs["turns"]:
+        leveling_gain(clips.get(path), clips.frame_rate)
+
+
+def compile_pydub(inputs: dict, work_dir: str, crossfade_duration=1000, outro_duration=10000):
+    """The previous mix_audio_files from cron/mix_approved_podcasts."""
+    from pydub import AudioSegment
+
+    audio_files = inputs["compilation"]
+    bg_music = {mood: AudioSegment.from_file(path) for mood, path in inputs["music"].items()}
+    effects = {name: AudioSegment.from_file(path) - 15 for name, path in inputs["effects"].items()}
+
+    mixed = AudioSegment.from_file(audio_files[0])
+    for i, audio_file in enumerate(audio_files[1:], 1):
+        next_audio = AudioSegment.from_file(audio_file)
+        bg_mood = 'upbeat' if i % 2 == 0 else 'calm'
+        bg_segment = bg_music[bg_mood][:5000]
+        target_volume = next_audio.dBFS - 15
+        bg_segment = bg_segment + (target_volume - bg_segment.dBFS)
+        bg_segment = bg_segment.fade_in(1000).fade_out(1000)
+        effect = effects['whoosh' if i % 3 == 0 else 'chime' if i % 3 == 1 else 'pop']
+        bg_segment = effect.overlay(bg_segment[:1000]) + bg_segment[1000:]
+        mixed = mixed.append(bg_segment, crossfade=crossfade_duration)
+        mixed = mixed.append(next_audio, crossfade=crossfade_duration)
+
+    outro_music = bg_music['calm'][:outro_duration]
+    for pos in [2000, 5000, 8000]:
+        outro_music = outro_music.overlay(effects['chime'], position=pos)
+    outro_music = outro_music.fade_in(2000).fade_out(2000) - 10
+    last_segment = mixed[-outro_duration:].overlay(outro_music)
+    mixed = mixed[:-outro_duration] + last_segment
+    mixed.export(os.path.join(work_dir, "compiled_pydub.wav"), format="wav")
+
+
+def compile_numpy(inputs: dict, work_dir: str):
+    from cron import mix_approved_podcasts
+    from create_audio import audio_mixer
+
+    mix_approved_podcasts.BG_MUSIC_FILES = inputs["music"]
+    mix_approved_podcasts.TRANSITION_EFFECTS = inputs["effects"]
+    # Write WAV like the pydub path so neither pays for MP3 encoding
+    export = audio_mixer.AudioSegment.export
+    audio_mixer.AudioSegment.export = lambda self, out, format="mp3", **kwargs: export(self, out, format="wav")
+    output_path = os.path.join(work_dir, "compiled_numpy.wav")
+    if not mix_approved_podcasts.mix_audio_files(inputs["compilation"], output_path):
+        raise Exception("NumPy compilation failed")
+
+
+PATHS = {
+    "level_pydub": level_pydub,
+    "level_numpy": level_numpy,
+    "compile_pydub": compile_pydub,
+    "compile_numpy": compile_numpy,
+}
+
+
+def run_one(path_name: str, work_dir: str, minutes: int):
+    """Child-process entry point: run one path and report time and peak RSS."""
+    if path_name == "generate":
+        with open(os.path.join(work_dir, "inputs.json"), "w") as f:
+            json.dump(generate_inputs(work_dir, minutes), f)
+        return
+    with open(os.path.join(work_dir, "inputs.json")) as f:
+        inputs = json.load(f)
+    # Import outside the timed region; scipy.signal alone takes seconds to load
+    import pydub.effects  # noqa: F401
+    import create_audio.loudness  # noqa: F401
+    if path_name == "compile_numpy":
+        import cron.mix_approved_podcasts  # noqa: F401
+    start = time.time()
+    PATHS[path_name](inputs, work_dir)
+    elapsed = time.time() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_kb / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=int, nargs="+", default=[10, 60])
+    parser.add_argument("--paths", nargs="+", default=list(PATHS), choices=list(PATHS))
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_one(args.run, args.work_dir, args.minutes[0])
+        return
+
+    def child(path_name: str, work_dir: str, minutes: int) -> str:
+        return subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run", path_name,
+             "--work-dir", work_dir, "--minutes", str(minutes)],
+            capture_output=True, text=True, check=True
+        ).stdout
+
+    print(f"{'minutes':>8} {'path':>14} {'seconds':>10} {'peak RSS':>10}")
+    for minutes in args.minutes:
+        work_dir = tempfile.mkdtemp(prefix="loudness_bench_")
+        try:
+            # Inputs are generated in a child too, so no path inherits its memory
+            child("generate", work_dir, minutes)
+            for path_name in args.paths:
+                stats = json.loads(child(path_name, work_dir, minutes).strip().splitlines()[-1])
+                print(f"{minutes:>8} {path_name:>14} {stats['seconds']:>9.2f}s {stats['peak_rss_mb']:>8.0f}MB")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Benchmark per-frame compositing of the short video layer stack.
+
+Builds the 14 layers create_podcast_short_video stacks (background,
+dimming overlay, speaker circles and videos, name boxes, title,
+subtitle, speaker names, footer) and times get_frame for:
+
+* moviepy: CompositeVideoClip, blitting every layer on every frame;
+* flattened: FlattenedCompositeClip, with static layers precomposited.
+
+Background and speaker "videos" are synthetic frames generated in
+memory, so decode cost is left out and only compositing is compared.
+Text layers are rendered with PIL as stand-ins for TextClip, which
+needs ImageMagick.
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# Add parent directory to path to import from project
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from moviepy.editor import ColorClip, CompositeVideoClip, ImageClip, VideoClip
+from video_creator.utils.overlay_layer import FlattenedCompositeClip
+
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080)}
+DURATION = 60
+
+
+def moving_clip(size, seed):
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 256, size=(size[1], size[0], 3)).astype(np.uint8)
+    return VideoClip(lambda t: np.roll(base, int(t * 30), axis=1), duration=DURATION)
+
+
+def text_clip(text, font_size, width=None):
+    font = ImageFont.load_default()
+    w = width or font_size * len(text) // 2
+    img = Image.new("RGBA", (w, int(font_size * 1.3)), (0, 0, 0, 0))
+    ImageDraw.Draw(img).text((0, 0), text, fill=(255, 255, 255, 255), font=font)
+    return ImageClip(np.array(img)).set_duration(DURATION)
+
+
+def short_video_layers(resolution):
+    """The create_podcast_short_video layer stack at ``resolution``."""
+    width, height = resolution
+    speaker_size = min(width // 4, height // 3)
+    yy, xx = np.mgrid[:speaker_size, :speaker_size]
+    r = speaker_size / 2
+    mask = ImageClip(((xx - r) ** 2 + (yy - r) ** 2 <= r ** 2).astype(float), ismask=True)
+    speaker_y = int(height * 0.4)
+    spacing = speaker_size * 1.5
+    speaker1_x = int(width // 2 - spacing)
+    speaker2_x = int(width // 2 + spacing - speaker_size)
+    name_y = speaker_y + speaker_size + 5
+    circle_bg = ColorClip((speaker_size, speaker_size), color=(128, 128, 128)).set_mask(mask)
+    text_bg = ColorClip((speaker_size, 50), color=(0, 0, 0)).set_opacity(0.7)
+    return [
+        moving_clip(resolution, 0),
+        ColorClip(resolution, color=(0, 0, 0)).set_opacity(0.5).set_duration(DURATION),
+        circle_bg.set_position((speaker1_x, speaker_y)).set_duration(DURATION),
+        circle_bg.set_position((speaker2_x, speaker_y)).set_duration(DURATION),
+        moving_clip((speaker_size, speaker_size), 1).set_mask(mask).set_position((speaker1_x, speaker_y)),
+        moving_clip((speaker_size, speaker_size), 2).set_mask(mask).set_position((speaker2_x, speaker_y)),
+        text_bg.set_position((speaker1_x, name_y)).set_duration(DURATION),
+        text_bg.set_position((speaker2_x, name_y)).set_duration(DURATION),
+        text_clip("The Future of Work", 60).set_position(("center", height * 0.15)),
+        text_clip("AI, automation and the people in between", 40).set_position(("center", height * 0.25)),
+        text_clip("Speaker One", 30, speaker_size).set_position((speaker1_x, name_y + 10)),
+        text_clip("Speaker Two", 30, speaker_size).set_position((speaker2_x, name_y + 10)),
+        ColorClip((width, 60), color=(0, 0, 0)).set_opacity(0.7).set_position(("center", height * 0.85))
+        .set_duration(DURATION),
+        text_clip("podcastify.example", 24, width - 40).set_position(("center", height * 0.85 + 18)),
+    ]
+
+
+def time_frames(clip, frames: int, fps: int = 30) -> float:
+    """Mean seconds per get_frame over ``frames`` consecutive frames."""
+    clip.get_frame(0)  # Warm up
+    start = time.perf_counter()
+    for i in range(frames):
+        clip.get_frame(i / fps)
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    args = parser.parse_args()
+
+    print(f"{'resolution':>10} {'path':>10} {'ms/frame':>10} {'speedup':>8}")
+    for name in args.resolutions:
+        resolution = RESOLUTIONS[name]
+        layers = short_video_layers(resolution)
+        baseline = time_frames(CompositeVideoClip(layers, size=resolution), args.frames)
+        start = time.perf_counter()
+        flattened_clip = FlattenedCompositeClip(layers, size=resolution)
+        flatten_seconds = time.perf_counter() - start
+        flattened = time_frames(flattened_clip, args.frames)
+        print(f"{name:>10} {'moviepy':>10} {baseline * 1000:>10.1f} {'':>8}")
+        print(f"{name:>10} {'flattened':>10} {flattened * 1000:>10.1f} {baseline / flattened:>7.1f}x"
+              f"  (flattening took {flatten_seconds * 1000:.0f} ms once)")
+
+
+if __name__ == "__main__":
+    main()
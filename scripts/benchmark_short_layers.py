@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Benchmark the per-frame cost of each layer type of the short video layout.
+
+Every layer kind the shared compositor draws (see
+video_creator.utils.short_compositor) is built once at ``--resolution``
+(1280x720 by default) with the sizes short_video_layout gives it, and
+timed over ``--frames`` frames:
+
+* blended: reading the layer's frame and blending it onto a float32
+  frame, as composite_layers does for layers that change (videos
+  include decoding their looped rendition);
+* flattened: applying the layer as part of a StaticOverlay, as it costs
+  when it is static and precomposited (text, boxes, discs, overlays).
+
+The one-off cost of building each layer is reported too, first and
+cached (circle masks and text rasters are reused across layers and
+jobs). Text is rendered with PIL as a stand-in for TextClip, which
+needs ImageMagick.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# Add parent directory to path to import from project
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from moviepy.config import get_setting
+
+FPS = 30
+
+
+def pil_text(text, size=None, fontsize=20, **style):
+    width = size[0] if size else fontsize * len(text) // 2
+    img = Image.new("RGBA", (width, int(fontsize * 1.3)), (0, 0, 0, 0))
+    ImageDraw.Draw(img).text((0, 0), text, fill=(255, 255, 255, 255), font=ImageFont.load_default())
+    rgba = np.array(img)
+    return rgba[..., :3], rgba[..., 3] / 255.0
+
+
+def generate_video(path: str, size: str):
+    subprocess.run([
+        get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc2=s={size}:r=25:d=10",
+        "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", path
+    ], check=True)
+
+
+def layer_specs(resolution, background_path: str, speaker_path: str):
+    """One LayerSpec per layer type, sized and placed as in short_video_layout."""
+    from video_creator.utils.short_compositor import LayerSpec
+
+    width, height = resolution
+    speaker_size = min(width // 4, height // 3)
+    speaker_x, speaker_y = int(width // 2 - speaker_size * 1.5), int(height * 0.4)
+    return {
+        "background video": LayerSpec("media", ("center", "center"), resolution, path=background_path, fit="cover"),
+        "speaker video": LayerSpec("media", (speaker_x, speaker_y), (speaker_size, speaker_size),
+                                   path=speaker_path, mask="circle"),
+        "dim overlay": LayerSpec("color", (0, 0), resolution, color=(0, 0, 0), opacity=0.5),
+        "circle disc": LayerSpec("color", (speaker_x, speaker_y), (speaker_size, speaker_size),
+                                 color=(128, 128, 128), mask="circle"),
+        "name box": LayerSpec("color", (speaker_x, speaker_y + speaker_size + 5), (speaker_size, 50),
+                              color=(0, 0, 0), opacity=0.7),
+        "title text": LayerSpec("text", ("center", height * 0.15), text="The Future of Work", fontsize=60,
+                                color="white", font="Arial"),
+        "caption text": LayerSpec("text", ("center", height * 0.85 + 18), (width - 40, None),
+                                  text="podcastify.example", fontsize=24, color="white", font="Arial",
+                                  method="caption", align="center"),
+    }
+
+
+def time_per_frame(apply, frames: int) -> float:
+    apply(0)  # Warm up
+    start = time.perf_counter()
+    for i in range(frames):
+        apply(i / FPS)
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--resolution", default="1280x720")
+    args = parser.parse_args()
+    resolution = tuple(int(v) for v in args.resolution.split("x"))
+
+    work_dir = tempfile.mkdtemp(prefix="short_layers_bench_")
+    os.environ["LOOPED_ASSET_CACHE_DIR"] = os.path.join(work_dir, "cache")
+    os.environ["LOOPED_ASSET_CACHE_ENABLED"] = "true"
+    from video_creator.utils.overlay_layer import StaticOverlay, blend_clip, is_static_clip
+    from video_creator.utils.short_compositor import ShortCompositor, circle_mask
+
+    try:
+        background_path = os.path.join(work_dir, "background.mp4")
+        speaker_path = os.path.join(work_dir, "speaker.mp4")
+        generate_video(background_path, "1920x1080")
+        generate_video(speaker_path, "640x640")
+        duration = args.frames / FPS + 1
+        canvas = np.zeros((resolution[1], resolution[0], 3), dtype=np.float32)
+
+        print(f"{'layer':>16} {'build':>9} {'cached':>9} {'blended':>12} {'flattened':>12}")
+        for name, spec in layer_specs(resolution, background_path, speaker_path).items():
+            circle_mask.cache_clear()
+            compositor = ShortCompositor(text_renderer=pil_text)
+            start = time.perf_counter()
+            clip = compositor.build_layer(spec, duration)
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            compositor.build_layer(spec, duration)
+            cached = time.perf_counter() - start
+
+            blended = time_per_frame(lambda t: blend_clip(canvas, clip, t), args.frames)
+            flattened = ""
+            if is_static_clip(clip, duration):
+                overlay = StaticOverlay([clip], resolution)
+                flattened = f"{time_per_frame(lambda t: overlay.apply(canvas), args.frames) * 1000:>9.2f}ms"
+            print(f"{name:>16} {build * 1000:>7.1f}ms {cached * 1000:>7.1f}ms "
+                  f"{blended * 1000:>9.2f}ms {flattened:>12}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Benchmark sequential vs concurrent TTS synthesis against a local fake TTS server."""
+import os
+import sys
+import time
+import json
+import argparse
+import tempfile
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path to import from project
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from create_audio.tts_engine import TTSEngine, TTSRequest, write_chunks_atomic
+
+
+class FakeTTSHandler(BaseHTTPRequestHandler):
+    """Answers every POST after a fixed latency with a fake MP3 body."""
+
+    latency = 0.5
+    body = b"\xff\xfb\x90\x00" * 4096
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_server(latency: float):
+    """Start the fake TTS server on a free local port."""
+    FakeTTSHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeTTSHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_convert(base_url: str):
+    """Build a ``text_to_speech.convert`` stand-in that calls the fake server."""
+    def convert(voice_id, output_format, text, model_id):
+        payload = json.dumps({"text": text, "model_id": model_id}).encode()
+        req = urllib.request.Request(
+            f"{base_url}/v1/text-to-speech/{voice_id}?output_format={output_format}",
+            data=payload,
+            headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(req) as resp:
+            while True:
+                chunk = resp.read(8192)
+                if not chunk:
+                    break
+                yield chunk
+    return convert
+
+
+def build_requests(num_turns: int, output_dir: str, overlap_every: int = 4):
+    """Build the same request list generate_audio_files would for a conversation."""
+    requests = []
+    speakers = ["Emma", "Jake"]
+    for order in range(1, num_turns + 1):
+        speaker = speakers[order % 2]
+        requests.append(TTSRequest(f"{speaker}_{order}", speaker, f"Turn {order} text",
+                                   os.path.join(output_dir, f"{speaker}_{order}.mp3")))
+        if order % overlap_every == 0:
+            other = speakers[(order + 1) % 2]
+            requests.append(TTSRequest(f"{other}_overlap_{order}", other, "Exactly!",
+                                       os.path.join(output_dir, f"{other}_overlap_{order}.mp3")))
+    return requests
+
+
+def run_sequential(convert, requests, sleep_seconds: float) -> float:
+    """The pre-engine behaviour: one call at a time plus a fixed sleep."""
+    start = time.time()
+    for r in requests:
+        write_chunks_atomic(r.output_path, convert(voice_id=r.voice_id, output_format=r.output_format,
+                                                   text=r.text, model_id=r.model_id))
+        time.sleep(sleep_seconds)
+    return time.time() - start
+
+
+def run_concurrent(convert, requests, rps: float, max_in_flight: int) -> float:
+    engine = TTSEngine(convert=convert, requests_per_second=rps, max_in_flight=max_in_flight)
+    start = time.time()
+    engine.synthesize_all(requests)
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 20, 40])
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake server latency per request (s)")
+    parser.add_argument("--sleep", type=float, default=1.0, help="Sequential baseline sleep per request (s)")
+    parser.add_argument("--rps", type=float, default=4.0)
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    args = parser.parse_args()
+
+    server = start_fake_server(args.latency)
+    convert = make_convert(f"http://127.0.0.1:{server.server_address[1]}")
+    print(f"Fake TTS latency {args.latency}s, engine budget {args.rps} req/s, {args.max_in_flight} in flight")
+    print(f"{'turns':>6} {'clips':>6} {'sequential':>12} {'concurrent':>12} {'speedup':>8}")
+    try:
+        for num_turns in args.turns:
+            with tempfile.TemporaryDirectory() as seq_dir, tempfile.TemporaryDirectory() as conc_dir:
+                seq_requests = build_requests(num_turns, seq_dir)
+                conc_requests = build_requests(num_turns, conc_dir)
+                seq = run_sequential(convert, seq_requests, args.sleep)
+                conc = run_concurrent(convert, conc_requests, args.rps, args.max_in_flight)
+                print(f"{num_turns:>6} {len(seq_requests):>6} {seq:>11.2f}s {conc:>11.2f}s {seq / conc:>7.1f}x")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Progress of a batch of podcast episodes generated in one worker.
+
+generate_audio_batch_task runs a batch's episodes concurrently and
+reports each episode's status as it changes; GET
+/api/podcasts/batch/{batch_id} combines the last report with the jobs'
+rows in the database. Both sides live here, free of Celery and FastAPI.
+"""
+import copy
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FINISHED = ("completed", "failed")
+
+
+class BatchProgress:
+    """Per-episode statuses and completed/failed counts of a batch.
+
+    ``on_update`` is called with a snapshot after every change, e.g. to
+    publish it as the task's PROGRESS state.
+    """
+
+    def __init__(self, job_ids: List[str], on_update: Optional[Callable[[Dict], None]] = None):
+        self.on_update = on_update
+        self._lock = threading.Lock()
+        self._progress = {
+            "total": len(job_ids),
+            "completed": 0,
+            "failed": 0,
+            "jobs": {str(job_id): "pending" for job_id in job_ids}
+        }
+
+    def report(self, job_id: str, status: str):
+        with self._lock:
+            previous = self._progress["jobs"].get(job_id)
+            self._progress["jobs"][job_id] = status
+            if status in FINISHED and previous not in FINISHED:
+                self._progress[status] += 1
+            if self.on_update:
+                self.on_update(copy.deepcopy(self._progress))
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return copy.deepcopy(self._progress)
+
+
+def run_batch(jobs: List[dict], run_job: Callable[[dict], object], max_episodes: int,
+              on_update: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """Run ``run_job`` for every job, ``max_episodes`` at a time, and return the final progress.
+
+    A failed episode is logged and counted; the rest of the batch carries on.
+    """
+    progress = BatchProgress([job["job_id"] for job in jobs], on_update)
+
+    def run(job: dict):
+        job_id = str(job["job_id"])
+        progress.report(job_id, "processing")
+        try:
+            run_job(job)
+            progress.report(job_id, "completed")
+        except Exception as e:
+            logger.error(f"Batch episode {job_id} failed: {str(e)}")
+            progress.report(job_id, "failed")
+
+    with ThreadPoolExecutor(max_workers=max(1, max_episodes)) as executor:
+        list(executor.map(run, jobs))
+    return progress.snapshot()
+
+
+def batch_job_ids(info) -> List[int]:
+    """Job ids of a batch from its task state, if the task has reported yet."""
+    progress = info if isinstance(info, dict) else {}
+    return [int(job_id) for job_id in progress.get("jobs", {})]
+
+
+def batch_status(batch_id: str, state: str, info, jobs: List) -> Dict:
+    """The batch status response for the task ``state``/``info`` and the jobs' rows.
+
+    ``jobs`` are PodcastJob rows (anything with ``id``, ``status``,
+    ``error_message`` and ``output_path``).
+    """
+    progress = info if isinstance(info, dict) else {}
+    return {
+        "batch_id": batch_id,
+        "status": state,
+        "total": progress.get("total", len(jobs)),
+        "completed": progress.get("completed", 0),
+        "failed": progress.get("failed", 0),
+        "jobs": [
+            {
+                "job_id": job.id,
+                "status": job.status,
+                "error": job.error_message if job.status == "failed" else None,
+                "output_path": job.output_path if job.status == "completed" else None
+            }
+            for job in sorted(jobs, key=lambda job: job.id)
+        ]
+    }
@@ -0,0 +1,109 @@
+"""Size-bounded, least-recently-used file caches on disk.
+
+The TTS, segment, image, looped-asset and background-track caches all
+keep one file per entry in a directory that every worker on a host can
+share. Recency is the file's mtime: a hit touches the file, and
+eviction removes the oldest entries until the directory fits its
+budget. Entries are always placed atomically (written or linked to a
+``.part`` name, then renamed), so a reader never sees a partial file
+and in-progress files are never counted or evicted.
+"""
+import os
+import shutil
+import logging
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def link_or_copy(src: str, dst: str):
+    """Atomically place a copy of ``src`` at ``dst`` (hard link when possible)."""
+    tmp_path = f"{dst}.{os.getpid()}.{threading.get_ident()}.part"
+    try:
+        try:
+            os.link(src, tmp_path)
+        except OSError:
+            shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class DiskLRU:
+    """The entries of one cache directory, evicted least recently used first.
+
+    ``extensions`` limits which files count as entries (all files by
+    default); names containing ``.part`` are in-progress writes and are
+    always ignored. ``label`` names the entries in log messages. The
+    caches subclass it and add their own keys and lookups.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, extensions: Optional[Iterable[str]] = None,
+                 label: str = "cache entries"):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.extensions = tuple(extensions) if extensions else None
+        self.label = label
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _is_entry(self, entry: os.DirEntry) -> bool:
+        if ".part" in entry.name or not entry.is_file():
+            return False
+        return self.extensions is None or entry.name.endswith(self.extensions)
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """``(mtime, size, path)`` of every entry, oldest first."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not self._is_entry(entry):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue  # Evicted by another worker
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        return entries
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    @staticmethod
+    def touch(path: str) -> bool:
+        """Mark an entry as recently used; False if it is not cached."""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Remove least recently used entries until the directory fits ``max_bytes``.
+
+        ``keep`` (an entry about to be used) is never removed, but its size
+        counts against the budget. Returns the size that remains.
+        """
+        with self._lock:
+            entries = [e for e in self.entries() if e[2] != keep]
+            total = sum(size for _, size, _ in entries)
+            if keep and os.path.exists(keep):
+                total += os.path.getsize(keep)
+            evicted = 0
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                evicted += 1
+            self.evictions += evicted
+        if evicted:
+            logger.info(f"Evicted {evicted} {self.label} from {self.cache_dir}, "
+                        f"{total / 1024 / 1024:.1f} MB remain")
+        return total
@@ -71,6 +71,39 @@ def transcribe_audio(audio_file_path: str) -> str:
         return None
 
 
+def transcribe_audio_with_timestamps(audio_file_path: str) -> Optional[List[Dict]]:
+    """
+    Transcribe a whole audio file once using OpenAI Whisper API, keeping timestamps
+
+    Args:
+        audio_file_path (str): Path to the audio file to transcribe
+
+    Returns:
+        list: Whisper segments as dicts with start, end (seconds) and text, or None on failure
+    """
+    try:
+        with open(audio_file_path, "rb") as audio_file:
+            transcription = client.audio.translations.create(
+                file=audio_file,
+                model="whisper-1",
+                response_format="verbose_json"
+            )
+        segments = []
+        for segment in getattr(transcription, "segments", None) or []:
+            # The SDK returns typed objects; older versions return plain dicts
+            if not isinstance(segment, dict):
+                segment = segment.model_dump() if hasattr(segment, "model_dump") else vars(segment)
+            segments.append({
+                "start": float(segment["start"]),
+                "end": float(segment["end"]),
+                "text": segment["text"].strip(),
+            })
+        return segments
+    except Exception as e:
+        logger.error(f"Error transcribing audio with timestamps: {str(e)}")
+        return None
+
+
 
 
 
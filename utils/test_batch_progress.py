@@ -0,0 +1,64 @@
+import threading
+from types import SimpleNamespace
+
+from utils.batch_progress import BatchProgress, batch_job_ids, batch_status, run_batch
+
+
+def test_run_batch_reports_progress_and_survives_failures():
+    jobs = [{"job_id": str(i), "request_dict": {}} for i in range(1, 6)]
+    updates = []
+    running = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def run_job(job):
+        with lock:
+            running.append(job["job_id"])
+            peak[0] = max(peak[0], len(running))
+        try:
+            if job["job_id"] in ("2", "4"):
+                raise Exception("TTS quota exceeded")
+        finally:
+            with lock:
+                running.remove(job["job_id"])
+
+    progress = run_batch(jobs, run_job, max_episodes=2, on_update=updates.append)
+
+    assert progress == {"total": 5, "completed": 3, "failed": 2,
+                        "jobs": {"1": "completed", "2": "failed", "3": "completed", "4": "failed", "5": "completed"}}
+    assert peak[0] <= 2
+    # Every episode was reported processing, then finished; counts only ever grow
+    assert len(updates) == 10
+    finished = [u["completed"] + u["failed"] for u in updates]
+    assert finished == sorted(finished) and finished[-1] == 5
+    assert updates[0]["jobs"] != updates[-1]["jobs"]  # Snapshots, not the live dict
+
+
+def test_progress_counts_each_episode_once():
+    progress = BatchProgress(["1"])
+    progress.report("1", "failed")
+    progress.report("1", "failed")
+    assert progress.snapshot()["failed"] == 1
+
+
+def test_batch_status():
+    rows = [
+        SimpleNamespace(id=12, status="failed", error_message="boom", output_path=None),
+        SimpleNamespace(id=11, status="completed", error_message=None, output_path="/out/podcast_11.mp4"),
+        SimpleNamespace(id=13, status="processing_video", error_message=None, output_path=None),
+    ]
+    info = {"total": 3, "completed": 2, "failed": 1, "jobs": {"11": "completed", "12": "failed", "13": "completed"}}
+    assert batch_job_ids(info) == [11, 12, 13]
+
+    status = batch_status("abc", "SUCCESS", info, rows)
+    assert (status["status"], status["total"], status["completed"], status["failed"]) == ("SUCCESS", 3, 2, 1)
+    assert status["jobs"] == [
+        {"job_id": 11, "status": "completed", "error": None, "output_path": "/out/podcast_11.mp4"},
+        {"job_id": 12, "status": "failed", "error": "boom", "output_path": None},
+        {"job_id": 13, "status": "processing_video", "error": None, "output_path": None},
+    ]
+
+    # Queued, or the result has expired: the ids come from the database and counts are unknown
+    assert batch_job_ids(None) == []
+    pending = batch_status("abc", "PENDING", None, rows)
+    assert (pending["total"], pending["completed"], pending["failed"]) == (3, 0, 0)
@@ -0,0 +1,69 @@
+"""Turn-timing index of a synthesized conversation.
+
+When the conversation mix is rendered, the start and end of every main
+and overlap line in the final mix is known exactly. The index is saved
+as ``turn_timings.json`` next to the conversation schema so the video
+pipeline can map time windows of the episode audio to the script text
+without transcribing audio the platform synthesized itself.
+
+Entries use the same ``start``/``end``/``text`` keys (seconds) as a
+timestamped Whisper transcription, so either can feed the same code.
+"""
+import os
+import json
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TURN_TIMINGS_FILENAME = "turn_timings.json"
+TURN_TIMINGS_VERSION = 1
+
+# How far the indexed duration may drift from the audio's before the index is ignored
+DURATION_TOLERANCE_SECONDS = 0.5
+
+
+def turn_timings_path(schema_path: str) -> str:
+    """Path of the index that belongs with a conversation schema."""
+    return os.path.join(os.path.dirname(schema_path), TURN_TIMINGS_FILENAME)
+
+
+def write_turn_timings(path: str, audio_path: str, duration: float, entries: List[Dict]) -> str:
+    """Atomically write the index for the mix at ``audio_path``."""
+    index = {
+        "version": TURN_TIMINGS_VERSION,
+        "audio_file": os.path.basename(audio_path),
+        "duration": duration,
+        "turns": entries,
+    }
+    tmp_path = f"{path}.{os.getpid()}.part"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, path)
+    logger.info(f"Saved turn timings for {len(entries)} lines to {path}")
+    return path
+
+
+def load_turn_timings(schema_path: Optional[str], audio_path: str, duration: float) -> Optional[List[Dict]]:
+    """Timed script lines for ``audio_path``, or None if it has no matching index.
+
+    The index is only used if it was written for a file of the same name
+    and duration, so external or re-edited audio falls back to transcription.
+    """
+    if not schema_path:
+        return None
+    path = turn_timings_path(schema_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read turn timings {path}: {str(e)}")
+        return None
+    if index.get("version") != TURN_TIMINGS_VERSION or index.get("audio_file") != os.path.basename(audio_path):
+        return None
+    if abs(index.get("duration", 0) - duration) > DURATION_TOLERANCE_SECONDS:
+        logger.warning(f"Turn timings cover {index.get('duration')}s but the audio is {duration:.2f}s, ignoring them")
+        return None
+    return index["turns"]
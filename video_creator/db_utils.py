@@ -477,6 +477,48 @@ class VideoDB:
                     }
                 return None
 
+    def get_in_progress_heygen_videos(self) -> List[tuple]:
+        """
+        Get all HeyGen videos that haven't reached a final status.
+
+        Returns:
+            List of (task_id, heygen_video_id, status, created_at, last_updated_at) rows, newest first
+        """
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT task_id, heygen_video_id, status, created_at, last_updated_at
+                    FROM heygen_videos
+                    WHERE status NOT IN ('completed', 'failed', 'error', 'aborted')
+                    ORDER BY created_at DESC
+                """)
+                return cursor.fetchall()
+
+    def update_hygen_short_video_path(self, heygen_video_id: str, video_path: str) -> bool:
+        """
+        Set the hygen_short_video path of the job a HeyGen video belongs to.
+
+        Args:
+            heygen_video_id: Video ID from HeyGen API
+            video_path: Local path of the downloaded video
+
+        Returns:
+            True if a video_paths record was updated
+        """
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE video_paths
+                    SET hygen_short_video = %s
+                    WHERE job_id = (
+                        SELECT task_id
+                        FROM heygen_videos
+                        WHERE heygen_video_id = %s
+                    )
+                """, (video_path, heygen_video_id))
+                conn.commit()
+                return cursor.rowcount > 0
+
     def update_video_config(self, job_id: int, config: Dict) -> bool:
         """
         Update video configuration for a podcast job.
@@ -749,6 +791,38 @@ class VideoDB:
             logger.error(f"Error updating heygen video flag: {str(e)}")
             return False
 
+    def record_segment_cache(self, job_id: int, segment_type: str, cache_key: str, hit: bool) -> bool:
+        """
+        Record whether a profile-static segment was served from the segment cache.
+        
+        Args:
+            job_id: The job ID to update
+            segment_type: Segment name (intro, bumper or outro)
+            cache_key: Render cache key of the segment
+            hit: True if the cached render was reused
+            
+        Returns:
+            bool: True if update was successful, False otherwise
+        """
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        UPDATE video_paths
+                        SET segment_cache = COALESCE(segment_cache, '{}'::jsonb) || %s::jsonb
+                        WHERE job_id = %s
+                        RETURNING id
+                    """, (Json({segment_type: {"key": cache_key, "hit": hit}}), job_id))
+                    
+                    result = cursor.fetchone()
+                    conn.commit()
+                    
+                    return result is not None
+                    
+        except Exception as e:
+            logger.error(f"Error recording segment cache: {str(e)}")
+            return False
+
     def get_pending_youtube_uploads(self) -> List[Dict]:
         """
         Get list of videos pending YouTube upload.
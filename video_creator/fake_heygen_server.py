@@ -0,0 +1,205 @@
+"""A local stand-in for the HeyGen API, for tests and offline development.
+
+FakeHeyGenServer serves, on a local port:
+
+* POST /v2/video/generate: creates a video that "renders" for
+  ``render_seconds``;
+* GET /v1/video_status.get: "processing" until the render time has
+  passed, then "completed" (or "failed") with video and thumbnail URLs;
+* GET /files/<video_id>.mp4 and .jpg: the rendered bytes, with an ETag
+  and Range / If-Range support. ``drop_after`` cuts the first full
+  download of each file after that many bytes, as a dropped connection
+  would.
+
+Every request is recorded in ``requests``. Point the pipeline at it with
+HEYGEN_API_BASE_URL, e.g. after ``python -m video_creator.fake_heygen_server``.
+"""
+import re
+import json
+import hashlib
+import time
+import uuid
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeVideo:
+    def __init__(self, video_id: str, render_seconds: float, fail: bool, size: int):
+        self.video_id = video_id
+        self.created_at = time.time()
+        self.render_seconds = render_seconds
+        self.fail = fail
+        # Distinct, position-dependent bytes so a mis-resumed download does not match
+        self.files = {
+            "mp4": bytes((i * 7 + len(video_id)) % 251 for i in range(size)),
+            "jpg": bytes((i * 13) % 241 for i in range(size // 8 or 1)),
+        }
+        self.dropped = set()
+
+    @property
+    def status(self) -> str:
+        if time.time() - self.created_at < self.render_seconds:
+            return "processing"
+        return "failed" if self.fail else "completed"
+
+
+class FakeHeyGenServer:
+    """The fake API on ``127.0.0.1:<port>`` (a free port by default), run in a thread."""
+
+    def __init__(self, api_key: str = "test-key", render_seconds: float = 0.0, file_size: int = 256 * 1024,
+                 drop_after: Optional[int] = None, port: int = 0):
+        self.api_key = api_key
+        self.render_seconds = render_seconds
+        self.file_size = file_size
+        self.drop_after = drop_after
+        self.videos: Dict[str, FakeVideo] = {}
+        self.requests: List[Tuple[str, str, Optional[str]]] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_video(self, render_seconds: Optional[float] = None, fail: bool = False) -> str:
+        video_id = uuid.uuid4().hex
+        with self._lock:
+            self.videos[video_id] = FakeVideo(
+                video_id, self.render_seconds if render_seconds is None else render_seconds, fail, self.file_size)
+        return video_id
+
+    def file_bytes(self, video_id: str, ext: str) -> bytes:
+        return self.videos[video_id].files[ext]
+
+    def count(self, path_prefix: str) -> int:
+        return sum(1 for _, path, _ in self.requests if path.startswith(path_prefix))
+
+    def start(self) -> "FakeHeyGenServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status: int, body: dict):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def authorized(self) -> bool:
+                if self.headers.get("X-Api-Key") == server.api_key:
+                    return True
+                self.send_json(401, {"code": 400111, "message": "Unauthorized"})
+                return False
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                server.requests.append(("POST", url.path, None))
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if url.path != "/v2/video/generate":
+                    return self.send_json(404, {"message": "Not found"})
+                if self.authorized():
+                    self.send_json(200, {"error": None, "data": {"video_id": server.add_video()}})
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                server.requests.append(("GET", url.path, self.headers.get("Range")))
+                if url.path == "/v1/video_status.get":
+                    return self.video_status(parse_qs(url.query).get("video_id", [""])[0])
+                match = re.fullmatch(r"/files/(\w+)\.(mp4|jpg)", url.path)
+                if match and match.group(1) in server.videos:
+                    return self.send_file(server.videos[match.group(1)], match.group(2))
+                self.send_json(404, {"message": "Not found"})
+
+            def video_status(self, video_id: str):
+                if not self.authorized():
+                    return
+                video = server.videos.get(video_id)
+                if video is None:
+                    return self.send_json(404, {"code": 400116, "message": "Video not found"})
+                data = {"id": video_id, "status": video.status, "video_url": None, "thumbnail_url": None}
+                if data["status"] == "completed":
+                    data.update(video_url=f"{server.base_url}/files/{video_id}.mp4",
+                                thumbnail_url=f"{server.base_url}/files/{video_id}.jpg", duration=5.0)
+                elif data["status"] == "failed":
+                    data["error"] = {"code": 40119, "message": "Render failed"}
+                self.send_json(200, {"code": 100, "data": data, "message": "Success"})
+
+            def send_file(self, video: FakeVideo, ext: str):
+                content = video.files[ext]
+                etag = '"' + hashlib.md5(content).hexdigest() + '"'
+                start = 0
+                byte_range = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range") or "")
+                if_range = self.headers.get("If-Range")
+                if byte_range and (if_range is None or if_range == etag):
+                    start = int(byte_range.group(1))
+                    if start >= len(content):
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{len(content)}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{len(content) - 1}/{len(content)}")
+                else:
+                    self.send_response(200)
+                self.send_header("Content-Type", "video/mp4" if ext == "mp4" else "image/jpeg")
+                self.send_header("Content-Length", str(len(content) - start))
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("ETag", etag)
+                self.end_headers()
+                body = content[start:]
+                if server.drop_after is not None and start == 0 and ext not in video.dropped:
+                    video.dropped.add(ext)
+                    self.wfile.write(body[:server.drop_after])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--api-key", default="test-key")
+    parser.add_argument("--render-seconds", type=float, default=30)
+    args = parser.parse_args()
+
+    server = FakeHeyGenServer(api_key=args.api_key, render_seconds=args.render_seconds, port=args.port)
+    print(f"Fake HeyGen API on {server.base_url} (HEYGEN_API_BASE_URL={server.base_url}, "
+          f"HEYGEN_API_KEY={args.api_key})")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
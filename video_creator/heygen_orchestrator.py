@@ -0,0 +1,477 @@
+"""Asyncio orchestration of HeyGen avatar video jobs.
+
+HeyGen renders avatar videos remotely, which takes minutes. A
+HeyGenOrchestrator tracks every job that has not reached a final status
+and, on one event loop:
+
+* checks the jobs that are due in one concurrent round per tick, over a
+  shared pool of HTTP connections. Each job is rechecked after an
+  interval proportional to its age (HEYGEN_POLL_MIN_SECONDS up to
+  HEYGEN_POLL_MAX_SECONDS), so a fresh job is seen finishing within
+  seconds while an hour-old one costs one request a minute;
+* streams the video and thumbnail of every completed job concurrently
+  into HEYGEN_VIDEOS_DIR and HEYGEN_THUMBNAILS_DIR, resuming interrupted
+  downloads with HTTP range requests. Each download is claimed with a
+  lock on its partial file, so the cron monitor and the API's webhook
+  handler never write the same file at once;
+* accepts HeyGen webhook events (see api/routers/heygen.py), which
+  trigger an immediate check. With HEYGEN_WEBHOOK_ENABLED polling only
+  backs up missed events, every HEYGEN_WEBHOOK_FALLBACK_POLL_SECONDS.
+
+Statuses, URLs and local paths are written to the heygen_videos and
+video_paths tables as the cron monitor did before.
+"""
+import os
+import hmac
+import json
+import fcntl
+import time
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_ROOT = str(Path(__file__).parent.parent)
+DEFAULT_BASE_URL = "https://api.heygen.com"
+FINAL_STATUSES = {"completed", "failed", "error", "aborted"}
+
+
+def env_flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower() in ("true", "1", "yes", "on")
+
+
+def poll_interval(age: float, min_interval: float, max_interval: float, factor: float = 0.1) -> float:
+    """Seconds until a job ``age`` seconds old is checked again.
+
+    The interval grows with the job's age, so the delay in noticing a
+    finished job stays within ``factor`` of how long it took.
+    """
+    return min(max_interval, max(min_interval, age * factor))
+
+
+def verify_webhook_signature(body: bytes, signature: Optional[str], secret: str) -> bool:
+    """True if ``signature`` is the hex HMAC-SHA256 of the raw request ``body`` with ``secret``."""
+    if not signature:
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+class DownloadInProgressError(Exception):
+    """Another process is downloading the same file."""
+
+
+def _read_validator(meta_path: str) -> Optional[str]:
+    try:
+        with open(meta_path) as f:
+            return json.load(f).get("validator")
+    except (OSError, ValueError):
+        return None
+
+
+def _write_validator(meta_path: str, headers: httpx.Headers):
+    """Remember what identifies the file being downloaded; nothing if the server sends no validator."""
+    validator = headers.get("etag") or headers.get("last-modified")
+    if validator:
+        with open(meta_path, "w") as f:
+            json.dump({"validator": validator}, f)
+    else:
+        _remove_if_exists(meta_path)
+
+
+def _remove_if_exists(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class HeyGenJob:
+    """A HeyGen video being tracked until it reaches a final status."""
+
+    def __init__(self, video_id: str, status: str = "processing", created_at: Optional[float] = None):
+        self.video_id = video_id
+        self.status = status
+        self.created_at = created_at or time.time()
+        self.next_check_at = 0.0  # Checked on the next round
+        self.checks = 0
+        self.response: Optional[dict] = None
+
+
+class AsyncHeyGenClient:
+    """The HeyGen status and download calls the orchestrator needs, on httpx.AsyncClient.
+
+    ``base_url`` (HEYGEN_API_BASE_URL, for a local fake server) defaults
+    to the public API. The API key is only sent to the API, not to the
+    signed file URLs videos are downloaded from.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 max_connections: int = 16, timeout: float = 30):
+        self.api_key = api_key or os.getenv("HEYGEN_API_KEY")
+        self.base_url = (base_url or os.getenv("HEYGEN_API_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            follow_redirects=True
+        )
+
+    async def check_video_status(self, video_id: str) -> dict:
+        """The video_status.get response for ``video_id``."""
+        response = await self.client.get(f"{self.base_url}/v1/video_status.get", params={"video_id": video_id},
+                                         headers={"X-Api-Key": self.api_key})
+        response.raise_for_status()
+        return response.json()
+
+    async def download(self, url: str, output_file: str, retries: int = 3) -> str:
+        """Stream ``url`` to ``output_file``, resuming after dropped connections.
+
+        Data goes to ``<output_file>.part`` first, locked for the whole
+        download; DownloadInProgressError is raised if another process
+        holds it. A retry (or a later run) asks only for the missing bytes
+        with a Range header, and an If-Range with the validator (ETag or
+        Last-Modified) of the partial data, so bytes of a different file
+        are never appended to it. The finished file is moved into place and
+        its absolute path returned; an existing one is returned as is.
+        """
+        if os.path.exists(output_file):
+            return os.path.abspath(output_file)
+        part_path = f"{output_file}.part"
+        with open(part_path, "ab+") as part:
+            try:
+                fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise DownloadInProgressError(f"{os.path.basename(output_file)} is being downloaded elsewhere")
+            if os.path.exists(output_file):
+                # Finished by the previous holder of the lock; nothing will resume this part
+                _remove_if_exists(part_path)
+                return os.path.abspath(output_file)
+            for attempt in range(retries + 1):
+                try:
+                    await self._download_part(url, part, part_path)
+                    break
+                except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                    retryable = isinstance(e, httpx.TransportError) or e.response.status_code >= 500
+                    if not retryable or attempt == retries:
+                        raise
+                    logger.warning(f"Download of {os.path.basename(output_file)} interrupted at "
+                                   f"{part.tell()} bytes ({e!r}), resuming")
+                    await asyncio.sleep(min(2 ** attempt, 10))
+            os.replace(part_path, output_file)
+        _remove_if_exists(f"{part_path}.meta")
+        return os.path.abspath(output_file)
+
+    async def _download_part(self, url: str, part, part_path: str):
+        """Fetch whatever the locked ``part`` file is missing."""
+        offset = part.seek(0, os.SEEK_END)
+        validator = _read_validator(f"{part_path}.meta") if offset else None
+        headers = {"Range": f"bytes={offset}-", "If-Range": validator} if validator else {}
+        async with self.client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 416:
+                return  # The part file already holds the whole file
+            response.raise_for_status()
+            if response.status_code != 206:
+                # Not resumable, or the file changed since the partial data was fetched
+                part.seek(0)
+                part.truncate()
+                _write_validator(f"{part_path}.meta", response.headers)
+            # Written as received, so a dropped connection loses nothing already sent
+            async for chunk in response.aiter_bytes():
+                part.write(chunk)
+            part.flush()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+class HeyGenOrchestrator:
+    """Tracks HeyGen jobs to a final status and downloads the finished videos.
+
+    ``db`` is a VideoDB (None to keep state in memory only); its
+    synchronous calls run in worker threads so they never block the loop.
+    With ``download`` off, completed jobs are only recorded. Settings
+    default to the HEYGEN_* environment variables.
+    """
+
+    def __init__(self, db=None, client: Optional[AsyncHeyGenClient] = None, download: bool = True,
+                 videos_dir: Optional[str] = None, thumbnails_dir: Optional[str] = None,
+                 min_interval: Optional[float] = None, max_interval: Optional[float] = None,
+                 max_concurrent_checks: Optional[int] = None, max_concurrent_downloads: Optional[int] = None,
+                 webhooks_enabled: Optional[bool] = None, refresh_interval: float = 30):
+        self.db = db
+        self._owns_client = client is None
+        self.client = client or AsyncHeyGenClient()
+        self.download = download
+        self.videos_dir = videos_dir or os.getenv("HEYGEN_VIDEOS_DIR") or os.path.join(PACKAGE_ROOT, "videos")
+        self.thumbnails_dir = (thumbnails_dir or os.getenv("HEYGEN_THUMBNAILS_DIR")
+                               or os.path.join(PACKAGE_ROOT, "thumbnails"))
+        self.min_interval = min_interval if min_interval is not None else \
+            float(os.getenv("HEYGEN_POLL_MIN_SECONDS") or 5)
+        self.max_interval = max_interval if max_interval is not None else \
+            float(os.getenv("HEYGEN_POLL_MAX_SECONDS") or 60)
+        self.webhooks_enabled = webhooks_enabled if webhooks_enabled is not None else \
+            env_flag("HEYGEN_WEBHOOK_ENABLED")
+        self.webhook_fallback_interval = float(os.getenv("HEYGEN_WEBHOOK_FALLBACK_POLL_SECONDS") or 300)
+        self.refresh_interval = refresh_interval
+        self._check_slots = asyncio.Semaphore(
+            max_concurrent_checks or int(os.getenv("HEYGEN_MAX_CONCURRENT_CHECKS") or 8))
+        self._download_slots = asyncio.Semaphore(
+            max_concurrent_downloads or int(os.getenv("HEYGEN_MAX_CONCURRENT_DOWNLOADS") or 4))
+        self.jobs: Dict[str, HeyGenJob] = {}
+        self._downloads: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._running = False
+
+    def track(self, video_id: str, status: str = "processing", created_at: Optional[float] = None) -> HeyGenJob:
+        """Start tracking ``video_id`` (a no-op if it is already tracked)."""
+        job = self.jobs.get(video_id)
+        if job is None:
+            job = self.jobs[video_id] = HeyGenJob(video_id, status, created_at)
+        return job
+
+    async def load_jobs(self):
+        """Track every job the database has not seen reach a final status."""
+        rows = await asyncio.to_thread(self.db.get_in_progress_heygen_videos)
+        in_progress = set()
+        for task_id, video_id, status, created_at, _ in rows:
+            in_progress.add(video_id)
+            if video_id not in self.jobs:
+                self.track(video_id, (status or "processing").lower(),
+                           created_at.timestamp() if created_at else None)
+                logger.info(f"Tracking HeyGen video {video_id} (task {task_id}, status {status})")
+        # Finished elsewhere, e.g. through a webhook handled by the API
+        for video_id in [v for v in self.jobs if v not in in_progress and v not in self._downloads]:
+            del self.jobs[video_id]
+
+    def interval_for(self, job: HeyGenJob, now: float) -> float:
+        if self.webhooks_enabled:
+            return self.webhook_fallback_interval
+        return poll_interval(now - job.created_at, self.min_interval, self.max_interval)
+
+    def due_jobs(self, now: float) -> List[HeyGenJob]:
+        return [job for job in self.jobs.values()
+                if job.next_check_at <= now and job.video_id not in self._downloads]
+
+    async def poll_once(self, now: Optional[float] = None) -> int:
+        """Check every due job concurrently; returns how many were checked."""
+        now = now or time.time()
+        due = self.due_jobs(now)
+        if due:
+            logger.info(f"Checking {len(due)} of {len(self.jobs)} HeyGen videos")
+            await asyncio.gather(*(self.check_job(job.video_id) for job in due))
+        return len(due)
+
+    async def check_job(self, video_id: str) -> Optional[str]:
+        """Fetch and handle the status of one video; returns its status."""
+        job = self.track(video_id)
+        async with self._check_slots:
+            try:
+                response = await self.client.check_video_status(video_id)
+            except httpx.HTTPStatusError as e:
+                logger.error(f"Error checking status for video {video_id}: {e}")
+                # Only a video HeyGen does not know (or rejects) is a permanent error
+                if e.response.status_code in (400, 404):
+                    return await self.handle_status(video_id, {"status": "error"})
+                return self._reschedule(job)
+            except httpx.HTTPError as e:
+                logger.error(f"Error checking status for video {video_id}: {e!r}")
+                return self._reschedule(job)
+        return await self.handle_status(video_id, response.get("data") or {}, response)
+
+    def _reschedule(self, job: HeyGenJob) -> str:
+        now = time.time()
+        job.next_check_at = now + self.interval_for(job, now)
+        return job.status
+
+    async def handle_status(self, video_id: str, data: dict, response: Optional[dict] = None) -> str:
+        """Record a status reported for ``video_id`` by a check or a webhook."""
+        job = self.track(video_id)
+        job.checks += 1
+        job.response = response or {"data": data}
+        new_status = (data.get("status") or job.status).lower()
+        previous, job.status = job.status, new_status
+
+        if new_status == "completed":
+            if video_id not in self._downloads:
+                task = asyncio.ensure_future(self._complete(job, data))
+                self._downloads[video_id] = task
+                task.add_done_callback(lambda _: self._downloads.pop(video_id, None))
+            return new_status
+        if new_status != previous or new_status in FINAL_STATUSES:
+            await self._update_status(video_id, new_status)
+            logger.info(f"HeyGen video {video_id} status: {previous} -> {new_status}")
+        if new_status in FINAL_STATUSES:
+            self._finish(job)
+        else:
+            self._reschedule(job)
+        return new_status
+
+    async def _complete(self, job: HeyGenJob, data: dict):
+        video_url, thumbnail_url = data.get("video_url"), data.get("thumbnail_url")
+        video_path = thumbnail_path = None
+        if self.download and video_url:
+            try:
+                async with self._download_slots:
+                    video_path, thumbnail_path = await self._download_files(job.video_id, video_url, thumbnail_url)
+                logger.info(f"Downloaded video and thumbnail for {job.video_id}")
+            except DownloadInProgressError as e:
+                # The process holding the download records the result
+                logger.info(f"Skipping download for video {job.video_id}: {e}")
+                self._finish(job)
+                return
+            except Exception as e:
+                logger.error(f"Error downloading files for video {job.video_id}: {e!r}")
+                video_path = thumbnail_path = None
+        # Without paths the status and URLs are still recorded
+        await self._update_status(job.video_id, "completed", video_url=video_url, thumbnail_url=thumbnail_url,
+                                  video_path=video_path, thumbnail_path=thumbnail_path)
+        if video_path and self.db is not None:
+            await asyncio.to_thread(self.db.update_hygen_short_video_path, job.video_id, video_path)
+            logger.info(f"Updated video_paths table with heygen video path for video {job.video_id}")
+        self._finish(job)
+
+    async def _download_files(self, video_id: str, video_url: str, thumbnail_url: Optional[str]):
+        os.makedirs(self.videos_dir, exist_ok=True)
+        os.makedirs(self.thumbnails_dir, exist_ok=True)
+        downloads = [self.client.download(video_url, os.path.join(self.videos_dir, f"heygen_{video_id}.mp4"))]
+        if thumbnail_url:
+            downloads.append(self.client.download(
+                thumbnail_url, os.path.join(self.thumbnails_dir, f"heygen_{video_id}.jpg")))
+        # Both downloads settle before any error is raised, so no lock outlives the job
+        paths = await asyncio.gather(*downloads, return_exceptions=True)
+        for result in paths:
+            if isinstance(result, BaseException):
+                raise result
+        return paths[0], paths[1] if thumbnail_url else None
+
+    async def _update_status(self, video_id: str, status: str, **fields):
+        if self.db is None:
+            return
+        try:
+            if not await asyncio.to_thread(self.db.update_heygen_video_status, video_id, status, **fields):
+                logger.warning(f"Failed to update video {video_id} status in database")
+        except Exception as e:
+            logger.error(f"Failed to update database status for video {video_id}: {e}")
+
+    def _finish(self, job: HeyGenJob):
+        self.jobs.pop(job.video_id, None)
+        for waiter in self._waiters.pop(job.video_id, []):
+            if not waiter.done():
+                waiter.set_result(job.response)
+
+    async def handle_webhook_event(self, payload: dict) -> Optional[str]:
+        """Handle a HeyGen webhook event (avatar_video.success / avatar_video.fail).
+
+        A success triggers an immediate status check, which also fetches the
+        thumbnail URL the event does not carry.
+        """
+        event_type = payload.get("event_type")
+        data = payload.get("event_data") or {}
+        video_id = data.get("video_id")
+        if not video_id:
+            logger.warning(f"Ignoring HeyGen webhook event without a video_id: {event_type}")
+            return None
+        logger.info(f"HeyGen webhook {event_type} for video {video_id}")
+        if event_type == "avatar_video.fail":
+            return await self.handle_status(video_id, {"status": "failed", "error": data.get("msg")})
+        return await self.check_job(video_id)
+
+    async def drain(self):
+        """Wait for the downloads in progress."""
+        while self._downloads:
+            await asyncio.gather(*list(self._downloads.values()), return_exceptions=True)
+
+    async def wait_for(self, video_id: str, timeout: float) -> dict:
+        """The final status response of ``video_id``, polling it unless run() already is.
+
+        Raises asyncio.TimeoutError after ``timeout`` seconds.
+        """
+        job = self.track(video_id)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(job.video_id, []).append(waiter)
+
+        async def drive():
+            while not waiter.done():
+                if not self._running:
+                    await self.poll_once()
+                await asyncio.sleep(self._seconds_to_next_check(1.0))
+            return waiter.result()
+
+        return await asyncio.wait_for(drive(), timeout)
+
+    def _seconds_to_next_check(self, longest: float) -> float:
+        next_check = min((job.next_check_at for job in self.jobs.values()), default=time.time() + longest)
+        return min(longest, max(0.05, next_check - time.time()))
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        """Poll and download until ``stop`` is set, picking up new jobs from the database."""
+        stop = stop or asyncio.Event()
+        self._running = True
+        next_refresh = 0.0
+        mode = "webhooks with polling fallback" if self.webhooks_enabled else "polling"
+        logger.info(f"Orchestrating HeyGen videos ({mode})")
+        try:
+            while not stop.is_set():
+                now = time.time()
+                if self.db is not None and now >= next_refresh:
+                    try:
+                        await self.load_jobs()
+                    except Exception as e:
+                        logger.error(f"Error loading HeyGen videos: {e}")
+                    next_refresh = now + self.refresh_interval
+                await self.poll_once(now)
+                delay = self._seconds_to_next_check(self.max_interval)
+                if self.db is not None:
+                    delay = min(delay, max(0.05, next_refresh - time.time()))
+                try:
+                    await asyncio.wait_for(stop.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            await self.drain()
+        finally:
+            self._running = False
+
+    async def aclose(self):
+        await self.drain()
+        if self._owns_client:
+            await self.client.aclose()
+
+
+async def wait_for_video(video_id: str, timeout: float, db=None, api_key: Optional[str] = None,
+                         min_interval: Optional[float] = None) -> dict:
+    """Poll one video to a final status and return its last status response.
+
+    Used by HeyGenAPI.wait_for_video_completion. On timeout the video is
+    marked "timeout" in the database (the cron orchestrator keeps checking
+    it) and TimeoutError is raised.
+    """
+    async with AsyncHeyGenClient(api_key=api_key) as client:
+        orchestrator = HeyGenOrchestrator(db=db, client=client, download=False, min_interval=min_interval,
+                                          webhooks_enabled=False)
+        try:
+            return await orchestrator.wait_for(video_id, timeout)
+        except asyncio.TimeoutError:
+            await orchestrator._update_status(video_id, "timeout")
+            raise TimeoutError(f"Video generation timed out after {timeout} seconds")
+
+
+_orchestrator: Optional[HeyGenOrchestrator] = None
+
+
+def get_heygen_orchestrator(db=None) -> HeyGenOrchestrator:
+    """The process-wide orchestrator of the API process, for webhook events."""
+    global _orchestrator
+    if _orchestrator is None:
+        _orchestrator = HeyGenOrchestrator(db=db)
+    return _orchestrator
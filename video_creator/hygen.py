@@ -1,6 +1,6 @@
 import requests
 import os
-import time
+import asyncio
 from dotenv import load_dotenv
 import json
 from .db_utils import VideoDB
@@ -17,8 +17,9 @@ class HeyGenAPI:
             "X-Api-Key": self.api_key,
             "Content-Type": "application/json"
         }
-        self.base_url_v1 = "https://api.heygen.com/v1"
-        self.base_url_v2 = "https://api.heygen.com/v2"
+        base_url = (os.getenv("HEYGEN_API_BASE_URL") or "https://api.heygen.com").rstrip("/")
+        self.base_url_v1 = f"{base_url}/v1"
+        self.base_url_v2 = f"{base_url}/v2"
         self.upload_url = "https://upload.heygen.com/v1"
         self.db = db or VideoDB()  # Use provided db or create new instance
 
@@ -79,52 +80,28 @@ class HeyGenAPI:
 
     def wait_for_video_completion(self, video_id: str, interval: int = 5, timeout: int = 600):
         """
-        Polls the video status every `interval` seconds until the video status is 'completed' or 'failed'.
+        Polls the video status until the video reaches a final status ('completed', 'failed', ...).
         Updates the database with current status.
         
+        Checks start every `interval` seconds and back off as the video ages
+        (see video_creator.heygen_orchestrator); they run on an event loop
+        rather than sleeping between blocking requests.
+        
         Parameters:
             video_id (str): The ID of the video to check.
-            interval (int): Time in seconds between each status check. Default is 5 seconds.
-            timeout (int): Maximum time in seconds to wait. Default is 300 seconds (5 minutes).
+            interval (int): Shortest time in seconds between status checks. Default is 5 seconds.
+            timeout (int): Maximum time in seconds to wait. Default is 600 seconds (10 minutes).
             
         Returns:
             dict: The final video status response.
             
         Raises:
-            TimeoutError: If the video status does not become 'completed' or 'failed' within the timeout period.
+            TimeoutError: If the video does not reach a final status within the timeout period.
         """
-        start_time = time.time()
-        
-        while True:
-            status_response = self.check_video_status(video_id)
-            status = status_response["data"]["status"]
-            
-            # Update database status
-            try:
-                self.db.update_heygen_video_status(
-                    video_id, 
-                    status,
-                    video_url=status_response["data"].get("video_url"),
-                    thumbnail_url=status_response["data"].get("thumbnail_url")
-                )
-                logger.info(f"Updated database status: {status}")
-            except Exception as e:
-                logger.error(f"Failed to update database status: {e}")
-            
-            logger.info(f"Current status: {status}")
-            
-            if status in ("completed", "failed"):
-                return status_response
-            
-            if time.time() - start_time > timeout:
-                error_msg = f"Video generation timed out after {timeout} seconds"
-                try:
-                    self.db.update_heygen_video_status(video_id, "timeout")
-                except Exception as e:
-                    logger.error(f"Failed to update database timeout status: {e}")
-                raise TimeoutError(error_msg)
-            
-            time.sleep(interval)
+        from .heygen_orchestrator import wait_for_video
+
+        return asyncio.run(wait_for_video(video_id, timeout, db=self.db, api_key=self.api_key,
+                                          min_interval=interval))
 
     def download_video(self, video_url: str, output_file: str):
         """Download the video or file from the given URL and save it to output_file."""
@@ -13,6 +13,8 @@ from moviepy.video.fx.resize import resize
 from moviepy.video.fx.fadein import fadein
 from moviepy.video.fx.fadeout import fadeout
 from utils.file_writer import get_output_path
+from video_creator.utils.encoder_profiles import resolve_encoder_profile
+from video_creator.utils.footage_index import get_footage_index, render_background_track
 
 logger = logging.getLogger(__name__)
 
@@ -39,88 +41,25 @@ class MainVideoCreator:
         logo = logo.set_duration(clip.duration)
         return CompositeVideoClip([clip, logo])
 
-    def create_background_sequence(self, duration: float, videos_path: str, resolution: tuple) -> VideoFileClip:
+    def create_background_sequence(self, duration: float, videos_path: str, resolution: tuple,
+                                   seed=None) -> VideoFileClip:
         """Create a sequence of different background videos for the entire duration"""
         logger.info("Creating background video sequence from multiple videos...")
         
-        # Get all video files from the directory
-        video_files = []
-        for ext in ['.mp4', '.avi', '.mov', '.mkv']:
-            video_files.extend([os.path.join(videos_path, f) for f in os.listdir(videos_path) if f.endswith(ext)])
-        
-        if not video_files:
-            raise ValueError(f"No video files found in {videos_path}")
-            
-        random.shuffle(video_files)  # Randomize video order
-        
-        video_segments = []
-        remaining_duration = duration
-        video_clips = []  # Keep track for cleanup
+        # Plan from the library index; the same seed gives the same sequence
+        index = get_footage_index(videos_path)
+        shots = index.plan_background(duration, seed=seed)
         
         try:
-            while remaining_duration > 0 and video_files:
-                # Get next video
-                video_path = video_files.pop(0)
-                if not video_files:  # If we've used all videos, refill and reshuffle
-                    video_files = [os.path.join(videos_path, f) for f in os.listdir(videos_path) 
-                                 if f.endswith(('.mp4', '.avi', '.mov', '.mkv'))]
-                    random.shuffle(video_files)
-                
-                try:
-                    logger.info(f"Loading video: {os.path.basename(video_path)}")
-                    video = VideoFileClip(video_path)
-                    video_clips.append(video)  # Add to cleanup list
-                    
-                    # Resize video to match target resolution
-                    video = self.resize_video(video, resolution[0], resolution[1])
-                    
-                    # Calculate segment duration
-                    # Use a random duration between 5 and 10 seconds, or remaining duration if less
-                    segment_duration = min(random.uniform(5, 10), remaining_duration)
-                    
-                    # If video is shorter than segment_duration, loop it
-                    if video.duration < segment_duration:
-                        video = video.loop(duration=segment_duration)
-                    else:
-                        # Take a random segment from the video
-                        max_start = max(0, video.duration - segment_duration)
-                        start_time = random.uniform(0, max_start)
-                        video = video.subclip(start_time, start_time + segment_duration)
-                    
-                    # Add fade transitions
-                    if video_segments:  # Not the first clip
-                        video = video.fadein(0.5)
-                    if remaining_duration - segment_duration <= 0:  # Last clip
-                        video = video.fadeout(0.5)
-                    
-                    video_segments.append(video)
-                    remaining_duration -= segment_duration
-                    
-                    logger.info(f"Added video segment from {os.path.basename(video_path)} "
-                              f"(duration: {segment_duration:.2f}s, remaining: {remaining_duration:.2f}s)")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing video {video_path}: {str(e)}")
-                    continue
-            
-            if not video_segments:
-                raise ValueError("No valid video segments created")
-                
-            # Concatenate all video segments
-            logger.info(f"Concatenating {len(video_segments)} video segments...")
-            final_background = concatenate_videoclips(video_segments, method="compose")
+            # One ffmpeg run renders the plan to a single track, read as one input
+            track_path = render_background_track(index, shots, resolution, fit="stretch")
+            final_background = VideoFileClip(track_path, audio=False)
             logger.info(f"Created background sequence with total duration: {final_background.duration:.2f}s")
             
             return final_background
             
         except Exception as e:
             logger.error(f"Error creating background sequence: {str(e)}")
-            # Clean up on error
-            for clip in video_clips:
-                try:
-                    clip.close()
-                except:
-                    pass
             # Create a plain black background as fallback
             return ColorClip(
                 size=resolution,
@@ -201,7 +140,8 @@ class MainVideoCreator:
             # First check videos_library_path for random video sequence
             if config.get('videos_library_path') and os.path.exists(config['videos_library_path']):
                 logger.info(f"Creating random video sequence from library: {config['videos_library_path']}")
-                bg_clip = self.create_background_sequence(duration, config['videos_library_path'], resolution)
+                bg_clip = self.create_background_sequence(duration, config['videos_library_path'], resolution,
+                                                          seed=job_id)
                 clips.append(bg_clip)
             # Fallback to background_video_path for single video
             elif config.get('background_video_path') and os.path.exists(config['background_video_path']):
@@ -289,7 +229,8 @@ class MainVideoCreator:
                 job_id=job_id,
                 theme=request_dict.get('theme', 'default')
             )
-            main_video.write_videofile(main_video_output_path, codec='libx264', audio_codec='aac')
+            main_video.write_videofile(main_video_output_path,
+                                       **resolve_encoder_profile("main", config).write_videofile_kwargs(main_video.fps))
             logger.info("Main video segment created successfully")
             return main_video, main_video_output_path
             
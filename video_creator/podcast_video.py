@@ -16,6 +16,7 @@ from moviepy.audio.fx.all import volumex, audio_loop
 from moviepy.audio.AudioClip import CompositeAudioClip
 from typing import List
 import glob
+from video_creator.utils.encoder_profiles import resolve_encoder_profile
 
 # Set up logging
 logging.basicConfig(
@@ -284,10 +285,7 @@ class PodcastVideoCreator:
             final_video.write_videofile(
                 self.output_path,
                 fps=30,
-                codec='libx264',
-                audio_codec='aac',
-                threads=4,
-                preset='medium'
+                **resolve_encoder_profile("main").write_videofile_kwargs(30)
             )
             
             print("Video creation completed successfully!")
@@ -20,7 +20,10 @@ from typing import Optional, Dict, Any, List, Tuple
 import json
 from profile_utils import ProfileUtils
 from video_creator.utils.podcast_short_video_creator import create_bumper_hygen_short_video, create_podcast_short_video
-from video_creator.utils.video_segment_creator import create_video_segment
+from video_creator.utils.video_segment_creator import create_cached_video_segment
+from video_creator.utils.segment_scheduler import SegmentScheduler
+from video_creator.utils.encoder_profiles import resolve_encoder_profile
+from video_creator.utils.footage_index import get_footage_index, render_background_track
 from datetime import datetime
 from config import DEFAULT_INTRO_PATH, DEFAULT_OUTRO_PATH
 from video_creator.utils.video_utils import create_final_video_from_paths
@@ -90,89 +93,25 @@ class PodcastVideoCreator:
             
         return video_files
 
-    def create_background_sequence(self, duration: float, videos_path: str, resolution: tuple) -> VideoFileClip:
+    def create_background_sequence(self, duration: float, videos_path: str, resolution: tuple,
+                                   seed=None) -> VideoFileClip:
         """Create a sequence of different background videos for the entire duration"""
         logger.info("Creating background video sequence from multiple videos...")
         
-        # Get all video files from the directory
-        video_files = []
-        for ext in ['.mp4', '.avi', '.mov', '.mkv']:
-            video_files.extend([os.path.join(videos_path, f) for f in os.listdir(videos_path) if f.endswith(ext)])
-        
-        if not video_files:
-            raise ValueError(f"No video files found in {videos_path}")
-            
-        import random
-        random.shuffle(video_files)  # Randomize video order
-        
-        video_segments = []
-        remaining_duration = duration
-        video_clips = []  # Keep track for cleanup
+        # Plan from the library index; the same seed gives the same sequence
+        index = get_footage_index(videos_path)
+        shots = index.plan_background(duration, seed=seed)
         
         try:
-            while remaining_duration > 0 and video_files:
-                # Get next video
-                video_path = video_files.pop(0)
-                if not video_files:  # If we've used all videos, refill and reshuffle
-                    video_files = [os.path.join(videos_path, f) for f in os.listdir(videos_path) 
-                                 if f.endswith(('.mp4', '.avi', '.mov', '.mkv'))]
-                    random.shuffle(video_files)
-                
-                try:
-                    logger.info(f"Loading video: {os.path.basename(video_path)}")
-                    video = VideoFileClip(video_path)
-                    video_clips.append(video)  # Add to cleanup list
-                    
-                    # Resize video to match target resolution
-                    video = self.resize_video(video, resolution[0], resolution[1])
-                    
-                    # Calculate segment duration
-                    # Use a random duration between 5 and 10 seconds, or remaining duration if less
-                    segment_duration = min(random.uniform(5, 10), remaining_duration)
-                    
-                    # If video is shorter than segment_duration, loop it
-                    if video.duration < segment_duration:
-                        video = video.loop(duration=segment_duration)
-                    else:
-                        # Take a random segment from the video
-                        max_start = max(0, video.duration - segment_duration)
-                        start_time = random.uniform(0, max_start)
-                        video = video.subclip(start_time, start_time + segment_duration)
-                    
-                    # Add fade transitions
-                    if video_segments:  # Not the first clip
-                        video = video.fadein(0.5)
-                    if remaining_duration - segment_duration <= 0:  # Last clip
-                        video = video.fadeout(0.5)
-                    
-                    video_segments.append(video)
-                    remaining_duration -= segment_duration
-                    
-                    logger.info(f"Added video segment from {os.path.basename(video_path)} "
-                              f"(duration: {segment_duration:.2f}s, remaining: {remaining_duration:.2f}s)")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing video {video_path}: {str(e)}")
-                    continue
-            
-            if not video_segments:
-                raise ValueError("No valid video segments created")
-                
-            # Concatenate all video segments
-            logger.info(f"Concatenating {len(video_segments)} video segments...")
-            final_background = concatenate_videoclips(video_segments, method="compose")
+            # One ffmpeg run renders the plan to a single track, read as one input
+            track_path = render_background_track(index, shots, resolution, fit="cover")
+            final_background = VideoFileClip(track_path, audio=False)
             logger.info(f"Created background sequence with total duration: {final_background.duration:.2f}s")
             
             return final_background
             
         except Exception as e:
             logger.error(f"Error creating background sequence: {str(e)}")
-            # Clean up on error
-            for clip in video_clips:
-                try:
-                    clip.close()
-                except:
-                    pass
             raise e
 
     def create_background(self, duration: float, background_video_path: str, resolution: tuple) -> VideoFileClip:
@@ -420,11 +359,8 @@ class PodcastVideoCreator:
             # final_short_video_path = config['output_dir'] + "/" + config['short_video_output_filename']
             short_video_clip.write_videofile(
                 final_short_video_path,
-                codec=config['codec'],
-                audio_codec=config['audio_codec'],
                 fps=config['fps'],
-                threads=config['threads'],
-                preset=config['preset']
+                **resolve_encoder_profile("short", config).write_videofile_kwargs(config['fps'])
             )
          
             # Load and return the final video clip
@@ -471,6 +407,64 @@ class PodcastVideoCreator:
         except Exception as e:
             logger.error(f"Error playing audio: {str(e)}")
 
+    def dispatch_heygen_short_video(self, config, job_id, request_dict):
+        """Queue the HeyGen avatar video; HeyGen renders it remotely while local segments render"""
+        logger.info("Creating heygen video...")
+        api = HeyGenAPI(db=self.db)
+        
+        # First generate the video
+        INPUT_TEXT = config['welcome_voiceover']
+
+        heygen_video_id = api.create_video_add_to_queue(
+            # Character and voice parameters
+            character_type="avatar",
+            avatar_id="Judith_expressive_2024120201",
+            avatar_style="normal",
+            voice_type="text",
+            input_text=INPUT_TEXT,
+            voice_id="c4be407b9d94405a9eb403190d77c851",
+            speed=1.1,
+            # Video dimensions
+            width=1280,
+            height=720,
+            # Background parameters (defaults to video background)
+            background_type="video",
+            #old f978e4db1f2743d3a4001c0b3e6b6bb7
+            background_asset_id="47aaef18491a477eadb192b0bf76b14c",
+            play_style="loop",
+            fit="cover",
+            # Output and polling parameters
+            video_output_file=config.get('hygen_file_name'),
+            thumbnail_output_file="thumbnail.jpg",
+            poll_interval=5,
+            timeout=300,
+            # Pass task ID for database tracking
+            task_id=int(job_id),
+            config=config,
+            request_dict=request_dict
+        )
+        #also update is_heygen_video to true in database
+        self.db.update_heygen_video_flag(job_id=int(job_id), is_heygen_video=True)
+        logger.info(f"Heygen video ID: {heygen_video_id}")
+        return heygen_video_id
+
+    def record_segment(self, job_id, path_type, result, seconds):
+        """Store a finished segment in the database as soon as its render completes"""
+        if path_type == 'short_video_path':
+            segment_path, _ = result
+        elif isinstance(result, tuple):
+            segment_path, cache_info = result
+            if cache_info['key']:
+                segment_type = path_type.replace('_video_path', '')
+                if cache_info['hit']:
+                    logger.info(f"Reused cached {segment_type} segment, skipped rendering")
+                self.db.record_segment_cache(job_id=int(job_id), segment_type=segment_type,
+                                             cache_key=cache_info['key'], hit=cache_info['hit'])
+        else:
+            segment_path = result
+        logger.info(f"{path_type} ready in {seconds:.1f}s: {segment_path}")
+        self.db.add_specific_path(job_id=int(job_id), path_type=path_type, path_value=segment_path)
+
     def create_video(self, 
                      audio_path,
                      welcome_audio_path,
@@ -479,72 +473,63 @@ class PodcastVideoCreator:
                      request_dict
                   ):
         
-        """Create a video with the specified parameters"""
+        """Create a video with the specified parameters
         
-        intro_clip = None
-        outro = None
-        main_video = None
-        short_video = None
-        final_video = None
+        The HeyGen video is queued first so its remote rendering overlaps
+        local work. Intro, short, bumper, main and outro segments are then
+        rendered in parallel by a SegmentScheduler within the host's
+        VIDEO_RENDER_* CPU/memory budget; each path is recorded in the
+        database as soon as its segment finishes, and per-segment wall
+        times are kept in ``self.segment_timings``.
+        """
         
-    # #
         try:
             import json
             # Set paths
-            # print("on top of the world")
-            # print(json.dumps(config, indent=4))
-            background_video_path = config['background_video_path']
-        
-            #self.background_video_path = os.path.dirname(config['background_video_path'])
             self.background_video_path = config['background_video_path']
             self.background_music_path = config['background_music_path']
             self.logo_path = config['logo_settings_main_logo_path']
+            resolution = config['resolution']
+            thumbnail_paths = None
             
-          
+            # Kick off HeyGen before any local rendering
+            if config['heygen_short_video']:
+                self.dispatch_heygen_short_video(config, job_id, request_dict)
             
-            final_clips = []  # List to store all video segments in sequence
+            scheduler = SegmentScheduler(
+                on_complete=lambda path_type, result, seconds: self.record_segment(job_id, path_type, result, seconds)
+            )
+            cpus = config.get('threads', 1)
+            
+            #let us chcek request_dict for main_video_style
+            # The main video is queued first as it takes longest
+            if config['main_video']:
+                if request_dict['main_video_style'] not in ('video', 'images'):
+                    raise ValueError(f"Unknown main video style: {request_dict['main_video_style']}")
+                logger.info("Creating main video...")
+                scheduler.add('main_video_path', render_main_video_segment, cpus=cpus,
+                              audio_path=audio_path, config=config, resolution=resolution,
+                              job_id=job_id, request_dict=request_dict)
             
-          # Get merged config with intro section overrides
-       
-    
-            # Create intro and outro segments if configs are provided
-         
             if config['intro_video']:
                 intro_config = profile_utils.get_merged_config('indapoint', 'intro')
-            
-                resolution = config['resolution']   
                 #if fixed_video_path is set in config, we use that as intro and do not create intro video
                 if intro_config['fixed_video_path']:
                     #let us validate the video path
-                
                     if not os.path.exists(intro_config['fixed_video_path']):
                         logger.error(f"Fixed video path does not exist: {intro_config['fixed_video_path']}")
                         raise ValueError(f"Fixed video path does not exist: {intro_config['fixed_video_path']}")
-                        intro_clip=DEFAULT_INTRO_PATH
-                    intro_video_path=intro_config['fixed_video_path']
+                    # Store intro path in database
+                    self.db.add_specific_path(job_id=int(job_id), path_type='intro_video_path',
+                                              path_value=intro_config['fixed_video_path'])
                 #let us create a video based on inro clip to
-                else:
-                    intro_config = profile_utils.get_merged_config('indapoint', 'intro')
-
-                    if intro_config:
-                        intro_video_path = create_video_segment(audio_path=audio_path, config=intro_config,
-                                                                segment_type="intro",
-                                                                job_id=job_id,
-                                                                request_dict=request_dict)
-                        logger.info("Loading intro video...")
-                  
-                        #let us store this in database
-                # Store intro path in database
-                self.db.add_specific_path(job_id=int(job_id), path_type='intro_video_path', path_value=intro_video_path)
-                
-            
-                # Create and add short video
-                logger.info("Creating short video segment...")
+                elif intro_config:
+                    scheduler.add('intro_video_path', render_profile_segment, cpus=cpus,
+                                  audio_path=audio_path, config=intro_config, segment_type="intro",
+                                  job_id=job_id, request_dict=request_dict)
             
             # # Set output filename in config
             config['output_filename'] = os.path.join(config['output_dir'], 'podcast_short_video.mp4')
-            
-                
                 
             thumbnail_file_name,thumbnail_dir = get_output_path(
                             filename="",
@@ -553,145 +538,46 @@ class PodcastVideoCreator:
                             job_id=job_id,
                             theme=request_dict.get('theme', 'default')
                 )
-                        
-           
-            #if hygen video is set than we use that as short video and we do not create short video
-            if config['heygen_short_video']:
-                logger.info("Creating heygen video...")
-                api = HeyGenAPI(db=self.db)
-                
-                # First generate the video
-                INPUT_TEXT = config['welcome_voiceover']
-        
-                heygen_video_id = api.create_video_add_to_queue(
-                    # Character and voice parameters
-                    character_type="avatar",
-                    avatar_id="Judith_expressive_2024120201",
-                    avatar_style="normal",
-                    voice_type="text",
-                    input_text=INPUT_TEXT,
-                    voice_id="c4be407b9d94405a9eb403190d77c851",
-                    speed=1.1,
-                    # Video dimensions
-                    width=1280,
-                    height=720,
-                    # Background parameters (defaults to video background)
-                    background_type="video",
-                    #old f978e4db1f2743d3a4001c0b3e6b6bb7
-                    background_asset_id="47aaef18491a477eadb192b0bf76b14c",
-                    play_style="loop",
-                    fit="cover",
-                    # Output and polling parameters
-                    video_output_file=config.get('hygen_file_name'),
-                    thumbnail_output_file="thumbnail.jpg",
-                    poll_interval=5,
-                    timeout=300,
-                    # Pass task ID for database tracking
-                    task_id=int(job_id),
-                    config=config,
-                    request_dict=request_dict
-                )
-                #also update is_heygen_video to true in database
-                self.db.update_heygen_video_flag(job_id=int(job_id), is_heygen_video=True)
-                logger.info(f"Heygen video ID: {heygen_video_id}")
-                # we will still create short video to get thumbnail paths
-                thumbnail_paths,short_video_path = self.create_short_video(
-                    main_audio=audio_path,
-                    welcome_audio_path=welcome_audio_path,
-                    config=config,
-                    thumbnail_dir=thumbnail_dir,
-                    request_dict=request_dict
-                    
-                )
-                
-            elif config['short_video']:
-                thumbnail_paths,short_video_path = self.create_short_video(
-                    main_audio=audio_path,
-                    welcome_audio_path=welcome_audio_path,
-                    config=config,
-                    request_dict=request_dict,
-                    thumbnail_dir=thumbnail_dir,
-                )
-
-            logger.info(f"Short video created at: {short_video_path}")
-            #final_clips.append(short_video)
-        #let us store this in database
-            self.db.add_specific_path(job_id=int(job_id), path_type='short_video_path', path_value=short_video_path)
+            
+            #if hygen video is set we still create short video to get thumbnail paths
+            if config['heygen_short_video'] or config['short_video']:
+                logger.info("Creating short video segment...")
+                scheduler.add('short_video_path', render_short_video_segment, cpus=cpus,
+                              main_audio=audio_path, welcome_audio_path=welcome_audio_path,
+                              config=config, request_dict=request_dict, thumbnail_dir=thumbnail_dir)
 
             if config['hygen_bumper']:
                 logger.info("Creating heygen bumper video...")
-                bumper_video_path = create_bumper_hygen_short_video(
-                    audio_path=None,
-                    welcome_audio_path=None,
-                    config=config, 
-                    request_dict=request_dict,
-                    job_id=job_id,
-                    duration=config['hygen_bumper_duration']
-                    )
-            else:
-                if config['bumper_video']:
-                    #let us create bumper video by using bumper config
-                    bumper_config = profile_utils.get_merged_config('indapoint', 'bumper')
+                scheduler.add('bumper_video_path', render_hygen_bumper_segment, cpus=cpus,
+                              config=config, request_dict=request_dict, job_id=job_id,
+                              duration=config['hygen_bumper_duration'])
+            elif config['bumper_video']:
+                #let us create bumper video by using bumper config
+                bumper_config = profile_utils.get_merged_config('indapoint', 'bumper')
                 if bumper_config['fixed_video_path']:
-            
-                    bumper_video_path=bumper_config['fixed_video_path']
+                    self.db.add_specific_path(job_id=int(job_id), path_type='bumper_video_path',
+                                              path_value=bumper_config['fixed_video_path'])
                 else:
-                    bumper_video_path = create_video_segment(audio_path=audio_path, config=bumper_config,
-                                                            segment_type="bumper",
-                                                            job_id=job_id,
-                                                            request_dict=request_dict)
-                    # bumper_video_clip = VideoFileClip(bumper_video)
-                    # bumper_video_clip = self.resize_video(bumper_video_clip, resolution[0], resolution[1])
-            
-            logger.info(f"Bumper video created at: {bumper_video_path}")
-            self.db.add_specific_path(job_id=int(job_id), path_type='bumper_video_path', path_value=bumper_video_path)
-          
-           #let us chcek request_dict for main_video_style
-            if config['main_video']:
-                if request_dict['main_video_style'] == 'video':
-                    logger.info("Creating main video...")
-                    from video_creator.main_video_creator import MainVideoCreator
-                    main_video_creator = MainVideoCreator()
-                    main_video_clip,main_video_path = main_video_creator.create_main_video(audio_path=audio_path, 
-                    config=config,
-                    resolution=resolution,
-                    job_id=job_id,
-                    request_dict=request_dict)
-                elif request_dict['main_video_style'] == 'images':
-                    logger.info("Creating main video...")
-                    from video_creator.video_with_images import create_video_with_images
-                    # Create a temporary output path for the images video
-                    temp_output = os.path.join(config['output_dir'], f"main_video_with_images_{random.randint(1000, 9999)}.mp4")
-                    config['output_file'] = temp_output
-                    main_video_path = create_video_with_images(
-                        audio_path=audio_path, 
-                        config=config, 
-                        resolution=resolution, 
-                        job_id=job_id,
-                        request_dict=request_dict)
-                    if main_video_path is None:
-                        raise ValueError("Failed to create video with images")
-         
-      
-            
-                self.db.add_specific_path(job_id=int(job_id), path_type='main_video_path', path_value=main_video_path)
+                    scheduler.add('bumper_video_path', render_profile_segment, cpus=cpus,
+                                  audio_path=audio_path, config=bumper_config, segment_type="bumper",
+                                  job_id=job_id, request_dict=request_dict)
             
             if config['outro_video']:
                 outro_config = profile_utils.get_merged_config('indapoint', 'outro')
-                if outro_config:
-                    logger.info("Creating outro video segment...")
-                    
                 if outro_config['fixed_video_path']:
-                    outro_video_path=outro_config['fixed_video_path']
+                    self.db.add_specific_path(job_id=int(job_id), path_type='outro_video_path',
+                                              path_value=outro_config['fixed_video_path'])
                 else:
-                        outro_video_path = create_video_segment(audio_path=audio_path, config=outro_config,
-                                                            segment_type="outro",
-                                                            job_id=job_id,
-                                                            request_dict=request_dict)
-
-                
-                self.db.add_specific_path(job_id=int(job_id), path_type='outro_video_path', path_value=outro_video_path)
-                logger.info("Outro video added successfully")
+                    logger.info("Creating outro video segment...")
+                    scheduler.add('outro_video_path', render_profile_segment, cpus=cpus,
+                                  audio_path=audio_path, config=outro_config, segment_type="outro",
+                                  job_id=job_id, request_dict=request_dict)
+            
+            results = scheduler.run()
+            self.segment_timings = scheduler.timings
+            if 'short_video_path' in results:
+                short_video_path, thumbnail_paths = results['short_video_path']
+                logger.info(f"Short video created at: {short_video_path}")
             
             self.db.update_video_path_column(job_id=int(job_id),
             column_name='welcome_voiceover_text', 
@@ -710,15 +596,6 @@ class PodcastVideoCreator:
                 value=conversation_data
             )
             
-            # Get all video paths from database
-            video_paths = self.db.get_video_paths_in_order(int(job_id))
-        
-            
-            # Create final video using paths
-          
-        
-            # output_path = create_final_video_from_paths(video_paths, config, job_id)
-        
             logger.info("Video creation completed successfully and recorded in database!")
             return job_id,thumbnail_paths
 
@@ -726,15 +603,6 @@ class PodcastVideoCreator:
             logger.error(f"Error creating video: {str(e)}")
             raise e
 
-        finally:
-            # Clean up resources
-            for clip in [intro_clip, outro, main_video, short_video, final_video]:
-                if clip:
-                    try:
-                        clip.close()
-                    except:
-                        pass
-
     def add_logo(self, clip, logo_path, logo_width, logo_height):
         """Add a logo to the clip"""
         logo = ImageClip(logo_path)
@@ -743,6 +611,72 @@ class PodcastVideoCreator:
         logo = logo.set_duration(clip.duration)
         return CompositeVideoClip([clip, logo])
 
+# Segment render tasks run in SegmentScheduler worker processes, so they are
+# module-level functions taking plain arguments and returning paths.
+
+def render_profile_segment(audio_path, config, segment_type, job_id, request_dict):
+    """Render an intro/bumper/outro through the segment cache, returning (path, cache_info)"""
+    return create_cached_video_segment(audio_path=audio_path, config=config,
+                                       segment_type=segment_type,
+                                       job_id=job_id,
+                                       request_dict=request_dict)
+
+
+def render_short_video_segment(main_audio, welcome_audio_path, config, request_dict, thumbnail_dir):
+    """Render the short video, returning (path, thumbnail_paths)"""
+    thumbnail_paths, short_video_path = PodcastVideoCreator().create_short_video(
+        main_audio=main_audio,
+        welcome_audio_path=welcome_audio_path,
+        config=config,
+        request_dict=request_dict,
+        thumbnail_dir=thumbnail_dir,
+    )
+    return short_video_path, thumbnail_paths
+
+
+def render_hygen_bumper_segment(config, request_dict, job_id, duration):
+    """Render the HeyGen bumper, returning its path"""
+    return create_bumper_hygen_short_video(
+        audio_path=None,
+        welcome_audio_path=None,
+        config=config,
+        request_dict=request_dict,
+        job_id=job_id,
+        duration=duration
+    )
+
+
+def render_main_video_segment(audio_path, config, resolution, job_id, request_dict):
+    """Render the main video in the requested style, returning its path"""
+    if request_dict['main_video_style'] == 'video':
+        from video_creator.main_video_creator import MainVideoCreator
+        main_video_creator = MainVideoCreator()
+        main_video_clip, main_video_path = main_video_creator.create_main_video(audio_path=audio_path,
+                                                                                config=config,
+                                                                                resolution=resolution,
+                                                                                job_id=job_id,
+                                                                                request_dict=request_dict)
+        if main_video_clip:
+            try:
+                main_video_clip.close()
+            except:
+                pass
+    else:
+        from video_creator.video_with_images import create_video_with_images
+        # Create a temporary output path for the images video
+        temp_output = os.path.join(config['output_dir'], f"main_video_with_images_{random.randint(1000, 9999)}.mp4")
+        config['output_file'] = temp_output
+        main_video_path = create_video_with_images(
+            audio_path=audio_path,
+            config=config,
+            resolution=resolution,
+            job_id=job_id,
+            request_dict=request_dict)
+    if main_video_path is None:
+        raise ValueError("Failed to create main video")
+    return main_video_path
+
+
 def create_video(audio_path: str, title: str = None, subtitle: str = None, profile: str = "default", output_filename: str = None) -> str:
     """
     Create a video from an audio file with the given parameters
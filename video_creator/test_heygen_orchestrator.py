@@ -0,0 +1,154 @@
+import asyncio
+import fcntl
+import hashlib
+import hmac
+import json
+import os
+
+import pytest
+
+from video_creator.fake_heygen_server import FakeHeyGenServer
+from video_creator.heygen_orchestrator import (
+    AsyncHeyGenClient, HeyGenOrchestrator, poll_interval, verify_webhook_signature, wait_for_video
+)
+
+
+class RecordingDB:
+    """The VideoDB calls the orchestrator makes, recorded in memory."""
+
+    def __init__(self, in_progress=()):
+        self.in_progress = list(in_progress)
+        self.statuses = {}
+        self.short_video_paths = {}
+
+    def get_in_progress_heygen_videos(self):
+        return [row for row in self.in_progress if row[1] not in self.statuses]
+
+    def update_heygen_video_status(self, video_id, status, **fields):
+        self.statuses[video_id] = dict(fields, status=status)
+        return True
+
+    def update_hygen_short_video_path(self, video_id, video_path):
+        self.short_video_paths[video_id] = video_path
+        return True
+
+
+def orchestrator_for(server, tmp_path, db=None, **kwargs):
+    client = AsyncHeyGenClient(api_key=server.api_key, base_url=server.base_url)
+    return HeyGenOrchestrator(db=db, client=client, videos_dir=str(tmp_path / "videos"),
+                              thumbnails_dir=str(tmp_path / "thumbnails"), min_interval=0.05, max_interval=0.5,
+                              webhooks_enabled=False, **kwargs)
+
+
+def test_poll_interval_backs_off_with_age():
+    assert poll_interval(0, 5, 60) == 5
+    assert poll_interval(300, 5, 60) == 30
+    assert poll_interval(3600, 5, 60) == 60
+
+
+def test_run_checks_due_jobs_and_downloads_with_resume(tmp_path):
+    with FakeHeyGenServer(render_seconds=0.3, drop_after=50_000) as server:
+        video_ids = [server.add_video() for _ in range(3)]
+        failed_id = server.add_video(fail=True)
+        db = RecordingDB([(i, video_id, "processing", None, None) for i, video_id in enumerate(video_ids + [failed_id])])
+
+        async def run():
+            orchestrator = orchestrator_for(server, tmp_path, db=db, refresh_interval=0.1)
+            stop = asyncio.Event()
+            task = asyncio.create_task(orchestrator.run(stop))
+            while len(db.statuses) < 4:
+                await asyncio.sleep(0.05)
+            stop.set()
+            await task
+            await orchestrator.aclose()
+
+        asyncio.run(asyncio.wait_for(run(), 20))
+
+        assert db.statuses[failed_id]["status"] == "failed"
+        for video_id in video_ids:
+            status = db.statuses[video_id]
+            assert status["status"] == "completed"
+            with open(status["video_path"], "rb") as f:
+                assert f.read() == server.file_bytes(video_id, "mp4")
+            with open(status["thumbnail_path"], "rb") as f:
+                assert f.read() == server.file_bytes(video_id, "jpg")
+            assert db.short_video_paths[video_id] == status["video_path"]
+        # Every first download was cut short and resumed from where it stopped
+        assert sum(1 for _, path, byte_range in server.requests
+                   if path.endswith(".mp4") and byte_range == "bytes=50000-") == 3
+        assert not [name for name in os.listdir(tmp_path / "videos") if name.endswith(".part")]
+        # Young jobs are checked often, but not more than their interval allows
+        assert server.count("/v1/video_status.get") < 4 * 0.5 / 0.05 + 8
+
+
+def test_webhook_events(tmp_path):
+    with FakeHeyGenServer() as server:
+        done_id, failed_id = server.add_video(), server.add_video()
+        db = RecordingDB()
+
+        async def run():
+            orchestrator = orchestrator_for(server, tmp_path, db=db)
+            assert await orchestrator.handle_webhook_event(
+                {"event_type": "avatar_video.success", "event_data": {"video_id": done_id}}) == "completed"
+            assert await orchestrator.handle_webhook_event(
+                {"event_type": "avatar_video.fail", "event_data": {"video_id": failed_id, "msg": "bad"}}) == "failed"
+            await orchestrator.aclose()
+            assert not orchestrator.jobs
+
+        asyncio.run(run())
+        assert db.statuses[done_id]["video_path"].endswith(f"heygen_{done_id}.mp4")
+        assert db.statuses[failed_id] == {"status": "failed"}
+
+    body = b'{"event_type": "avatar_video.success"}'
+    signature = hmac.new(b"secret", body, hashlib.sha256).hexdigest()
+    assert verify_webhook_signature(body, signature, "secret")
+    assert not verify_webhook_signature(body + b" ", signature, "secret")
+    assert not verify_webhook_signature(body, None, "secret")
+
+
+def test_download_is_claimed_and_stale_partial_discarded(tmp_path):
+    with FakeHeyGenServer() as server:
+        video_id = server.add_video()
+        db = RecordingDB()
+        video_path = tmp_path / "videos" / f"heygen_{video_id}.mp4"
+        os.makedirs(video_path.parent)
+        # Left behind by a download of a different file
+        part_path = f"{video_path}.part"
+        with open(part_path, "wb") as f:
+            f.write(b"x" * 1000)
+        with open(f"{part_path}.meta", "w") as f:
+            json.dump({"validator": '"stale"'}, f)
+
+        async def webhook():
+            orchestrator = orchestrator_for(server, tmp_path, db=db)
+            await orchestrator.handle_webhook_event(
+                {"event_type": "avatar_video.success", "event_data": {"video_id": video_id}})
+            await orchestrator.aclose()
+
+        # Another process holds the download: this one leaves the job to it
+        with open(part_path, "ab") as other:
+            fcntl.flock(other, fcntl.LOCK_EX)
+            asyncio.run(webhook())
+        assert video_id not in db.statuses and not video_path.exists()
+
+        asyncio.run(webhook())
+        assert db.statuses[video_id]["video_path"] == str(video_path)
+        with open(video_path, "rb") as f:
+            assert f.read() == server.file_bytes(video_id, "mp4")
+        assert ("GET", f"/files/{video_id}.mp4", "bytes=1000-") in server.requests
+        assert not os.path.exists(part_path) and not os.path.exists(f"{part_path}.meta")
+
+
+def test_wait_for_video(tmp_path, monkeypatch):
+    with FakeHeyGenServer(render_seconds=0.2) as server:
+        monkeypatch.setenv("HEYGEN_API_BASE_URL", server.base_url)
+        db = RecordingDB()
+        video_id = server.add_video()
+        response = asyncio.run(wait_for_video(video_id, 5, db=db, api_key=server.api_key, min_interval=0.05))
+        assert response["data"]["status"] == "completed" and response["data"]["video_url"]
+        assert db.statuses[video_id]["status"] == "completed"
+
+        slow_id = server.add_video(render_seconds=60)
+        with pytest.raises(TimeoutError):
+            asyncio.run(wait_for_video(slow_id, 0.3, db=db, api_key=server.api_key, min_interval=0.05))
+        assert db.statuses[slow_id] == {"status": "timeout"}
@@ -10,10 +10,11 @@ Utility functions for podcast video creation
 
 from .podcast_intro_creator import create_podcast_intro
 from .podcast_short_video_creator import create_podcast_short_video
-from .video_segment_creator import create_video_segment
+from .video_segment_creator import create_cached_video_segment, create_video_segment
 
 __all__ = [
     'create_podcast_intro',
     'create_podcast_short_video',
-    'create_video_segment'
+    'create_video_segment',
+    'create_cached_video_segment'
 ]
@@ -0,0 +1,150 @@
+"""Module for the encoder profiles every video output is written with.
+
+A profile fixes the rate control (CRF or bitrate), x264 preset and tune,
+GOP length, encoder thread count and audio encoding. Each output of the
+pipeline has a role that resolves to a profile, so speed and quality can
+be traded off per output in one place:
+
+* segment: intro, bumper and outro renders (publish)
+* main: the main video (publish)
+* short: the short and HeyGen bumper videos (short-form)
+* final: the assembled episode (publish)
+* preprocess: compatibility re-encodes of source videos (publish)
+* intermediate: temporary renders that are decoded again (intermediate)
+
+A profile config can pick another profile for an output with
+``encoder_profiles: {output: name}``; VIDEO_ENCODER_PROFILE overrides
+every output (e.g. "draft" for quick local renders).
+"""
+import os
+import re
+import json
+from typing import Dict, List, Optional
+
+ENCODER_OUTPUTS = {
+    "segment": "publish",
+    "main": "publish",
+    "short": "short-form",
+    "final": "publish",
+    "preprocess": "publish",
+    "intermediate": "intermediate",
+}
+
+
+BITRATE_UNITS = {"": 1, "k": 1000, "m": 1000 ** 2, "g": 1000 ** 3}
+
+
+def parse_bitrate(value: str) -> int:
+    """Bits per second of an ffmpeg bitrate such as "6000k", "6M" or "128000"."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kKmMgG]?)\s*", str(value))
+    if not match:
+        raise ValueError(f"Invalid bitrate: {value!r}")
+    return int(float(match.group(1)) * BITRATE_UNITS[match.group(2).lower()])
+
+
+class EncoderProfile:
+    """Encoder settings for one quality/speed trade-off.
+
+    Exactly one of ``crf`` and ``video_bitrate`` sets the rate control;
+    ``max_bitrate`` caps a CRF or bitrate encode with a VBV buffer of
+    twice its size. Bitrates take ffmpeg's k/M/G suffixes.
+    ``gop_seconds`` is converted to frames at the output frame rate.
+    ``threads`` None lets ffmpeg choose.
+    """
+
+    def __init__(self, name: str, crf: Optional[int] = None, video_bitrate: Optional[str] = None,
+                 max_bitrate: Optional[str] = None, preset: str = "medium", tune: Optional[str] = None,
+                 gop_seconds: Optional[float] = None, threads: Optional[int] = None,
+                 video_codec: str = "libx264", audio_codec: str = "aac", audio_bitrate: str = "128k"):
+        if (crf is None) == (video_bitrate is None):
+            raise ValueError(f"Encoder profile {name} needs exactly one of crf and video_bitrate")
+        for bitrate in (video_bitrate, max_bitrate, audio_bitrate):
+            if bitrate is not None:
+                parse_bitrate(bitrate)
+        self.name = name
+        self.crf = crf
+        self.video_bitrate = video_bitrate
+        self.max_bitrate = max_bitrate
+        self.preset = preset
+        self.tune = tune
+        self.gop_seconds = gop_seconds
+        self.threads = threads
+        self.video_codec = video_codec
+        self.audio_codec = audio_codec
+        self.audio_bitrate = audio_bitrate
+
+    @property
+    def key(self) -> str:
+        """Canonical description, for cache keys of files encoded with this profile."""
+        return json.dumps(self.__dict__, sort_keys=True)
+
+    def _rate_and_tuning_args(self, fps: Optional[float]) -> List[str]:
+        args = ["-crf", str(self.crf)] if self.crf is not None else []
+        if self.max_bitrate:
+            bufsize = 2 * parse_bitrate(self.max_bitrate)
+            args += ["-maxrate", self.max_bitrate, "-bufsize", f"{bufsize // 1000}k"]
+        if self.tune:
+            args += ["-tune", self.tune]
+        if self.gop_seconds and fps:
+            args += ["-g", str(max(1, int(round(self.gop_seconds * fps))))]
+        return args
+
+    def video_args(self, fps: Optional[float] = None) -> List[str]:
+        """ffmpeg video encoding arguments."""
+        args = ["-c:v", self.video_codec]
+        if self.video_bitrate:
+            args += ["-b:v", self.video_bitrate]
+        args += ["-preset", self.preset] + self._rate_and_tuning_args(fps)
+        if self.threads:
+            args += ["-threads", str(self.threads)]
+        return args
+
+    def audio_args(self) -> List[str]:
+        """ffmpeg audio encoding arguments."""
+        return ["-c:a", self.audio_codec, "-b:a", self.audio_bitrate]
+
+    def write_videofile_kwargs(self, fps: Optional[float] = None) -> Dict:
+        """Keyword arguments for MoviePy's write_videofile (which adds yuv420p for libx264 itself)."""
+        return {
+            "codec": self.video_codec,
+            "bitrate": self.video_bitrate,
+            "preset": self.preset,
+            "threads": self.threads,
+            "audio_codec": self.audio_codec,
+            "audio_bitrate": self.audio_bitrate,
+            "ffmpeg_params": self._rate_and_tuning_args(fps),
+        }
+
+
+ENCODER_PROFILES = {
+    # Fast local previews; visibly soft
+    "draft": EncoderProfile("draft", crf=30, preset="ultrafast", tune="fastdecode", gop_seconds=2,
+                            audio_bitrate="96k"),
+    # What viewers get: transparent quality, keyframes every 2s for streaming
+    "publish": EncoderProfile("publish", crf=20, preset="medium", gop_seconds=2, audio_bitrate="160k"),
+    # Masters kept for re-editing
+    "archive": EncoderProfile("archive", crf=16, preset="slow", gop_seconds=10, audio_bitrate="256k"),
+    # Social platforms cap the bitrate of short clips
+    "short-form": EncoderProfile("short-form", crf=21, max_bitrate="6000k", preset="fast", gop_seconds=1,
+                                 audio_bitrate="128k"),
+    # Temporary files that are decoded and re-encoded again
+    "intermediate": EncoderProfile("intermediate", crf=12, preset="veryfast", gop_seconds=1, audio_bitrate="320k"),
+}
+
+
+def get_encoder_profile(name: str) -> EncoderProfile:
+    if name not in ENCODER_PROFILES:
+        raise ValueError(f"Unknown encoder profile: {name}")
+    return ENCODER_PROFILES[name]
+
+
+def resolve_encoder_profile(output: str, config: Optional[Dict] = None) -> EncoderProfile:
+    """The profile an output is encoded with (see the module docstring for the lookup order)."""
+    if output not in ENCODER_OUTPUTS:
+        raise ValueError(f"Unknown encoder output: {output}")
+    config = config or {}
+    name = (os.getenv("VIDEO_ENCODER_PROFILE")
+            or config.get(f"encoder_profiles_{output}")
+            or (config.get("encoder_profiles") or {}).get(output)
+            or ENCODER_OUTPUTS[output])
+    return get_encoder_profile(name)
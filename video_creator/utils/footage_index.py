@@ -0,0 +1,325 @@
+"""Module for the stock-footage library behind random background sequences.
+
+Each profile's ``videos`` directory gets a persistent index of its clips
+(duration, resolution, frame rate, codec, size and mtime). Refreshing
+the index only stats the directory; clips are probed again only when
+they are added or change, and removed clips are dropped.
+
+For rendering, every clip gets a proxy: a silent copy already scaled to
+the output resolution and frame rate. A background sequence is planned
+from the index in memory as an edit decision list (deterministic for a
+seed) and rendered from the proxies by a single ffmpeg run to one
+background track, which the main video reads as a single input.
+
+The index, proxies and tracks live under FOOTAGE_CACHE_DIR (default
+``cache/footage``), in one directory per library.
+"""
+import os
+import re
+import json
+import random
+import shutil
+import hashlib
+import logging
+import tempfile
+import subprocess
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from moviepy.config import get_setting
+
+from utils.disk_lru import DiskLRU
+from video_creator.utils.encoder_profiles import resolve_encoder_profile
+from video_creator.utils.segment_scheduler import get_render_budget
+from video_creator.utils.video_assembly import run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(str(Path(__file__).parent.parent.parent), "cache", "footage")
+FOOTAGE_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+FOOTAGE_INDEX_VERSION = 1
+PROXY_FPS = 30
+
+# "cover" scales and centre-crops like PodcastVideoCreator.resize_video;
+# "stretch" scales to the exact size like MainVideoCreator.resize_video
+PROXY_FITS = {
+    "cover": "scale={w}:{h}:force_original_aspect_ratio=increase,crop={w}:{h},setsar=1",
+    "stretch": "scale={w}:{h},setsar=1",
+}
+
+
+def get_footage_cache_dir() -> str:
+    return os.getenv("FOOTAGE_CACHE_DIR") or DEFAULT_CACHE_DIR
+
+
+def probe_footage(path: str) -> Dict:
+    """Duration, resolution, frame rate and codec of a clip, from one ``ffmpeg -i`` run."""
+    result = subprocess.run([get_setting("FFMPEG_BINARY"), "-hide_banner", "-i", path],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    info = result.stderr.decode(errors='replace')
+    duration = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", info)
+    video = re.search(r"Stream #.*?Video: (\w+).*?, (\d{2,5})x(\d{2,5})", info)
+    if not duration or not video:
+        raise Exception(f"Could not read video stream of {path}")
+    hours, minutes, seconds = duration.groups()
+    fps = re.search(r"([\d.]+) (?:fps|tbr)", info[video.start():])
+    return {
+        "duration": int(hours) * 3600 + int(minutes) * 60 + float(seconds),
+        "width": int(video.group(2)),
+        "height": int(video.group(3)),
+        "fps": float(fps.group(1)) if fps else None,
+        "codec": video.group(1),
+    }
+
+
+class BackgroundShot:
+    """One edit decision: ``duration`` seconds of a clip from ``start``, looped if the clip is shorter.
+
+    ``fade_in`` and ``fade_out`` are fades from and to black, in seconds.
+    """
+
+    def __init__(self, name: str, start: float, duration: float, loop: bool = False,
+                 fade_in: float = 0.0, fade_out: float = 0.0):
+        self.name = name
+        self.start = start
+        self.duration = duration
+        self.loop = loop
+        self.fade_in = fade_in
+        self.fade_out = fade_out
+
+    def to_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+
+class FootageIndex:
+    """Persistent index and proxies of the clips in one videos directory."""
+
+    def __init__(self, videos_dir: str, cache_dir: Optional[str] = None):
+        self.videos_dir = os.path.abspath(videos_dir)
+        library = hashlib.sha256(self.videos_dir.encode()).hexdigest()[:16]
+        self.cache_dir = os.path.join(cache_dir or get_footage_cache_dir(), library)
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        self.clips: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        if index.get("version") == FOOTAGE_INDEX_VERSION and index.get("videos_dir") == self.videos_dir:
+            self.clips = index["clips"]
+
+    def _save(self):
+        tmp_path = f"{self.index_path}.{os.getpid()}.part"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": FOOTAGE_INDEX_VERSION, "videos_dir": self.videos_dir, "clips": self.clips},
+                      f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def refresh(self) -> "FootageIndex":
+        """Bring the index up to date, probing only new or changed clips."""
+        clips = {}
+        probed = 0
+        for entry in sorted(os.scandir(self.videos_dir), key=lambda e: e.name):
+            if not entry.is_file() or not entry.name.lower().endswith(FOOTAGE_EXTENSIONS):
+                continue
+            stat = entry.stat()
+            known = self.clips.get(entry.name)
+            if known and known["mtime"] == stat.st_mtime and known["size"] == stat.st_size:
+                clips[entry.name] = known
+                continue
+            try:
+                clips[entry.name] = dict(probe_footage(entry.path), mtime=stat.st_mtime, size=stat.st_size)
+                probed += 1
+            except Exception as e:
+                logger.error(f"Skipping footage {entry.path}: {str(e)}")
+        changed = probed or set(clips) != set(self.clips)
+        self.clips = clips
+        if changed:
+            self._save()
+            self._prune_proxies()
+            logger.info(f"Indexed {len(clips)} clips in {self.videos_dir} ({probed} probed)")
+        return self
+
+    def plan_background(self, duration: float, seed=None, min_shot: float = 5.0, max_shot: float = 10.0,
+                        fade: float = 0.5) -> List[BackgroundShot]:
+        """Edit decision list of random shots covering ``duration``.
+
+        Clips are used once each in shuffled order, then reshuffled. Each
+        shot takes a random ``min_shot``-``max_shot`` second window of its
+        clip (the final shot is cut to what remains); clips shorter than
+        the shot are looped. Every shot but the first fades in and the
+        last fades out. The same ``seed`` and library give the same list.
+        """
+        if not self.clips:
+            raise ValueError(f"No video files found in {self.videos_dir}")
+        rng = random.Random(seed)
+        shots = []
+        queue = []
+        remaining = duration
+        while remaining > 0:
+            if not queue:
+                queue = sorted(self.clips)
+                rng.shuffle(queue)
+            name = queue.pop(0)
+            clip_duration = self.clips[name]["duration"]
+            length = min(rng.uniform(min_shot, max_shot), remaining)
+            if clip_duration < length:
+                shots.append(BackgroundShot(name, 0.0, length, loop=True))
+            else:
+                shots.append(BackgroundShot(name, rng.uniform(0, clip_duration - length), length))
+            remaining -= length
+        for i, shot in enumerate(shots):
+            shot.fade_in = fade if i > 0 else 0.0
+            shot.fade_out = fade if i == len(shots) - 1 else 0.0
+        return shots
+
+    def _clip_key(self, name: str) -> str:
+        clip = self.clips[name]
+        return hashlib.sha256(json.dumps([name, clip["mtime"], clip["size"]]).encode()).hexdigest()[:24]
+
+    def proxy_path(self, name: str, resolution: Tuple[int, int], fps: float = PROXY_FPS,
+                   fit: str = "cover") -> str:
+        """Proxy file name: the clip version first (for pruning), then the rendering settings."""
+        settings = hashlib.sha256(json.dumps([list(resolution), fps, fit,
+                                              resolve_encoder_profile("intermediate").key]).encode()).hexdigest()[:12]
+        return os.path.join(self.cache_dir, "proxies", f"{self._clip_key(name)}_{settings}.mp4")
+
+    def _prune_proxies(self):
+        """Remove proxies of clips that were deleted or changed."""
+        proxy_dir = os.path.join(self.cache_dir, "proxies")
+        if not os.path.isdir(proxy_dir):
+            return
+        current = {self._clip_key(name) for name in self.clips}
+        for entry in os.scandir(proxy_dir):
+            if entry.name.split("_", 1)[0] not in current:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def _build_proxy(self, name: str, resolution: Tuple[int, int], fps: float, fit: str) -> str:
+        path = self.proxy_path(name, resolution, fps, fit)
+        if os.path.exists(path):
+            return path
+        width, height = resolution
+        logger.info(f"Creating {width}x{height} proxy of {name}")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part.mp4"
+        try:
+            run_ffmpeg(["-i", os.path.join(self.videos_dir, name), "-map", "0:v:0", "-an",
+                        "-vf", PROXY_FITS[fit].format(w=width, h=height), "-r", str(fps),
+                        *resolve_encoder_profile("intermediate").video_args(fps),
+                        "-pix_fmt", "yuv420p", "-movflags", "+faststart", tmp_path])
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+    def proxies(self, names: List[str], resolution: Tuple[int, int], fps: float = PROXY_FPS,
+                fit: str = "cover") -> Dict[str, str]:
+        """Proxy paths for ``names``, creating any that are missing in parallel."""
+        if fit not in PROXY_FITS:
+            raise ValueError(f"Unknown proxy fit: {fit}")
+        names = sorted(set(names))
+        os.makedirs(os.path.join(self.cache_dir, "proxies"), exist_ok=True)
+        workers = max(1, min(len(names), get_render_budget()["max_cpus"]))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="proxy") as executor:
+            paths = list(executor.map(lambda n: self._build_proxy(n, resolution, fps, fit), names))
+        return dict(zip(names, paths))
+
+
+def _concat_file_line(path: str) -> str:
+    return "file '" + path.replace("'", "'\\''") + "'"
+
+
+def render_background_track(index: FootageIndex, shots: List[BackgroundShot], resolution: Tuple[int, int],
+                            fit: str = "cover", fps: float = PROXY_FPS) -> str:
+    """Render an edit decision list to one silent background track in a single ffmpeg run.
+
+    The shots are read from the proxies through the concat demuxer, so
+    only one proxy is decoded at a time; ``concatdec_select`` drops the
+    frames the demuxer decodes before each in point. Tracks are cached
+    by their edit decision list in the library's ``tracks`` directory.
+    """
+    proxies = index.proxies(list(index.clips), resolution, fps, fit)
+    encoder = resolve_encoder_profile("intermediate")
+    key = hashlib.sha256(json.dumps([[os.path.basename(proxies[shot.name]), shot.to_dict()] for shot in shots]
+                                    + [list(resolution), fps, encoder.key]).encode()).hexdigest()
+    track_dir = os.path.join(index.cache_dir, "tracks")
+    path = os.path.join(track_dir, f"{key}.mp4")
+    if DiskLRU.touch(path):
+        logger.info(f"Using cached background track {path}")
+        return path
+    os.makedirs(track_dir, exist_ok=True)
+
+    durations = {}
+    entries = []
+    fades = []
+    offset = 0.0
+    for shot in shots:
+        source = proxies[shot.name]
+        if shot.loop:
+            if source not in durations:
+                durations[source] = probe_footage(source)["duration"]
+            remaining = shot.duration
+            while remaining > 1e-3:
+                length = min(durations[source], remaining)
+                entries += [_concat_file_line(source), "inpoint 0", f"outpoint {length:.6f}"]
+                remaining -= length
+        else:
+            entries += [_concat_file_line(source), f"inpoint {shot.start:.6f}",
+                        f"outpoint {shot.start + shot.duration:.6f}"]
+        if shot.fade_in:
+            fades.append(f"fade=t=in:st={offset:.3f}:d={shot.fade_in}"
+                         f":enable='between(t,{offset:.3f},{offset + shot.fade_in:.3f})'")
+        offset += shot.duration
+        if shot.fade_out:
+            fades.append(f"fade=t=out:st={offset - shot.fade_out:.3f}:d={shot.fade_out}"
+                         f":enable='gte(t,{offset - shot.fade_out:.3f})'")
+
+    work_dir = tempfile.mkdtemp(prefix="background_", dir=track_dir)
+    tmp_path = os.path.join(work_dir, "track.mp4")
+    try:
+        list_path = os.path.join(work_dir, "shots.txt")
+        with open(list_path, "w") as f:
+            f.write("ffconcat version 1.0\n" + "\n".join(entries) + "\n")
+        script_path = os.path.join(work_dir, "filters.txt")
+        with open(script_path, "w") as f:
+            f.write(",".join(["select=concatdec_select", f"fps={fps}"] + fades))
+        logger.info(f"Rendering {len(shots)} background shots ({offset:.1f}s) in one ffmpeg run...")
+        run_ffmpeg(["-f", "concat", "-safe", "0", "-segment_time_metadata", "1", "-i", list_path,
+                    "-filter_script:v", script_path, "-an", "-t", f"{offset:.6f}",
+                    *encoder.video_args(fps), "-pix_fmt", "yuv420p", "-movflags", "+faststart", tmp_path])
+        os.replace(tmp_path, path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    get_track_cache(track_dir).evict(keep=path)
+    return path
+
+
+def get_track_cache(track_dir: str) -> DiskLRU:
+    """The background tracks of a library, bounded by FOOTAGE_TRACKS_MAX_MB."""
+    max_bytes = int(float(os.getenv("FOOTAGE_TRACKS_MAX_MB") or 4096) * 1024 * 1024)
+    return DiskLRU(track_dir, max_bytes, extensions=(".mp4",), label="background tracks")
+
+
+_indexes: Dict[str, FootageIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_footage_index(videos_dir: str) -> FootageIndex:
+    """The refreshed index of a videos directory, shared within the process."""
+    key = os.path.abspath(videos_dir)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = FootageIndex(videos_dir)
+        index = _indexes[key]
+    with index._lock:
+        return index.refresh()
@@ -0,0 +1,206 @@
+"""Module for preparing the images of an images-style main video.
+
+The voice-over is split into ``voice_split_duration`` segments and each
+gets an image: an image prompt is written from the segment's text, then
+the image is generated from the prompt. Segment text comes from the
+script's turn-timing index (or a single timestamped transcription of
+external audio), and every segment's prompt and image requests run
+concurrently (bounded by IMAGE_GEN_MAX_IN_FLIGHT, with retries), so an
+episode of N segments no longer pays N sequential transcription, prompt
+and image round trips.
+Generated images are cached on disk by a hash of their prompt and size.
+"""
+import os
+import time
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.disk_lru import DiskLRU, link_or_copy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(str(Path(__file__).parent.parent.parent), "cache", "images")
+
+
+def get_image_gen_settings() -> Dict:
+    """Concurrency and retry settings from the environment."""
+    return {
+        "max_in_flight": int(os.getenv("IMAGE_GEN_MAX_IN_FLIGHT") or 4),
+        "retries": int(os.getenv("IMAGE_GEN_RETRIES") or 2),
+        "retry_backoff": float(os.getenv("IMAGE_GEN_RETRY_BACKOFF") or 2.0),
+    }
+
+
+def split_segments(total_duration: float, split_duration: float) -> List[Tuple[float, float]]:
+    """``(start, end)`` of every ``split_duration`` segment of the voice-over."""
+    bounds = []
+    start = 0.0
+    while start < total_duration:
+        end = min(start + split_duration, total_duration)
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+def segment_texts(transcript: List[Dict], bounds: List[Tuple[float, float]]) -> List[str]:
+    """Text spoken in each segment, from timed script lines or a timestamped transcript.
+
+    Whisper segments do not line up with the split points, so the words
+    of each one are spread evenly over its time span and every word goes
+    to the segment containing its midpoint.
+    """
+    words = [[] for _ in bounds]
+    if not bounds:
+        return []
+    for entry in transcript:
+        entry_words = entry["text"].split()
+        if not entry_words:
+            continue
+        step = max(entry["end"] - entry["start"], 0.0) / len(entry_words)
+        index = 0
+        for n, word in enumerate(entry_words):
+            t = entry["start"] + (n + 0.5) * step
+            while index < len(bounds) - 1 and t >= bounds[index][1]:
+                index += 1
+            words[index].append(word)
+    return [" ".join(w) for w in words]
+
+
+def make_image_cache_key(prompt: str, size: Tuple[int, int]) -> str:
+    payload = "\x00".join([prompt, f"{size[0]}x{size[1]}"])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ImageCache(DiskLRU):
+    """On-disk cache of generated images keyed by prompt and size.
+
+    Entries are stored as ``<sha256>.jpg`` in ``cache_dir``; the file's
+    mtime is refreshed on every hit and eviction removes the least
+    recently used entries until the cache fits ``max_bytes``. The
+    directory can be shared by every worker on a host.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = 1024 ** 3):
+        super().__init__(cache_dir, max_bytes, extensions=(".jpg",), label="cached images")
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, prompt: str, size: Tuple[int, int]) -> str:
+        return os.path.join(self.cache_dir, f"{make_image_cache_key(prompt, size)}.jpg")
+
+    def materialize(self, prompt: str, size: Tuple[int, int], output_path: str) -> Optional[str]:
+        """Place the cached image at ``output_path``; None if it is not cached."""
+        path = self._path(prompt, size)
+        hit = self.touch(path)
+        if hit:
+            try:
+                link_or_copy(path, output_path)
+            except FileNotFoundError:
+                hit = False  # Evicted between lookup and link
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return output_path if hit else None
+
+    def store(self, prompt: str, size: Tuple[int, int], image_path: str) -> str:
+        """Add a freshly generated image to the cache."""
+        path = self._path(prompt, size)
+        link_or_copy(image_path, path)
+        self.evict(keep=path)
+        return path
+
+
+def get_image_cache_from_env() -> Optional[ImageCache]:
+    """Build the cache from environment settings, or None if disabled."""
+    if os.getenv("IMAGE_CACHE_ENABLED", "true").lower() not in ("true", "1", "yes", "on"):
+        return None
+    return ImageCache(
+        cache_dir=os.getenv("IMAGE_CACHE_DIR") or DEFAULT_CACHE_DIR,
+        max_bytes=int(float(os.getenv("IMAGE_CACHE_MAX_MB", "1024")) * 1024 * 1024)
+    )
+
+
+def call_with_retries(fn: Callable, *args, retries: int = 2, retry_backoff: float = 2.0, what: str = "request"):
+    """Call ``fn`` until it returns something other than None, at most ``retries + 1`` times.
+
+    The API helpers log their errors and return None rather than raise;
+    exceptions are treated the same way. Returns None if every attempt fails.
+    """
+    for attempt in range(retries + 1):
+        try:
+            result = fn(*args)
+        except Exception as e:
+            logger.warning(f"{what} failed: {str(e)}")
+            result = None
+        if result is not None:
+            return result
+        if attempt < retries:
+            delay = retry_backoff * 2 ** attempt
+            logger.warning(f"{what} attempt {attempt + 1} failed, retrying in {delay:.1f}s")
+            time.sleep(delay)
+    return None
+
+
+class SegmentImagePipeline:
+    """Write a prompt and generate an image for every segment, concurrently.
+
+    Args:
+        create_prompt: ``create_prompt(segment_text)`` -> image prompt or None
+        generate_image: ``generate_image(prompt, output_path)`` -> output path or None
+        fallback_image: ``fallback_image(text, output_path)`` -> output path, used when generation fails
+        image_size: Size of the generated images, part of the cache key
+        cache: Optional ImageCache
+    """
+
+    def __init__(self, create_prompt: Callable[[str], Optional[str]],
+                 generate_image: Callable[[str, str], Optional[str]],
+                 fallback_image: Callable[[str, str], str],
+                 image_size: Tuple[int, int],
+                 cache: Optional[ImageCache] = None,
+                 max_in_flight: Optional[int] = None,
+                 retries: Optional[int] = None,
+                 retry_backoff: Optional[float] = None):
+        settings = get_image_gen_settings()
+        self.create_prompt = create_prompt
+        self.generate_image = generate_image
+        self.fallback_image = fallback_image
+        self.image_size = tuple(image_size)
+        self.cache = cache
+        self.max_in_flight = max(1, max_in_flight or settings["max_in_flight"])
+        self.retries = settings["retries"] if retries is None else retries
+        self.retry_backoff = settings["retry_backoff"] if retry_backoff is None else retry_backoff
+
+    def _retry(self, fn: Callable, *args, what: str):
+        return call_with_retries(fn, *args, retries=self.retries, retry_backoff=self.retry_backoff, what=what)
+
+    def prepare_image(self, index: int, text: str) -> str:
+        """Prompt and image for one segment; returns the image path."""
+        with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as temp_file:
+            output_path = temp_file.name
+        prompt = self._retry(self.create_prompt, text, what=f"Image prompt for segment {index + 1}") or text
+        if self.cache and self.cache.materialize(prompt, self.image_size, output_path):
+            logger.info(f"Image for segment {index + 1} served from cache")
+            return output_path
+        if self._retry(self.generate_image, prompt, output_path, what=f"Image for segment {index + 1}") is None:
+            logger.info(f"Using fallback text image for segment {index + 1}")
+            return self.fallback_image(prompt, output_path)
+        if self.cache:
+            self.cache.store(prompt, self.image_size, output_path)
+        return output_path
+
+    def prepare_images(self, texts: List[str]) -> List[str]:
+        """Image paths for every segment, in segment order."""
+        logger.info(f"Generating {len(texts)} segment images ({self.max_in_flight} in flight)")
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="image") as executor:
+            paths = list(executor.map(self.prepare_image, range(len(texts)), texts))
+        logger.info(f"Generated {len(texts)} segment images in {time.time() - start_time:.2f} seconds")
+        if self.cache:
+            logger.info(f"Image cache: {self.cache.hits} hits, {self.cache.misses} misses")
+        return paths
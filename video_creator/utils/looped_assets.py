@@ -0,0 +1,217 @@
+"""Module for caching looped, resized and masked renditions of speaker and background videos.
+
+Short speaker and background videos are looped to the length of every
+episode, resized and (for speakers) cut to a circle on every frame. A
+rendition does the resizing and masking once with ffmpeg, for a fixed
+stretch of the asset's own loop: the asset is repeated seamlessly
+(``-stream_loop``, no repeated or dropped frame at the seam) until it
+lasts at least ``min_seconds``, scaled to the target size and, for
+masked shapes, given an alpha channel. Readers loop the rendition to
+their own duration, so its size depends only on the asset, never on
+the episode length, and every later job with the same asset, size and
+mask reuses it. Renditions are keyed by the asset's content hash, size,
+fit and mask shape.
+
+Masked renditions are QuickTime Animation (qtrle, ARGB) .mov files,
+which MoviePy reads with ``has_mask=True``; unmasked ones are H.264.
+"""
+import os
+import math
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from utils.disk_lru import DiskLRU
+from video_creator.utils.encoder_profiles import resolve_encoder_profile
+from video_creator.utils.footage_index import PROXY_FITS, probe_footage
+from video_creator.utils.segment_cache import file_content_hash
+from video_creator.utils.video_assembly import run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(str(Path(__file__).parent.parent.parent), "cache", "looped_assets")
+
+# Bump when renditions change how they are rendered, to invalidate old entries
+LOOPED_ASSET_VERSION = 2
+MASK_SHAPES = (None, "circle")
+RENDITION_EXTENSIONS = (".mov", ".mp4")
+
+
+def circle_mask_array(size: Tuple[int, int]) -> np.ndarray:
+    """The speaker circle: filled, centred, touching the shorter side (as the creators draw it)."""
+    w, h = size
+    mask = np.zeros((h, w), dtype="uint8")
+    center = (w // 2, h // 2)
+    cv2.circle(mask, center, min(center), (255,), -1)
+    return mask
+
+
+class LoopedAssetCache(DiskLRU):
+    """On-disk cache of looped asset renditions with size-bounded LRU eviction.
+
+    Entries are stored as ``<key>.mov`` or ``<key>.mp4`` in ``cache_dir``;
+    the file's mtime is refreshed on every hit and eviction removes the
+    least recently used entries until the cache fits ``max_bytes``. The
+    directory can be shared by every worker on a host. A rendition holds
+    whole loops of its asset, at least ``min_seconds`` of them; longer
+    renditions mean fewer seeks back to the start while reading.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = 4 * 1024 ** 3,
+                 min_seconds: float = 10, fps: float = 30):
+        super().__init__(cache_dir, max_bytes, extensions=RENDITION_EXTENSIONS, label="looped asset renditions")
+        self.min_seconds = min_seconds
+        self.fps = fps
+        self.hits = 0
+        self.misses = 0
+        self._periods: Dict[str, float] = {}
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def loops(self, source_path: str) -> Tuple[int, float]:
+        """How many times a rendition repeats the asset, and the asset's duration."""
+        source_hash = file_content_hash(source_path)
+        with self._lock:
+            period = self._periods.get(source_hash)
+        if period is None:
+            period = probe_footage(source_path)["duration"]
+            with self._lock:
+                self._periods[source_hash] = period
+        if period <= 0:
+            raise ValueError(f"Cannot loop {source_path}: it has no duration")
+        return max(1, math.ceil(round(self.min_seconds / period, 6))), period
+
+    def key(self, source_path: str, size: Tuple[int, int], mask_shape: Optional[str], loops: int,
+            fit: str = "stretch") -> str:
+        inputs = {
+            "source": file_content_hash(source_path),
+            "size": list(size),
+            "fit": fit,
+            "mask": mask_shape,
+            "loops": loops,
+            "fps": self.fps,
+            "encoder": None if mask_shape else resolve_encoder_profile("intermediate").key,
+            "version": LOOPED_ASSET_VERSION,
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def materialize(self, source_path: str, size: Tuple[int, int], mask_shape: Optional[str] = None,
+                    fit: str = "stretch") -> str:
+        """Path of the seamlessly loopable rendition of ``source_path`` at ``size``.
+
+        ``fit`` is "stretch" (scale to ``size``) or "cover" (scale to fill
+        ``size`` and centre-crop, as a centred oversized clip would show).
+        """
+        if mask_shape not in MASK_SHAPES:
+            raise ValueError(f"Unknown mask shape: {mask_shape}")
+        if fit not in PROXY_FITS:
+            raise ValueError(f"Unknown fit: {fit}")
+        size = (int(size[0]), int(size[1]))
+        loops, period = self.loops(source_path)
+        key = self.key(source_path, size, mask_shape, loops, fit)
+        path = os.path.join(self.cache_dir, f"{key}{'.mov' if mask_shape else '.mp4'}")
+        if self.touch(path):
+            with self._lock:
+                self.hits += 1
+            logger.info(f"Looped asset cache hit for {os.path.basename(source_path)} at {size[0]}x{size[1]}")
+            return path
+        with self._lock:
+            self.misses += 1
+        logger.info(f"Rendering {loops * period:.1f}s {mask_shape or 'unmasked'} rendition of "
+                    f"{os.path.basename(source_path)} at {size[0]}x{size[1]}")
+        self._render(source_path, size, mask_shape, loops, period, fit, path)
+        self.evict(keep=path)
+        return path
+
+    def _render(self, source_path: str, size: Tuple[int, int], mask_shape: Optional[str], loops: int,
+                period: float, fit: str, path: str):
+        width, height = size
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part{os.path.splitext(path)[1]}"
+        mask_path = None
+        try:
+            args = ["-stream_loop", str(loops - 1), "-i", source_path]
+            scale = f"{PROXY_FITS[fit].format(w=width, h=height)},fps={self.fps}"
+            if mask_shape == "circle":
+                with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as mask_file:
+                    mask_path = mask_file.name
+                Image.fromarray(circle_mask_array(size)).save(mask_path)
+                args += ["-loop", "1", "-i", mask_path,
+                         "-filter_complex", f"[0:v]{scale},format=rgba[v];[1:v]format=gray[m];[v][m]alphamerge[out]",
+                         "-map", "[out]", "-c:v", "qtrle", "-pix_fmt", "argb"]
+            else:
+                args += ["-map", "0:v:0", "-vf", scale,
+                         *resolve_encoder_profile("intermediate").video_args(self.fps), "-pix_fmt", "yuv420p"]
+            run_ffmpeg(args + ["-an", "-t", f"{loops * period:.3f}", tmp_path])
+            os.replace(tmp_path, path)
+        finally:
+            for leftover in (tmp_path, mask_path):
+                if leftover and os.path.exists(leftover):
+                    os.remove(leftover)
+
+    def log_stats(self):
+        logger.info(f"Looped asset cache: {self.hits} hits, {self.misses} misses "
+                    f"({self.hit_rate:.0%} hit rate)")
+
+
+_cache: Optional[LoopedAssetCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_looped_asset_cache_from_env() -> Optional[LoopedAssetCache]:
+    """The process-wide cache from environment settings, or None if disabled."""
+    global _cache
+    if os.getenv("LOOPED_ASSET_CACHE_ENABLED", "true").lower() not in ("true", "1", "yes", "on"):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LoopedAssetCache(
+                cache_dir=os.getenv("LOOPED_ASSET_CACHE_DIR") or DEFAULT_CACHE_DIR,
+                max_bytes=int(float(os.getenv("LOOPED_ASSET_CACHE_MAX_MB", "4096")) * 1024 * 1024),
+                min_seconds=float(os.getenv("LOOPED_ASSET_MIN_SECONDS") or 10)
+            )
+        return _cache
+
+
+def load_looped_video(path: str, duration: float, size: Tuple[int, int], mask_shape: Optional[str] = None,
+                      fit: str = "stretch"):
+    """A VideoFileClip of ``path`` looped to ``duration`` at ``size``, masked to ``mask_shape``.
+
+    Served from the rendition cache and looped at read time; if the cache
+    is disabled the clip is looped, resized and masked per frame by
+    MoviePy as before.
+    """
+    from moviepy.editor import ImageClip, VideoFileClip
+
+    cache = get_looped_asset_cache_from_env()
+    if cache is not None:
+        clip = VideoFileClip(cache.materialize(path, size, mask_shape, fit), audio=False, has_mask=bool(mask_shape))
+        if clip.duration < duration:
+            # Clip.loop() leaves the alpha mask unlooped, so map time for both explicitly
+            period = clip.duration
+            clip = clip.fl_time(lambda t: t % period, apply_to=['mask'])
+        return clip.set_duration(duration)
+    clip = VideoFileClip(path).without_audio()
+    if clip.duration < duration:
+        clip = clip.loop(duration=duration)
+    width, height = size
+    if fit == "cover":
+        scale = max(width / clip.w, height / clip.h)
+        clip = clip.resize((max(width, round(clip.w * scale)), max(height, round(clip.h * scale))))
+        clip = clip.crop(x_center=clip.w / 2, y_center=clip.h / 2, width=width, height=height)
+    else:
+        clip = clip.resize((width, height))
+    clip = clip.set_duration(duration)
+    if mask_shape == "circle":
+        clip = clip.set_mask(ImageClip(circle_mask_array(tuple(size)) / 255.0, ismask=True))
+    return clip
@@ -0,0 +1,221 @@
+"""Module for precompositing the static layers of a video into flat overlays.
+
+Title and subtitle text, speaker name boxes, footers, logos and dimming
+overlays never change over a clip, yet CompositeVideoClip blits each of
+them (and builds a mask for each) on every frame. FlattenedCompositeClip
+rasterizes every run of consecutive static layers once into a
+premultiplied RGBA overlay, so a frame only blends the layers that move
+(background and speaker videos) plus one overlay per run.
+"""
+import os
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+from moviepy.editor import CompositeAudioClip, CompositeVideoClip, ImageClip, VideoClip
+
+logger = logging.getLogger(__name__)
+
+
+def flatten_static_layers_enabled() -> bool:
+    return os.getenv("VIDEO_FLATTEN_STATIC_LAYERS", "true").lower() in ("true", "1", "yes", "on")
+
+
+def is_static_clip(clip: VideoClip, duration: Optional[float]) -> bool:
+    """True if ``clip`` shows the same pixels in the same place for the whole composite.
+
+    ImageClip stays an ImageClip only through frame-independent filters
+    (resize, set_opacity, ...); time-dependent ones such as fades turn it
+    into a plain VideoClip.
+    """
+    if not isinstance(clip, ImageClip):
+        return False
+    if clip.mask is not None and not isinstance(clip.mask, ImageClip):
+        return False
+    if clip.start or (clip.end is not None and duration is not None and clip.end < duration):
+        return False
+    return duration is None or clip.pos(0) == clip.pos(duration)
+
+
+def resolve_position(clip: VideoClip, t: float, frame_size: Tuple[int, int],
+                     clip_size: Tuple[int, int]) -> Tuple[int, int]:
+    """Top-left corner of ``clip`` at clip time ``t``, resolved like VideoClip.blit_on."""
+    wf, hf = frame_size
+    wi, hi = clip_size
+    pos = clip.pos(t)
+    if isinstance(pos, str):
+        pos = {'center': ['center', 'center'],
+               'left': ['left', 'center'],
+               'right': ['right', 'center'],
+               'top': ['center', 'top'],
+               'bottom': ['center', 'bottom']}[pos]
+    else:
+        pos = list(pos)
+    if clip.relative_pos:
+        for i, dim in enumerate([wf, hf]):
+            if not isinstance(pos[i], str):
+                pos[i] = dim * pos[i]
+    if isinstance(pos[0], str):
+        pos[0] = {'left': 0, 'center': (wf - wi) / 2, 'right': wf - wi}[pos[0]]
+    if isinstance(pos[1], str):
+        pos[1] = {'top': 0, 'center': (hf - hi) / 2, 'bottom': hf - hi}[pos[1]]
+    return int(pos[0]), int(pos[1])
+
+
+def blit_region(frame_size: Tuple[int, int], clip_size: Tuple[int, int], pos: Tuple[int, int]):
+    """Slices of the frame and of the clip that overlap, or None if they do not."""
+    wf, hf = frame_size
+    wi, hi = clip_size
+    x, y = pos
+    fx1, fy1 = max(0, x), max(0, y)
+    fx2, fy2 = min(wf, x + wi), min(hf, y + hi)
+    if fx1 >= fx2 or fy1 >= fy2:
+        return None
+    cx1, cy1 = fx1 - x, fy1 - y
+    return ((slice(fy1, fy2), slice(fx1, fx2)),
+            (slice(cy1, cy1 + fy2 - fy1), slice(cx1, cx1 + fx2 - fx1)))
+
+
+def clip_frame(clip: VideoClip, t: float):
+    """The clip's image and mask (or None) at clip time ``t``."""
+    img = clip.get_frame(t)
+    mask = clip.mask.get_frame(t) if clip.mask is not None else None
+    if mask is not None and img.shape[:2] != mask.shape[:2]:
+        img = clip.fill_array(img, mask.shape)
+    return img, mask
+
+
+class StaticOverlay:
+    """A run of static layers flattened into premultiplied RGBA bands.
+
+    Only the horizontal bands the layers actually cover are kept, so a
+    footer and a title cost their own rows rather than the whole frame.
+    """
+
+    def __init__(self, clips: List[ImageClip], size: Tuple[int, int]):
+        self.size = size
+        w, h = size
+        color = np.zeros((h, w, 3), dtype=np.float32)  # Premultiplied by alpha
+        alpha = np.zeros((h, w, 1), dtype=np.float32)
+        for clip in clips:
+            img, mask = clip_frame(clip, 0)
+            region = blit_region(size, img.shape[1::-1], resolve_position(clip, 0, size, img.shape[1::-1]))
+            if region is None:
+                continue
+            frame_slice, clip_slice = region
+            m = np.ones(img.shape[:2] + (1,), dtype=np.float32) if mask is None else \
+                mask[..., None].astype(np.float32)
+            m = m[clip_slice]
+            color[frame_slice] = m * img[clip_slice] + (1 - m) * color[frame_slice]
+            alpha[frame_slice] = m + (1 - m) * alpha[frame_slice]
+
+        self.bands = []
+        covered = alpha[..., 0] > 0
+        rows = np.flatnonzero(covered.any(axis=1))
+        if len(rows):
+            # Split into runs of consecutive covered rows
+            breaks = np.flatnonzero(np.diff(rows) > 1)
+            for start, end in zip(np.r_[rows[0], rows[breaks + 1]], np.r_[rows[breaks], rows[-1]] + 1):
+                cols = np.flatnonzero(covered[start:end].any(axis=0))
+                box = (slice(start, end), slice(cols[0], cols[-1] + 1))
+                self.bands.append((box, color[box].copy(), 1 - alpha[box]))
+
+    def apply(self, frame: np.ndarray):
+        """Composite the overlay onto a float32 frame in place."""
+        for box, color, transparency in self.bands:
+            region = frame[box]
+            region *= transparency
+            region += color
+
+    def to_rgba(self) -> np.ndarray:
+        """The overlay as a full-frame straight-alpha RGBA image, e.g. to save as PNG."""
+        w, h = self.size
+        rgba = np.zeros((h, w, 4), dtype=np.uint8)
+        for box, color, transparency in self.bands:
+            alpha = 1 - transparency
+            straight = np.divide(color, alpha, out=np.zeros_like(color), where=alpha > 0)
+            rgba[box + (slice(0, 3),)] = np.clip(straight + 0.5, 0, 255)
+            rgba[box + (slice(3, 4),)] = np.clip(alpha * 255 + 0.5, 0, 255)
+        return rgba
+
+
+class FlattenedCompositeClip(VideoClip):
+    """CompositeVideoClip for opaque output that precomposites its static layers.
+
+    Layers are given bottom to top as for CompositeVideoClip. Each run of
+    consecutive static layers (see is_static_clip) becomes one
+    StaticOverlay when the clip is built; the remaining layers are blended
+    per frame with the same mask arithmetic as moviepy's blit, in float32,
+    and the frame is rounded to 8 bits once at the end. No composite mask
+    is built, as write_videofile would not use it.
+    """
+
+    def __init__(self, clips: List[VideoClip], size: Optional[Tuple[int, int]] = None,
+                 bg_color: Tuple[int, int, int] = (0, 0, 0)):
+        VideoClip.__init__(self)
+        self.size = size = tuple(size or clips[0].size)
+        self.clips = clips
+        self.bg_color = np.array(bg_color, dtype=np.float32)
+
+        fpss = [c.fps for c in clips if getattr(c, 'fps', None)]
+        self.fps = max(fpss) if fpss else None
+        ends = [c.end for c in clips]
+        if None not in ends:
+            self.duration = self.end = max(ends)
+        audioclips = [c.audio for c in clips if c.audio is not None]
+        if audioclips:
+            self.audio = CompositeAudioClip(audioclips)
+
+        self.layers = []
+        run = []
+        for clip in clips:
+            if is_static_clip(clip, self.duration):
+                run.append(clip)
+                continue
+            if run:
+                self.layers.append(StaticOverlay(run, size))
+                run = []
+            self.layers.append(clip)
+        if run:
+            self.layers.append(StaticOverlay(run, size))
+        dynamic = sum(1 for layer in self.layers if not isinstance(layer, StaticOverlay))
+        logger.info(f"Flattened {len(clips) - dynamic} static layers into "
+                    f"{len(self.layers) - dynamic} overlays, {dynamic} layers blended per frame")
+
+        def make_frame(t):
+            w, h = size
+            frame = np.empty((h, w, 3), dtype=np.float32)
+            frame[:] = self.bg_color
+            for layer in self.layers:
+                if isinstance(layer, StaticOverlay):
+                    layer.apply(frame)
+                elif layer.is_playing(t):
+                    blend_clip(frame, layer, t)
+            frame += 0.5
+            return np.clip(frame, 0, 255, out=frame).astype(np.uint8)
+
+        self.make_frame = make_frame
+
+
+def blend_clip(frame: np.ndarray, clip: VideoClip, t: float):
+    """Blend a clip's frame at composite time ``t`` onto a float32 frame in place."""
+    ct = t - clip.start
+    img, mask = clip_frame(clip, ct)
+    h, w = frame.shape[:2]
+    region = blit_region((w, h), img.shape[1::-1], resolve_position(clip, ct, (w, h), img.shape[1::-1]))
+    if region is None:
+        return
+    frame_slice, clip_slice = region
+    if mask is None:
+        frame[frame_slice] = img[clip_slice]
+        return
+    target = frame[frame_slice]
+    m = mask[clip_slice][..., None].astype(np.float32)
+    target += m * (img[clip_slice] - target)
+
+
+def composite_layers(clips: List[VideoClip], size: Optional[Tuple[int, int]] = None) -> VideoClip:
+    """Composite layers bottom to top, flattening static ones unless VIDEO_FLATTEN_STATIC_LAYERS is off."""
+    if flatten_static_layers_enabled():
+        return FlattenedCompositeClip(clips, size=size)
+    return CompositeVideoClip(clips, size=size)
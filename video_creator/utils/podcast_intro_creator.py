@@ -11,6 +11,8 @@ from moviepy.video.fx.speedx import speedx
 from moviepy.audio.fx.audio_loop import audio_loop
 import logging
 from PIL import Image
+from video_creator.utils.encoder_profiles import resolve_encoder_profile
+from video_creator.utils.thumbnails import extract_thumbnails
 
 def create_circular_mask(size: Tuple[int, int]) -> ImageClip:
     """Create a circular mask for video clips"""
@@ -32,6 +34,10 @@ def create_thumbnails(
     """
     Create thumbnails from the generated video.
     
+    Frames are seeked to directly and encoded from memory (see
+    video_creator.utils.thumbnails); THUMBNAIL_MODE=scene picks the most
+    visually distinct frames instead of evenly spaced ones.
+    
     Args:
         video_path (str): Path to the video file
         num_thumbnails (int): Number of thumbnails to generate
@@ -42,58 +48,11 @@ def create_thumbnails(
         List[str]: List of paths to the generated thumbnail files
     """
     try:
-        # Load the video
-        video = VideoFileClip(video_path)
-        duration = video.duration
-        
-        # Calculate timestamps for thumbnails
-        timestamps = [duration * (i + 1) / (num_thumbnails + 1) for i in range(num_thumbnails)]
-        
-        # Create output directory
-        if thumbnails_dir is None:
-            thumbnails_dir = os.path.join(os.path.dirname(video_path), "thumbnails")
-        os.makedirs(thumbnails_dir, exist_ok=True)
-        
-        thumbnail_paths = []
-        # Generate thumbnails
-        for i, timestamp in enumerate(timestamps):
-            # Get the frame at the timestamp
-            frame = video.get_frame(timestamp)
-            
-            # Create an ImageClip from the frame and resize to YouTube dimensions
-            thumbnail = (ImageClip(frame)
-                       .resize(thumbnail_size))
-            
-            # Generate output path
-            output_filename = f"thumbnail_{i+1}.jpg"
-            output_path = os.path.join(thumbnails_dir, output_filename)
-            
-            # Save the frame first
-            temp_path = os.path.join(thumbnails_dir, f"temp_{output_filename}")
-            thumbnail.save_frame(temp_path)
-            
-            # Use PIL to load and save with quality
-            with Image.open(temp_path) as img:
-                img.save(output_path, 'JPEG', quality=95)
-            
-            # Remove temporary file
-            os.remove(temp_path)
-            
-            thumbnail_paths.append(output_path)
-            
-            # Clean up
-            thumbnail.close()
-        
-        return thumbnail_paths
-        
+        return extract_thumbnails(video_path, num_thumbnails=num_thumbnails,
+                                  thumbnail_size=thumbnail_size, thumbnails_dir=thumbnails_dir)
     except Exception as e:
         logging.error(f"Error creating thumbnails: {str(e)}")
         raise
-    finally:
-        try:
-            video.close()
-        except:
-            pass
 
 def create_podcast_intro(
     speaker1_video_path: str,
@@ -293,10 +252,7 @@ def create_podcast_intro(
         final_video.write_videofile(
             video_output_path,
             fps=30,
-            codec='libx264',
-            audio_codec='aac',
-            threads=4,
-            preset='medium'
+            **resolve_encoder_profile("segment").write_videofile_kwargs(30)
         )
         
         # Create thumbnails if requested
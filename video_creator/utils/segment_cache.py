@@ -0,0 +1,124 @@
+"""Module for caching rendered profile-static video segments (intro, bumper, outro).
+
+These segments depend only on profile config, so episodes of the same show
+usually render identical files. Renders are stored in a shared directory
+under a canonical hash of every input that affects their pixels or audio,
+and a repeat episode links the cached file instead of rendering again.
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from utils.disk_lru import DiskLRU, link_or_copy
+from video_creator.utils.encoder_profiles import resolve_encoder_profile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(str(Path(__file__).parent.parent.parent), "cache", "segments")
+
+# Bump when create_video_segment changes how it renders, to invalidate old entries
+SEGMENT_RENDER_VERSION = 2
+
+# Config keys create_video_segment reads that change the rendered pixels or audio
+SEGMENT_CONFIG_KEYS = [
+    'resolution', 'duration', 'bg_music_volume',
+    'title_font_size', 'title_font_color', 'title_font_name',
+    'subtitle_font_size', 'subtitle_font_color', 'subtitle_font_name',
+    'footer_text', 'footer_settings_font_size', 'footer_settings_font_color', 'footer_settings_font_name',
+    'logo_settings_logo_size', 'fps', 'segment_renderer',
+]
+# Input files, hashed by content so a moved or renamed asset still hits
+SEGMENT_FILE_KEYS = ['background_video_path', 'background_music_path', 'logo_settings_main_logo_path']
+
+HASH_CHUNK_BYTES = 8 * 1024 * 1024
+
+_file_hashes: Dict[Tuple[str, int, int], str] = {}
+_file_hashes_lock = threading.Lock()
+
+
+def file_content_hash(path: str) -> str:
+    """SHA-256 of a file, remembered per process until its size or mtime changes."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _file_hashes_lock:
+        if memo_key in _file_hashes:
+            return _file_hashes[memo_key]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    with _file_hashes_lock:
+        _file_hashes[memo_key] = digest.hexdigest()
+    return digest.hexdigest()
+
+
+def segment_cache_key(config: Dict, heading: str, subheading: str) -> str:
+    """Canonical hash of everything that determines a rendered segment.
+
+    The segment type, job and output paths are deliberately left out: an
+    intro and an outro with identical inputs render identical files.
+    """
+    inputs = {key: config.get(key) for key in SEGMENT_CONFIG_KEYS}
+    inputs['resolution'] = list(inputs['resolution'] or [])
+    inputs['heading'] = heading
+    inputs['subheading'] = subheading
+    for key in SEGMENT_FILE_KEYS:
+        path = config.get(key)
+        inputs[key] = file_content_hash(path) if path else None
+    inputs['encoder'] = resolve_encoder_profile("segment", config).key
+    inputs['version'] = SEGMENT_RENDER_VERSION
+    payload = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SegmentCache(DiskLRU):
+    """On-disk segment render cache with size-bounded LRU eviction.
+
+    Entries are stored as ``<key>.mp4`` in ``cache_dir``; the file's mtime
+    is refreshed on every hit and eviction removes the least recently
+    used entries until the cache fits ``max_bytes``. The directory can be
+    shared by every worker on a host.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = 4 * 1024 ** 3):
+        super().__init__(cache_dir, max_bytes, extensions=(".mp4",), label="segment cache entries")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.mp4")
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Return the cached render for ``key``, or None on a miss."""
+        path = self._path(key)
+        return path if self.touch(path) else None
+
+    def materialize(self, key: str, output_path: str) -> Optional[str]:
+        """Place the cached render at ``output_path``; None if it is not cached."""
+        cached_path = self.lookup(key)
+        if cached_path is None:
+            return None
+        try:
+            link_or_copy(cached_path, output_path)
+        except FileNotFoundError:
+            return None  # Evicted between lookup and link
+        return output_path
+
+    def store(self, key: str, rendered_path: str) -> str:
+        """Add a freshly rendered segment to the cache."""
+        path = self._path(key)
+        link_or_copy(rendered_path, path)
+        self.evict(keep=path)
+        return path
+
+
+def get_segment_cache_from_env() -> Optional[SegmentCache]:
+    """Build the cache from environment settings, or None if disabled."""
+    if os.getenv("SEGMENT_CACHE_ENABLED", "true").lower() not in ("true", "1", "yes", "on"):
+        return None
+    return SegmentCache(
+        cache_dir=os.getenv("SEGMENT_CACHE_DIR") or DEFAULT_CACHE_DIR,
+        max_bytes=int(float(os.getenv("SEGMENT_CACHE_MAX_MB", "4096")) * 1024 * 1024)
+    )
@@ -0,0 +1,92 @@
+"""Module for rendering intro/bumper/outro segments as a single ffmpeg filter graph.
+
+The segment's text and logo clips are rasterized once into a single RGBA
+PNG (the same clips the MoviePy renderer composites), then one ffmpeg
+process scales and loops the background video, overlays the PNG and
+loops and attenuates the background music. No frame passes through
+Python.
+"""
+import os
+import logging
+import tempfile
+from typing import Dict, List
+
+from PIL import Image
+from moviepy.editor import ImageClip
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from video_creator.utils.encoder_profiles import resolve_encoder_profile
+from video_creator.utils.overlay_layer import StaticOverlay
+from video_creator.utils.video_assembly import run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_RENDERERS = ("moviepy", "ffmpeg")
+
+
+def get_segment_renderer(config: Dict) -> str:
+    """Renderer for a profile's segments, from its ``segment_renderer`` setting (default moviepy)."""
+    renderer = (config.get('segment_renderer') or "moviepy").lower()
+    if renderer not in SEGMENT_RENDERERS:
+        raise ValueError(f"Unknown segment renderer: {renderer}")
+    return renderer
+
+
+def write_overlay_png(overlay_clips: List[ImageClip], size, path: str) -> str:
+    """Flatten the positioned text/logo clips into one transparent PNG of the frame size."""
+    Image.fromarray(StaticOverlay(overlay_clips, tuple(size)).to_rgba(), "RGBA").save(path)
+    return path
+
+
+def build_segment_command(config: Dict, overlay_path: str, output_path: str) -> List[str]:
+    """ffmpeg arguments that render the segment, matching create_video_segment's MoviePy path.
+
+    As there, the background is stretched to the resolution and either
+    cut from the middle of a longer video or looped, and the music is
+    looped or trimmed to the duration and scaled by ``bg_music_volume``.
+    """
+    width, height = config['resolution']
+    duration = config['duration']
+    fps = config['fps']
+    background_duration = ffmpeg_parse_infos(config['background_video_path'])['duration']
+    if background_duration > duration:
+        background_input = ["-ss", str((background_duration - duration) / 2), "-t", str(duration)]
+    else:
+        background_input = ["-stream_loop", "-1"]
+
+    filter_graph = ";".join([
+        f"[0:v]scale={width}:{height},setsar=1,fps={fps}[bg]",
+        "[bg][1:v]overlay=0:0:format=rgb[v]",
+        f"[2:a]atrim=0:{duration},asetpts=PTS-STARTPTS,volume={config['bg_music_volume']}[a]",
+    ])
+    encoder = resolve_encoder_profile("segment", config)
+    args = background_input + ["-i", config['background_video_path'],
+                               "-i", overlay_path,
+                               "-stream_loop", "-1", "-i", config['background_music_path'],
+                               "-filter_complex", filter_graph,
+                               "-map", "[v]", "-map", "[a]"] + encoder.video_args(fps) + [
+                               "-r", str(fps)] + encoder.audio_args() + [
+                               "-ar", "44100",
+                               "-t", str(duration)]
+    # As MoviePy's writer does
+    if encoder.video_codec == 'libx264' and width % 2 == 0 and height % 2 == 0:
+        args += ["-pix_fmt", "yuv420p"]
+    return args + [output_path]
+
+
+def render_segment_with_ffmpeg(config: Dict, overlay_clips: List[ImageClip], output_path: str) -> str:
+    """Render a segment in one ffmpeg process.
+
+    Args:
+        config: Segment config (the keys create_video_segment reads)
+        overlay_clips: Positioned heading, subheading, footer and logo clips
+        output_path: Where to write the segment
+
+    Returns:
+        The output path
+    """
+    with tempfile.TemporaryDirectory(prefix="segment_") as work_dir:
+        overlay_path = write_overlay_png(overlay_clips, config['resolution'], os.path.join(work_dir, "overlay.png"))
+        logger.info(f"Rendering segment with ffmpeg to {output_path}")
+        run_ffmpeg(build_segment_command(config, overlay_path, output_path))
+    return output_path
@@ -0,0 +1,128 @@
+"""Module for rendering independent video segments in parallel within a host budget."""
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def get_render_budget() -> Dict:
+    """Get the host's segment rendering budget from the environment.
+
+    By default segments may use every CPU and three quarters of physical
+    memory. Each render is assumed to need VIDEO_RENDER_TASK_MEMORY_MB
+    unless its task says otherwise.
+    """
+    try:
+        total_mb = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        total_mb = 8192
+    return {
+        "max_cpus": int(os.getenv("VIDEO_RENDER_MAX_CPUS") or os.cpu_count() or 1),
+        "max_memory_mb": int(os.getenv("VIDEO_RENDER_MAX_MEMORY_MB") or total_mb * 0.75),
+        "task_memory_mb": int(os.getenv("VIDEO_RENDER_TASK_MEMORY_MB") or 1500),
+    }
+
+
+def make_executor(max_workers: int) -> Executor:
+    """Pool the segments render in.
+
+    Workers are spawned rather than forked, so they start clean instead
+    of inheriting the parent's open database connections and clients.
+    A daemonic process (a Celery prefork worker) may not start children,
+    so there the segments render on threads instead; the heavy lifting
+    happens in ffmpeg subprocesses either way.
+    """
+    if multiprocessing.current_process().daemon:
+        logger.info("Running in a daemonic worker, rendering segments on threads")
+        return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="segment")
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _timed_call(fn: Callable[..., Any], kwargs: Dict[str, Any]):
+    """Run a task in the worker process and measure its wall time there."""
+    start = time.time()
+    result = fn(**kwargs)
+    return result, time.time() - start
+
+
+class SegmentTask:
+    """One segment render: a picklable module-level function and its arguments."""
+
+    def __init__(self, name: str, fn: Callable[..., Any], kwargs: Dict[str, Any], cpus: int, memory_mb: int):
+        self.name = name
+        self.fn = fn
+        self.kwargs = kwargs
+        self.cpus = cpus
+        self.memory_mb = memory_mb
+
+
+class SegmentScheduler:
+    """Renders independent segments in a worker pool without exceeding a CPU/memory budget.
+
+    A task is started only while the CPUs (its encoder thread count) and
+    memory reserved by running tasks leave room for it; a task larger than
+    the whole budget still runs, alone. ``on_complete(name, result, seconds)``
+    is called in the parent process as each segment finishes, so results
+    can be recorded while other segments are still rendering. The first
+    failure cancels the tasks that have not started and is re-raised.
+    """
+
+    def __init__(self, max_cpus: Optional[int] = None, max_memory_mb: Optional[int] = None,
+                 on_complete: Optional[Callable[[str, Any, float], None]] = None):
+        budget = get_render_budget()
+        self.max_cpus = max(1, max_cpus or budget["max_cpus"])
+        self.max_memory_mb = max_memory_mb or budget["max_memory_mb"]
+        self.task_memory_mb = budget["task_memory_mb"]
+        self.on_complete = on_complete
+        self.timings: Dict[str, float] = {}
+        self._tasks: List[SegmentTask] = []
+
+    def add(self, name: str, fn: Callable[..., Any], /, cpus: int = 1, memory_mb: Optional[int] = None, **kwargs):
+        """Queue a segment; tasks start in the order they were added as the budget allows."""
+        self._tasks.append(SegmentTask(name, fn, kwargs, max(1, int(cpus)), memory_mb or self.task_memory_mb))
+
+    def _fits(self, task: SegmentTask, running: Dict) -> bool:
+        if not running:
+            return True
+        cpus = sum(t.cpus for t in running.values()) + task.cpus
+        memory_mb = sum(t.memory_mb for t in running.values()) + task.memory_mb
+        return cpus <= self.max_cpus and memory_mb <= self.max_memory_mb
+
+    def run(self) -> Dict[str, Any]:
+        """Render every queued segment and return the results by name."""
+        results = {}
+        if not self._tasks:
+            return results
+        pending = list(self._tasks)
+        running = {}
+        start_time = time.time()
+        logger.info(f"Rendering {len(pending)} segments within {self.max_cpus} CPUs / {self.max_memory_mb} MB")
+        pool = make_executor(min(len(pending), self.max_cpus))
+        try:
+            while pending or running:
+                for task in list(pending):
+                    if self._fits(task, running):
+                        running[pool.submit(_timed_call, task.fn, task.kwargs)] = task
+                        pending.remove(task)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    try:
+                        result, seconds = future.result()
+                    except Exception as e:
+                        logger.error(f"Error rendering {task.name}: {str(e)}")
+                        raise
+                    results[task.name] = result
+                    self.timings[task.name] = seconds
+                    logger.info(f"Rendered {task.name} in {seconds:.1f}s")
+                    if self.on_complete:
+                        self.on_complete(task.name, result, seconds)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        logger.info(f"Rendered {len(results)} segments in {time.time() - start_time:.1f}s "
+                    f"({sum(self.timings.values()):.1f}s of segment time)")
+        return results
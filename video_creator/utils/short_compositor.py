@@ -0,0 +1,254 @@
+"""Module for rendering short-form videos from a declarative layout.
+
+The podcast short video and the HeyGen bumper stack the same layers: a
+dimmed background, two circular speakers on grey discs, name boxes, a
+title, a subtitle and a footer. A ShortLayout lists those layers as
+LayerSpecs (what to draw, where, how big, in which font and when) and a
+ShortCompositor turns it into one clip:
+
+* circle masks are built once per size and shared by every layer and job;
+* text is rasterized once per text and style and kept as RGB + alpha
+  arrays, so repeated titles, names and footers skip ImageMagick;
+* videos come from the looped rendition cache (see looped_assets);
+* layers are blended by composite_layers, which flattens the static ones
+  into a single overlay and blends the rest with vectorized float32
+  arithmetic.
+"""
+import os
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from moviepy.editor import ColorClip, ImageClip, VideoClip
+
+from video_creator.utils.looped_assets import circle_mask_array, load_looped_video
+from video_creator.utils.overlay_layer import composite_layers
+
+logger = logging.getLogger(__name__)
+
+LAYER_KINDS = ("media", "color", "text")
+MASK_SHAPES = (None, "circle")
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".gif"}
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".avi", ".mkv", ".webm", ".mpeg", ".mpg"}
+
+
+class LayerSpec:
+    """One layer of a layout.
+
+    ``kind`` is "media" (an image or video file at ``path``), "color" (a
+    solid box) or "text". ``position`` is the top-left corner in pixels,
+    either coordinate may be "center". ``size`` is the layer's size; for
+    text it is ``(width, None)`` to wrap as a caption or None to fit the
+    text. The layer is shown from ``start`` for ``duration`` seconds (to
+    the end of the video if None). Style options depend on the kind:
+
+    * media: ``path``, ``fit`` ("stretch" or "cover", for videos), ``mask``;
+    * color: ``color``, ``opacity``, ``mask``;
+    * text: ``text``, ``font``, ``fontsize``, ``color``, ``stroke_color``,
+      ``stroke_width``, ``method`` and ``align`` as for TextClip.
+    """
+
+    def __init__(self, kind: str, position=(0, 0), size: Optional[Tuple] = None, start: float = 0,
+                 duration: Optional[float] = None, **style):
+        if kind not in LAYER_KINDS:
+            raise ValueError(f"Unknown layer kind: {kind}")
+        if style.get("mask") not in MASK_SHAPES:
+            raise ValueError(f"Unknown mask shape: {style.get('mask')}")
+        self.kind = kind
+        self.position = tuple(position)
+        self.size = tuple(size) if size is not None else None
+        self.start = start
+        self.duration = duration
+        self.style = style
+
+    def __repr__(self):
+        return f"LayerSpec({self.kind!r}, position={self.position}, size={self.size})"
+
+
+class ShortLayout:
+    """The layers of a video at ``resolution``, bottom to top."""
+
+    def __init__(self, resolution: Tuple[int, int], layers: List[LayerSpec]):
+        self.resolution = tuple(resolution)
+        self.layers = layers
+
+
+def short_video_layout(config: dict, request_dict: dict, background_path: str,
+                       name_font_size: int = 30, name_box_height: int = 50) -> ShortLayout:
+    """The two-speaker layout shared by the podcast short video and the HeyGen bumper.
+
+    Positions and fonts come from ``config`` as before; ``speaker_font_size``
+    and ``speaker_box_height`` override the name defaults.
+    """
+    width, height = config['resolution']
+    speaker_size = config.get('speaker_size') or min(width // 4, height // 3)
+
+    # Speakers sit side by side, 1.5 speaker widths either side of the centre
+    speaker_y = int(height * 0.4)
+    spacing = speaker_size * 1.5
+    center_x = width // 2
+    speaker_xs = [int(center_x - spacing), int(center_x + spacing - speaker_size)]
+
+    # Name boxes just below the speakers, with the name centred vertically in them
+    name_y = speaker_y + speaker_size + 5
+    name_font_size = config.get('speaker_font_size', name_font_size)
+    name_box_height = config.get('speaker_box_height', name_box_height)
+    name_box_width = config.get('speaker_box_width', speaker_size)
+    name_text_y = name_y + (name_box_height - name_font_size) / 2
+
+    footer_height = 60
+    footer_y = height * 0.85
+    footer_text_y = footer_y + (footer_height - config['footer_settings_font_size']) / 2
+
+    speakers = [config['speaker1_video_path'], config['speaker2_video_path']]
+    names = [config['voice_settings_speaker1_name'], config['voice_settings_speaker2_name']]
+    layers = [
+        LayerSpec("media", ("center", "center"), (width, height), path=background_path, fit="cover"),
+        LayerSpec("color", (0, 0), (width, height), color=(0, 0, 0), opacity=0.5),
+    ]
+    layers += [LayerSpec("color", (x, speaker_y), (speaker_size, speaker_size), color=(128, 128, 128),
+                         mask="circle") for x in speaker_xs]
+    layers += [LayerSpec("media", (x, speaker_y), (speaker_size, speaker_size), path=path, mask="circle")
+               for x, path in zip(speaker_xs, speakers)]
+    layers += [LayerSpec("color", (x, name_y), (name_box_width, name_box_height), color=(0, 0, 0), opacity=0.7)
+               for x in speaker_xs]
+    layers += [
+        LayerSpec("text", ("center", height * 0.15), text=request_dict['title'],
+                  fontsize=config['title_font_size'], color=config['title_font_color'],
+                  font=config['title_font_name']),
+        LayerSpec("text", ("center", height * 0.25), text=request_dict['sub_title'],
+                  fontsize=config['subtitle_font_size'], color=config['subtitle_font_color'],
+                  font=config['subtitle_font_name']),
+    ]
+    layers += [LayerSpec("text", (x, name_text_y), (name_box_width, None), text=name, fontsize=name_font_size,
+                         color=config.get('speaker_font_color', 'white'),
+                         font=config.get('speaker_font', 'Arial-Bold'),
+                         stroke_color=config.get('speaker_stoke_color', 'black'), stroke_width=1,
+                         method='caption', align='center')
+               for x, name in zip(speaker_xs, names)]
+    layers += [
+        LayerSpec("color", ("center", footer_y), (width, footer_height), color=(0, 0, 0), opacity=0.7),
+        LayerSpec("text", ("center", footer_text_y), (width - 40, None), text=config['footer_settings_text'],
+                  fontsize=config['footer_settings_font_size'], color=config['footer_settings_font_color'],
+                  font=config['footer_settings_font_name'], method='caption', align='center'),
+    ]
+    return ShortLayout((width, height), layers)
+
+
+@lru_cache(maxsize=32)
+def circle_mask(size: Tuple[int, int]) -> np.ndarray:
+    """A read-only 0-1 float circle mask of ``size``, built once per size."""
+    mask = circle_mask_array(size).astype(np.float32) / 255
+    mask.setflags(write=False)
+    return mask
+
+
+def render_text(text: str, size: Optional[Tuple] = None, **style) -> Tuple[np.ndarray, np.ndarray]:
+    """Rasterize text with TextClip (ImageMagick) into RGB and 0-1 alpha arrays."""
+    from moviepy.editor import TextClip
+
+    if size is not None:
+        style['size'] = size
+    clip = TextClip(text, **style)
+    try:
+        return clip.get_frame(0), clip.mask.get_frame(0)
+    finally:
+        clip.close()
+
+
+class ShortCompositor:
+    """Builds the clips of a ShortLayout and composites them.
+
+    Text rasters are kept in a bounded LRU keyed by text, size and style,
+    so a title, name or footer is rasterized once per process however many
+    videos show it. ``text_renderer`` takes the text, size and style
+    options and returns RGB and alpha arrays (see render_text).
+    """
+
+    def __init__(self, text_renderer: Callable = render_text, max_text_rasters: int = 256):
+        self.text_renderer = text_renderer
+        self.max_text_rasters = max_text_rasters
+        self.text_hits = 0
+        self.text_misses = 0
+        self._text_rasters: "OrderedDict[tuple, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def text_raster(self, text: str, size: Optional[Tuple] = None, **style) -> Tuple[np.ndarray, np.ndarray]:
+        key = (text, size, tuple(sorted((k, v if not isinstance(v, list) else tuple(v))
+                                        for k, v in style.items())))
+        with self._lock:
+            raster = self._text_rasters.get(key)
+            if raster is not None:
+                self._text_rasters.move_to_end(key)
+                self.text_hits += 1
+                return raster
+            self.text_misses += 1
+        img, alpha = self.text_renderer(text, size, **style)
+        img, alpha = np.ascontiguousarray(img), np.ascontiguousarray(alpha, dtype=np.float32)
+        for array in (img, alpha):
+            array.setflags(write=False)
+        with self._lock:
+            self._text_rasters[key] = (img, alpha)
+            while len(self._text_rasters) > self.max_text_rasters:
+                self._text_rasters.popitem(last=False)
+        return img, alpha
+
+    def build_layer(self, spec: LayerSpec, duration: float) -> VideoClip:
+        """The clip for one layer, positioned and timed within a ``duration`` second video."""
+        layer_duration = spec.duration if spec.duration is not None else duration - spec.start
+        style = spec.style
+        if spec.kind == "media":
+            clip = self._media_clip(style['path'], layer_duration, spec.size, style.get('fit', "stretch"),
+                                    style.get('mask'))
+        elif spec.kind == "color":
+            clip = ColorClip(spec.size, color=style.get('color', (0, 0, 0)))
+            if style.get('mask'):
+                clip = clip.set_mask(ImageClip(circle_mask(spec.size), ismask=True))
+            if style.get('opacity') is not None:
+                clip = clip.set_opacity(style['opacity'])
+        else:
+            text_style = {k: v for k, v in style.items() if k != 'text'}
+            img, alpha = self.text_raster(style['text'], spec.size, **text_style)
+            clip = ImageClip(img).set_mask(ImageClip(alpha, ismask=True))
+        clip = clip.set_position(spec.position).set_duration(layer_duration)
+        return clip.set_start(spec.start) if spec.start else clip
+
+    def _media_clip(self, path: str, duration: float, size: Tuple[int, int], fit: str,
+                    mask: Optional[str]) -> VideoClip:
+        _, ext = os.path.splitext(path.lower())
+        if ext in VIDEO_EXTENSIONS:
+            # Looped, resized and masked once; later jobs reuse the rendition
+            return load_looped_video(path, duration, size, mask_shape=mask, fit=fit)
+        if ext not in IMAGE_EXTENSIONS:
+            raise ValueError(f"Media file '{path}' has unrecognized extension '{ext}'. "
+                             "Expected an image (jpg/png/etc.) or a video (mp4/mov/etc.)")
+        clip = ImageClip(path).resize(size)
+        if mask:
+            clip = clip.set_mask(ImageClip(circle_mask(tuple(size)), ismask=True))
+        return clip
+
+    def build_layers(self, layout: ShortLayout, duration: float) -> List[VideoClip]:
+        return [self.build_layer(spec, duration) for spec in layout.layers]
+
+    def render(self, layout: ShortLayout, duration: float) -> VideoClip:
+        """The composited (silent) video of ``layout``, ``duration`` seconds long."""
+        clips = self.build_layers(layout, duration)
+        logger.info(f"Compositing {len(clips)} layers at {layout.resolution[0]}x{layout.resolution[1]} "
+                    f"({self.text_hits} cached text rasters used, {self.text_misses} rendered)")
+        return composite_layers(clips, size=layout.resolution).set_duration(duration)
+
+
+_compositor: Optional[ShortCompositor] = None
+_compositor_lock = threading.Lock()
+
+
+def get_short_compositor() -> ShortCompositor:
+    """The process-wide compositor, so text rasters are shared by every job."""
+    global _compositor
+    with _compositor_lock:
+        if _compositor is None:
+            _compositor = ShortCompositor()
+        return _compositor
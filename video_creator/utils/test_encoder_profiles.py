@@ -0,0 +1,40 @@
+import pytest
+
+from video_creator.utils.encoder_profiles import (
+    EncoderProfile, get_encoder_profile, parse_bitrate, resolve_encoder_profile
+)
+
+
+def test_profile_arguments():
+    args = get_encoder_profile("short-form").video_args(30)
+    assert args[:2] == ["-c:v", "libx264"]
+    assert args[args.index("-crf") + 1] == "21"
+    assert args[args.index("-maxrate") + 1] == "6000k"
+    assert args[args.index("-bufsize") + 1] == "12000k"
+    assert args[args.index("-g") + 1] == "30"
+    kwargs = get_encoder_profile("draft").write_videofile_kwargs(25)
+    assert kwargs["preset"] == "ultrafast" and kwargs["bitrate"] is None
+    assert kwargs["ffmpeg_params"] == ["-crf", "30", "-tune", "fastdecode", "-g", "50"]
+    with pytest.raises(ValueError):
+        EncoderProfile("broken", crf=20, video_bitrate="1000k")
+
+
+def test_bitrate_units():
+    assert parse_bitrate("6M") == parse_bitrate("6000k") == parse_bitrate("6000000") == 6_000_000
+    assert parse_bitrate("2.5m") == 2_500_000
+    args = EncoderProfile("capped", crf=21, max_bitrate="6M").video_args(30)
+    assert args[args.index("-maxrate") + 1] == "6M"
+    assert args[args.index("-bufsize") + 1] == "12000k"
+    with pytest.raises(ValueError):
+        EncoderProfile("broken", crf=21, max_bitrate="6 megabits")
+
+
+def test_resolution_order(monkeypatch):
+    monkeypatch.delenv("VIDEO_ENCODER_PROFILE", raising=False)
+    assert resolve_encoder_profile("short").name == "short-form"
+    assert resolve_encoder_profile("final", {"encoder_profiles_final": "archive"}).name == "archive"
+    assert resolve_encoder_profile("main", {"encoder_profiles": {"main": "draft"}}).name == "draft"
+    monkeypatch.setenv("VIDEO_ENCODER_PROFILE", "draft")
+    assert resolve_encoder_profile("final", {"encoder_profiles_final": "archive"}).name == "draft"
+    with pytest.raises(ValueError):
+        resolve_encoder_profile("nonexistent")
@@ -0,0 +1,60 @@
+import os
+import subprocess
+
+from moviepy.config import get_setting
+
+from video_creator.utils import footage_index
+from video_creator.utils.footage_index import FootageIndex, render_background_track
+from moviepy.editor import VideoFileClip
+
+
+def make_clip(path, seconds, size="320x240", rate=25):
+    subprocess.run([get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+                    "-f", "lavfi", "-i", f"testsrc2=s={size}:r={rate}:d={seconds}",
+                    "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", str(path)], check=True)
+
+
+def test_index_is_persistent_and_incremental(tmp_path, monkeypatch):
+    videos = tmp_path / "videos"
+    videos.mkdir()
+    make_clip(videos / "a.mp4", 3)
+    make_clip(videos / "b.mov", 2, size="160x90")
+    (videos / "notes.txt").write_text("not footage")
+    index = FootageIndex(str(videos), cache_dir=str(tmp_path / "cache")).refresh()
+    assert sorted(index.clips) == ["a.mp4", "b.mov"]
+    assert (index.clips["b.mov"]["width"], index.clips["b.mov"]["height"]) == (160, 90)
+    assert index.clips["a.mp4"]["codec"] == "h264" and index.clips["a.mp4"]["fps"] == 25
+    assert abs(index.clips["a.mp4"]["duration"] - 3) < 0.1
+
+    probed = []
+    monkeypatch.setattr(footage_index, "probe_footage", lambda p: probed.append(p) or {"duration": 9.0})
+    reloaded = FootageIndex(str(videos), cache_dir=str(tmp_path / "cache")).refresh()
+    assert probed == [] and reloaded.clips == index.clips
+    os.remove(videos / "b.mov")
+    os.utime(videos / "a.mp4", (1, 1))
+    reloaded.refresh()
+    assert probed == [str(videos / "a.mp4")] and list(reloaded.clips) == ["a.mp4"]
+
+
+def test_background_plan_renders_to_one_track(tmp_path):
+    videos = tmp_path / "videos"
+    videos.mkdir()
+    make_clip(videos / "a.mp4", 12)
+    make_clip(videos / "b.mp4", 3)
+    index = FootageIndex(str(videos), cache_dir=str(tmp_path / "cache")).refresh()
+    shots = index.plan_background(20, seed="job-1")
+    assert [s.to_dict() for s in shots] == [s.to_dict() for s in index.plan_background(20, seed="job-1")]
+    assert abs(sum(shot.duration for shot in shots) - 20) < 1e-6
+    assert all(shot.loop for shot in shots if shot.name == "b.mp4")
+    assert shots[0].fade_in == 0 and shots[1].fade_in == 0.5 and shots[-1].fade_out == 0.5
+
+    track = render_background_track(index, shots, (128, 72))
+    background = VideoFileClip(track)
+    assert tuple(background.size) == (128, 72) and background.fps == 30
+    assert abs(background.duration - 20) < 0.1
+    # Shots fade up from black at the cut and play unfaded after it
+    cut = shots[0].duration
+    assert background.get_frame(cut + 0.02).mean() < 15
+    assert background.get_frame(cut + 1.0).mean() > 40
+    background.close()
+    assert render_background_track(index, shots, (128, 72)) == track
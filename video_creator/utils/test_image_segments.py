@@ -0,0 +1,67 @@
+import threading
+import time
+
+from video_creator.utils.image_segments import ImageCache, SegmentImagePipeline, segment_texts, split_segments
+
+
+def test_segment_texts_split_at_boundaries():
+    bounds = split_segments(70, 30)
+    assert bounds == [(0, 30), (30, 60), (60, 70)]
+    transcript = [
+        {"start": 0.0, "end": 20.0, "text": "one two"},
+        {"start": 20.0, "end": 40.0, "text": "three four"},  # Midpoints 25 and 35
+        {"start": 62.0, "end": 66.0, "text": " five "},
+    ]
+    assert segment_texts(transcript, bounds) == ["one two three", "four", "five"]
+
+
+def test_pipeline_runs_concurrently_retries_and_caches(tmp_path):
+    in_flight, peak, lock = [0], [0], threading.Lock()
+    calls = {"prompt": 0, "image": 0}
+    failed_once = set()
+
+    def create_prompt(text):
+        calls["prompt"] += 1
+        if text == "flaky" and text not in failed_once:
+            failed_once.add(text)
+            return None
+        return f"prompt for {text}"
+
+    def generate_image(prompt, output_path):
+        with lock:
+            calls["image"] += 1
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.05)
+        with open(output_path, "w") as f:
+            f.write(prompt)
+        with lock:
+            in_flight[0] -= 1
+        return output_path
+
+    def pipeline():
+        return SegmentImagePipeline(create_prompt, generate_image, fallback_image=None, image_size=(64, 36),
+                                    cache=ImageCache(str(tmp_path)), max_in_flight=3, retries=1, retry_backoff=0)
+
+    texts = ["a", "b", "flaky", "c", "d", "e"]
+    paths = pipeline().prepare_images(texts)
+    assert [open(p).read() for p in paths] == [f"prompt for {t}" for t in texts]
+    assert calls == {"prompt": 7, "image": 6}
+    assert 1 < peak[0] <= 3
+
+    # A second episode with the same prompts makes no image requests
+    paths = pipeline().prepare_images(texts)
+    assert [open(p).read() for p in paths] == [f"prompt for {t}" for t in texts]
+    assert calls["image"] == 6
+
+
+def test_pipeline_falls_back_when_generation_fails(tmp_path):
+    def fallback(text, output_path):
+        with open(output_path, "w") as f:
+            f.write("fallback " + text)
+        return output_path
+
+    pipeline = SegmentImagePipeline(lambda text: None, lambda prompt, path: None, fallback, image_size=(64, 36),
+                                    max_in_flight=2, retries=1, retry_backoff=0)
+    [path] = pipeline.prepare_images(["segment text"])
+    assert open(path).read() == "fallback segment text"
@@ -0,0 +1,58 @@
+import os
+import subprocess
+
+from moviepy.config import get_setting
+from moviepy.editor import VideoFileClip
+
+from video_creator.utils import looped_assets
+from video_creator.utils.looped_assets import LoopedAssetCache, load_looped_video
+
+
+def make_clip(path, seconds=1, size="160x90"):
+    subprocess.run([get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+                    "-f", "lavfi", "-i", f"testsrc2=s={size}:r=25:d={seconds}",
+                    "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", str(path)], check=True)
+    return str(path)
+
+
+def test_circle_rendition_is_looped_masked_and_reused(tmp_path, monkeypatch):
+    source = make_clip(tmp_path / "speaker.mp4")
+    cache = LoopedAssetCache(str(tmp_path / "cache"), min_seconds=2)
+    monkeypatch.setattr(looped_assets, "get_looped_asset_cache_from_env", lambda: cache)
+
+    clip = load_looped_video(source, 2.5, (64, 64), mask_shape="circle")
+    assert clip.duration == 2.5 and tuple(clip.size) == (64, 64)
+    mask = clip.mask.get_frame(2.2)
+    assert mask[32, 32] == 1.0 and mask[0, 0] == 0.0 and mask[0, 63] == 0.0
+    assert clip.get_frame(2.2).mean() > 0
+    assert (clip.get_frame(2.2) == clip.get_frame(0.2)).all()
+
+    rendition = VideoFileClip(cache.materialize(source, (64, 64), "circle"))
+    # Two loops at 30 fps of a 1s source, without a repeated or dropped frame
+    assert abs(rendition.duration - 2) < 0.05
+    assert sum(1 for _ in rendition.iter_frames()) == 60
+    assert (cache.hits, cache.misses) == (1, 1) and cache.hit_rate == 0.5
+
+
+def test_rendition_size_does_not_grow_with_duration(tmp_path, monkeypatch):
+    source = make_clip(tmp_path / "speaker.mp4")
+    cache = LoopedAssetCache(str(tmp_path / "cache"), min_seconds=1)
+    monkeypatch.setattr(looped_assets, "get_looped_asset_cache_from_env", lambda: cache)
+
+    short = load_looped_video(source, 2, (48, 48), mask_shape="circle")
+    sizes = [p.stat().st_size for p in (tmp_path / "cache").iterdir()]
+    long = load_looped_video(source, 600, (48, 48), mask_shape="circle")
+    assert [p.stat().st_size for p in (tmp_path / "cache").iterdir()] == sizes
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert long.duration == 600 and (long.get_frame(599.5) == short.get_frame(0.5)).all()
+
+
+def test_cover_rendition_and_eviction(tmp_path):
+    source = make_clip(tmp_path / "background.mp4", size="320x120")
+    cache = LoopedAssetCache(str(tmp_path / "cache"), min_seconds=1)
+    path = cache.materialize(source, (100, 100), fit="cover")
+    assert tuple(VideoFileClip(path).size) == (100, 100)
+    cache.max_bytes = 0
+    kept = cache.materialize(source, (80, 80), fit="cover")
+    assert [str(p) for p in (tmp_path / "cache").iterdir()] == [kept]
+    assert os.path.basename(kept) != os.path.basename(path)
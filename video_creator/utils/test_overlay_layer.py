@@ -0,0 +1,57 @@
+import numpy as np
+from moviepy.editor import ColorClip, CompositeVideoClip, ImageClip, VideoClip
+
+from video_creator.utils.overlay_layer import FlattenedCompositeClip, StaticOverlay, is_static_clip
+
+SIZE = (320, 180)
+DURATION = 2.0
+
+
+def moving_clip(size, seed):
+    """A clip whose pixels change every frame, standing in for a video."""
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 256, size=(size[1], size[0], 3)).astype(np.uint8)
+    return VideoClip(lambda t: np.roll(base, int(t * 30), axis=1), duration=DURATION)
+
+
+def circle_mask(size):
+    yy, xx = np.mgrid[:size, :size]
+    r = size / 2
+    return ImageClip(((xx - r) ** 2 + (yy - r) ** 2 <= r ** 2).astype(float), ismask=True)
+
+
+def short_video_layers():
+    """Layers in the order create_podcast_short_video stacks them."""
+    speaker = 60
+    mask = circle_mask(speaker)
+    text = np.full((20, 120, 4), 255, dtype=np.uint8)
+    text[..., 3] = np.tile(np.linspace(0, 255, 120).astype(np.uint8), (20, 1))
+    return [
+        moving_clip((400, 200), 1).set_position(("center", "center")),
+        ColorClip(SIZE, color=(0, 0, 0)).set_opacity(0.5).set_duration(DURATION),
+        ColorClip((speaker, speaker), color=(128, 128, 128)).set_mask(mask).set_position((40, 70)).set_duration(DURATION),
+        moving_clip((speaker, speaker), 2).set_mask(mask).set_position((40, 70)),
+        moving_clip((speaker, speaker), 3).set_mask(mask).set_position((220, 70)),
+        ColorClip((speaker, 20), color=(0, 0, 0)).set_opacity(0.7).set_position((40, 135)).set_duration(DURATION),
+        ImageClip(text).set_position(("center", SIZE[1] * 0.15)).set_duration(DURATION),
+        ColorClip((SIZE[0], 20), color=(0, 0, 0)).set_opacity(0.7).set_position(("center", 150)).set_duration(DURATION),
+    ]
+
+
+def test_static_detection():
+    layers = short_video_layers()
+    assert [is_static_clip(c, DURATION) for c in layers] == [False, True, True, False, False, True, True, True]
+    # A clip that only plays for part of the composite is not static
+    assert not is_static_clip(ColorClip(SIZE, color=(0, 0, 0)).set_start(1).set_duration(1), DURATION)
+
+
+def test_matches_composite_video_clip():
+    layers = short_video_layers()
+    flattened = FlattenedCompositeClip(layers, size=SIZE)
+    reference = CompositeVideoClip(layers, size=SIZE)
+    assert sum(isinstance(layer, StaticOverlay) for layer in flattened.layers) == 2
+    for t in (0, 0.5, 1.9):
+        diff = np.abs(flattened.get_frame(t).astype(int) - reference.get_frame(t).astype(int))
+        # moviepy truncates to 8 bits after every layer, the flattened path rounds once
+        assert diff.max() <= 2
+        assert diff.mean() < 1
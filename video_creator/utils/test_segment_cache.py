@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from video_creator.utils.segment_cache import SegmentCache, segment_cache_key
+
+
+@pytest.fixture
+def config(tmp_path):
+    background = tmp_path / "background.mp4"
+    background.write_bytes(b"background footage")
+    return {
+        'resolution': (1920, 1080), 'duration': 5, 'fps': 30,
+        'title_font_size': 70, 'title_font_color': 'white',
+        'background_video_path': str(background), 'background_music_path': None,
+        'job_id': 41, 'output_dir': str(tmp_path / "job_41"),
+    }
+
+
+def test_key_changes_with_config_and_asset_content(config, tmp_path):
+    key = segment_cache_key(config, "Welcome", "Episode 1")
+    assert segment_cache_key(dict(config), "Welcome", "Episode 1") == key
+    assert segment_cache_key({**config, 'title_font_size': 72}, "Welcome", "Episode 1") != key
+    assert segment_cache_key({**config, 'resolution': (1080, 1920)}, "Welcome", "Episode 1") != key
+    assert segment_cache_key(config, "Welcome", "Episode 2") != key
+
+    # Same path, new content
+    with open(config['background_video_path'], "ab") as f:
+        f.write(b" re-exported")
+    edited = segment_cache_key(config, "Welcome", "Episode 1")
+    assert edited != key
+
+    # Same content at another path
+    moved = tmp_path / "assets" / "background.mp4"
+    moved.parent.mkdir()
+    os.rename(config['background_video_path'], moved)
+    assert segment_cache_key({**config, 'background_video_path': str(moved)}, "Welcome", "Episode 1") == edited
+
+
+def test_key_ignores_job_and_output_paths(config, tmp_path):
+    key = segment_cache_key(config, "Welcome", "Episode 1")
+    other_job = {**config, 'job_id': 42, 'output_dir': str(tmp_path / "job_42"), 'output_path': "/tmp/intro.mp4"}
+    assert segment_cache_key(other_job, "Welcome", "Episode 1") == key
+
+
+def test_store_materialize_and_evict_within_budget(tmp_path):
+    cache = SegmentCache(str(tmp_path / "cache"), max_bytes=250)
+    renders = []
+    for name in ("intro", "bumper", "outro"):
+        path = tmp_path / f"{name}.mp4"
+        path.write_bytes(name.encode() * 20)  # 100-120 bytes each
+        renders.append(str(path))
+
+    cache.store("intro", renders[0])
+    cache.store("bumper", renders[1])
+    os.utime(cache.lookup("intro"), (1, 1))
+    os.utime(cache.lookup("bumper"), (2, 2))
+
+    # A hit makes intro the most recently used, so storing outro evicts bumper
+    os.makedirs(tmp_path / "job")
+    assert cache.materialize("intro", str(tmp_path / "job" / "intro.mp4")) == str(tmp_path / "job" / "intro.mp4")
+    assert (tmp_path / "job" / "intro.mp4").read_bytes() == b"intro" * 20
+    cache.store("outro", renders[2])
+
+    assert cache.lookup("bumper") is None
+    assert cache.lookup("intro") and cache.lookup("outro")
+    assert cache.size() <= cache.max_bytes and cache.evictions == 1
+    assert cache.materialize("bumper", str(tmp_path / "job" / "bumper.mp4")) is None
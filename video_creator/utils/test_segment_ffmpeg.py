@@ -0,0 +1,87 @@
+"""Parity tests for the ffmpeg segment renderer against the MoviePy one."""
+import subprocess
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+from moviepy.config import get_setting
+from moviepy.editor import ImageClip
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from video_creator.utils import video_segment_creator
+
+FPS = 25
+DURATION = 3
+HASH_SIZE = (16, 9)
+
+
+def fake_text_clip(text, fontsize, color, font, size, method):
+    """PIL stand-in for TextClip, which needs ImageMagick; both renderers share it."""
+    img = Image.new("RGBA", (size[0], int(fontsize * 1.4)), (0, 0, 0, 0))
+    ImageDraw.Draw(img).text((4, 2), text, fill=color, font=ImageFont.load_default())
+    return ImageClip(np.array(img))
+
+
+def ffmpeg(*args):
+    subprocess.run([get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error", *args], check=True)
+
+
+def frame_hashes(path):
+    """Average hash of every frame: one bit per cell of a 16x9 grayscale thumbnail."""
+    raw = subprocess.run([get_setting("FFMPEG_BINARY"), "-loglevel", "error", "-i", path,
+                          "-vf", f"scale={HASH_SIZE[0]}:{HASH_SIZE[1]}:flags=area,format=gray",
+                          "-f", "rawvideo", "-"], capture_output=True, check=True).stdout
+    frames = np.frombuffer(raw, dtype=np.uint8).reshape(-1, HASH_SIZE[0] * HASH_SIZE[1]).astype(int)
+    return frames > frames.mean(axis=1, keepdims=True)
+
+
+@pytest.fixture
+def segment_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(video_segment_creator, "TextClip", fake_text_clip)
+    logo = np.zeros((64, 64, 4), dtype=np.uint8)
+    logo[8:56, 8:56] = (230, 60, 40, 255)
+    Image.fromarray(logo, "RGBA").save(tmp_path / "logo.png")
+    ffmpeg("-f", "lavfi", "-i", "sine=f=330:d=5", str(tmp_path / "music.wav"))
+    return {
+        'background_music_path': str(tmp_path / "music.wav"),
+        'logo_settings_main_logo_path': str(tmp_path / "logo.png"),
+        'logo_settings_logo_size': [40, 40],
+        'resolution': [320, 180],
+        'duration': DURATION,
+        'bg_music_volume': 0.3,
+        'title': "Episode title",
+        'sub_title': "Episode subtitle",
+        'title_font_size': 24, 'title_font_color': "white", 'title_font_name': "Helvetica-Bold",
+        'subtitle_font_size': 16, 'subtitle_font_color': "#eab676", 'subtitle_font_name': "Helvetica",
+        'footer_text': "www.example.com",
+        'footer_settings_font_size': 14, 'footer_settings_font_color': "#eeeee4",
+        'footer_settings_font_name': "Helvetica",
+        'codec': "libx264", 'audio_codec': "aac", 'fps': FPS,
+    }
+
+
+@pytest.mark.parametrize("background_seconds", [2, 5])  # Looped and cut from the middle
+def test_ffmpeg_renderer_matches_moviepy(tmp_path, monkeypatch, segment_config, background_seconds):
+    background = tmp_path / "background.mp4"
+    ffmpeg("-f", "lavfi", "-i", f"testsrc2=s=640x360:r={FPS}:d={background_seconds}",
+           "-c:v", "libx264", "-pix_fmt", "yuv420p", str(background))
+    segment_config['background_video_path'] = str(background)
+
+    outputs = {}
+    for renderer in ("moviepy", "ffmpeg"):
+        outputs[renderer] = str(tmp_path / f"{renderer}.mp4")
+        monkeypatch.setattr(video_segment_creator, "get_segment_output_path",
+                            lambda *args, path=outputs[renderer]: path)
+        video_segment_creator.create_video_segment(dict(segment_config, segment_renderer=renderer),
+                                                   job_id="1", segment_type="intro")
+
+    infos = {renderer: ffmpeg_parse_infos(path) for renderer, path in outputs.items()}
+    assert infos["ffmpeg"]['video_size'] == infos["moviepy"]['video_size'] == [320, 180]
+    assert infos["ffmpeg"]['audio_found'] and infos["moviepy"]['audio_found']
+    assert abs(infos["ffmpeg"]['video_duration'] - infos["moviepy"]['video_duration']) <= 1 / FPS
+
+    hashes = {renderer: frame_hashes(path) for renderer, path in outputs.items()}
+    assert len(hashes["ffmpeg"]) == len(hashes["moviepy"]) == DURATION * FPS
+    distances = (hashes["ffmpeg"] != hashes["moviepy"]).sum(axis=1)
+    # Scaling and colour conversion differ slightly, so allow a few flipped cells of 144
+    assert distances.max() <= 3, distances
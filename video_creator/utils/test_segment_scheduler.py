@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from video_creator.utils import segment_scheduler
+from video_creator.utils.segment_scheduler import SegmentScheduler
+
+SEGMENTS = ("main", "intro", "short", "bumper", "outro")
+
+
+class Reservations:
+    """CPUs and memory held by the renders running right now, and the peaks seen."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cpus = self.memory_mb = 0
+        self.peak_cpus = self.peak_memory_mb = 0
+        self.started = []
+
+    def render(self, segment, threads, ram_mb, seconds=0.05):
+        with self.lock:
+            self.started.append(segment)
+            self.cpus += threads
+            self.memory_mb += ram_mb
+            self.peak_cpus = max(self.peak_cpus, self.cpus)
+            self.peak_memory_mb = max(self.peak_memory_mb, self.memory_mb)
+        time.sleep(seconds)
+        with self.lock:
+            self.cpus -= threads
+            self.memory_mb -= ram_mb
+        return f"{segment}.mp4"
+
+
+@pytest.fixture
+def thread_pool(monkeypatch):
+    """Run renders on threads so they can share state with the test."""
+    pools = []
+
+    def executor(max_workers):
+        pools.append(ThreadPoolExecutor(max_workers=max_workers))
+        return pools[-1]
+
+    monkeypatch.setattr(segment_scheduler, "make_executor", executor)
+    return pools
+
+
+def add(scheduler, held, segment, cpus, memory_mb, **kwargs):
+    scheduler.add(segment, held.render, cpus=cpus, memory_mb=memory_mb,
+                  segment=segment, threads=cpus, ram_mb=memory_mb, **kwargs)
+
+
+def test_renders_are_admitted_within_cpu_budget(thread_pool):
+    held = Reservations()
+    completed = []
+    scheduler = SegmentScheduler(max_cpus=4, max_memory_mb=100_000,
+                                 on_complete=lambda name, result, seconds: completed.append(name))
+    for segment in SEGMENTS:
+        add(scheduler, held, segment, cpus=2, memory_mb=100)
+
+    results = scheduler.run()
+    assert results == {segment: f"{segment}.mp4" for segment in SEGMENTS}
+    assert sorted(completed) == sorted(SEGMENTS) and set(scheduler.timings) == set(SEGMENTS)
+    assert held.peak_cpus == 4  # Two at a time, never three
+    assert held.started[:2] == ["main", "intro"]  # Started in the order added
+    assert thread_pool[0]._max_workers == 4
+
+
+def test_renders_are_admitted_within_memory_budget(thread_pool):
+    held = Reservations()
+    scheduler = SegmentScheduler(max_cpus=8, max_memory_mb=3000)
+    add(scheduler, held, "main", cpus=1, memory_mb=2000)
+    for segment in SEGMENTS[1:]:
+        add(scheduler, held, segment, cpus=1, memory_mb=500)
+
+    scheduler.run()
+    assert held.peak_memory_mb <= 3000
+    assert held.peak_cpus < len(SEGMENTS)
+
+
+def test_render_larger_than_budget_runs_alone(thread_pool):
+    held = Reservations()
+    scheduler = SegmentScheduler(max_cpus=2, max_memory_mb=1000)
+    add(scheduler, held, "main", cpus=4, memory_mb=4000)
+    add(scheduler, held, "intro", cpus=1, memory_mb=100)
+
+    assert set(scheduler.run()) == {"main", "intro"}
+    assert (held.peak_cpus, held.peak_memory_mb) == (4, 4000)
+
+
+def fail_render(segment):
+    raise RuntimeError(f"ffmpeg exited with 1 rendering {segment}")
+
+
+def finish_render(segment):
+    return f"{segment}.mp4"
+
+
+def render_in_process(segment):
+    return f"{segment}.mp4", os.getpid()
+
+
+def test_renders_run_in_spawned_worker_processes():
+    scheduler = SegmentScheduler(max_cpus=2, max_memory_mb=1000)
+    for segment in ("intro", "outro"):
+        scheduler.add(segment, render_in_process, segment=segment)
+
+    results = scheduler.run()
+    assert {name: path for name, (path, _) in results.items()} == {"intro": "intro.mp4", "outro": "outro.mp4"}
+    assert os.getpid() not in {pid for _, pid in results.values()}
+    pool = segment_scheduler.make_executor(2)
+    assert isinstance(pool, ProcessPoolExecutor) and pool._mp_context.get_start_method() == "spawn"
+    pool.shutdown()
+
+
+def test_daemonic_worker_renders_on_threads(monkeypatch):
+    monkeypatch.setattr(segment_scheduler.multiprocessing, "current_process", lambda: SimpleNamespace(daemon=True))
+    scheduler = SegmentScheduler(max_cpus=2, max_memory_mb=1000)
+    scheduler.add("intro", render_in_process, segment="intro")
+    assert scheduler.run() == {"intro": ("intro.mp4", os.getpid())}
+
+
+def test_failure_in_worker_process_is_raised_and_queue_cancelled():
+    completed = []
+    scheduler = SegmentScheduler(max_cpus=1, max_memory_mb=1000,
+                                 on_complete=lambda name, result, seconds: completed.append(name))
+    scheduler.add("intro", finish_render, segment="intro")
+    scheduler.add("main", fail_render, segment="main")
+    scheduler.add("outro", finish_render, segment="outro")
+
+    with pytest.raises(RuntimeError, match="rendering main"):
+        scheduler.run()
+    assert completed == ["intro"]
+    assert set(scheduler.timings) == {"intro"}
@@ -0,0 +1,107 @@
+import subprocess
+
+import numpy as np
+from moviepy.config import get_setting
+from moviepy.editor import VideoFileClip
+from PIL import Image, ImageDraw, ImageFont
+
+from video_creator.utils import looped_assets, short_compositor
+from video_creator.utils.looped_assets import LoopedAssetCache
+from video_creator.utils.overlay_layer import StaticOverlay
+from video_creator.utils.podcast_short_video_creator import create_podcast_short_video
+from video_creator.utils.short_compositor import LayerSpec, ShortCompositor, ShortLayout, short_video_layout
+
+
+def pil_text(text, size=None, fontsize=20, **style):
+    """Stand-in for TextClip, which needs ImageMagick."""
+    width = size[0] if size else fontsize * len(text) // 2
+    img = Image.new("RGBA", (width, int(fontsize * 1.3)), (0, 0, 0, 0))
+    ImageDraw.Draw(img).text((0, 0), text, fill=(255, 255, 255, 255), font=ImageFont.load_default())
+    rgba = np.array(img)
+    return rgba[..., :3], rgba[..., 3] / 255.0
+
+
+def make_media(path, lavfi):
+    subprocess.run([get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error", "-f", "lavfi", "-i", lavfi,
+                    "-t", "1", *{".mp4": ["-c:v", "libx264", "-pix_fmt", "yuv420p"],
+                                 ".png": ["-frames:v", "1", "-update", "1"]}.get(path.suffix, []),
+                    str(path)], check=True)
+    return str(path)
+
+
+def close(pixel, rgb):
+    """Equal up to the rounding of ffmpeg's YUV conversion."""
+    return np.abs(pixel.astype(int) - np.array(rgb)).max() <= 3
+
+
+def short_config(tmp_path):
+    return {
+        'resolution': (320, 180),
+        'fps': 10,
+        'speaker1_video_path': make_media(tmp_path / "speaker1.mp4", "color=c=red:s=64x64:r=10"),
+        'speaker2_video_path': make_media(tmp_path / "speaker2.png", "color=c=blue:s=64x64"),
+        'short_video_background_path': make_media(tmp_path / "background.mp4", "color=c=white:s=400x180:r=10"),
+        'background_image_path': None,
+        'background_music_path': make_media(tmp_path / "music.wav", "sine=f=440:d=1"),
+        'bg_music_volume': 0.5,
+        'voiceover_volume': 1.0,
+        'title_font_size': 20, 'title_font_color': 'white', 'title_font_name': 'Arial',
+        'subtitle_font_size': 16, 'subtitle_font_color': 'white', 'subtitle_font_name': 'Arial',
+        'footer_settings_text': 'podcastify', 'footer_settings_font_size': 14,
+        'footer_settings_font_color': 'white', 'footer_settings_font_name': 'Arial',
+        'voice_settings_speaker1_name': 'One', 'voice_settings_speaker2_name': 'Two',
+        'output_dir': str(tmp_path), 'output_filename': str(tmp_path / "out.mp4"),
+        'short_video_output_filename': "short.mp4",
+    }
+
+
+def test_layout_renders_with_cached_masks_and_text(tmp_path, monkeypatch):
+    cache = LoopedAssetCache(str(tmp_path / "cache"), fps=10)
+    monkeypatch.setattr(looped_assets, "get_looped_asset_cache_from_env", lambda: cache)
+    config = short_config(tmp_path)
+    layout = short_video_layout(config, {'title': "Title", 'sub_title': "Subtitle"},
+                                config['short_video_background_path'])
+    assert len(layout.layers) == 14
+
+    compositor = ShortCompositor(text_renderer=pil_text)
+    video = compositor.render(layout, 1.5)
+    assert video.duration == 1.5 and (compositor.text_hits, compositor.text_misses) == (0, 5)
+    # Only the background and the video speaker are blended per frame
+    assert sum(not isinstance(layer, StaticOverlay) for layer in video.layers) == 2
+
+    frame = video.get_frame(1.2)
+    speaker_size = min(320 // 4, 180 // 3)
+    y = int(180 * 0.4) + speaker_size // 2
+    x1, x2 = 160 - int(speaker_size * 1.5), 160 + int(speaker_size * 1.5) - speaker_size
+    assert close(frame[y, x1 + speaker_size // 2], (255, 0, 0))
+    assert close(frame[y, x2 + speaker_size // 2], (0, 0, 255))
+    assert close(frame[int(180 * 0.4) + 1, x1 + 1], (128, 128, 128))  # Dimmed white outside the circle
+
+    compositor.render(layout, 3)
+    assert (compositor.text_hits, compositor.text_misses) == (5, 5)
+    assert short_compositor.circle_mask((speaker_size, speaker_size)) is \
+        short_compositor.circle_mask((speaker_size, speaker_size))
+
+
+def test_layer_timing():
+    layout = ShortLayout((40, 20), [
+        LayerSpec("color", (0, 0), (40, 20), color=(255, 255, 255)),
+        LayerSpec("color", (0, 0), (20, 20), start=0.5, duration=0.5, color=(0, 0, 0)),
+    ])
+    video = ShortCompositor(text_renderer=pil_text).render(layout, 2)
+    assert video.get_frame(0.2)[5, 5].tolist() == [255, 255, 255]
+    assert video.get_frame(0.7)[5, 5].tolist() == [0, 0, 0]
+    assert video.get_frame(1.2)[5, 5].tolist() == [255, 255, 255]
+
+
+def test_create_podcast_short_video(tmp_path, monkeypatch):
+    cache = LoopedAssetCache(str(tmp_path / "cache"), fps=10)
+    monkeypatch.setattr(looped_assets, "get_looped_asset_cache_from_env", lambda: cache)
+    monkeypatch.setattr(short_compositor, "_compositor", ShortCompositor(text_renderer=pil_text))
+    config = short_config(tmp_path)
+    voiceover = make_media(tmp_path / "voice.wav", "sine=f=220:d=1")
+
+    path, thumbnails = create_podcast_short_video(voiceover, None, config, {'title': "T", 'sub_title': "S"}, None)
+    assert thumbnails is None
+    video = VideoFileClip(path)
+    assert tuple(video.size) == (320, 180) and abs(video.duration - 1) < 0.15
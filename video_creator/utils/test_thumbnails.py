@@ -0,0 +1,62 @@
+import subprocess
+
+import numpy as np
+from PIL import Image
+from moviepy.config import get_setting
+
+from video_creator.utils.thumbnails import extract_thumbnails, pick_distinct_frames, seek_frames
+
+FPS = 25
+
+
+def make_video(path, colors, seconds_each=2):
+    """One flat colour per ``seconds_each`` seconds, a keyframe every second."""
+    args = []
+    for color in colors:
+        args += ["-f", "lavfi", "-i", f"color=c={color}:s=320x180:r={FPS}:d={seconds_each}"]
+    concat = "".join(f"[{i}:v]" for i in range(len(colors))) + f"concat=n={len(colors)}:v=1[v]"
+    subprocess.run([get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error", *args,
+                    "-filter_complex", concat, "-map", "[v]", "-c:v", "libx264", "-g", str(FPS),
+                    "-pix_fmt", "yuv420p", str(path)], check=True)
+    return str(path)
+
+
+def test_seeks_to_each_timestamp(tmp_path):
+    video = make_video(tmp_path / "video.mp4", ["red", "lime", "blue"])
+    frames = seek_frames(video, [1.0, 3.0, 5.0], (64, 36))
+    assert [f.shape for f in frames] == [(36, 64, 3)] * 3
+    assert [int(np.argmax(f.reshape(-1, 3).mean(axis=0))) for f in frames] == [0, 1, 2]
+
+
+def test_even_thumbnails_keep_the_old_layout(tmp_path):
+    video = make_video(tmp_path / "video.mp4", ["red", "lime", "blue", "white"])
+    paths = extract_thumbnails(video, thumbnail_size=(128, 72), mode="even")
+    assert paths == [str(tmp_path / "thumbnails" / f"thumbnail_{i}.jpg") for i in (1, 2, 3)]
+    assert all(Image.open(p).size == (128, 72) and Image.open(p).format == "JPEG" for p in paths)
+    assert not [p for p in (tmp_path / "thumbnails").iterdir() if p.name.startswith("temp_")]
+
+
+def test_scene_mode_prefers_distinct_frames():
+    flat = np.zeros((36, 64, 3), dtype=np.uint8)
+    stripes = flat.copy()
+    stripes[::4] = 255
+    checks = flat.copy()
+    checks[::8, ::8] = 200
+    frames = [flat, stripes, stripes.copy(), flat, checks, stripes.copy()]
+    assert pick_distinct_frames(frames, 2) == [1, 4]
+
+
+def test_seeks_to_the_frame_inside_a_long_gop(tmp_path):
+    video = str(tmp_path / "long_gop.mp4")
+    subprocess.run([get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+                    "-f", "lavfi", "-i", f"testsrc2=s=160x90:r={FPS}:d=8",
+                    "-c:v", "libx264", "-g", "250", "-pix_fmt", "yuv420p", video], check=True)
+    # Frame 80 at 3.2s is deep inside the first GOP, which only has a keyframe at 0
+    raw = subprocess.run([get_setting("FFMPEG_BINARY"), "-loglevel", "error", "-i", video,
+                          "-vf", "select=eq(n\\,80)", "-vsync", "0", "-frames:v", "1",
+                          "-f", "rawvideo", "-pix_fmt", "rgb24", "-"], capture_output=True, check=True).stdout
+    expected = np.frombuffer(raw, dtype=np.uint8).reshape(90, 160, 3)
+
+    at_keyframe, mid_gop = seek_frames(video, [0.0, 3.2], (160, 90))
+    assert np.array_equal(mid_gop, expected)
+    assert np.abs(mid_gop.astype(int) - at_keyframe.astype(int)).mean() > 1
@@ -0,0 +1,68 @@
+import os
+
+import cv2
+import numpy as np
+from moviepy.editor import ImageClip
+
+from video_creator.utils.transitions import (
+    create_transition_sequence, ken_burns, remove_rendered_transitions, report_transition_timings, zoom_crop_boxes,
+    zoom_in
+)
+
+SIZE = (320, 180)
+FPS = 25
+
+
+def still(seed=0, duration=2.0):
+    rng = np.random.default_rng(seed)
+    img = cv2.resize(rng.integers(0, 256, size=(18, 32, 3)).astype(np.uint8), SIZE)
+    return ImageClip(img, duration=duration)
+
+
+def legacy_zoom_frame(frame, t):
+    """The previous zoom-in: upscale the whole frame, then crop the centre."""
+    h, w = frame.shape[:2]
+    zoom_factor = max(1.0, 1.5 - 0.5 * t)
+    zoomed_w, zoomed_h = max(w, int(w * zoom_factor)), max(h, int(h * zoom_factor))
+    resized = cv2.resize(frame, (zoomed_w, zoomed_h))
+    x, y = (zoomed_w - w) // 2, (zoomed_h - h) // 2
+    return resized[y:y + h, x:x + w]
+
+
+def test_crop_boxes_zoom_out_to_full_frame():
+    boxes = zoom_crop_boxes(SIZE, 1.0, FPS)
+    assert len(boxes) == FPS
+    assert tuple(boxes[0]) == (53, 30, 213, 120)  # 1.5x
+    assert np.all(np.diff(boxes[:, 2]) >= 0)
+    assert boxes[-1, 2] <= SIZE[0]
+
+
+def test_zoom_matches_previous_and_stops_after_window():
+    clip = still()
+    zoomed = zoom_in(clip, 1.0, fps=FPS)
+    for t in (0, 0.4, 0.8):
+        diff = np.abs(zoomed.get_frame(t).astype(int) - legacy_zoom_frame(clip.get_frame(t), t).astype(int))
+        assert diff.mean() < 4
+    assert zoomed.get_frame(1.0) is clip.get_frame(1.0)
+
+
+def test_sequence_reports_timings():
+    clips = create_transition_sequence([still(i).set_start(2 * i) for i in range(3)], transition_type='zoom-in',
+                                       transition_duration=0.5, fps=FPS)
+    for clip in clips:
+        for i in range(int(clip.duration * FPS)):
+            clip.get_frame(i / FPS)
+    timings = report_transition_timings(clips)
+    assert [s.index for s in timings] == [1, 2]
+    assert all(s.frames == 13 and s.seconds > 0 for s in timings)  # t = 0, 0.04, ..., 0.48
+
+
+def test_ken_burns_renders_whole_still(tmp_path):
+    clip = ken_burns(still(duration=1.2).set_start(3), fps=FPS, work_dir=str(tmp_path))
+    assert clip.start == 3 and clip.duration == 1.2
+    assert tuple(clip.size) == SIZE
+    first, last = clip.get_frame(0), clip.get_frame(1.1)
+    assert np.abs(first.astype(int) - last.astype(int)).mean() > 1  # It moves
+    assert [p.name for p in tmp_path.iterdir()] == [os.path.basename(clip.rendered_path)]
+    remove_rendered_transitions([clip])
+    assert list(tmp_path.iterdir()) == []
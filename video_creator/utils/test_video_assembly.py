@@ -0,0 +1,89 @@
+"""Tests for normalizing segments and assembling them into one episode."""
+import os
+import subprocess
+
+import numpy as np
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from video_creator.utils.encoder_profiles import EncoderProfile
+from video_creator.utils.video_assembly import (
+    AssemblyProfile, NormalizedSegment, NormalizedSegmentCache, assemble_segments, normalize_segment, plan_pieces
+)
+
+SAMPLE_RATE = 44100
+
+
+def make_segment(path, seconds, frequency):
+    subprocess.run([get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+                    "-f", "lavfi", "-i", f"testsrc2=s=160x90:r=30:d={seconds}",
+                    "-f", "lavfi", "-i", f"sine=f={frequency}:d={seconds}:r={SAMPLE_RATE}",
+                    "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", "-shortest", str(path)], check=True)
+    return str(path)
+
+
+def decode_audio(path):
+    raw = subprocess.run([get_setting("FFMPEG_BINARY"), "-loglevel", "error", "-i", path, "-map", "0:a",
+                          "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"],
+                         capture_output=True, check=True).stdout
+    return np.frombuffer(raw, dtype=np.int16)
+
+
+def longest_silence(samples, threshold=200):
+    quiet = np.concatenate([[0], (np.abs(samples.astype(int)) < threshold).astype(int), [0]])
+    edges = np.flatnonzero(np.diff(quiet))
+    return int((edges[1::2] - edges[::2]).max()) if len(edges) else 0
+
+
+def test_plan_pieces():
+    first = NormalizedSegment("a.mp4", 5.0, head_end=1.0, tail_start=4.0)
+    middle = NormalizedSegment("b.mp4", 6.0, head_end=1.0, tail_start=5.0)
+    short = NormalizedSegment("c.mp4", 0.5, head_end=0.5, tail_start=0.5)
+    assert plan_pieces([first, middle, short], 1.0) == [
+        ("copy", first, 0.0, 4.0),
+        ("window", first, 4.0, 5.0, 0, 1.0),
+        ("window", middle, 0.0, 1.0, 1.0, 0),
+        ("copy", middle, 1.0, 5.0),
+        ("window", middle, 5.0, 6.0, 0, 1.0),
+        # Too short for a body: re-encoded whole, fading in for at most its length
+        ("window", short, 0.0, 0.5, 0.5, 0),
+    ]
+    assert plan_pieces([first], 1.0) == [("copy", first, 0.0, 5.0)]
+
+
+def test_assembled_duration_matches_segments_without_audio_gaps(tmp_path):
+    profile = AssemblyProfile(160, 90, 30, encoder=EncoderProfile("test", crf=28, preset="ultrafast"))
+    sources = [make_segment(tmp_path / f"segment_{n}.mp4", seconds, 440)
+               for n, seconds in enumerate([3.3, 2.7, 4.1])]
+    cache_dir = str(tmp_path / "cache")
+    output = assemble_segments(sources, str(tmp_path / "episode.mp4"), profile, transition=0.5, cache_dir=cache_dir)
+
+    expected = sum(normalize_segment(p, profile, 0.5, cache_dir).duration for p in sources)
+    assert abs(ffmpeg_parse_infos(output)["video_duration"] - expected) <= 1.5 / profile.fps
+    audio = decode_audio(output)
+    assert abs(len(audio) / SAMPLE_RATE - expected) < 0.01
+    # A continuous tone: no stretch of silence where encoder padding met at a join
+    assert longest_silence(audio[SAMPLE_RATE // 10:-SAMPLE_RATE // 10]) < SAMPLE_RATE // 500
+
+
+def test_cache_evicts_segments_with_their_sidecars(tmp_path):
+    cache = NormalizedSegmentCache(str(tmp_path), max_bytes=150)
+    for n, name in enumerate(["intro", "main", "outro"]):
+        (tmp_path / f"{name}.mp4").write_bytes(b"x" * 100)
+        (tmp_path / f"{name}.json").write_text("{}")
+        os.utime(tmp_path / f"{name}.mp4", (n, n))
+    (tmp_path / "next.mp4.1.part.mp4").write_bytes(b"x" * 100)  # Being written
+
+    assert cache.evict() == 100
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["next.mp4.1.part.mp4", "outro.json", "outro.mp4"]
+
+
+def test_assembly_keeps_cache_within_budget(tmp_path, monkeypatch):
+    monkeypatch.setenv("VIDEO_SEGMENT_CACHE_MAX_MB", "0")
+    profile = AssemblyProfile(160, 90, 30, encoder=EncoderProfile("test", crf=28, preset="ultrafast"))
+    sources = [make_segment(tmp_path / f"segment_{n}.mp4", 1.5, 440) for n in range(2)]
+    cache_dir = tmp_path / "cache"
+    output = assemble_segments(sources, str(tmp_path / "episode.mp4"), profile, transition=0.5,
+                               cache_dir=str(cache_dir))
+    assert os.path.getsize(output) > 0
+    assert list(cache_dir.iterdir()) == []
@@ -0,0 +1,145 @@
+"""Module for extracting thumbnails from rendered videos.
+
+Frames are pulled with ffmpeg input seeking: each timestamp becomes one
+input that jumps to the last keyframe before it and decodes only from
+there to the frame at the timestamp, rather than decoding the video from
+the start. All timestamps are read in
+a single ffmpeg process, scaled there, and returned as NumPy arrays; the
+JPEGs are encoded straight from memory with no temp files.
+
+Two ways to choose the timestamps (THUMBNAIL_MODE):
+
+* even: evenly spaced over the video, as before;
+* scene: a few candidates per thumbnail are sampled at low resolution
+  and the most visually distinct ones are kept, skipping near-duplicate
+  and flat (e.g. black) frames.
+"""
+import os
+import logging
+import subprocess
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_MODES = ("even", "scene")
+SCENE_CANDIDATES_PER_THUMBNAIL = 4
+SCENE_SAMPLE_SIZE = (64, 36)
+JPEG_QUALITY = 95
+
+
+def get_thumbnail_mode() -> str:
+    mode = (os.getenv("THUMBNAIL_MODE") or "even").lower()
+    if mode not in THUMBNAIL_MODES:
+        raise ValueError(f"Unknown thumbnail mode: {mode}")
+    return mode
+
+
+def evenly_spaced_timestamps(duration: float, count: int) -> List[float]:
+    """``count`` timestamps splitting the video into equal parts, excluding both ends."""
+    return [duration * (i + 1) / (count + 1) for i in range(count)]
+
+
+def seek_frames(video_path: str, timestamps: List[float], size: Tuple[int, int]) -> List[np.ndarray]:
+    """Decode the frame at each timestamp, scaled to ``size``, in one ffmpeg process.
+
+    Returns RGB arrays of shape ``(height, width, 3)``, in timestamp order.
+    """
+    if not timestamps:
+        return []
+    width, height = size
+    inputs = []
+    chains = []
+    for i, t in enumerate(timestamps):
+        # Input seek: decoding starts at the keyframe before t; read at most a second past it
+        inputs += ["-ss", f"{t:.3f}", "-t", "1", "-i", video_path]
+        chains.append(f"[{i}:v]trim=end_frame=1,setpts=PTS-STARTPTS,scale={width}:{height},setsar=1[f{i}]")
+    labels = "".join(f"[f{i}]" for i in range(len(timestamps)))
+    filter_graph = ";".join(chains + [f"{labels}concat=n={len(timestamps)}:v=1:a=0[v]"])
+    command = [get_setting("FFMPEG_BINARY"), "-hide_banner", "-loglevel", "error", *inputs,
+               "-filter_complex", filter_graph, "-map", "[v]",
+               # Pass the frames through as they are, without frame rate conversion
+               "-vsync", "0", "-f", "rawvideo", "-pix_fmt", "rgb24", "-"]
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise Exception(f"FFmpeg error: {result.stderr.decode(errors='replace')[-2000:]}")
+    frame_bytes = width * height * 3
+    if len(result.stdout) != frame_bytes * len(timestamps):
+        raise Exception(f"Expected {len(timestamps)} frames from {video_path}, "
+                        f"got {len(result.stdout) / frame_bytes:g}")
+    frames = np.frombuffer(result.stdout, dtype=np.uint8).reshape(len(timestamps), height, width, 3)
+    return list(frames)
+
+
+def pick_distinct_frames(frames: List[np.ndarray], count: int) -> List[int]:
+    """Indices of the ``count`` most visually distinct frames, in their original order.
+
+    The most detailed frame (highest pixel standard deviation) is taken
+    first; each next pick is the frame farthest (mean absolute
+    difference) from every frame already picked, weighted by its detail
+    so flat frames are only picked as a last resort.
+    """
+    samples = np.stack([f.astype(np.float32).mean(axis=2) for f in frames])
+    samples = samples.reshape(len(frames), -1)
+    detail = samples.std(axis=1)
+    weight = detail / (detail.max() or 1.0)
+    picked = [int(np.argmax(detail))]
+    nearest = np.abs(samples - samples[picked[0]]).mean(axis=1)
+    while len(picked) < min(count, len(frames)):
+        score = nearest * weight
+        score[picked] = -1
+        best = int(np.argmax(score))
+        picked.append(best)
+        nearest = np.minimum(nearest, np.abs(samples - samples[best]).mean(axis=1))
+    return sorted(picked)
+
+
+def scene_score_timestamps(video_path: str, duration: float, count: int) -> List[float]:
+    """Timestamps of the ``count`` most distinct of several evenly spaced candidates."""
+    candidates = evenly_spaced_timestamps(duration, count * SCENE_CANDIDATES_PER_THUMBNAIL)
+    samples = seek_frames(video_path, candidates, SCENE_SAMPLE_SIZE)
+    return [candidates[i] for i in pick_distinct_frames(samples, count)]
+
+
+def extract_thumbnails(
+    video_path: str,
+    num_thumbnails: int = 3,
+    thumbnail_size: Tuple[int, int] = (1280, 720),
+    thumbnails_dir: Optional[str] = None,
+    mode: Optional[str] = None
+) -> List[str]:
+    """
+    Save ``thumbnail_N.jpg`` files for a video.
+
+    Args:
+        video_path (str): Path to the video file
+        num_thumbnails (int): Number of thumbnails to generate
+        thumbnail_size (Tuple[int, int]): Size of thumbnails in pixels (width, height)
+        thumbnails_dir (Optional[str]): Directory to save thumbnails. If None, uses 'thumbnails' in video directory
+        mode (Optional[str]): 'even' or 'scene'; defaults to the THUMBNAIL_MODE setting
+
+    Returns:
+        List[str]: List of paths to the generated thumbnail files
+    """
+    mode = mode or get_thumbnail_mode()
+    duration = ffmpeg_parse_infos(video_path)['duration']
+    if mode == "scene":
+        timestamps = scene_score_timestamps(video_path, duration, num_thumbnails)
+    else:
+        timestamps = evenly_spaced_timestamps(duration, num_thumbnails)
+
+    if thumbnails_dir is None:
+        thumbnails_dir = os.path.join(os.path.dirname(video_path), "thumbnails")
+    os.makedirs(thumbnails_dir, exist_ok=True)
+
+    thumbnail_paths = []
+    for i, frame in enumerate(seek_frames(video_path, timestamps, thumbnail_size)):
+        output_path = os.path.join(thumbnails_dir, f"thumbnail_{i+1}.jpg")
+        Image.fromarray(frame).save(output_path, 'JPEG', quality=JPEG_QUALITY)
+        thumbnail_paths.append(output_path)
+    logger.info(f"Saved {len(thumbnail_paths)} thumbnails ({mode}) to {thumbnails_dir}")
+    return thumbnail_paths
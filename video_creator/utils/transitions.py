@@ -0,0 +1,192 @@
+"""Module for transitions between the clips of the main video.
+
+* fade: MoviePy fadein over the transition window;
+* zoom-in: zooms from 1.5x to 1x over the transition window. Each frame
+  in the window is a precomputed centre crop resized to the output size,
+  so there is no 1.5x intermediate and frames after the window are
+  passed through untouched;
+* ken-burns: a slow zoom over the whole of a still image, rendered by a
+  single ffmpeg zoompan pass instead of frame by frame in Python.
+
+Every transitioned clip carries a TransitionStats so the time spent on
+each transition can be reported after the video is written. Ken Burns
+renders are written to the job's work directory and removed by
+remove_rendered_transitions once the video has been written.
+"""
+import os
+import time
+import random
+import logging
+import tempfile
+from typing import List, Optional
+
+import cv2
+import numpy as np
+from PIL import Image
+from moviepy.editor import ImageClip, VideoClip, VideoFileClip
+from moviepy.video.fx.fadein import fadein
+
+from video_creator.utils.encoder_profiles import resolve_encoder_profile
+from video_creator.utils.video_assembly import run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+TRANSITION_TYPES = ("fade", "zoom-in", "ken-burns")
+RANDOM_TRANSITION_TYPES = ("fade", "zoom-in")
+ZOOM_IN_START = 1.5
+KEN_BURNS_END = 1.2
+DEFAULT_FPS = 30
+
+
+class TransitionStats:
+    """Time spent producing one clip's transition."""
+
+    def __init__(self, index: int, transition_type: str):
+        self.index = index
+        self.transition_type = transition_type
+        self.frames = 0
+        self.seconds = 0.0
+
+
+def zoom_crop_boxes(size, duration: float, fps: float, start_zoom: float = ZOOM_IN_START) -> np.ndarray:
+    """Centre crop ``(x, y, w, h)`` of every frame of a zoom from ``start_zoom`` down to 1x."""
+    w, h = size
+    frames = max(1, int(np.ceil(duration * fps)))
+    zoom = np.maximum(1.0, start_zoom - (start_zoom - 1.0) * np.arange(frames) / fps / duration)
+    crop_w = np.minimum(w, np.round(w / zoom)).astype(int)
+    crop_h = np.minimum(h, np.round(h / zoom)).astype(int)
+    return np.stack([(w - crop_w) // 2, (h - crop_h) // 2, crop_w, crop_h], axis=1)
+
+
+def zoom_in(clip: VideoClip, duration: float, fps: float = DEFAULT_FPS) -> VideoClip:
+    """Zoom from 1.5x to 1x over the first ``duration`` seconds of the clip."""
+    w, h = clip.size
+    boxes = zoom_crop_boxes(clip.size, duration, fps)
+
+    def zoom_frame(get_frame, t):
+        frame = get_frame(t)
+        if t >= duration:
+            return frame
+        x, y, crop_w, crop_h = boxes[min(int(t * fps + 1e-6), len(boxes) - 1)]
+        return cv2.resize(frame[y:y + crop_h, x:x + crop_w], (w, h), interpolation=cv2.INTER_LINEAR)
+
+    return clip.fl(zoom_frame)
+
+
+def timed_window(clip: VideoClip, duration: float, stats: TransitionStats) -> VideoClip:
+    """Add the time spent producing frames inside the transition window to ``stats``."""
+    def timed_frame(get_frame, t):
+        if t >= duration:
+            return get_frame(t)
+        start = time.perf_counter()
+        frame = get_frame(t)
+        stats.frames += 1
+        stats.seconds += time.perf_counter() - start
+        return frame
+
+    timed = clip.fl(timed_frame)
+    # fl renders a frame to learn the clip size; that one is not part of the video
+    stats.frames, stats.seconds = 0, 0.0
+    return timed
+
+
+def ken_burns(clip: ImageClip, fps: float = DEFAULT_FPS, end_zoom: float = KEN_BURNS_END,
+              stats: Optional[TransitionStats] = None, work_dir: Optional[str] = None) -> VideoClip:
+    """Render a still clip as a slow zoom to ``end_zoom`` with one ffmpeg zoompan pass.
+
+    The render is written to ``work_dir`` (the system temp directory by
+    default) and its path kept as the clip's ``rendered_path``.
+    """
+    start = time.perf_counter()
+    w, h = clip.size
+    frames = max(1, int(round(clip.duration * fps)))
+    if work_dir:
+        os.makedirs(work_dir, exist_ok=True)
+    with tempfile.NamedTemporaryFile(suffix=".png", dir=work_dir, delete=False) as still:
+        still_path = still.name
+    Image.fromarray(clip.get_frame(0)).save(still_path)
+    output_path = still_path[:-4] + "_ken_burns.mp4"
+    try:
+        # One decoded input frame expanded to every output frame by zoompan's d
+        run_ffmpeg([
+            "-i", still_path,
+            "-vf", (f"scale={w}:{h},zoompan=z='1+{end_zoom - 1.0}*on/{frames}':d={frames}"
+                    f":x='iw/2-iw/zoom/2':y='ih/2-ih/zoom/2':s={w}x{h}:fps={fps}"),
+            "-frames:v", str(frames), *resolve_encoder_profile("intermediate").video_args(fps),
+            "-pix_fmt", "yuv420p", output_path
+        ])
+    finally:
+        os.remove(still_path)
+    if stats:
+        stats.frames = frames
+        stats.seconds = time.perf_counter() - start
+    # The rendered file is read by the caller's writer, then removed by remove_rendered_transitions
+    rendered = VideoFileClip(output_path)
+    timed = rendered.set_start(clip.start).set_duration(clip.duration)
+    timed.rendered_path = output_path
+    timed.rendered_reader = rendered
+    return timed
+
+
+def apply_transition(clip: VideoClip, duration: float, transition_type: str, fps: float = DEFAULT_FPS,
+                     stats: Optional[TransitionStats] = None, work_dir: Optional[str] = None) -> VideoClip:
+    """Apply a fade, zoom-in or (for stills) Ken Burns transition to a clip."""
+    if transition_type == 'ken-burns' and isinstance(clip, ImageClip):
+        return ken_burns(clip, fps=fps, stats=stats, work_dir=work_dir)
+    if transition_type == 'fade':
+        transitioned = fadein(clip, duration)
+    else:
+        transitioned = zoom_in(clip, duration, fps=fps)
+    return timed_window(transitioned, duration, stats) if stats else transitioned
+
+
+def create_transition_sequence(clips: List[VideoClip], transition_type: Optional[str] = None,
+                               transition_duration: float = 1.0, fps: float = DEFAULT_FPS,
+                               work_dir: Optional[str] = None) -> List[VideoClip]:
+    """Apply one transition type to every clip but the first.
+
+    The type is picked at random between fade and zoom-in unless given.
+    Each transitioned clip gets a ``transition_stats`` attribute; Ken
+    Burns renders go to ``work_dir``.
+    """
+    if not clips:
+        logger.warning("No clips provided for transition sequence")
+        return []
+    transition_type = transition_type or random.choice(RANDOM_TRANSITION_TYPES)
+    if transition_type not in TRANSITION_TYPES:
+        raise ValueError(f"Unknown transition type: {transition_type}")
+    logger.info(f"Using {transition_type} transitions")
+
+    final_clips = [clips[0]]
+    for i, clip in enumerate(clips[1:], 1):
+        stats = TransitionStats(i, transition_type)
+        clip = apply_transition(clip, transition_duration, transition_type, fps=fps, stats=stats,
+                                work_dir=work_dir)
+        clip.transition_stats = stats
+        final_clips.append(clip)
+    return final_clips
+
+
+def report_transition_timings(clips: List[VideoClip]) -> List[TransitionStats]:
+    """Log the time spent on each clip's transition once the video has been written."""
+    timings = [clip.transition_stats for clip in clips if getattr(clip, 'transition_stats', None)]
+    for stats in timings:
+        per_frame = stats.seconds / stats.frames * 1000 if stats.frames else 0.0
+        logger.info(f"Transition {stats.index} ({stats.transition_type}): {stats.frames} frames "
+                    f"in {stats.seconds:.2f}s ({per_frame:.1f} ms/frame)")
+    if timings:
+        logger.info(f"Transitions took {sum(s.seconds for s in timings):.2f}s in total")
+    return timings
+
+
+def remove_rendered_transitions(clips: List[VideoClip]):
+    """Close and delete the files rendered for the clips' transitions."""
+    for clip in clips:
+        path = getattr(clip, 'rendered_path', None)
+        if not path:
+            continue
+        clip.rendered_reader.close()
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
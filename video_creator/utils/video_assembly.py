@@ -0,0 +1,307 @@
+"""Module for assembling final episodes with ffmpeg stream copy.
+
+Each segment is normalized once to a canonical profile (codec, resolution,
+frame rate and audio format) and cached by content hash in a size-bounded
+LRU directory, with keyframes forced where its transitions start and end. Episodes are then joined with
+the ffmpeg concat demuxer: segment bodies are stream copied and only the
+short fade windows at the boundaries are re-encoded. The audio is encoded
+once more as one continuous track from the segments' own audio, since
+joining separately encoded AAC pieces leaves encoder padding at every
+join and drifts out of sync.
+"""
+import os
+import json
+import math
+import shutil
+import hashlib
+import logging
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from utils.disk_lru import DiskLRU
+from video_creator.utils.encoder_profiles import EncoderProfile, resolve_encoder_profile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(str(Path(__file__).parent.parent.parent), "cache", "video_segments")
+
+TRANSITION_SECONDS = 1.0
+VIDEO_TRACK_TIMESCALE = 15360  # Shared by every piece so the concat demuxer can copy them
+HASH_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+def get_assembly_backend() -> str:
+    """Final assembly backend: "ffmpeg" (stream copy) or "moviepy"."""
+    return os.getenv("VIDEO_ASSEMBLY", "ffmpeg").lower()
+
+
+def get_segment_cache_dir() -> str:
+    return os.getenv("VIDEO_SEGMENT_CACHE_DIR") or DEFAULT_CACHE_DIR
+
+
+class NormalizedSegmentCache(DiskLRU):
+    """Normalized segments stored as ``<key>.mp4`` beside a ``<key>.json`` of their cut points.
+
+    The main video is unique to its episode, so without a budget every
+    episode would leave a full-length re-encode behind. Eviction removes
+    a segment's sidecar along with it.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        super().__init__(cache_dir, max_bytes, extensions=(".mp4",), label="normalized segments")
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        remaining = super().evict(keep)
+        for entry in os.scandir(self.cache_dir):
+            # The sidecar is written after its segment, so one without a segment was evicted
+            if entry.name.endswith(".json") and not os.path.exists(entry.path[:-len(".json")] + ".mp4"):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+        return remaining
+
+
+def get_normalized_segment_cache(cache_dir: Optional[str] = None) -> NormalizedSegmentCache:
+    """The normalized segment cache in ``cache_dir`` (VIDEO_SEGMENT_CACHE_DIR by default)."""
+    return NormalizedSegmentCache(
+        cache_dir or get_segment_cache_dir(),
+        max_bytes=int(float(os.getenv("VIDEO_SEGMENT_CACHE_MAX_MB", "8192")) * 1024 * 1024)
+    )
+
+
+class AssemblyProfile:
+    """The canonical encoding, resolution and frame rate every segment is normalized to."""
+
+    def __init__(self, width: int, height: int, fps: float = 30, encoder: Optional[EncoderProfile] = None,
+                 sample_rate: int = 44100, channels: int = 2):
+        self.width = int(width)
+        self.height = int(height)
+        self.fps = fps
+        self.encoder = encoder or resolve_encoder_profile("final")
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "AssemblyProfile":
+        """Build the profile from the same keys create_final_video_from_paths reads."""
+        width, height = config.get('resolution', (780, 480))
+        return cls(width, height, fps=config.get('fps', 30), encoder=resolve_encoder_profile("final", config))
+
+    @property
+    def key(self) -> str:
+        return json.dumps(dict(self.__dict__, encoder=self.encoder.key), sort_keys=True)
+
+    def frame_time(self, seconds: float) -> float:
+        """Round a time up to the next frame boundary."""
+        return math.ceil(round(seconds * self.fps, 6)) / self.fps
+
+    def audio_args(self) -> List[str]:
+        return self.encoder.audio_args() + ["-ar", str(self.sample_rate), "-ac", str(self.channels)]
+
+    def encode_args(self) -> List[str]:
+        return self.encoder.video_args(self.fps) + [
+            "-pix_fmt", "yuv420p", "-r", str(self.fps),
+            "-video_track_timescale", str(VIDEO_TRACK_TIMESCALE),
+        ] + self.audio_args()
+
+
+def run_ffmpeg(args: List[str]):
+    """Run ffmpeg, raising with the tail of its log if it fails."""
+    command = [get_setting("FFMPEG_BINARY"), "-y", "-hide_banner", "-loglevel", "error"] + args
+    result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise Exception(f"FFmpeg error: {result.stderr.decode(errors='replace')[-2000:]}")
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class NormalizedSegment:
+    """A segment in the canonical profile, with the keyframes its fade windows start at."""
+
+    def __init__(self, path: str, duration: float, head_end: float, tail_start: float):
+        self.path = path
+        self.duration = duration
+        self.head_end = head_end
+        self.tail_start = tail_start
+
+
+def normalize_segment(source_path: str, profile: AssemblyProfile, transition: float = TRANSITION_SECONDS,
+                      cache_dir: Optional[str] = None) -> NormalizedSegment:
+    """Convert a segment to the canonical profile, reusing the cached result for identical content.
+
+    The segment is scaled to the profile resolution (as the MoviePy path
+    resized it), resampled to the profile frame rate and given a silent
+    audio track if it has none, so every piece shares one stream layout.
+    Keyframes are forced at ``transition`` seconds from either end so the
+    body between them can be cut without re-encoding.
+    """
+    cache_dir = cache_dir or get_segment_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    key = hashlib.sha256("\x1f".join([file_hash(source_path), profile.key, str(transition)]).encode()).hexdigest()
+    path = os.path.join(cache_dir, f"{key}.mp4")
+    meta_path = os.path.join(cache_dir, f"{key}.json")
+    if os.path.exists(meta_path) and DiskLRU.touch(path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        logger.info(f"Using cached normalized segment for {source_path}")
+        return NormalizedSegment(path, **meta)
+
+    logger.info(f"Normalizing {source_path} to {profile.width}x{profile.height}@{profile.fps}...")
+    infos = ffmpeg_parse_infos(source_path)
+    duration = infos['duration']
+    head_end = profile.frame_time(transition)
+    tail_start = profile.frame_time(max(head_end, duration - transition))
+    args = ["-i", source_path]
+    if infos.get('audio_found'):
+        audio_map = "0:a:0"
+    else:
+        args += ["-f", "lavfi", "-t", str(duration),
+                 "-i", f"anullsrc=r={profile.sample_rate}:cl={'mono' if profile.channels == 1 else 'stereo'}"]
+        audio_map = "1:a:0"
+    tmp_path = f"{path}.{os.getpid()}.part.mp4"
+    try:
+        run_ffmpeg(args + [
+            "-map", "0:v:0", "-map", audio_map,
+            "-vf", f"scale={profile.width}:{profile.height},setsar=1",
+            "-force_key_frames", f"{head_end},{tail_start}",
+        ] + profile.encode_args() + ["-t", str(duration), "-movflags", "+faststart", tmp_path])
+        # Cut points come from the normalized file, which may be a frame shorter or longer
+        duration = ffmpeg_parse_infos(tmp_path)['video_duration']
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    meta = {"duration": duration, "head_end": head_end, "tail_start": tail_start}
+    with open(f"{meta_path}.part", "w") as f:
+        json.dump(meta, f)
+    os.replace(f"{meta_path}.part", meta_path)
+    return NormalizedSegment(path, **meta)
+
+
+def encode_window(segment: NormalizedSegment, start: float, end: float, fade_in: float, fade_out: float,
+                  profile: AssemblyProfile, output_path: str) -> str:
+    """Re-encode ``[start, end)`` of a normalized segment with fades from and to black."""
+    length = end - start
+    fades = []
+    if fade_in:
+        fades.append(f"fade=t=in:st=0:d={fade_in}")
+    if fade_out:
+        fades.append(f"fade=t=out:st={length - fade_out}:d={fade_out}")
+    args = ["-ss", str(start), "-i", segment.path, "-t", str(length)]
+    if fades:
+        args += ["-vf", ",".join(fades)]
+    run_ffmpeg(args + profile.encode_args() + [output_path])
+    return output_path
+
+
+def plan_pieces(segments: List[NormalizedSegment], transition: float) -> List[Tuple]:
+    """Split the episode into stream-copied bodies and re-encoded fade windows.
+
+    Returns ``("copy", segment, inpoint, outpoint)`` and
+    ``("window", segment, start, end, fade_in, fade_out)`` tuples in order.
+    Like the MoviePy crossfades, every segment fades in from black unless
+    it is first and fades out to black unless it is last.
+    """
+    pieces = []
+    for i, segment in enumerate(segments):
+        fade_in = i > 0
+        fade_out = i < len(segments) - 1
+        head = segment.head_end if fade_in else 0.0
+        tail = segment.tail_start if fade_out else segment.duration
+        if tail <= head:
+            # Too short to keep a body, re-encode the whole segment
+            pieces.append(("window", segment, 0.0, segment.duration,
+                           min(transition, segment.duration) if fade_in else 0,
+                           min(transition, segment.duration) if fade_out else 0))
+            continue
+        if fade_in:
+            pieces.append(("window", segment, 0.0, head, head, 0))
+        pieces.append(("copy", segment, head, tail))
+        if fade_out:
+            pieces.append(("window", segment, tail, segment.duration, 0, segment.duration - tail))
+    return pieces
+
+
+def concat_entry(path: str, inpoint: Optional[float] = None, outpoint: Optional[float] = None) -> str:
+    entry = "file '{}'\n".format(os.path.abspath(path).replace("'", "'\\''"))
+    if inpoint:
+        entry += f"inpoint {inpoint}\n"
+    if outpoint is not None:
+        entry += f"outpoint {outpoint}\n"
+    return entry
+
+
+def audio_track_filter(segments: List[NormalizedSegment], first_input: int = 0) -> str:
+    """Filter graph joining the segments' audio into one track labelled ``[audio]``.
+
+    Each segment's audio is padded or trimmed to its video duration, so
+    the track stays in sync however many segments there are.
+    """
+    chains = []
+    for n, segment in enumerate(segments):
+        chains.append(f"[{first_input + n}:a:0]apad=whole_dur={segment.duration},"
+                      f"atrim=end={segment.duration},asetpts=PTS-STARTPTS[a{n}]")
+    labels = "".join(f"[a{n}]" for n in range(len(segments)))
+    return ";".join(chains + [f"{labels}concat=n={len(segments)}:v=0:a=1[audio]"])
+
+
+def assemble_segments(source_paths: List[str], output_path: str, profile: AssemblyProfile,
+                      transition: float = TRANSITION_SECONDS, cache_dir: Optional[str] = None) -> str:
+    """Join video segments with fade transitions, stream copying the video of everything but the fades.
+
+    Args:
+        source_paths: Segment files in playback order
+        output_path: Where to write the episode
+        profile: Canonical profile the segments are normalized to
+        transition: Fade duration at each boundary, in seconds
+        cache_dir: Normalized segment cache, defaults to VIDEO_SEGMENT_CACHE_DIR
+
+    Returns:
+        The output path
+    """
+    if not source_paths:
+        raise ValueError("No valid video clips found")
+    cache = get_normalized_segment_cache(cache_dir)
+    segments = [normalize_segment(p, profile, transition, cache.cache_dir) for p in source_paths]
+    work_dir = tempfile.mkdtemp(prefix="assembly_", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        entries = []
+        reencoded = 0.0
+        for n, piece in enumerate(plan_pieces(segments, transition)):
+            if piece[0] == "copy":
+                _, segment, inpoint, outpoint = piece
+                entries.append(concat_entry(segment.path, inpoint,
+                                            None if outpoint >= segment.duration else outpoint))
+                continue
+            _, segment, start, end, fade_in, fade_out = piece
+            window_path = encode_window(segment, start, end, fade_in, fade_out, profile,
+                                        os.path.join(work_dir, f"window_{n}.mp4"))
+            entries.append(concat_entry(window_path))
+            reencoded += end - start
+        list_path = os.path.join(work_dir, "concat.txt")
+        with open(list_path, "w") as f:
+            f.writelines(entries)
+        logger.info(f"Joining {len(segments)} segments ({reencoded:.1f}s re-encoded at transitions)...")
+        inputs = ["-f", "concat", "-safe", "0", "-i", list_path]
+        for segment in segments:
+            inputs += ["-i", segment.path]
+        run_ffmpeg(inputs + ["-filter_complex", audio_track_filter(segments, first_input=1),
+                             "-map", "0:v:0", "-map", "[audio]", "-c:v", "copy"]
+                   + profile.audio_args() + ["-movflags", "+faststart", output_path])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    # Only once the episode is written, so none of its own segments is evicted while in use
+    cache.evict()
+    return output_path
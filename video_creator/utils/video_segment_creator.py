@@ -12,12 +12,96 @@ import colorlog
 from typing import Dict, Any, Optional, Tuple, List
 
 from utils.file_writer import get_output_path
+from video_creator.utils.encoder_profiles import resolve_encoder_profile
+from video_creator.utils.segment_cache import SegmentCache, get_segment_cache_from_env, segment_cache_key
+from video_creator.utils.segment_ffmpeg import get_segment_renderer, render_segment_with_ffmpeg
 
 def setup_logger():
     # This function is not provided in the original file or the code block
     # It's assumed to exist as it's called in the create_video_segment function
     pass
 
+def get_segment_text(config: dict, request_dict: dict = None) -> Tuple[str, str]:
+    """Heading and subheading of a segment: from the config, else the request's title and subtitle."""
+    #if heading is not avaiable in config we use the title and subtitle from request_dict
+    try :
+        return config['title'], config['sub_title']
+    except:
+        return request_dict['title'], request_dict['sub_title']
+
+def get_segment_output_path(config: dict, job_id: str, segment_type: str, request_dict: dict) -> str:
+    """Where a job's copy of a segment is written."""
+    output_path, _ = get_output_path(
+        filename=config.get(f'{segment_type}_filename', f'{segment_type}.mp4'),
+        profile_name=request_dict['profile_name'],
+        customer_id=request_dict['customer_id'],
+        job_id=job_id,
+        theme=request_dict.get('theme', 'default')
+    )
+    return output_path
+
+def create_segment_overlay_clips(config: dict, heading: str, subheading: str) -> List[ImageClip]:
+    """Positioned heading, subheading, footer and (optional) logo clips of a segment."""
+    resolution = config['resolution']
+    duration = config['duration']
+    logo_path = config['logo_settings_main_logo_path']
+    
+    # Create text clips
+    heading_clip = TextClip(
+        heading,
+        fontsize=config['title_font_size'],
+        color=config['title_font_color'],
+        font=config['title_font_name'],
+        size=(int(resolution[0] * 0.8), None),
+        method='caption'
+    ).set_duration(duration)
+    
+    subheading_clip = TextClip(
+        subheading,
+        fontsize=config['subtitle_font_size'],
+        color=config['subtitle_font_color'],
+        font=config['subtitle_font_name'],
+        size=(int(resolution[0] * 0.8), None),
+        method='caption'
+    ).set_duration(duration)
+    
+    footer_clip = TextClip(
+        config['footer_text'],
+        fontsize=config['footer_settings_font_size'],
+        color=config['footer_settings_font_color'],
+        font=config['footer_settings_font_name'],
+        size=(int(resolution[0] * 0.8), None),
+        method='caption'
+    ).set_duration(duration)
+    
+    # Position text clips
+    # Calculate the total height of both clips plus spacing
+    total_height = heading_clip.size[1] + subheading_clip.size[1] + 20  # 20px spacing between texts
+    
+    # Calculate center positions
+    center_y = (resolution[1] - total_height) // 2
+    heading_y = center_y
+    subheading_y = heading_y + heading_clip.size[1] + 20
+    
+    heading_clip = heading_clip.set_position(('center', heading_y))
+    subheading_clip = subheading_clip.set_position(('center', subheading_y))
+    footer_clip = footer_clip.set_position(('center', resolution[1] - 100))  # 100px from bottom
+    
+    # Add logo if provided
+    clips = [heading_clip, subheading_clip, footer_clip]
+    if logo_path:
+        # Add padding for logo position
+        padding = 20
+        logo_width = config['logo_settings_logo_size'][0]
+        logo_height = config['logo_settings_logo_size'][1]
+        logo_clip = (ImageClip(logo_path)
+                    .resize((logo_width, logo_height))
+                    .set_duration(duration)
+                    .set_position((resolution[0] - logo_width - padding, padding)))  # Top-right with padding
+        clips.append(logo_clip)
+    
+    return clips
+
 def create_video_segment(
     config: dict,
     job_id: str,
@@ -52,14 +136,7 @@ def create_video_segment(
         footer = config['footer_text']
         
       
-        #if heading is not avaiable in config we use the title and subtitle from request_dict
-  
-        try :
-            heading = config['title']
-            subheading = config['sub_title']
-        except:
-            heading = request_dict['title']
-            subheading = request_dict['sub_title']
+        heading, subheading = get_segment_text(config, request_dict)
 
         if not os.path.exists(background_video_path):
             raise FileNotFoundError(f"Background video file not found: {background_video_path}")
@@ -68,6 +145,16 @@ def create_video_segment(
         if logo_path and not os.path.exists(logo_path):
             raise FileNotFoundError(f"Logo file not found: {logo_path}")
 
+        #let us get the output path from the file writer
+        output_path = get_segment_output_path(config, job_id, segment_type, request_dict)
+        
+        overlay_clips = create_segment_overlay_clips(config, heading, subheading)
+        if get_segment_renderer(config) == "ffmpeg":
+            print(f"Rendering {segment_type} segment with ffmpeg to {output_path}...")
+            render_segment_with_ffmpeg(config, overlay_clips, output_path)
+            print(f"{segment_type.capitalize()} video segment created successfully!")
+            return output_path
+
         # Load the background video
         video = VideoFileClip(background_video_path)
         
@@ -82,59 +169,7 @@ def create_video_segment(
             print(f"Background video is shorter than {duration}s, looping to match duration.")
             video = video.loop(duration=duration)
         
-        # Create text clips
-        heading_clip = TextClip(
-            heading,
-            fontsize=config['title_font_size'],
-            color=config['title_font_color'],
-            font=config['title_font_name'],
-            size=(int(resolution[0] * 0.8), None),
-            method='caption'
-        ).set_duration(duration)
-        
-        subheading_clip = TextClip(
-            subheading,
-            fontsize=config['subtitle_font_size'],
-            color=config['subtitle_font_color'],
-            font=config['subtitle_font_name'],
-            size=(int(resolution[0] * 0.8), None),
-            method='caption'
-        ).set_duration(duration)
-        
-        footer_clip = TextClip(
-            footer,
-            fontsize=config['footer_settings_font_size'],
-            color=config['footer_settings_font_color'],
-            font=config['footer_settings_font_name'],
-            size=(int(resolution[0] * 0.8), None),
-            method='caption'
-        ).set_duration(duration)
-        
-        # Position text clips
-        # Calculate the total height of both clips plus spacing
-        total_height = heading_clip.size[1] + subheading_clip.size[1] + 20  # 20px spacing between texts
-        
-        # Calculate center positions
-        center_y = (resolution[1] - total_height) // 2
-        heading_y = center_y
-        subheading_y = heading_y + heading_clip.size[1] + 20
-        
-        heading_clip = heading_clip.set_position(('center', heading_y))
-        subheading_clip = subheading_clip.set_position(('center', subheading_y))
-        footer_clip = footer_clip.set_position(('center', resolution[1] - 100))  # 100px from bottom
-        
-        # Add logo if provided
-        clips = [video, heading_clip, subheading_clip, footer_clip]
-        if logo_path:
-            # Add padding for logo position
-            padding = 20
-            logo_width = config['logo_settings_logo_size'][0]
-            logo_height = config['logo_settings_logo_size'][1]
-            logo_clip = (ImageClip(logo_path)
-                        .resize((logo_width, logo_height))
-                        .set_duration(duration)
-                        .set_position((resolution[0] - logo_width - padding, padding)))  # Top-right with padding
-            clips.append(logo_clip)
+        clips = [video] + overlay_clips
         
         # Composite the final video with all elements
         final_video = CompositeVideoClip(clips, size=resolution)
@@ -165,22 +200,12 @@ def create_video_segment(
         # output_dir = os.path.dirname(output_path)
         # os.makedirs(output_dir, exist_ok=True)
         
-        #let us get the output path from the file writer
-        output_path = get_output_path(
-            job_id=job_id,
-            customer_id=request_dict['customer_id'],
-            profile_name=request_dict['profile_name'],
-            output_filename=config['intro_filename'],
-            output_dir=config['output_dir']
-        )
-        
         # Write the final video to file
         print(f"Writing final video to {output_path}...")
         final_video.write_videofile(
             output_path, 
-            codec=config['codec'],
-            audio_codec=config['audio_codec'], 
-            fps=config['fps']
+            fps=config['fps'],
+            **resolve_encoder_profile("segment", config).write_videofile_kwargs(config['fps'])
         )
         print(f"{segment_type.capitalize()} video segment created successfully!")
         return output_path
@@ -190,6 +215,41 @@ def create_video_segment(
         raise
 
 
+def create_cached_video_segment(
+    config: dict,
+    job_id: str,
+    segment_type: str = "generic",
+    request_dict: dict = None,
+    audio_path: str = None,
+    cache: Optional[SegmentCache] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Create a video segment like create_video_segment, reusing an identical earlier render.
+    
+    The segment is looked up in the shared segment cache (SEGMENT_CACHE_* settings)
+    under a hash of the inputs that affect its pixels and audio; on a hit the
+    cached file is linked to the job's output path and nothing is rendered.
+    
+    Returns:
+        The segment path and ``{"key": ..., "hit": ...}`` (key is None when caching is disabled)
+    """
+    cache = cache or get_segment_cache_from_env()
+    if cache is None:
+        return create_video_segment(config=config, job_id=job_id, segment_type=segment_type,
+                                    request_dict=request_dict, audio_path=audio_path), {"key": None, "hit": False}
+    
+    heading, subheading = get_segment_text(config, request_dict)
+    key = segment_cache_key(config, heading, subheading)
+    output_path = get_segment_output_path(config, job_id, segment_type, request_dict)
+    if cache.materialize(key, output_path):
+        print(f"{segment_type.capitalize()} video segment served from cache ({key[:12]})")
+        return output_path, {"key": key, "hit": True}
+    
+    output_path = create_video_segment(config=config, job_id=job_id, segment_type=segment_type,
+                                       request_dict=request_dict, audio_path=audio_path)
+    cache.store(key, output_path)
+    return output_path, {"key": key, "hit": False}
+
 
 def process_individual_video(config: Dict) -> Dict:
     """
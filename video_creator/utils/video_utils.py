@@ -14,6 +14,7 @@ from moviepy.audio.fx.all import audio_fadein, audio_fadeout
 
 from video_creator import podcast_video
 from utils.file_writer import get_output_path
+from video_creator.utils.encoder_profiles import resolve_encoder_profile
 
 def setup_logger():
     """Set up colored logging configuration"""
@@ -590,11 +591,8 @@ class VideoCreator:
             logger.info(f"\n💾 Writing final video to: {output_path}")
             final_video.write_videofile(
                 output_path,
-                codec="libx264",
-                audio_codec="aac",
-                bitrate="2000k",
-                threads=4,
-                logger=None
+                logger=None,
+                **resolve_encoder_profile("final").write_videofile_kwargs(final_video.fps)
             )
             
             logger.info("✅ Video creation completed successfully!")
@@ -660,12 +658,74 @@ import logging
 from moviepy.editor import VideoFileClip, concatenate_videoclips
 import datetime
 import json
+from video_creator.utils.video_assembly import AssemblyProfile, assemble_segments, get_assembly_backend
 logger = logging.getLogger(__name__)
 
+def concatenate_with_moviepy(source_paths: List[str], output_path: str, config: dict) -> str:
+    """
+    Concatenate clips with crossfades in MoviePy, resizing and re-encoding every frame.
+    
+    Args:
+        source_paths: Video files in playback order
+        output_path: Where to write the final video
+        config: Configuration dictionary containing video settings
+        
+    Returns:
+        Path to the final video file
+    """
+    # Get video resolution from config
+    resolution = tuple(config.get('resolution', (780, 480)))
+    
+    # Load clips in order
+    clips = []
+    for path in source_paths:
+        logger.info(f"Loading {path}...")
+        clip = VideoFileClip(path)
+        # Resize clip to match target resolution
+        if tuple(clip.size) != resolution:
+            clip = clip.resize(width=resolution[0], height=resolution[1])
+        clips.append(clip)
+    
+    if not clips:
+        raise ValueError("No valid video clips found")
+        
+    # Add crossfade transitions between clips
+    transition_duration = 1.0  # 1 second transition
+    for i in range(len(clips)-1):
+        clips[i] = clips[i].crossfadeout(transition_duration)
+        clips[i+1] = clips[i+1].crossfadein(transition_duration)
+    
+    # Concatenate all clips with transitions
+    logger.info("Concatenating clips with transitions...")
+    final_video = concatenate_videoclips(
+        clips,
+        method="compose"
+    )
+    
+    # Write final video
+    logger.info(f"Writing final video to {output_path}...")
+    fps = config.get('fps', 30)
+    final_video.write_videofile(
+        output_path,
+        fps=fps,
+        **resolve_encoder_profile("final", config).write_videofile_kwargs(fps)
+    )
+    
+    # Close clips to free up memory
+    for clip in clips:
+        clip.close()
+    return output_path
+
 def create_final_video_from_paths(video_paths: dict, config: dict, job_id: int, customer_id: str, theme: str, profile: str) -> str:
     """
     Create final video by concatenating video clips with transitions.
     
+    By default (VIDEO_ASSEMBLY=ffmpeg) each segment is normalized once to the
+    configured codec, resolution and frame rate (cached by content hash) and
+    the episode is joined with the ffmpeg concat demuxer, so only the 1 second
+    fade windows at the boundaries are re-encoded. VIDEO_ASSEMBLY=moviepy
+    uses the previous MoviePy compositing path.
+    
     Args:
         video_paths: Dictionary of video paths in order (intro, short, bumper, main, outro)
         config: Configuration dictionary containing video settings
@@ -679,37 +739,13 @@ def create_final_video_from_paths(video_paths: dict, config: dict, job_id: int,
     try:
         logger.info("Creating final video from paths...")
         
-        # Get video resolution from config
-        resolution = config.get('resolution', (780, 480))
-         
-        # Load clips in order
-        clips = []
+        # Collect clips in order
         path_order = ['intro_video_path', 'short_video_path', 'bumper_video_path', 'main_video_path', 'outro_video_path']
+        source_paths = [video_paths[path_key] for path_key in path_order
+                        if path_key in video_paths and video_paths[path_key] and os.path.exists(video_paths[path_key])]
         
-        for path_key in path_order:
-            if path_key in video_paths and os.path.exists(video_paths[path_key]):
-                logger.info(f"Loading {path_key}...")
-                clip = VideoFileClip(video_paths[path_key])
-                # Resize clip to match target resolution
-                if clip.size != resolution:
-                    clip = clip.resize(width=resolution[0], height=resolution[1])
-                clips.append(clip)
-        
-        if not clips:
+        if not source_paths:
             raise ValueError("No valid video clips found")
-            
-        # Add crossfade transitions between clips
-        transition_duration = 1.0  # 1 second transition
-        for i in range(len(clips)-1):
-            clips[i] = clips[i].crossfadeout(transition_duration)
-            clips[i+1] = clips[i+1].crossfadein(transition_duration)
-        
-        # Concatenate all clips with transitions
-        logger.info("Concatenating clips with transitions...")
-        final_video = concatenate_videoclips(
-            clips,
-            method="compose"
-        )
         
         # Create output path
         output_filename = config.get('final_video_output_filename', 'final_video_{job_id}.mp4')
@@ -721,20 +757,10 @@ def create_final_video_from_paths(video_paths: dict, config: dict, job_id: int,
             theme=theme
         )
         
-        # Write final video
-        logger.info(f"Writing final video to {output_path}...")
-        final_video.write_videofile(
-            output_path,
-            fps=config.get('fps', 30),
-            codec=config.get('video_codec', 'libx264'),
-            bitrate=config.get('video_bitrate', '8000k'),
-            audio_codec=config.get('audio_codec', 'aac'),
-            audio_bitrate=config.get('audio_bitrate', '128k')
-        )
-        
-        # Close clips to free up memory
-        for clip in clips:
-            clip.close()
+        if get_assembly_backend() == "moviepy":
+            concatenate_with_moviepy(source_paths, output_path, config)
+        else:
+            assemble_segments(source_paths, output_path, AssemblyProfile.from_config(config))
             
         logger.info("Final video created successfully!")
         return output_path
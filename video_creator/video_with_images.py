@@ -8,7 +8,18 @@ import traceback
 import numpy as np
 from dotenv import load_dotenv
 from utils.file_writer import get_output_path
-from utils.open_ai_utils import create_image_prompt, transcribe_audio
+from utils.open_ai_utils import create_image_prompt, transcribe_audio, transcribe_audio_with_timestamps
+from utils.turn_timings import load_turn_timings
+from video_creator.utils.image_segments import (
+    SegmentImagePipeline, get_image_cache_from_env, segment_texts, split_segments
+)
+from video_creator.utils.encoder_profiles import resolve_encoder_profile
+from video_creator.utils.overlay_layer import composite_layers
+from video_creator.utils.looped_assets import get_looped_asset_cache_from_env, load_looped_video
+from video_creator.utils.transitions import (
+    RANDOM_TRANSITION_TYPES, apply_transition, create_transition_sequence, remove_rendered_transitions,
+    report_transition_timings
+)
 load_dotenv()
 
 import moviepy.editor as mp
@@ -44,6 +55,8 @@ logger.setLevel(logging.DEBUG)
 ########################################################################
 # IMAGE & AUDIO SPLIT FUNCTIONS
 ########################################################################
+GETIMAGE_SIZE = (1280, 720)
+
 def generate_getimage_and_save_image(prompt, output_path):
     url = "https://api.getimg.ai/v1/stable-diffusion-xl/text-to-image"
     
@@ -53,8 +66,8 @@ def generate_getimage_and_save_image(prompt, output_path):
     api_key = os.environ.get("GETIMAGE_API_KEY")
     payload = {
         "prompt": prompt,
-        "width": 1280,
-        "height": 720
+        "width": GETIMAGE_SIZE[0],
+        "height": GETIMAGE_SIZE[1]
     }
     
     headers = {
@@ -99,17 +112,24 @@ def generate_image_from_text(context, topic, segment_description, resolution, Us
         text = segment_description
     result = generate_getimage_and_save_image(text, temp_file.name)
     if result is None:
-        width, height = resolution
-        img = Image.new("RGB", (width, height), color="white")
-        draw = ImageDraw.Draw(img)
-        font = ImageFont.load_default()
-        text_width, text_height = draw.textsize(text, font=font)
-        position = ((width - text_width) // 2, (height - text_height) // 2)
-        draw.text(position, text, fill="black", font=font)
-        img.save(temp_file.name)
-        logger.info("Using fallback text image generation.")
+        create_fallback_image(text, resolution, temp_file.name)
     return temp_file.name
 
+def create_fallback_image(text, resolution, output_path):
+    """
+    Save a white image of the given resolution with the text centered on it.
+    """
+    width, height = resolution
+    img = Image.new("RGB", (width, height), color="white")
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default()
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    position = ((width - (right - left)) // 2, (height - (bottom - top)) // 2)
+    draw.text(position, text, fill="black", font=font)
+    img.save(output_path, format="JPEG")
+    logger.info("Using fallback text image generation.")
+    return output_path
+
 def transcribe_audio_segment(audio_clip, UseOpenAI=True):
     """
     Write the audio_clip to a temporary WAV file and transcribe it using Google Speech Recognition.
@@ -143,15 +163,15 @@ def transcribe_audio_segment(audio_clip, UseOpenAI=True):
 ########################################################################
 # VIDEO TRANSITION & OVERLAY FUNCTIONS (unchanged)
 ########################################################################
-def add_logo_and_footer(clip, logo_path=None, logo_size=(100, 100), logo_position='top-right', footer_text=None):
+def logo_and_footer_layers(size, duration, logo_path=None, logo_size=(100, 100), logo_position='top-right', footer_text=None):
     """
-    Add logo and footer text to a video clip.
+    Build the logo and footer layers for a video of the given size, bottom to top.
     """
-    final_clip = clip
+    layers = []
+    video_width, video_height = size
     
     if logo_path and os.path.exists(logo_path):
         logo = mp.ImageClip(logo_path).resize(logo_size)
-        video_width, video_height = clip.size
         logo_width, logo_height = logo_size
         margin = 20
         
@@ -164,8 +184,7 @@ def add_logo_and_footer(clip, logo_path=None, logo_size=(100, 100), logo_positio
         else:  # bottom-right
             pos = (video_width - logo_width - margin, video_height - logo_height - margin)
         
-        logo = logo.set_duration(clip.duration)
-        final_clip = mp.CompositeVideoClip([final_clip, logo.set_position(pos)])
+        layers.append(logo.set_duration(duration).set_position(pos))
     
     if footer_text:
         txt_clip = mp.TextClip(
@@ -173,76 +192,35 @@ def add_logo_and_footer(clip, logo_path=None, logo_size=(100, 100), logo_positio
             fontsize=30,
             color='white',
             font='Arial',
-            size=(clip.size[0], None),
+            size=(video_width, None),
             method='caption'
-        ).set_duration(clip.duration)
+        ).set_duration(duration)
         
-        txt_pos = ('center', clip.size[1] - txt_clip.size[1] - 20)
+        txt_pos = ('center', video_height - txt_clip.size[1] - 20)
         txt_bg = mp.ColorClip(
-            size=(clip.size[0], txt_clip.size[1] + 40),
+            size=(video_width, txt_clip.size[1] + 40),
             color=(0, 0, 0)
-        ).set_opacity(0.6).set_duration(clip.duration)
-        txt_bg = txt_bg.set_position(('center', clip.size[1] - txt_bg.size[1]))
-        final_clip = mp.CompositeVideoClip([final_clip, txt_bg, txt_clip.set_position(txt_pos)])
+        ).set_opacity(0.6).set_duration(duration)
+        txt_bg = txt_bg.set_position(('center', video_height - txt_bg.size[1]))
+        layers.extend([txt_bg, txt_clip.set_position(txt_pos)])
     
-    return final_clip
+    return layers
 
-def apply_random_transition(clip, duration, direction=None, transition_type=None):
+def add_logo_and_footer(clip, logo_path=None, logo_size=(100, 100), logo_position='top-right', footer_text=None):
     """
-    Apply either a fade or zoom-in transition effect to a video clip.
+    Add logo and footer text to a video clip.
     """
-    if transition_type is None:
-        transition_type = random.choice(['fade', 'zoom-in'])
-    
-    if transition_type == 'fade':
-        return fadein(clip, duration)
-    else:  # zoom-in only
-        w, h = clip.size
-
-        def make_frame(t):
-            # Always zoom in from 1.5x to 1x
-            zoom_factor = max(1.0, 1.5 - 0.5 * t)  # Ensure zoom factor never goes below 1.0
-            frame = clip.get_frame(t)
-            zoomed_w = max(w, int(w * zoom_factor))  # Ensure width never goes below original
-            zoomed_h = max(h, int(h * zoom_factor))  # Ensure height never goes below original
-            
-            # Resize the frame
-            resized = cv2.resize(frame, (zoomed_w, zoomed_h))
-            
-            # Calculate center crop coordinates
-            x_start = (zoomed_w - w) // 2
-            y_start = (zoomed_h - h) // 2
-            
-            # Return the center portion
-            return resized[y_start:y_start+h, x_start:x_start+w]
+    layers = logo_and_footer_layers(clip.size, clip.duration, logo_path=logo_path, logo_size=logo_size,
+                                    logo_position=logo_position, footer_text=footer_text)
+    if not layers:
+        return clip
+    return mp.CompositeVideoClip([clip] + layers)
 
-        zoomed_clip = clip.fl(lambda gf, t: make_frame(t))
-        zoomed_clip.size = clip.size
-        return zoomed_clip
-
-def create_transition_sequence(clips, transition_type=None, transition_duration=1.0):
+def apply_random_transition(clip, duration, direction=None, transition_type=None):
     """
-    Create a sequence of clips with transitions.
+    Apply either a fade or zoom-in transition effect to a video clip.
     """
-    if not clips:
-        logger.warning("No clips provided for transition sequence")
-        return []
-        
-    final_transition_type = transition_type or random.choice(['fade', 'zoom-in'])
-    logger.info("Using %s transitions", final_transition_type)
-    
-    final_clips = []
-    for i, clip in enumerate(clips):
-        current_clip = clip
-        if i > 0:  # Apply transition to all clips except the first one
-            current_clip = apply_random_transition(
-                current_clip,
-                transition_duration,
-                transition_type=final_transition_type
-            )
-        final_clips.append(current_clip)
-    
-    return final_clips
+    return apply_transition(clip, duration, transition_type or random.choice(RANDOM_TRANSITION_TYPES))
 
 ########################################################################
 # MAIN FUNCTION: create_video_with_images
@@ -253,7 +231,8 @@ def create_video_with_images(audio_path, config, resolution, job_id, request_dic
     
     This function:
       1. Loads the voice-over audio and splits it into segments (using config['voice_split_duration']).
-      2. For each segment, it transcribes the audio and generates an image from the text.
+      2. Takes each segment's text from the script's turn timings (or one transcription of external audio)
+         and generates an image for every segment concurrently.
       3. Creates image clips for each segment (placed at the appropriate start time).
       4. Applies transitions between the image clips.
       5. Composites the clips, overlays logo/footer, adds background music, and (optionally) speaker overlays.
@@ -269,6 +248,7 @@ def create_video_with_images(audio_path, config, resolution, job_id, request_dic
     Returns:
       The path to the final video file.
     """
+    final_clips = []
     try:
         # Create temporary output file path
         # let us get the output path from the file writer
@@ -284,46 +264,57 @@ def create_video_with_images(audio_path, config, resolution, job_id, request_dic
         voiceover_audio = mp.AudioFileClip(audio_path)
         total_duration = voiceover_audio.duration
         voice_split_duration = config.get('voice_split_duration', 30)
-        num_splits = int(total_duration // voice_split_duration)
-        if total_duration % voice_split_duration > 0:
-            num_splits += 1
-        logger.info("Total voice-over duration: %.2fs in %d segments", total_duration, num_splits)
-        
+        bounds = split_segments(total_duration, voice_split_duration)
+        logger.info("Total voice-over duration: %.2fs in %d segments", total_duration, len(bounds))
+
+        # Segment text comes from the script's turn timings when the audio is our own
+        # mix; other audio is transcribed once and split at the segment boundaries
+        transcript = load_turn_timings(config.get('context'), audio_path, total_duration)
+        if transcript is not None:
+            logger.info("Using script turn timings for segment text")
+        else:
+            transcript = transcribe_audio_with_timestamps(audio_path)
+            if transcript is None:
+                logger.warning("Transcription failed, using placeholder segment text")
+                transcript = []
+        texts = [text or f"Segment {i+1}" for i, text in enumerate(segment_texts(transcript, bounds))]
+
+        context = config.get('context')
+        context_data = ""
+        if context and os.path.exists(context):
+            with open(context, 'r') as f:
+                context_data = f.read()[:2000]
+        topic = config.get('topic')
+
         # Generate an image for each audio segment
-        for i in range(num_splits):
-            start_time = i * voice_split_duration
-            end_time = min((i + 1) * voice_split_duration, total_duration)
-            segment_duration = end_time - start_time
-            logger.info("Processing segment %d: %.2fs to %.2fs", i+1, start_time, end_time)
-            segment_audio = voiceover_audio.subclip(start_time, end_time)
-            text = transcribe_audio_segment(segment_audio)
-            if not text:
-                text = f"Segment {i+1}"
-            logger.info("Transcribed text: %s", text)
-            context = config.get('context')
-            context_data = ""
-            if context and os.path.exists(context):
-                with open(context, 'r') as f:
-                    context_data = f.read()[:2000]
-            topic = config.get('topic')
-            image_path = generate_image_from_text(context_data, topic, text, resolution)
-            img_clip = mp.ImageClip(image_path, duration=segment_duration).set_start(start_time)
+        pipeline = SegmentImagePipeline(
+            create_prompt=lambda text: create_image_prompt(context_data, topic, text),
+            generate_image=generate_getimage_and_save_image,
+            fallback_image=lambda text, path: create_fallback_image(text, resolution, path),
+            image_size=GETIMAGE_SIZE,
+            cache=get_image_cache_from_env()
+        )
+        image_paths = pipeline.prepare_images(texts)
+        for (start_time, end_time), image_path in zip(bounds, image_paths):
+            img_clip = mp.ImageClip(image_path, duration=end_time - start_time).set_start(start_time)
             image_clips.append(img_clip)
         
         logger.info("Applying transitions...")
-        final_clips = create_transition_sequence(image_clips, transition_type=config.get('transition_type'), transition_duration=config.get('transition_duration', 1.0))
+        final_clips = create_transition_sequence(image_clips, transition_type=config.get('transition_type'), transition_duration=config.get('transition_duration', 1.0), fps=config.get('fps') or 30, work_dir=output_dir)
         
-        logger.info("Compositing video clips...")
-        base_video = mp.CompositeVideoClip(final_clips, size=resolution).set_duration(total_duration)
+        # Image clips, logo, footer and speaker overlays are composited in a single
+        # pass so the static ones are flattened once instead of blitted every frame
+        layers = list(final_clips)
         logo_path = config.get('logo_settings_main_logo_path') or config.get('logo_path')
         logo_position = config.get('logo_settings_logo_position') or config.get('logo_position', 'top-right')
-        base_video = add_logo_and_footer(
-            base_video, 
+        layers.extend(logo_and_footer_layers(
+            resolution,
+            total_duration,
             logo_path=logo_path,
             logo_size=config.get('logo_size', (100, 100)),
             logo_position=logo_position,
             footer_text=config.get('footer_text')
-        )
+        ))
         
         logger.info("Processing background music...")
         bg_music_clip = mp.AudioFileClip(config['background_music_path']).volumex(config.get('bg_music_volume', 0.1))
@@ -333,7 +324,6 @@ def create_video_with_images(audio_path, config, resolution, job_id, request_dic
             bg_music_clip = bg_music_clip.subclip(0, total_duration)
         logger.info("Combining audio tracks...")
         final_audio = mp.CompositeAudioClip([bg_music_clip, voiceover_audio])
-        base_video = base_video.set_audio(final_audio)
         
         # --- Add speaker overlays if requested and provided ---
         if show_speakers and (config.get('speaker1_video_path') or config.get('speaker2_video_path')):
@@ -357,11 +347,8 @@ def create_video_with_images(audio_path, config, resolution, job_id, request_dic
                 if ext in valid_image_exts:
                     clip = mp.ImageClip(path).set_duration(duration)
                 elif ext in valid_video_exts:
-                    clip = mp.VideoFileClip(path)
-                    if clip.duration < duration:
-                        clip = clip.loop(duration=duration)
-                    else:
-                        clip = clip.subclip(0, duration)
+                    # Looped, resized and cut to the circle once; later jobs reuse the rendition
+                    return load_looped_video(path, duration, (size, size), mask_shape="circle").set_position(position)
                 else:
                     raise ValueError(f"Speaker clip '{path}' has invalid extension '{ext}'.")
                 return clip.resize((size, size)).set_mask(mask).set_position(position).set_duration(duration)
@@ -453,11 +440,19 @@ def create_video_with_images(audio_path, config, resolution, job_id, request_dic
                         align='center'
                     ).set_position((speaker_x, name_y)).set_duration(total_duration)
                     speaker_overlays.append(name_clip)
-            base_video = mp.CompositeVideoClip([base_video] + speaker_overlays, size=resolution)
+            layers.extend(speaker_overlays)
+            looped_asset_cache = get_looped_asset_cache_from_env()
+            if looped_asset_cache:
+                looped_asset_cache.log_stats()
+        
+        logger.info("Compositing video clips...")
+        base_video = composite_layers(layers, size=resolution).set_duration(total_duration).set_audio(final_audio)
         
         logger.info("Writing final video to %s", output_path)
-        base_video.write_videofile(output_path, codec=config.get('codec'), audio_codec=config.get('audio_codec'), fps=config.get('fps'))
+        base_video.write_videofile(output_path, fps=config.get('fps'),
+                                   **resolve_encoder_profile("main", config).write_videofile_kwargs(config.get('fps')))
         logger.info("Video creation complete.")
+        report_transition_timings(final_clips)
         
         # (Optional) Clean up temporary image files if needed...
         return output_path
@@ -465,3 +460,5 @@ def create_video_with_images(audio_path, config, resolution, job_id, request_dic
         logger.error("Error creating video: %s", e)
         traceback.print_exc()
         return None
+    finally:
+        remove_rendered_transitions(final_clips)
@@ -2,6 +2,7 @@ import os
 import logging
 import subprocess
 from moviepy.editor import VideoFileClip, concatenate_videoclips
+from video_creator.utils.encoder_profiles import get_encoder_profile, resolve_encoder_profile
 
 def setup_simple_logger():
     """Set up basic logging configuration"""
@@ -18,14 +19,10 @@ def preprocess_video_for_compatibility(
     source_video: str, 
     target_duration: float = None, 
     output_path: str = None,
-    video_codec: str = "libx264",
-    audio_codec: str = "aac",
     fps: int = 30,
-    threads: int = 4,
-    preset: str = "medium",
-    video_bitrate: str = "1000k",
     width: int = 1920,
-    height: int = 1080
+    height: int = 1080,
+    encoder_profile: str = None
 ) -> str:
     """
     Pre-process a video to make it compatible with MoviePy and ensure it meets the target duration.
@@ -34,14 +31,10 @@ def preprocess_video_for_compatibility(
         source_video (str): Path to the source video file
         target_duration (float, optional): Desired duration in seconds. If None, keeps original duration
         output_path (str, optional): Path for the output video. If None, creates one based on source
-        video_codec (str): Video codec to use (default: libx264)
-        audio_codec (str): Audio codec to use (default: aac)
         fps (int): Frames per second (default: 30)
-        threads (int): Number of threads to use (default: 4)
-        preset (str): FFmpeg preset (default: medium)
-        video_bitrate (str): Video bitrate (default: 1000k)
         width (int): Output video width (default: 1920)
         height (int): Output video height (default: 1080)
+        encoder_profile (str, optional): Encoder profile name. If None, uses the preprocess output's profile
         
     Returns:
         str: Path to the processed video file
@@ -57,15 +50,13 @@ def preprocess_video_for_compatibility(
         logger.info(f"Target duration: {target_duration if target_duration else 'original'}")
         
         # Basic ffmpeg command with specified parameters
+        encoder = get_encoder_profile(encoder_profile) if encoder_profile else resolve_encoder_profile("preprocess")
         ffmpeg_cmd = [
             'ffmpeg', '-y',  # Overwrite output files
             '-i', source_video,
-            '-c:v', video_codec,
-            '-c:a', audio_codec,
+            *encoder.video_args(fps),
+            *encoder.audio_args(),
             '-r', str(fps),
-            '-threads', str(threads),
-            '-preset', preset,
-            '-b:v', video_bitrate,
             '-vf', f'scale={width}:{height}',
             '-pix_fmt', 'yuv420p',  # Widely compatible pixel format
             '-movflags', '+faststart',  # Enable fast start for web playback
@@ -110,12 +101,8 @@ def combine_videos_with_transitions(
     transition_duration: float = 1.0,
     fade_in_duration: float = 1.0,
     fade_out_duration: float = 1.0,
-    video_codec: str = "libx264",
-    audio_codec: str = "aac",
     fps: int = 30,
-    threads: int = 4,
-    preset: str = "medium",
-    video_bitrate: str = "1000k"
+    encoder_profile: str = None
 ) -> str:
     """
     Combine multiple videos with crossfade transitions and fade effects.
@@ -126,12 +113,8 @@ def combine_videos_with_transitions(
         transition_duration (float): Duration of crossfade between clips in seconds
         fade_in_duration (float): Duration of fade in effect at start in seconds
         fade_out_duration (float): Duration of fade out effect at end in seconds
-        video_codec (str): Video codec to use (default: libx264)
-        audio_codec (str): Audio codec to use (default: aac)
         fps (int): Frames per second (default: 30)
-        threads (int): Number of threads to use (default: 4)
-        preset (str): FFmpeg preset (default: medium)
-        video_bitrate (str): Video bitrate (default: 1000k)
+        encoder_profile (str, optional): Encoder profile name. If None, uses the preprocess output's profile
         
     Returns:
         str: Path to the combined video file
@@ -187,14 +170,11 @@ def combine_videos_with_transitions(
         final = final.fadein(fade_in_duration).fadeout(fade_out_duration)
         
         # Write the combined video
+        encoder = get_encoder_profile(encoder_profile) if encoder_profile else resolve_encoder_profile("preprocess")
         final.write_videofile(
             output_path,
-            codec=video_codec,
-            audio_codec=audio_codec,
             fps=fps,
-            threads=threads,
-            preset=preset,
-            bitrate=video_bitrate
+            **encoder.write_videofile_kwargs(fps)
         )
         
         logger.info(f"Successfully created combined video: {output_path}")
@@ -223,12 +203,8 @@ def create_looped_video_from_section(
     height: int = 1080,
     target_duration: float = 5.0,
     extract_seconds: float = 2.0,
-    video_codec: str = "libx264",
-    audio_codec: str = "aac",
     fps: int = 30,
-    threads: int = 4,
-    preset: str = "medium",
-    video_bitrate: str = "1000k"
+    encoder_profile: str = None
 ) -> str:
     """
     Extract first N seconds from video and loop it to reach target duration.
@@ -241,12 +217,8 @@ def create_looped_video_from_section(
         height (int): Target height for output video
         target_duration (float): Desired duration in seconds for final video
         extract_seconds (float): Number of seconds to extract from start of video
-        video_codec (str): Video codec to use (default: libx264)
-        audio_codec (str): Audio codec to use (default: aac)
         fps (int): Frames per second (default: 30)
-        threads (int): Number of threads to use (default: 4)
-        preset (str): FFmpeg preset (default: medium)
-        video_bitrate (str): Video bitrate (default: 1000k)
+        encoder_profile (str, optional): Encoder profile name. If None, uses the preprocess output's profile
         
     Returns:
         str: Path to the processed video file
@@ -271,6 +243,7 @@ def create_looped_video_from_section(
         loop_count = int(target_duration / extract_seconds) + 1
             
         # Create FFmpeg command - note stream_loop before input file
+        encoder = get_encoder_profile(encoder_profile) if encoder_profile else resolve_encoder_profile("preprocess")
         ffmpeg_cmd = [
             'ffmpeg', '-y',
             '-stream_loop', str(loop_count),  # Number of times to loop - MUST be before input
@@ -279,12 +252,9 @@ def create_looped_video_from_section(
             '-filter_complex', f'[0:v]scale={width}:{height}[v];[0:a]volume=1[a]',
             '-map', '[v]',
             '-map', '[a]',
-            '-c:v', video_codec,
-            '-c:a', audio_codec,
+            *encoder.video_args(fps),
+            *encoder.audio_args(),
             '-r', str(fps),
-            '-threads', str(threads),
-            '-preset', preset,
-            '-b:v', video_bitrate,
             '-pix_fmt', 'yuv420p',
             output_path
         ]
@@ -319,12 +289,7 @@ if __name__ == "__main__":
         processed_video = preprocess_video_for_compatibility(
             source_video=source_video,
             target_duration=5.0,
-            video_codec="libx264",
-            audio_codec="aac",
             fps=30,
-            threads=4,
-            preset="medium",
-            video_bitrate="1000k",
             width=1920,
             height=1080
         )